@@ -13,14 +13,17 @@ import tempfile
 import subprocess
 import uuid
 import shutil
+import threading
+from concurrent.futures import Future
 from pathlib import Path
-from flask import Flask, request, render_template_string, send_file, redirect, url_for, flash, send_from_directory
+from flask import Flask, request, render_template, send_file, redirect, url_for, flash, send_from_directory, abort, make_response, jsonify, Response, g, session, has_request_context
 from werkzeug.utils import secure_filename
 import zipfile
 import io
 from datetime import datetime
 from dotenv import load_dotenv
 import re
+import sqlite3
 
 # Import utils functions
 from utils import (
@@ -31,12 +34,30 @@ from utils import (
 # Import modules for Wiki.js and export functionality
 import wikijs
 import export
+import process_runner
+import assets
+import chunked_upload
+import events
+import native_convert
+import page_split
+import libreoffice
+import stage_timing
+import job_queue
+import job_journal
+import scheduler
+import similarity
+import spreadsheet
+import pdf_extract
+import wiki_mirror
 
 # Lade Umgebungsvariablen
 load_dotenv()
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
-app.secret_key = os.urandom(24)
+# Alle Worker-Prozesse müssen denselben Schlüssel verwenden, sonst gehen Flash-Nachrichten verloren
+app.secret_key = os.getenv('SECRET_KEY') or os.urandom(24)
+# Maximale Größe einer Anfrage (Uploads) in MB
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 512)) * 1024 * 1024
 
 # Konfiguration
 UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'doc_converter_uploads')
@@ -44,15 +65,116 @@ RESULT_FOLDER = os.path.join(tempfile.gettempdir(), 'doc_converter_results')
 ALLOWED_EXTENSIONS = {
     'doc', 'docx', 'odt', 'rtf', 'tex', 'html', 'htm', 'epub',
     'ppt', 'pptx', 'odp',
+    'xls', 'xlsx', 'ods', 'csv', 'pdf',
     'rst', 'textile', 'wiki', 'dbk', 'xml', 'adoc', 'asciidoc', 'org'
 }
 
+# Chunked Upload: maximale Dateigröße
+CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_MB', 8)) * 1024 * 1024
+MAX_FILE_SIZE = int(os.getenv('MAX_FILE_MB', 2048)) * 1024 * 1024
+# Ab dieser Gesamtgröße lädt die Startseite die Dateien in Teilen hoch
+app.config['UPLOAD_CHUNK_SIZE'] = CHUNK_SIZE
+
+# Live-Fortschritt (SSE): jeder offene Stream belegt einen Gunicorn-Thread (WEB_THREADS in
+# gunicorn.conf.py), deshalb bleibt standardmäßig die Hälfte der Threads für normale Anfragen frei
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', max(1, int(os.getenv('WEB_THREADS', 4)) // 2)))
+events.limit_streams(SSE_MAX_STREAMS)
+
+# Konvertierungen pro Worker-Prozess: faire Verteilung nach Benutzer, Überholspur für kleine Dateien
+conversion_scheduler = scheduler.FairScheduler(
+    workers=int(os.getenv('UPLOAD_CONVERT_WORKERS', scheduler.DEFAULT_WORKERS)),
+    fast_workers=int(os.getenv('FAST_LANE_WORKERS', scheduler.DEFAULT_FAST_WORKERS)),
+    fast_lane_bytes=int(os.getenv('FAST_LANE_KB', scheduler.DEFAULT_FAST_LANE_BYTES // 1024)) * 1024,
+    fast_lane_pages=int(os.getenv('FAST_LANE_PAGES', scheduler.DEFAULT_FAST_LANE_PAGES)),
+    max_in_flight=int(os.getenv('MAX_CONVERSIONS_PER_USER', scheduler.DEFAULT_MAX_IN_FLIGHT)),
+    max_queued=int(os.getenv('MAX_QUEUED_CONVERSIONS', scheduler.DEFAULT_MAX_QUEUED))
+)
+
 # Wiki.js Konfiguration
 WIKIJS_URL = os.getenv('WIKIJS_URL')
 WIKIJS_EXTERNAL_URL = os.getenv('WIKIJS_EXTERNAL_URL')
 WIKIJS_TOKEN = os.getenv('WIKIJS_TOKEN')
 
-# Format-Mapping für Pandoc
+# Export-Pipeline Konfiguration (Abruf -> Konvertierung -> ZIP)
+EXPORT_FETCH_WORKERS = int(os.getenv('EXPORT_FETCH_WORKERS', export.DEFAULT_FETCH_WORKERS))
+EXPORT_CONVERT_WORKERS = int(os.getenv('EXPORT_CONVERT_WORKERS', export.DEFAULT_CONVERT_WORKERS))
+EXPORT_QUEUE_SIZE = int(os.getenv('EXPORT_QUEUE_SIZE', export.DEFAULT_QUEUE_SIZE))
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', export.DEFAULT_BATCH_SIZE))
+PDF_ENGINE = export.resolve_pdf_engine(os.getenv('PDF_ENGINE', export.DEFAULT_PDF_ENGINE))
+
+# Gültigkeit des gemeinsamen Seitenindexes (Pfad -> Seiten-ID) in Sekunden
+wikijs.configure_page_index(ttl=int(os.getenv('PAGE_INDEX_TTL', wikijs.PAGE_INDEX_TTL)))
+
+# Größe des Caches für Wiki.js-Seiteninhalte in MB (0 = deaktiviert)
+wikijs.page_content_cache.resize(int(os.getenv('PAGE_CACHE_MB', 64)) * 1024 * 1024)
+
+# Verbindungstest zu Wiki.js: Cache-Dauer und Pause nach wiederholten Fehlern
+wikijs.configure_health_check(
+    cache_ttl=int(os.getenv('WIKIJS_HEALTH_TTL', wikijs.HEALTH_CACHE_TTL)),
+    failure_threshold=int(os.getenv('WIKIJS_HEALTH_FAILURES', wikijs.HEALTH_FAILURE_THRESHOLD)),
+    open_seconds=int(os.getenv('WIKIJS_HEALTH_PAUSE', wikijs.HEALTH_OPEN_SECONDS))
+)
+
+# Adaptive Parallelität gegenüber Wiki.js: wächst bei stabiler Latenz, halbiert sich bei 429/5xx/Timeouts
+wikijs.configure_limiter(
+    initial=int(os.getenv('WIKIJS_CONCURRENCY_START', 4)),
+    min_limit=int(os.getenv('WIKIJS_CONCURRENCY_MIN', 1)),
+    max_limit=int(os.getenv('WIKIJS_CONCURRENCY_MAX', 32)),
+    tolerance=float(os.getenv('WIKIJS_LATENCY_TOLERANCE', 2.0)),
+    request_timeout=int(os.getenv('WIKIJS_REQUEST_TIMEOUT', wikijs.REQUEST_TIMEOUT))
+)
+
+# Ressourcenlimits für Pandoc-Konvertierungen
+process_runner.configure(
+    timeout=int(os.getenv('CONVERSION_TIMEOUT', process_runner.DEFAULT_TIMEOUT)),
+    memory_limit_mb=int(os.getenv('CONVERSION_MEMORY_LIMIT_MB', process_runner.DEFAULT_MEMORY_LIMIT_MB)),
+    cpu_limit=int(os.getenv('CONVERSION_CPU_LIMIT', process_runner.DEFAULT_CPU_LIMIT)),
+    max_heavy=int(os.getenv('MAX_HEAVY_CONVERSIONS', process_runner.DEFAULT_MAX_HEAVY)),
+    max_queue=int(os.getenv('MAX_CONVERSION_QUEUE', process_runner.DEFAULT_MAX_QUEUE)),
+    queue_timeout=int(os.getenv('CONVERSION_QUEUE_TIMEOUT', process_runner.DEFAULT_QUEUE_TIMEOUT))
+)
+
+# Vorkonvertierung alter .doc/.ppt-Dateien mit LibreOffice (Prozesse pro Worker-Prozess)
+libreoffice.configure(
+    binary=os.getenv('LIBREOFFICE_BINARY', 'soffice'),
+    workers=int(os.getenv('LIBREOFFICE_WORKERS', libreoffice.DEFAULT_WORKERS)),
+    timeout=int(os.getenv('LIBREOFFICE_TIMEOUT', libreoffice.DEFAULT_TIMEOUT)),
+    queue_timeout=int(os.getenv('LIBREOFFICE_QUEUE_TIMEOUT', libreoffice.DEFAULT_QUEUE_TIMEOUT))
+)
+
+# Zeitprofile pro Datei: optional als JSON Lines speichern, cProfile für einzelne Anfragen
+TIMING_LOG = os.getenv('TIMING_LOG') or None
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('true', '1', 'yes')
+PROFILE_DIR = os.getenv('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'doc_converter_profiles')
+
+# Verteilter Betrieb: Web-Knoten stellen Jobs in eine gemeinsame Warteschlange,
+# worker.py-Prozesse auf beliebigen Knoten führen sie aus (leer = alles lokal)
+QUEUE_URL = os.getenv('QUEUE_URL') or None
+JOB_WAIT_TIMEOUT = int(os.getenv('JOB_WAIT_TIMEOUT', 600))
+job_backend = None
+if QUEUE_URL:
+    job_backend = job_queue.create_backend(
+        QUEUE_URL, result_ttl=int(os.getenv('JOB_RESULT_TTL_HOURS', 24)) * 3600
+    )
+    events.configure(job_backend)
+
+# Aufteilen großer Dokumente in mehrere Wiki.js-Seiten
+SPLIT_LEVEL = int(os.getenv('SPLIT_LEVEL', 0))
+SPLIT_MIN_BYTES = int(os.getenv('SPLIT_MIN_KB', 256)) * 1024
+SPLIT_UPLOAD_WORKERS = int(os.getenv('SPLIT_UPLOAD_WORKERS', 4))
+
+# Kleine HTML-, RST- und Org-Dateien ohne Pandoc direkt in Python konvertieren
+NATIVE_CONVERSION = os.getenv('NATIVE_CONVERSION', 'true').lower() in ('true', '1', 'yes')
+NATIVE_MAX_BYTES = int(os.getenv('NATIVE_MAX_KB', native_convert.DEFAULT_MAX_BYTES // 1024)) * 1024
+
+# Tabellen (XLSX/ODS/CSV) werden zeilenweise gelesen; längere Blätter werden in Tabellen dieser Zeilenzahl aufgeteilt
+SPREADSHEET_PAGE_ROWS = int(os.getenv('SPREADSHEET_PAGE_ROWS', spreadsheet.DEFAULT_PAGE_ROWS))
+
+# Gleichzeitige pdftohtml-Prozesse (poppler-utils), jeder liest einen Seitenbereich
+PDF_PAGE_WORKERS = int(os.getenv('PDF_PAGE_WORKERS', pdf_extract.DEFAULT_WORKERS))
+
+# Format-Mapping für Pandoc (Formate mit Eintrag in native_convert.NATIVE_CONVERTERS
+# werden zuerst ohne Pandoc versucht)
 FORMAT_MAPPING = {
     'doc': 'docx',
     'docx': 'docx',
@@ -87,24 +209,83 @@ OUTPUT_FORMAT_MAPPING = {
     'pptx': 'pptx'
 }
 
-# HTML-Templates werden jetzt aus Dateien geladen
-def load_template(filename):
-    """Lädt ein Template aus einer Datei"""
-    template_path = os.path.join(app.template_folder, filename)
-    try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except Exception as e:
-        print(f"Fehler beim Laden des Templates {filename}: {e}")
-        return f"<h1>Fehler beim Laden des Templates {filename}</h1>"
+# Templates werden über Flask geladen; kompilierte Templates werden zwischengespeichert
+# und nur im Debug-Modus bei Änderungen neu geladen
+app.jinja_env.auto_reload = app.debug
+
+# Cache-Dauer für Favicon, Logo und andere nicht versionierte statische Dateien
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 86400))
+
+# CSS/JS-Bundles mit Fingerprint und vorkomprimierten Varianten
+assets.build_assets(app.static_folder)
+
+@app.template_global()
+def asset_url(name):
+    """Liefert die URL eines CSS/JS-Bundles mit Fingerprint im Dateinamen"""
+    fingerprinted = assets.fingerprinted_name(name)
+    if fingerprinted is None:
+        return url_for('static', filename=name)
+    return url_for('asset', filename=fingerprinted)
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Liefert ein Bundle (gzip/brotli je nach Accept-Encoding) mit langer Cache-Dauer"""
+    bundle = assets.get_asset(filename)
+    if bundle is None:
+        abort(404)
+
+    encoding = assets.choose_encoding(bundle, request.headers.get('Accept-Encoding'))
+    response = make_response(bundle[encoding])
+    response.mimetype = bundle['mimetype']
+    response.set_etag(f"{bundle['etag']}-{encoding}")
+    response.vary.add('Accept-Encoding')
+    if encoding != 'identity':
+        response.content_encoding = encoding
+    response.cache_control.public = True
+    response.cache_control.max_age = assets.ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+@app.before_request
+def start_request_profile():
+    """Startet cProfile für eine Anfrage mit ?profile=1 oder X-DocFlow-Profile: 1 (PROFILING_ENABLED)"""
+    if PROFILING_ENABLED and (request.args.get('profile') == '1' or request.headers.get('X-DocFlow-Profile') == '1'):
+        g.profiler = stage_timing.RequestProfiler(PROFILE_DIR, request.endpoint or 'request').start()
+        ids = g.profiler.ids
+        log_debug(f"Profiling für {request.path} (PID {ids['pid']}, Thread {ids['thread_id']})", "info")
+
+def profiled(func):
+    """Profiliert func in Scheduler- und Executor-Threads mit, wenn die laufende Anfrage profiliert wird"""
+    profiler = g.get('profiler') if has_request_context() else None
+    return profiler.profiled(func) if profiler is not None else func
+
+@app.after_request
+def write_request_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profile_path = profiler.stop()
+        response.headers['X-DocFlow-Profile-File'] = os.path.basename(profile_path)
+        log_debug(f"Profil gespeichert: {profile_path}", "info")
+    return response
+
+@app.after_request
+def add_static_cache_headers(response):
+    """Erlaubt Browsern, statische Dateien (Logo usw.) zwischenzuspeichern"""
+    if request.endpoint == 'static':
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+    return response
 
 # Favicon Route
 @app.route('/favicon.ico')
 def favicon():
+    # send_from_directory setzt ETag/Last-Modified und beantwortet bedingte Anfragen mit 304
     return send_from_directory(
         os.path.join(app.root_path, 'static'),
         'favicon.ico',
-        mimetype='image/x-icon'
+        mimetype='image/x-icon',
+        max_age=STATIC_MAX_AGE
     )
 
 def get_input_format(filename):
@@ -112,59 +293,574 @@ def get_input_format(filename):
     ext = filename.rsplit('.', 1)[1].lower()
     return FORMAT_MAPPING.get(ext, 'docx')
 
-# Globale Variable für Debug-Logs
-debug_logs = []
+class DebugLog:
+    """
+    Sammelt die Debug-Nachrichten einer einzelnen Anfrage.
+
+    Jede Anfrage erhält ein eigenes Objekt, damit sich parallele Anfragen
+    (mehrere Threads oder Worker-Prozesse) nicht gegenseitig die Logs
+    überschreiben. Das Objekt ist aufrufbar und wird als debug_logger an
+    die Module wikijs und export übergeben.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def __call__(self, message, log_type='info'):
+        """Fügt eine Debug-Nachricht zum Log hinzu"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with self._lock:
+            self.entries.append({
+                'time': timestamp,
+                'message': message,
+                'type': log_type
+            })
+        print(f"[{timestamp}] {log_type.upper()}: {message}")
+
+class SessionLog(DebugLog):
+    """
+    Debug-Log, das zusätzlich jede Nachricht und jeden Dateistatus in das
+    Ereignisprotokoll der Sitzung schreibt, damit der Browser den Fortschritt
+    live über /events/<session_id> verfolgen kann.
+    """
+
+    def __init__(self, session_id):
+        super().__init__()
+        self.session_id = session_id
+
+    def __call__(self, message, log_type='info'):
+        super().__call__(message, log_type)
+        events.emit(UPLOAD_FOLDER, self.session_id, 'log', {'message': message, 'type': log_type})
+
+    def file_state(self, filename, state, **details):
+        """Meldet einen Statuswechsel einer Datei (queued, converting, converted, uploading, uploaded, failed)"""
+        events.emit(UPLOAD_FOLDER, self.session_id, 'file', dict(details, filename=filename, state=state))
+
+    def done(self, **summary):
+        """Meldet das Ende der Verarbeitung"""
+        events.emit(UPLOAD_FOLDER, self.session_id, 'done', summary)
 
 def log_debug(message, log_type='info'):
-    """Fügt eine Debug-Nachricht zum Log hinzu"""
+    """Gibt eine Debug-Nachricht außerhalb einer Anfrage aus"""
     timestamp = datetime.now().strftime("%H:%M:%S")
-    debug_logs.append({
-        'time': timestamp,
-        'message': message,
-        'type': log_type
-    })
     print(f"[{timestamp}] {log_type.upper()}: {message}")
 
-def convert_to_markdown(input_path, output_path):
-    """Konvertiert eine Datei in Markdown mithilfe von pandoc"""
+# Lokaler Spiegel der Wiki.js-Seiten (SQLite/FTS5) für Seitenlisten, Inhalte und Suche (leer = aus).
+# Gleicht per Polling nur geänderte Seiten (updatedAt) ab; mehrere Prozesse teilen sich die Datei.
+WIKI_MIRROR_DB = os.getenv('WIKI_MIRROR_DB') or None
+page_mirror = None
+if WIKI_MIRROR_DB and WIKIJS_URL and WIKIJS_TOKEN:
+    page_mirror = wiki_mirror.WikiMirror(
+        WIKI_MIRROR_DB, WIKIJS_URL, WIKIJS_TOKEN,
+        interval=int(os.getenv('WIKI_MIRROR_INTERVAL', wiki_mirror.DEFAULT_INTERVAL)),
+        debug_logger=log_debug
+    )
+
+# Ähnlichkeitsindex (MinHash/LSH, SQLite) gegen mehrfach hochgeladene, kaum veränderte Dokumente (leer = aus).
+# SIMILARITY_MODE: warn = Upload mit Hinweis, block = Upload ab SIMILARITY_THRESHOLD Prozent verweigern
+SIMILARITY_DB = os.getenv('SIMILARITY_DB') or None
+similarity_index = None
+if SIMILARITY_DB:
+    similarity_index = similarity.SimilarityIndex(
+        SIMILARITY_DB,
+        threshold=int(os.getenv('SIMILARITY_THRESHOLD', similarity.DEFAULT_THRESHOLD)),
+        mode=os.getenv('SIMILARITY_MODE', similarity.DEFAULT_MODE).lower(),
+        debug_logger=log_debug
+    )
+    wikijs.configure_similarity(similarity_index)
+    if page_mirror is not None:
+        # Vor dem Start des Spiegels registrieren, damit schon der erste Abgleich den Index füllt
+        page_mirror.add_listener(similarity_index.sync_from_mirror)
+
+if page_mirror is not None:
+    wikijs.configure_mirror(page_mirror)
+
+# Job-Journal (SQLite/WAL) für laufende Upload-Stapel und Exporte (leer = aus). Nach einem Neustart des Dienstes
+# oder dem Ende eines Worker-Prozesses werden unterbrochene Jobs ab dem letzten abgeschlossenen Schritt fortgesetzt.
+# Im verteilten Betrieb (QUEUE_URL) übernimmt das die gemeinsame Warteschlange.
+JOB_JOURNAL_DB = os.getenv('JOB_JOURNAL_DB') or None
+batch_journal = None
+if JOB_JOURNAL_DB and job_backend is None:
+    batch_journal = job_journal.JobJournal(
+        JOB_JOURNAL_DB,
+        retention_hours=int(os.getenv('JOB_JOURNAL_RETENTION_HOURS', job_journal.DEFAULT_RETENTION_HOURS)),
+        debug_logger=log_debug
+    )
+
+# Ohne die UNO-Bindings startet LibreOffice für jede alte Office-Datei neu (mehrere Sekunden pro Datei)
+if libreoffice.is_available() and not libreoffice.has_uno():
+    log_debug("LibreOffice: Python-UNO-Bindings nicht gefunden, .doc/.ppt/.xls werden pro Datei mit soffice "
+              "konvertiert. Abhilfe: python3-uno installieren und das venv mit --system-site-packages anlegen.",
+              "warning")
+
+def find_duplicate_pages(contents):
+    """
+    Sucht im Ähnlichkeitsindex nach vorhandenen Seiten mit nahezu gleichem Inhalt
+
+    Args:
+        contents: Markdown-Texte, die hochgeladen werden sollen (mehrere bei aufgeteilten Dokumenten)
+
+    Returns:
+        list: Treffer (path, title, similarity in Prozent), ähnlichste zuerst
+    """
+    matches = {}
+    for content in contents:
+        for match in similarity_index.find_similar(clean_markdown_content(content)):
+            if match['similarity'] > matches.get(match['path'], {}).get('similarity', -1):
+                matches[match['path']] = match
+    return sorted(matches.values(), key=lambda match: -match['similarity'])
+
+def parse_split_level(value):
+    """Liest die Überschriftenebene zum Aufteilen (0 = nicht aufteilen)"""
+    try:
+        return min(max(int(value), 0), 6)
+    except (TypeError, ValueError):
+        return SPLIT_LEVEL
+
+def convert_to_markdown_text(input_path, timer=None):
+    """
+    Konvertiert eine Datei in Markdown und gibt den Text zurück
+
+    Einfache HTML-, RST- und Org-Dateien werden direkt in Python konvertiert;
+    enthalten sie Konstrukte, die der native Konverter nicht kennt, übernimmt Pandoc.
+    Pandoc schreibt das Markdown auf stdout, es entsteht keine Zwischendatei.
+    Tabellen (XLSX/ODS/CSV) liest das Modul spreadsheet zeilenweise ohne Pandoc.
+    PDF-Dateien werden in Seitenbereichen parallel mit pdftohtml gelesen; die Dauer
+    jedes Bereichs wird als verschachtelte Stufe in timer (StageTimer) festgehalten.
+    Alte .doc-, .ppt- und .xls-Dateien wandelt LibreOffice vorher in .docx/.pptx/.xlsx um.
+
+    Returns:
+        tuple: (markdown, error_message); markdown ist None bei einem Fehler
+    """
+    if libreoffice.needs_preconversion(input_path):
+        if not libreoffice.is_available():
+            print(f"LibreOffice nicht installiert, {input_path} kann nicht konvertiert werden")
+            return None, "LibreOffice ist nicht installiert, alte .doc/.ppt/.xls-Dateien können nicht konvertiert werden"
+
+        preconvert_dir = tempfile.mkdtemp(prefix='.preconvert-', dir=os.path.dirname(input_path))
+        try:
+            try:
+                converted_path = libreoffice.preconvert(input_path, preconvert_dir)
+            except (process_runner.ConversionTimeout, process_runner.ConversionRejected) as e:
+                print(f"Vorkonvertierung von {input_path} mit LibreOffice fehlgeschlagen: {e}")
+                return None, str(e)
+            except (RuntimeError, subprocess.CalledProcessError, OSError) as e:
+                print(f"Vorkonvertierung von {input_path} mit LibreOffice fehlgeschlagen: {e}")
+                return None, "Vorkonvertierung mit LibreOffice fehlgeschlagen"
+            return convert_to_markdown_text(converted_path, timer=timer)
+        finally:
+            shutil.rmtree(preconvert_dir, ignore_errors=True)
+
+    if spreadsheet.is_spreadsheet(input_path):
+        try:
+            return spreadsheet.convert(input_path, SPREADSHEET_PAGE_ROWS), None
+        except (spreadsheet.UnreadableSpreadsheet, ValueError, OSError) as e:
+            print(f"Tabelle {input_path} konnte nicht gelesen werden: {e}")
+            return None, "Tabelle konnte nicht gelesen werden"
+
+    if pdf_extract.is_pdf(input_path):
+        if not pdf_extract.is_available():
+            print(f"poppler-utils nicht installiert, {input_path} kann nicht konvertiert werden")
+            return None, "poppler-utils (pdftohtml) ist nicht installiert, PDF-Dateien können nicht konvertiert werden"
+        try:
+            markdown = clean_markdown_content(pdf_extract.convert(input_path, PDF_PAGE_WORKERS, timer=timer))
+        except (process_runner.ConversionTimeout, process_runner.ConversionRejected) as e:
+            print(f"Konvertierung von {input_path} abgebrochen: {e}")
+            return None, str(e)
+        except (pdf_extract.PdfError, OSError) as e:
+            print(f"PDF {input_path} konnte nicht gelesen werden: {e}")
+            return None, "PDF konnte nicht gelesen werden"
+        if not markdown:
+            return None, "Das PDF enthält keinen Text (eingescanntes Dokument?)"
+        return markdown + "\n", None
+
     input_format = get_input_format(input_path)
 
-    # Create directory if it doesn't exist
-    output_dir = os.path.dirname(output_path)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    if NATIVE_CONVERSION:
+        markdown = native_convert.try_convert(input_path, input_format, NATIVE_MAX_BYTES)
+        if markdown is not None:
+            return markdown, None
 
     try:
-        subprocess.run([
+        # Die Eingabe liegt als Upload bereits auf der Platte (DOCX/PPTX/ODT sind ZIP-Archive
+        # und brauchen ohnehin eine Datei), die Ausgabe kommt über stdout zurück
+        completed = process_runner.run([
             'pandoc',
             input_path,
             '-f', input_format,
-            '-t', 'markdown',
-            '-o', output_path
-        ], check=True)
-        return True
+            '-t', 'markdown'
+        ], heavy=process_runner.is_heavy_input(input_path), encoding='utf-8', errors='replace')
+        return completed.stdout, None
+    except process_runner.ConversionTimeout as e:
+        print(f"Zeitüberschreitung bei der Konvertierung von {input_path}: {e}")
+        return None, str(e)
+    except process_runner.ConversionRejected as e:
+        print(f"Konvertierung von {input_path} abgelehnt: {e}")
+        return None, str(e)
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
         print(f"Fehler bei der Konvertierung von {input_path}: {e}")
-        return False
+        return None, "Konvertierung fehlgeschlagen"
 
-def process_uploads(files, session_id, upload_to_wiki=False, wiki_paths=None, wiki_titles=None, username=None, default_folder=None):
-    """Verarbeitet hochgeladene Dateien und konvertiert sie zu Markdown"""
-    global debug_logs
-    debug_logs = []  # Zurücksetzen der Debug-Logs für jede neue Sitzung
+def convert_to_markdown(input_path, output_path):
+    """
+    Konvertiert eine Datei in Markdown und speichert sie unter output_path
+
+    Returns:
+        tuple: (success, error_message)
+    """
+    markdown, error_message = convert_to_markdown_text(input_path)
+    if markdown is None:
+        return False, error_message
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(markdown)
+    return True, None
+
+def convert_and_upload_file(file_path, filename, session_id, upload_to_wiki=False, custom_path="", custom_title="",
+                            username=None, default_folder=None, debug_logger=None, on_state=None, split_level=0,
+                            timer=None, markdown=None, wiki_target=None):
+    """
+    Konvertiert eine gespeicherte Datei zu Markdown und lädt sie optional zu Wiki.js hoch
+
+    on_state wird bei jedem Statuswechsel mit (filename, state, **details) aufgerufen.
+    Mit split_level > 0 werden Dokumente ab SPLIT_MIN_KB an den Überschriften bis zu
+    dieser Ebene in eine Seitenhierarchie mit Inhaltsverzeichnis aufgeteilt.
+    Die Dauer jeder Verarbeitungsstufe wird in timer (StageTimer) festgehalten.
+
+    Beim Fortsetzen nach einem Neustart (Job-Journal) enthält markdown das bereits
+    konvertierte Dokument und wiki_target (Pfad, Titel) das Ziel eines begonnenen
+    Uploads; Seiten, die dort schon existieren, werden nicht erneut angelegt.
+
+    Returns:
+        dict: output_filename, converted, error, wiki_url, timings
+    """
+    log_debug = debug_logger or DebugLog()
+    report_state = on_state or (lambda *args, **kwargs: None)
+    timer = timer or stage_timing.StageTimer()
+
+    result_dir = os.path.join(RESULT_FOLDER, session_id)
+    os.makedirs(result_dir, exist_ok=True)
+
+    output_filename = os.path.splitext(filename)[0] + '.md'
+    output_path = os.path.join(result_dir, output_filename)
+    result = {'output_filename': output_filename, 'converted': False, 'error': None, 'wiki_url': None}
+
+    if markdown is not None:
+        # Die Konvertierung war vor dem Neustart abgeschlossen, die .md-Datei existiert bereits
+        content = markdown
+        log_debug(f"Verwende bereits konvertiertes Dokument: {output_filename}", "info")
+    else:
+        log_debug(f"Starte Konvertierung zu: {output_filename}")
+        report_state(filename, 'converting')
+        with timer.stage('convert', bytes_in=os.path.getsize(file_path)) as info:
+            content, error_message = convert_to_markdown_text(file_path, timer=timer)
+            if content is not None:
+                info['bytes_out'] = len(content.encode('utf-8'))
+        if content is None:
+            log_debug(f"Konvertierung fehlgeschlagen: {filename} ({error_message})", "error")
+            result['error'] = error_message
+            report_state(filename, 'failed', error=error_message)
+            return finish_timings(result, timer, session_id, filename)
+
+        # Die Datei dient nur dem Download auf der Ergebnisseite, der Upload nutzt den Text im Speicher
+        with timer.stage('write_markdown', bytes_in=info['bytes_out']):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        log_debug(f"Konvertierung erfolgreich: {output_filename}", "success")
+    result['converted'] = True
+    report_state(filename, 'converted', output_filename=output_filename)
+
+    if upload_to_wiki:
+        log_debug(f"Beginne Upload zu Wiki.js: {output_filename}", "api")
+        try:
+            log_debug(f"Markdown im Speicher: {len(content)} Zeichen", "api")
+
+            if wiki_target is None:
+                # Für Titel: Wenn ein benutzerdefinierter Titel vorhanden ist, verwende diesen,
+                # ansonsten verwende den bereinigten Dateinamen ohne Erweiterung
+                if not custom_title or custom_title.strip() == "":
+                    # Extrahiere den Dateinamen ohne Erweiterung
+                    base_title = os.path.splitext(filename)[0]
+                    # Sanitiere den Titel automatisch
+                    sanitized_title = sanitize_wikijs_title(base_title)
+                    custom_title = sanitized_title
+                    log_debug(f"Kein Titel angegeben, verwende automatisch sanitierten Dateinamen: '{sanitized_title}'", "info")
+
+                # Überprüfe, ob der Pfad oder Titel ungültige Zeichen enthält, bevor sie sanitiert werden
+                if custom_path and not sanitize_wikijs_path(custom_path) == custom_path:
+                    log_debug(f"Warnung: Benutzerdefinierter Pfad '{custom_path}' enthält ungültige Zeichen und wird sanitiert.", "warning")
+
+                if custom_title and not sanitize_wikijs_title(custom_title) == custom_title:
+                    log_debug(f"Warnung: Benutzerdefinierter Titel '{custom_title}' enthält ungültige Zeichen und wird sanitiert.", "warning")
+
+                log_debug(f"Benutzerdefinierter Pfad: {custom_path}", "info")
+                log_debug(f"Benutzerdefinierter Titel: {custom_title}", "info")
+
+                base_path, page_title = wikijs.resolve_page_path(
+                    output_filename,
+                    custom_path=custom_path,
+                    custom_title=custom_title,
+                    username=username,
+                    default_folder=default_folder,
+                    debug_logger=log_debug,
+                    sanitize_wikijs_path_fn=sanitize_wikijs_path,
+                    sanitize_wikijs_title_fn=sanitize_wikijs_title
+                )
+            else:
+                # Der Standardpfad enthält die Uhrzeit, daher wird das Ziel aus dem Journal übernommen
+                base_path, page_title = wiki_target
+                log_debug(f"Setze begonnenen Upload nach {base_path} fort", "info")
+
+            # Das Ziel wird vor dem Anlegen gemeldet (und im Job-Journal festgehalten)
+            report_state(filename, 'uploading', output_filename=output_filename, wiki_path=base_path,
+                         wiki_title=page_title)
+
+            pages = None
+            if split_level and len(content.encode('utf-8')) >= SPLIT_MIN_BYTES:
+                with timer.stage('split') as info:
+                    pages = page_split.split_markdown(
+                        content, split_level, base_path, page_title, sanitize_wikijs_path, sanitize_wikijs_title
+                    )
+                    info['pages'] = len(pages) if pages else 1
+                if not pages:
+                    log_debug(f"Keine Überschriften bis Ebene {split_level} gefunden, lade als eine Seite hoch", "info")
+
+            # Beim Fortsetzen: Seiten, die vor dem Abbruch noch angelegt wurden, nicht doppelt erstellen
+            existing = {}
+            if wiki_target is not None:
+                existing, _ = wikijs.get_page_index(WIKIJS_URL, WIKIJS_TOKEN, debug_logger=log_debug, refresh=True)
+                if pages:
+                    remaining = [page for page in pages if page['path'] not in existing]
+                    if len(remaining) < len(pages):
+                        log_debug(f"{len(pages) - len(remaining)} von {len(pages)} Seiten existieren bereits", "info")
+                    pages = remaining
+            resume_url = f"{WIKIJS_EXTERNAL_URL or WIKIJS_URL}/{base_path}"
+
+            if wiki_target is not None and (pages == [] or (pages is None and base_path in existing)):
+                log_debug(f"Seite {base_path} wurde bereits vor dem Neustart angelegt", "info")
+                success, wiki_url = True, resume_url
+            else:
+                if similarity_index is not None and similarity_index.mode != 'off':
+                    with timer.stage('similarity') as info:
+                        duplicates = find_duplicate_pages([page['content'] for page in pages] if pages else [content])
+                        info['matches'] = len(duplicates)
+                    if duplicates:
+                        result['duplicates'] = duplicates
+                        summary = ', '.join(f"{match['path']} ({match['similarity']} %)" for match in duplicates[:3])
+                        if similarity_index.mode == 'block':
+                            message = f"Nahezu identische Seite in Wiki.js vorhanden: {summary}"
+                            log_debug(f"Upload von {output_filename} abgebrochen. {message}", "error")
+                            result['error'] = message
+                            report_state(filename, 'failed', output_filename=output_filename, error=message)
+                            return finish_timings(result, timer, session_id, filename)
+                        log_debug(f"{output_filename} ähnelt vorhandenen Seiten: {summary}", "warning")
+
+                # Die Bereinigung läuft innerhalb des Uploads und wird als eigene (verschachtelte) Stufe gemessen
+                timed_clean = timer.wrap('clean', clean_markdown_content)
+                with timer.stage('wikijs_upload', bytes_in=len(content.encode('utf-8'))):
+                    if pages:
+                        log_debug(f"Dokument wird in {len(pages)} Seiten aufgeteilt (Überschriften bis Ebene {split_level})", "info")
+                        success, wiki_url, _ = wikijs.upload_pages(
+                            pages,
+                            WIKIJS_URL,
+                            WIKIJS_TOKEN,
+                            debug_logger=log_debug,
+                            external_url=WIKIJS_EXTERNAL_URL,
+                            clean_markdown_content_fn=timed_clean,
+                            max_workers=SPLIT_UPLOAD_WORKERS
+                        )
+                    else:
+                        # Der Pfad ist bereits aufgelöst, daher direkt anlegen
+                        if not WIKIJS_URL or not WIKIJS_TOKEN:
+                            raise ValueError("Wiki.js URL oder Token nicht konfiguriert")
+                        success, wiki_url = wikijs.create_page(
+                            content,
+                            page_title,
+                            base_path,
+                            WIKIJS_URL,
+                            WIKIJS_TOKEN,
+                            debug_logger=log_debug,
+                            external_url=WIKIJS_EXTERNAL_URL,
+                            clean_markdown_content_fn=timed_clean
+                        )
+                if success and wiki_target is not None:
+                    wiki_url = resume_url
+
+            if success:
+                result['wiki_url'] = wiki_url
+                log_debug(f"Wiki.js Upload erfolgreich: {wiki_url}", "success")
+                details = {}
+                if result.get('duplicates'):
+                    details['warning'] = "Ähnlich zu: " + ', '.join(
+                        f"{match['path']} ({match['similarity']} %)" for match in result['duplicates'][:3])
+                if existing.get(base_path, {}).get('id'):
+                    details['page_id'] = existing[base_path]['id']
+                report_state(filename, 'uploaded', output_filename=output_filename, wiki_url=wiki_url, **details)
+            else:
+                log_debug(f"Wiki.js Upload fehlgeschlagen für {output_filename}", "error")
+                report_state(filename, 'failed', output_filename=output_filename,
+                             error='Wiki.js Upload fehlgeschlagen')
+        except Exception as e:
+            log_debug(f"Fehler beim Hochladen von {output_filename}: {str(e)}", "error")
+            report_state(filename, 'failed', output_filename=output_filename, error=str(e))
+
+    return finish_timings(result, timer, session_id, filename)
+
+def finish_timings(result, timer, session_id, filename):
+    """Hängt das Zeitprofil an das Ergebnis an und schreibt es optional in TIMING_LOG"""
+    result['timings'] = timer.as_dict()
+    try:
+        stage_timing.write_jsonl(TIMING_LOG, 'upload', session_id, filename, result['timings'])
+    except OSError as e:
+        log_debug(f"Zeitprofil konnte nicht geschrieben werden: {e}", "warning")
+    return result
+
+def save_uploads(files, upload_dir, log_debug, timers=None):
+    """
+    Speichert die gültigen Dateien eines Formular-Uploads
+
+    Ist timers ein Dictionary, wird darin pro Datei ein StageTimer mit der Dauer
+    des Speicherns abgelegt.
+
+    Returns:
+        list: (index, filename, file_path) je gespeicherter Datei
+    """
+    saved = []
+    for i, file in enumerate(files):
+        if file and allowed_file(file.filename, ALLOWED_EXTENSIONS):
+            filename = secure_filename(file.filename)
+            log_debug(f"Verarbeite Datei: {filename}")
 
+            file_path = os.path.join(upload_dir, filename)
+            timer = stage_timing.StageTimer()
+            with timer.stage('save') as info:
+                file.save(file_path)
+                info['bytes_out'] = os.path.getsize(file_path)
+            if timers is not None:
+                timers[filename] = timer
+            log_debug(f"Datei gespeichert unter: {file_path}")
+            saved.append((i, filename, file_path))
+        else:
+            if not file:
+                log_debug("Leerer Datei-Eintrag übersprungen", "error")
+            else:
+                log_debug(f"Ungültiges Dateiformat: {file.filename}", "error")
+    return saved
+
+def schedule_saved_files(saved, session_id, upload_to_wiki=False, wiki_paths=None, wiki_titles=None, username=None,
+                         default_folder=None, debug_logger=None, on_state=None, split_level=0, timers=None,
+                         fair_key=None, resume=None):
+    """
+    Stellt die Konvertierung gespeicherter Dateien in den Fair-Share-Scheduler ein
+
+    fair_key bestimmt die Warteschlange (Benutzername, sonst die Client-Adresse).
+    Mit Job-Journal wird der Stapel vorher dort angelegt; resume enthält beim
+    Fortsetzen zusätzliche Argumente je Dateiname (markdown, wiki_target) und
+    der vorhandene Journal-Eintrag wird weiterverwendet.
+
+    Returns:
+        list: Future je Datei mit dem Ergebnis von convert_and_upload_file
+
+    Raises:
+        scheduler.SchedulerFull: Wenn die Warteschlange voll ist
+    """
+    wiki_paths = wiki_paths or {}
+    wiki_titles = wiki_titles or {}
+    timers = timers or {}
+
+    if batch_journal is not None:
+        if resume is None:
+            batch_journal.create(session_id, 'upload', {
+                'upload_to_wiki': upload_to_wiki,
+                'wiki_paths': wiki_paths,
+                'wiki_titles': wiki_titles,
+                'username': username,
+                'default_folder': default_folder,
+                'split_level': split_level,
+                'fair_key': fair_key,
+            }, [(i, filename) for i, filename, _ in saved], client=fair_key)
+        on_state = batch_journal.state_reporter(session_id, on_state)
+
+    items = []
+    for i, filename, file_path in saved:
+        items.append((file_path, profiled(convert_and_upload_file), (file_path, filename, session_id, upload_to_wiki), {
+            'custom_path': wiki_paths.get(f"path_{i}", ""),
+            'custom_title': wiki_titles.get(f"title_{i}", ""),
+            'username': username,
+            'default_folder': default_folder,
+            'debug_logger': debug_logger,
+            'on_state': on_state,
+            'split_level': split_level,
+            'timer': timers.get(filename),
+            **(resume or {}).get(filename, {}),
+        }))
+    try:
+        return conversion_scheduler.submit_batch(fair_key or username or 'anonymous', items)
+    except scheduler.SchedulerFull:
+        if batch_journal is not None and resume is None:
+            batch_journal.discard(session_id)
+        raise
+
+def collect_results(saved, futures, log_debug):
+    """
+    Wartet auf die Konvertierungen aus schedule_saved_files
+
+    Returns:
+        tuple: (converted_files, failed_files, wiki_urls, timings)
+    """
+    converted_files = []
+    failed_files = {}
+    wiki_urls = {}
+    timings = {}
+
+    for (i, filename, file_path), future in zip(saved, futures):
+        try:
+            result = future.result()
+        except Exception as e:
+            log_debug(f"Unerwarteter Fehler bei der Verarbeitung von {filename}: {str(e)}", "error")
+            failed_files[filename] = str(e)
+            continue
+        timings[filename] = result['timings']
+
+        if result['converted']:
+            converted_files.append(result['output_filename'])
+            if result['wiki_url']:
+                wiki_urls[result['output_filename']] = result['wiki_url']
+        else:
+            failed_files[filename] = result['error']
+
+    log_debug(f"Verarbeitung abgeschlossen: {len(converted_files)} konvertiert, {len(failed_files)} fehlgeschlagen")
+    return converted_files, failed_files, wiki_urls, timings
+
+def process_saved_files(saved, session_id, upload_to_wiki=False, wiki_paths=None, wiki_titles=None, username=None,
+                        default_folder=None, debug_logger=None, on_state=None, split_level=0, timers=None,
+                        fair_key=None):
+    """
+    Konvertiert bereits gespeicherte Dateien und lädt sie optional zu Wiki.js hoch
+
+    timers enthält die StageTimer aus save_uploads, damit das Speichern im Profil enthalten ist.
+
+    Returns:
+        tuple: (converted_files, failed_files, wiki_urls, timings)
+    """
+    log_debug = debug_logger or DebugLog()
+    futures = schedule_saved_files(saved, session_id, upload_to_wiki, wiki_paths, wiki_titles, username,
+                                   default_folder, log_debug, on_state, split_level, timers, fair_key)
+    converted_files, failed_files, wiki_urls, timings = collect_results(saved, futures, log_debug)
+    finish_journaled_batch(session_id, converted_files, failed_files, wiki_urls)
+    return converted_files, failed_files, wiki_urls, timings
+
+def prepare_session(session_id, upload_to_wiki, username, wiki_titles, log_debug):
+    """Legt die Verzeichnisse einer Sitzung an und protokolliert die Einstellungen"""
     upload_dir = os.path.join(UPLOAD_FOLDER, session_id)
     result_dir = os.path.join(RESULT_FOLDER, session_id)
 
     log_debug(f"Neue Upload-Verarbeitung gestartet. Session ID: {session_id}")
     log_debug(f"Benutzer: {username or 'Nicht angegeben'}")
     log_debug(f"Wiki.js-Upload aktiviert: {'Ja' if upload_to_wiki else 'Nein'}")
-
-    # Sicherstellen, dass wiki_paths und wiki_titles Dictionaries sind
-    if wiki_paths is None:
-        wiki_paths = {}
-    if wiki_titles is None:
-        wiki_titles = {}
-
     log_debug(f"Wiki Titel: {wiki_titles}", "info")
 
     # Create directories if they don't exist
@@ -175,99 +871,182 @@ def process_uploads(files, session_id, upload_to_wiki=False, wiki_paths=None, wi
         os.makedirs(result_dir)
         log_debug(f"Ergebnis-Verzeichnis erstellt: {result_dir}")
 
-    converted_files = []
-    failed_files = []
-    wiki_urls = {}
-
-    log_debug(f"{len(files)} Datei(en) für die Verarbeitung empfangen")
+    return upload_dir
 
-    for i, file in enumerate(files):
-        if file and allowed_file(file.filename, ALLOWED_EXTENSIONS):
-            filename = secure_filename(file.filename)
-            log_debug(f"Verarbeite Datei: {filename}")
+def process_uploads(files, session_id, upload_to_wiki=False, wiki_paths=None, wiki_titles=None, username=None,
+                    default_folder=None, debug_logger=None, split_level=0, fair_key=None):
+    """Verarbeitet hochgeladene Dateien und konvertiert sie zu Markdown"""
+    log_debug = debug_logger or DebugLog()
 
-            file_path = os.path.join(upload_dir, filename)
-            file.save(file_path)
-            log_debug(f"Datei gespeichert unter: {file_path}")
+    # Sicherstellen, dass wiki_paths und wiki_titles Dictionaries sind
+    if wiki_paths is None:
+        wiki_paths = {}
+    if wiki_titles is None:
+        wiki_titles = {}
 
-            output_filename = os.path.splitext(filename)[0] + '.md'
-            output_path = os.path.join(result_dir, output_filename)
-
-            log_debug(f"Starte Konvertierung zu: {output_filename}")
-            if convert_to_markdown(file_path, output_path):
-                log_debug(f"Konvertierung erfolgreich: {output_filename}", "success")
-                converted_files.append(output_filename)
-
-                if upload_to_wiki:
-                    log_debug(f"Beginne Upload zu Wiki.js: {output_filename}", "api")
-                    try:
-                        with open(output_path, 'r', encoding='utf-8') as md_file:
-                            content = md_file.read()
-                            log_debug(f"Markdown-Datei gelesen: {len(content)} Zeichen", "api")
-
-                            # Hole benutzerdefinierte Pfad und Titel für diese Datei
-                            custom_path = wiki_paths.get(f"path_{i}", "")
-                            custom_title = wiki_titles.get(f"title_{i}", "")
-
-                            # Für Titel: Wenn ein benutzerdefinierter Titel vorhanden ist, verwende diesen,
-                            # ansonsten verwende den bereinigten Dateinamen ohne Erweiterung
-                            if not custom_title or custom_title.strip() == "":
-                                # Extrahiere den Dateinamen ohne Erweiterung
-                                base_title = os.path.splitext(filename)[0]
-                                # Sanitiere den Titel automatisch
-                                sanitized_title = sanitize_wikijs_title(base_title)
-                                custom_title = sanitized_title
-                                log_debug(f"Kein Titel angegeben, verwende automatisch sanitierten Dateinamen: '{sanitized_title}'", "info")
-
-                            # Überprüfe, ob der Pfad oder Titel ungültige Zeichen enthält, bevor sie sanitiert werden
-                            if custom_path and not sanitize_wikijs_path(custom_path) == custom_path:
-                                log_debug(f"Warnung: Benutzerdefinierter Pfad '{custom_path}' enthält ungültige Zeichen und wird sanitiert.", "warning")
-
-                            if custom_title and not sanitize_wikijs_title(custom_title) == custom_title:
-                                log_debug(f"Warnung: Benutzerdefinierter Titel '{custom_title}' enthält ungültige Zeichen und wird sanitiert.", "warning")
-
-                            log_debug(f"Benutzerdefinierter Pfad: {custom_path}", "info")
-                            log_debug(f"Benutzerdefinierter Titel: {custom_title}", "info")
-
-                            # Verwende die WikiJS-Funktion für den Upload
-                            success, wiki_url = wikijs.upload_content(
-                                content,
-                                output_filename,
-                                session_id,
-                                WIKIJS_URL,
-                                WIKIJS_TOKEN,
-                                custom_path=custom_path,
-                                custom_title=custom_title,
-                                username=username,
-                                default_folder=default_folder,
-                                debug_logger=log_debug,
-                                external_url=WIKIJS_EXTERNAL_URL,
-                                sanitize_wikijs_path_fn=sanitize_wikijs_path,
-                                sanitize_wikijs_title_fn=sanitize_wikijs_title,
-                                clean_markdown_content_fn=clean_markdown_content
-                            )
-
-                            if success:
-                                wiki_urls[output_filename] = wiki_url
-                                log_debug(f"Wiki.js Upload erfolgreich: {wiki_url}", "success")
-                            else:
-                                log_debug(f"Wiki.js Upload fehlgeschlagen für {output_filename}", "error")
-                    except Exception as e:
-                        log_debug(f"Fehler beim Lesen/Hochladen von {output_filename}: {str(e)}", "error")
-            else:
-                log_debug(f"Konvertierung fehlgeschlagen: {filename}", "error")
-                failed_files.append(filename)
-        else:
-            if not file:
-                log_debug("Leerer Datei-Eintrag übersprungen", "error")
-            else:
-                log_debug(f"Ungültiges Dateiformat: {file.filename}", "error")
+    upload_dir = prepare_session(session_id, upload_to_wiki, username, wiki_titles, log_debug)
 
-    log_debug(f"Verarbeitung abgeschlossen: {len(converted_files)} konvertiert, {len(failed_files)} fehlgeschlagen")
-    return converted_files, failed_files, wiki_urls
+    log_debug(f"{len(files)} Datei(en) für die Verarbeitung empfangen")
+    timers = {}
+    saved = save_uploads(files, upload_dir, log_debug, timers)
 
-def cleanup_session(session_id):
-    """Bereinigt die temporären Dateien einer Session"""
+    try:
+        return process_saved_files(
+            saved,
+            session_id,
+            upload_to_wiki,
+            wiki_paths=wiki_paths,
+            wiki_titles=wiki_titles,
+            username=username,
+            default_folder=default_folder,
+            debug_logger=log_debug,
+            split_level=split_level,
+            timers=timers,
+            fair_key=fair_key
+        )
+    except scheduler.SchedulerFull:
+        remove_local_session(session_id)
+        raise
+
+def process_uploads_queued(files, session_id, options, debug_log):
+    """
+    Verteilter Betrieb ohne Live-Anzeige: stellt die Dateien als Job ein und
+    wartet bis JOB_WAIT_TIMEOUT auf das Ergebnis eines Workers
+
+    Returns:
+        tuple: (converted_files, failed_files, wiki_urls, timings)
+    """
+    upload_dir = prepare_session(session_id, options['upload_to_wiki'], options['username'],
+                                 options['wiki_titles'], debug_log)
+    debug_log(f"{len(files)} Datei(en) für die Verarbeitung empfangen")
+    saved = save_uploads(files, upload_dir, debug_log)
+    if not saved:
+        remove_local_session(session_id)
+        return [], {}, {}, {}
+
+    job_id = enqueue_conversion(saved, session_id, options, debug_log)
+    job = job_queue.wait_for_job(job_backend, job_id, JOB_WAIT_TIMEOUT)
+    if job is None or job['status'] != 'done':
+        error = job['error'] if job else 'Zeitüberschreitung beim Warten auf einen Worker'
+        debug_log(f"Konvertierungsjob {job_id} fehlgeschlagen: {error}", "error")
+        return [], {filename: error for _, filename, _ in saved}, {}, {}
+
+    result = job['result']
+    debug_log.entries.extend(result['debug_logs'])
+    return result['converted_files'], result['failed_files'], result['wiki_urls'], result['timings']
+
+def process_saved_files_live(saved, futures, session_log):
+    """Hintergrund-Thread der Live-Verarbeitung: wartet auf alle Dateien und meldet am Ende 'done'"""
+    try:
+        converted_files, failed_files, wiki_urls, timings = collect_results(saved, futures, session_log)
+        finish_journaled_batch(session_log.session_id, converted_files, failed_files, wiki_urls)
+        session_log.done(converted=len(converted_files), failed=len(failed_files), wiki_urls=wiki_urls,
+                         timings=timings)
+    except Exception as e:
+        session_log(f"Unerwarteter Fehler bei der Verarbeitung: {str(e)}", "error")
+        if batch_journal is not None:
+            batch_journal.finish(session_log.session_id, {'error': str(e)}, state='failed')
+        session_log.done(converted=0, failed=len(saved), wiki_urls={})
+
+def finish_journaled_batch(session_id, converted_files, failed_files, wiki_urls):
+    """Schließt einen Upload-Stapel im Job-Journal ab (ohne Journal oder Eintrag: nichts zu tun)"""
+    if batch_journal is None:
+        return
+    try:
+        batch_journal.finish(session_id, {
+            'converted_files': converted_files,
+            'failed_files': failed_files,
+            'wiki_urls': wiki_urls,
+        })
+    except Exception as e:
+        log_debug(f"Job-Journal: Abschluss von {session_id} nicht gespeichert: {e}", "warning")
+
+def journaled_result(item, upload_to_wiki):
+    """
+    Ergebnis einer Datei, die laut Job-Journal schon vor dem Neustart fertig war
+
+    Returns:
+        dict or None: Ergebnis wie von convert_and_upload_file, None wenn noch Arbeit offen ist
+    """
+    details = item['details']
+    output_filename = details.get('output_filename') or os.path.splitext(item['name'])[0] + '.md'
+    if item['state'] == 'failed':
+        # Nach der Konvertierung fehlgeschlagene Uploads zählen wie bisher als konvertiert
+        return {'output_filename': output_filename, 'converted': 'output_filename' in details,
+                'error': details.get('error'), 'wiki_url': None, 'timings': {}}
+    if item['state'] == 'uploaded' or (item['state'] == 'converted' and not upload_to_wiki):
+        return {'output_filename': output_filename, 'converted': True, 'error': None,
+                'wiki_url': details.get('wiki_url'), 'timings': {}}
+    return None
+
+def resume_upload_batch(job):
+    """
+    Setzt einen unterbrochenen Upload-Stapel aus dem Job-Journal fort
+
+    Fertige Dateien werden übernommen, konvertierte Dateien nur noch hochgeladen
+    und alle anderen aus der gespeicherten Upload-Datei neu konvertiert. Der
+    Fortschritt erscheint in derselben Sitzung; eine geöffnete Ergebnisseite
+    verbindet sich nach dem Neustart selbst wieder.
+    """
+    session_id = job['id']
+    options = job['options']
+    session_log = SessionLog(session_id)
+    upload_dir = os.path.join(UPLOAD_FOLDER, session_id)
+    result_dir = os.path.join(RESULT_FOLDER, session_id)
+    os.makedirs(result_dir, exist_ok=True)
+    session_log(f"Verarbeitung nach einem Neustart fortgesetzt (Versuch {job['attempts']})", "warning")
+
+    batch = []
+    pending, resume = [], {}
+    for item in batch_journal.items(session_id):
+        filename = item['name']
+        entry = (item['position'], filename, os.path.join(upload_dir, filename))
+        result = journaled_result(item, options['upload_to_wiki'])
+        markdown_path = os.path.join(result_dir, os.path.splitext(filename)[0] + '.md')
+        details = item['details']
+
+        if result is None and details.get('wiki_path'):
+            resume[filename] = {'wiki_target': (details['wiki_path'], details.get('wiki_title'))}
+        if result is None and item['state'] in ('converted', 'uploading') and os.path.isfile(markdown_path):
+            with open(markdown_path, 'r', encoding='utf-8') as f:
+                resume.setdefault(filename, {})['markdown'] = f.read()
+        elif result is None and not os.path.isfile(entry[2]):
+            error = 'Hochgeladene Datei nach dem Neustart nicht mehr vorhanden'
+            batch_journal.item_state(session_id, filename, 'failed', error=error)
+            session_log.file_state(filename, 'failed', error=error)
+            result = {'output_filename': os.path.basename(markdown_path), 'converted': False, 'error': error,
+                      'wiki_url': None, 'timings': {}}
+
+        if result is None:
+            pending.append(entry)
+            session_log.file_state(filename, 'queued')
+        else:
+            future = Future()
+            future.set_result(result)
+            batch.append((entry, future))
+
+    if pending:
+        try:
+            pending_futures = schedule_saved_files(
+                pending, session_id, options['upload_to_wiki'], options['wiki_paths'], options['wiki_titles'],
+                options['username'], options['default_folder'], session_log, session_log.file_state,
+                options['split_level'], fair_key=options['fair_key'], resume=resume
+            )
+        except scheduler.SchedulerFull:
+            # Beim nächsten Durchlauf erneut versuchen
+            batch_journal.release(session_id)
+            return
+        batch.extend(zip(pending, pending_futures))
+
+    batch.sort(key=lambda pair: pair[0][0])
+    threading.Thread(
+        target=process_saved_files_live,
+        args=([entry for entry, _ in batch], [future for _, future in batch], session_log),
+        name=f"resume-{session_id[:8]}", daemon=True
+    ).start()
+
+def remove_local_session(session_id):
+    """Löscht die Verzeichnisse einer Session auf diesem Knoten"""
     upload_dir = os.path.join(UPLOAD_FOLDER, session_id)
     result_dir = os.path.join(RESULT_FOLDER, session_id)
 
@@ -276,6 +1055,78 @@ def cleanup_session(session_id):
     if os.path.exists(result_dir):
         shutil.rmtree(result_dir)
 
+def cleanup_session(session_id):
+    """Bereinigt die temporären Dateien einer Session"""
+    remove_local_session(session_id)
+    if job_backend is not None:
+        job_backend.delete_session(session_id)
+
+def fetch_shared_results(session_id):
+    """Holt im verteilten Betrieb die Ergebnisse einer Session aus der gemeinsamen Ablage"""
+    if job_backend is None or not chunked_upload.is_valid_id(session_id):
+        return
+    result_dir = os.path.join(RESULT_FOLDER, session_id)
+    if not os.path.isdir(result_dir):
+        job_queue.pull_directory(job_backend, session_id, job_queue.RESULTS, result_dir)
+
+def enqueue_conversion(saved, session_id, options, log_debug):
+    """
+    Legt gespeicherte Uploads in der gemeinsamen Ablage ab und stellt einen
+    Konvertierungsjob für worker.py ein
+
+    Returns:
+        str: Job-ID
+    """
+    job_queue.push_directory(job_backend, session_id, job_queue.UPLOADS, os.path.join(UPLOAD_FOLDER, session_id))
+    remove_local_session(session_id)
+    job_id = job_backend.enqueue('convert', dict(
+        options,
+        session_id=session_id,
+        files=[[i, filename] for i, filename, _ in saved]
+    ))
+    log_debug(f"Konvertierungsjob {job_id} in die Warteschlange gestellt", "info")
+    return job_id
+
+def run_convert_job(payload):
+    """Führt einen Konvertierungsjob des verteilten Betriebs aus (aufgerufen von worker.py)"""
+    session_id = payload['session_id']
+    upload_dir = os.path.join(UPLOAD_FOLDER, session_id)
+    session_log = SessionLog(session_id)
+
+    try:
+        job_queue.pull_directory(job_backend, session_id, job_queue.UPLOADS, upload_dir)
+        saved = [(i, filename, os.path.join(upload_dir, filename)) for i, filename in payload['files']]
+        converted_files, failed_files, wiki_urls, timings = process_saved_files(
+            saved,
+            session_id,
+            payload['upload_to_wiki'],
+            wiki_paths=payload['wiki_paths'],
+            wiki_titles=payload['wiki_titles'],
+            username=payload['username'],
+            default_folder=payload['default_folder'],
+            debug_logger=session_log,
+            on_state=session_log.file_state,
+            split_level=payload['split_level']
+        )
+        # Erst ablegen, dann 'done' melden, damit der Download auf jedem Knoten funktioniert
+        job_queue.push_directory(job_backend, session_id, job_queue.RESULTS, os.path.join(RESULT_FOLDER, session_id))
+    except Exception as e:
+        session_log(f"Unerwarteter Fehler bei der Verarbeitung: {str(e)}", "error")
+        session_log.done(converted=0, failed=len(payload['files']), wiki_urls={})
+        raise
+    finally:
+        remove_local_session(session_id)
+
+    session_log.done(converted=len(converted_files), failed=len(failed_files), wiki_urls=wiki_urls,
+                     timings=timings)
+    return {
+        'converted_files': converted_files,
+        'failed_files': failed_files,
+        'wiki_urls': wiki_urls,
+        'timings': timings,
+        'debug_logs': session_log.entries,
+    }
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
@@ -290,11 +1141,20 @@ def index():
             flash('Keine Dateien ausgewählt')
             return redirect(request.url)
 
+        # Lastabwurf, bevor die Dateien gespeichert werden
+        if job_backend is None:
+            try:
+                conversion_scheduler.check_capacity(len(files))
+            except scheduler.SchedulerFull as e:
+                return overloaded_response(e)
+
         session_id = str(uuid.uuid4())
 
         # Get username and default folder
         username = request.form.get('username', '')
+        fair_key = username or request.remote_addr
         default_folder = request.form.get('default_folder', '')
+        split_level = parse_split_level(request.form.get('split_level', SPLIT_LEVEL))
 
         # Sammle benutzerdefinierte Wiki.js Pfade und Titel
         wiki_paths = {}
@@ -308,36 +1168,316 @@ def index():
                 index = key.replace('wiki_title_', '')
                 wiki_titles[f"title_{index}"] = value
 
-        converted_files, failed_files, wiki_urls = process_uploads(
-            files,
-            session_id,
-            upload_to_wiki,
-            wiki_paths=wiki_paths,
-            wiki_titles=wiki_titles,
-            username=username,
-            default_folder=default_folder
-        )
+        conversion_options = {
+            'upload_to_wiki': upload_to_wiki,
+            'wiki_paths': wiki_paths,
+            'wiki_titles': wiki_titles,
+            'username': username,
+            'default_folder': default_folder,
+            'split_level': split_level,
+        }
+
+        # Live-Modus: Dateien speichern, im Hintergrund verarbeiten und den
+        # Fortschritt per Server-Sent Events an die Ergebnisseite senden
+        if request.form.get('live') == '1':
+            session_log = SessionLog(session_id)
+            upload_dir = prepare_session(session_id, upload_to_wiki, username, wiki_titles, session_log)
+            session_log(f"{len(files)} Datei(en) für die Verarbeitung empfangen")
+            timers = {}
+            saved = save_uploads(files, upload_dir, session_log, timers)
+
+            if not saved:
+                flash('Keine gültigen Dateien zum Konvertieren gefunden')
+                return redirect(request.url)
+
+            for _, filename, _ in saved:
+                session_log.file_state(filename, 'queued')
+
+            if job_backend is not None:
+                enqueue_conversion(saved, session_id, conversion_options, session_log)
+            else:
+                try:
+                    futures = schedule_saved_files(
+                        saved, session_id, upload_to_wiki, wiki_paths, wiki_titles, username, default_folder,
+                        session_log, session_log.file_state, split_level, timers, fair_key
+                    )
+                except scheduler.SchedulerFull as e:
+                    remove_local_session(session_id)
+                    return overloaded_response(e)
+                threading.Thread(
+                    target=process_saved_files_live, args=(saved, futures, session_log),
+                    name=f"live-{session_id[:8]}", daemon=True
+                ).start()
+
+            return render_template(
+                'results.html',
+                live=True,
+                queued_files=[filename for _, filename, _ in saved],
+                converted_files=[],
+                failed_files={},
+                wiki_urls={},
+                session_id=session_id,
+                debug_logs=session_log.entries,
+                wiki_requested=upload_to_wiki,
+                wiki_url=WIKIJS_URL,
+                api_token_exists=bool(WIKIJS_TOKEN)
+            )
+
+        debug_log = DebugLog()
+        if job_backend is not None:
+            converted_files, failed_files, wiki_urls, timings = process_uploads_queued(
+                files, session_id, conversion_options, debug_log
+            )
+        else:
+            try:
+                converted_files, failed_files, wiki_urls, timings = process_uploads(
+                    files,
+                    session_id,
+                    upload_to_wiki,
+                    wiki_paths=wiki_paths,
+                    wiki_titles=wiki_titles,
+                    username=username,
+                    default_folder=default_folder,
+                    debug_logger=debug_log,
+                    split_level=split_level,
+                    fair_key=fair_key
+                )
+            except scheduler.SchedulerFull as e:
+                return overloaded_response(e)
 
         if not converted_files and not failed_files:
             flash('Keine gültigen Dateien zum Konvertieren gefunden')
             return redirect(request.url)
 
-        return render_template_string(
-            load_template('results.html'),
+        return render_template(
+            'results.html',
             converted_files=converted_files,
             failed_files=failed_files,
             wiki_urls=wiki_urls,
+            timings=timings,
             session_id=session_id,
-            debug_logs=debug_logs,
+            debug_logs=debug_log.entries,
             wiki_requested=upload_to_wiki,
             wiki_url=WIKIJS_URL,
             api_token_exists=bool(WIKIJS_TOKEN)
         )
 
-    return render_template_string(load_template('index.html'))
+    return render_template('index.html', split_level=SPLIT_LEVEL, split_min_kb=SPLIT_MIN_BYTES // 1024)
+
+def overloaded_response(error):
+    """Antwortet bei voller Konvertierungs-Warteschlange mit 503 und Retry-After"""
+    if request.accept_mimetypes.best == 'application/json' or request.is_json:
+        response = jsonify({'success': False, 'message': str(error), 'retry_after': error.retry_after})
+    else:
+        flash(f"{error} (in etwa {error.retry_after} Sekunden).")
+        response = make_response(render_template('index.html', split_level=SPLIT_LEVEL,
+                                                  split_min_kb=SPLIT_MIN_BYTES // 1024))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@app.errorhandler(413)
+def request_too_large(error):
+    """Wird ausgelöst, wenn ein Upload MAX_UPLOAD_MB überschreitet"""
+    flash(f"Die hochgeladenen Dateien sind zu groß (maximal {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB pro Anfrage).")
+    return redirect(url_for('index'))
+
+def _upload_error_response(error):
+    """Antwortet auf einen UploadError mit JSON und passendem Status"""
+    body = {'success': False, 'message': str(error)}
+    if error.received is not None:
+        body['received'] = error.received
+    return jsonify(body), error.status
+
+def _upload_status(state):
+    """Öffentliche Sicht auf den Zustand eines Uploads"""
+    return {
+        'upload_id': state['upload_id'],
+        'session_id': state['session_id'],
+        'filename': state['filename'],
+        'size': state['size'],
+        'received': state['received'],
+        'status': state['status'],
+        'result': state.get('result'),
+        'chunk_size': CHUNK_SIZE
+    }
+
+def convert_finalized_upload(session_id, upload_id, file_path):
+    """Konvertiert eine vollständig hochgeladene Datei im Hintergrund"""
+    debug_log = SessionLog(session_id)
+    try:
+        state = chunked_upload.update_upload(UPLOAD_FOLDER, session_id, upload_id, status='converting')
+        options = state['options']
+        result = convert_and_upload_file(
+            file_path,
+            state['filename'],
+            session_id,
+            options.get('upload_to_wiki', False),
+            custom_path=options.get('wiki_path', ''),
+            custom_title=options.get('wiki_title', ''),
+            username=options.get('username'),
+            default_folder=options.get('default_folder'),
+            debug_logger=debug_log,
+            on_state=debug_log.file_state,
+            split_level=options.get('split_level', 0)
+        )
+        chunked_upload.update_upload(
+            UPLOAD_FOLDER, session_id, upload_id,
+            status='converted' if result['converted'] else 'failed',
+            result=result,
+            logs=debug_log.entries
+        )
+    except Exception as e:
+        debug_log(f"Fehler bei der Verarbeitung von {file_path}: {str(e)}", "error")
+        chunked_upload.update_upload(
+            UPLOAD_FOLDER, session_id, upload_id,
+            status='failed',
+            result={'converted': False, 'error': str(e)},
+            logs=debug_log.entries
+        )
+    report_chunked_session_done(debug_log)
+
+def report_chunked_session_done(session_log):
+    """Meldet 'done', sobald keine Datei der Sitzung mehr hochgeladen, wartet oder konvertiert wird"""
+    uploads = chunked_upload.list_uploads(UPLOAD_FOLDER, session_log.session_id)
+    if not uploads or any(state['status'] not in ('converted', 'failed') for state in uploads):
+        return
+    converted = [state for state in uploads if state['status'] == 'converted']
+    wiki_urls = {state['result']['output_filename']: state['result']['wiki_url']
+                 for state in converted if state['result'].get('wiki_url')}
+    timings = {state['filename']: state['result']['timings']
+               for state in converted if state['result'].get('timings')}
+    session_log.done(converted=len(converted), failed=len(uploads) - len(converted), wiki_urls=wiki_urls,
+                     timings=timings)
+
+@app.route('/upload/init', methods=['POST'])
+def upload_init():
+    """Meldet eine Datei für den Upload in Teilen an"""
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get('filename') or '')
+
+    if not filename or not allowed_file(filename, ALLOWED_EXTENSIONS):
+        return jsonify({'success': False, 'message': f"Ungültiges Dateiformat: {data.get('filename')}"}), 400
+
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Dateigröße fehlt'}), 400
+
+    options = {
+        'upload_to_wiki': bool(data.get('upload_to_wiki')),
+        'wiki_path': data.get('wiki_path', ''),
+        'wiki_title': data.get('wiki_title', ''),
+        'username': data.get('username', ''),
+        'default_folder': data.get('default_folder', ''),
+        'split_level': parse_split_level(data.get('split_level', SPLIT_LEVEL))
+    }
+
+    try:
+        state = chunked_upload.init_upload(
+            UPLOAD_FOLDER,
+            data.get('session_id'),
+            filename,
+            size,
+            sha256=data.get('sha256'),
+            options=options,
+            max_file_size=MAX_FILE_SIZE
+        )
+    except chunked_upload.UploadError as e:
+        return _upload_error_response(e)
+
+    return jsonify(_upload_status(state)), 201
+
+@app.route('/upload/<session_id>/<upload_id>', methods=['GET'])
+def upload_status(session_id, upload_id):
+    """Zustand eines Uploads, z.B. um nach einer Unterbrechung fortzusetzen"""
+    try:
+        return jsonify(_upload_status(chunked_upload.get_upload(UPLOAD_FOLDER, session_id, upload_id)))
+    except chunked_upload.UploadError as e:
+        return _upload_error_response(e)
+
+@app.route('/upload/<session_id>/<upload_id>/chunk', methods=['PUT'])
+def upload_chunk(session_id, upload_id):
+    """Nimmt einen Teil der Datei entgegen (Offset als Query-Parameter)"""
+    try:
+        offset = int(request.args.get('offset', 0))
+        state = chunked_upload.write_chunk(UPLOAD_FOLDER, session_id, upload_id, offset, request.stream,
+                                           chunk_size_limit=CHUNK_SIZE)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Ungültiger Offset'}), 400
+    except chunked_upload.UploadError as e:
+        return _upload_error_response(e)
+
+    return jsonify(_upload_status(state))
+
+@app.route('/upload/<session_id>/<upload_id>/finalize', methods=['POST'])
+def upload_finalize(session_id, upload_id):
+    """Prüft die vollständige Datei und startet sofort ihre Konvertierung"""
+    # Bei voller Warteschlange bleibt der Upload offen, der Client wiederholt finalize später
+    try:
+        conversion_scheduler.check_capacity()
+    except scheduler.SchedulerFull as e:
+        return overloaded_response(e)
+
+    try:
+        state, file_path = chunked_upload.finalize_upload(UPLOAD_FOLDER, session_id, upload_id)
+    except chunked_upload.UploadError as e:
+        return _upload_error_response(e)
+
+    events.emit(UPLOAD_FOLDER, session_id, 'file', {'filename': state['filename'], 'state': 'queued'})
+    # Der Platz wurde oben geprüft; die Datei ist jetzt übernommen und wird auch bei
+    # inzwischen voller Warteschlange eingereiht, statt den Upload scheitern zu lassen
+    conversion_scheduler.submit_batch(state['options'].get('username') or request.remote_addr,
+                                      [(file_path, convert_finalized_upload, (session_id, upload_id, file_path), {})],
+                                      admitted=True)
+    return jsonify(_upload_status(state)), 202
+
+@app.route('/results/<session_id>', methods=['GET'])
+def upload_results(session_id):
+    """Ergebnisseite einer Sitzung, deren Dateien der Browser in Teilen hochgeladen hat"""
+    uploads = chunked_upload.list_uploads(UPLOAD_FOLDER, session_id)
+    if not uploads:
+        abort(404)
+    return render_template(
+        'results.html',
+        live=True,
+        queued_files=[state['filename'] for state in uploads],
+        converted_files=[],
+        failed_files={},
+        wiki_urls={},
+        session_id=session_id,
+        debug_logs=[],
+        wiki_requested=any(state['options'].get('upload_to_wiki') for state in uploads),
+        wiki_url=WIKIJS_URL,
+        api_token_exists=bool(WIKIJS_TOKEN)
+    )
+
+@app.route('/upload/<session_id>', methods=['GET'])
+def upload_session_status(session_id):
+    """Zustand aller Uploads einer Sitzung"""
+    uploads = chunked_upload.list_uploads(UPLOAD_FOLDER, session_id)
+    return jsonify({'session_id': session_id, 'uploads': [_upload_status(state) for state in uploads]})
+
+@app.route('/events/<session_id>', methods=['GET'])
+def session_events(session_id):
+    """Server-Sent Events: Dateistatus und Log-Zeilen einer Sitzung in Echtzeit"""
+    if not chunked_upload.is_valid_id(session_id):
+        abort(404)
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', request.args.get('last_event_id', 0)))
+    except ValueError:
+        last_event_id = 0
+
+    response = Response(events.stream(UPLOAD_FOLDER, session_id, last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Kein Puffern durch einen vorgeschalteten nginx
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/download/<session_id>', methods=['GET'])
 def download_results(session_id):
+    fetch_shared_results(session_id)
     memory_file = export.create_zip_file(session_id, RESULT_FOLDER)
     cleanup_session(session_id)
 
@@ -350,6 +1490,7 @@ def download_results(session_id):
 
 @app.route('/download_single/<session_id>/<filename>', methods=['GET'])
 def download_single_file(session_id, filename):
+    fetch_shared_results(session_id)
     file_path = os.path.join(RESULT_FOLDER, session_id, filename)
 
     if not os.path.exists(file_path):
@@ -365,11 +1506,8 @@ def download_single_file(session_id, filename):
 
 @app.route('/test_wikijs_connection', methods=['POST'])
 def test_wikijs_connection():
-    global debug_logs
-    debug_logs = []  # Zurücksetzen der Debug-Logs
-
     # Use the wikijs module function for testing connection
-    result = wikijs.test_connection(WIKIJS_URL, WIKIJS_TOKEN, log_debug)
+    result = wikijs.test_connection(WIKIJS_URL, WIKIJS_TOKEN, DebugLog())
     return result
 
 @app.route('/get_wikijs_directories', methods=['GET'])
@@ -378,14 +1516,221 @@ def get_wikijs_directories():
     # Use the wikijs module function
     return wikijs.get_directories(WIKIJS_URL, WIKIJS_TOKEN, log_debug)
 
+@app.route('/page_cache_stats', methods=['GET'])
+def page_cache_stats():
+    """Returns hit/miss/eviction statistics of the Wiki.js page content cache"""
+    return wikijs.page_content_cache.stats()
+
+@app.route('/search_pages', methods=['GET'])
+def search_pages():
+    """
+    Searches Wiki.js pages for the export screen
+
+    With the local mirror the search covers title, path and content (FTS5);
+    without it only title and path of the page index are compared.
+    """
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    if len(query) < 2:
+        return {'results': [], 'fulltext': False}
+
+    mirror = wikijs.active_mirror(WIKIJS_URL)
+    if mirror is not None:
+        try:
+            return {'results': mirror.search(query, limit), 'fulltext': True}
+        except sqlite3.OperationalError as e:
+            log_debug(f"Suche im Wiki.js-Spiegel fehlgeschlagen: {e}", "error")
+
+    pages_by_path, error = wikijs.get_page_index(WIKIJS_URL, WIKIJS_TOKEN, debug_logger=log_debug)
+    if error:
+        return {'results': [], 'fulltext': False, 'error': error}, 502
+    words = query.lower().split()
+    results = [
+        {'id': page['id'], 'path': page['path'], 'title': page['title'], 'snippet': ''}
+        for page in pages_by_path.values()
+        if all(word in f"{page['title'] or ''} {page['path']}".lower() for word in words)
+    ]
+    return {'results': results[:limit], 'fulltext': False}
+
+@app.route('/mirror_stats', methods=['GET'])
+def mirror_stats():
+    """Returns page counts and sync state of the local Wiki.js mirror"""
+    mirror = wikijs.active_mirror(WIKIJS_URL)
+    if mirror is None:
+        return {'enabled': WIKI_MIRROR_DB is not None, 'ready': False}
+    return dict(mirror.stats(), enabled=True, ready=True)
+
+@app.route('/similarity_stats', methods=['GET'])
+def similarity_stats():
+    """Returns size, threshold and mode of the near-duplicate index"""
+    if similarity_index is None:
+        return {'enabled': False}
+    return dict(similarity_index.stats(), enabled=True)
+
+@app.route('/wikijs_stats', methods=['GET'])
+def wikijs_stats():
+    """Returns the adaptive concurrency limit and the latencies of Wiki.js requests"""
+    return wikijs.request_limiter.stats()
+
+def run_export(session_id, options, debug_log, resume=False):
+    """
+    Runs an export with the options of the export form
+
+    With a path prefix the pages are resolved from the Wiki.js page index
+    when the export starts, fetched in batches and stored in folders that
+    mirror the Wiki.js paths.
+
+    With the job journal every page is recorded once all its formats are
+    converted. A resumed export (resume=True) takes the page list from the
+    journal and skips the pages whose files survived in the session archive.
+
+    Returns:
+        tuple: (converted_files, failed_files, debug_data)
+    """
+    page_paths = options['pages']
+    prefix = options.get('prefix')
+    journaled = batch_journal.items(session_id) if resume else []
+    completed = {}
+    if journaled:
+        page_paths = [item['name'] for item in journaled]
+        archived = export.recover_archive(os.path.join(RESULT_FOLDER, session_id, export.EXPORT_ARCHIVE_NAME))
+        completed = {item['name']: item['details']['files'] for item in journaled
+                     if item['state'] == 'done' and set(item['details']['entries']) <= archived}
+        debug_log(f"Export nach einem Neustart fortgesetzt: {len(completed)} von {len(page_paths)} Seiten "
+                  "bereits exportiert")
+    elif prefix is not None:
+        # Fresh index, so pages created shortly before the export are included
+        pages_by_path, error = wikijs.get_page_index(WIKIJS_URL, WIKIJS_TOKEN, debug_logger=debug_log, refresh=True)
+        page_paths = export.select_pages_by_prefix(pages_by_path, prefix)
+        debug_log(f"{len(page_paths)} Seiten unter '/{export.normalize_path_prefix(prefix)}' gefunden")
+        if not page_paths:
+            return [], [error or f"Keine Seiten unter '/{export.normalize_path_prefix(prefix)}' gefunden"], {}
+
+    if batch_journal is not None and not journaled:
+        batch_journal.add_items(session_id, list(enumerate(page_paths)))
+
+    def on_page_done(page_path, files, failures, entries):
+        # Pages with failed formats are exported again when the export is resumed
+        if batch_journal is not None:
+            batch_journal.item_state(session_id, page_path, 'failed' if failures else 'done',
+                                     files=files, entries=entries)
+
+    if options['combined']:
+        converted_files, failed_files, debug_data = export.export_pages_combined(
+            page_paths,
+            options['formats'],
+            session_id,
+            RESULT_FOLDER,
+            WIKIJS_URL,
+            WIKIJS_TOKEN,
+            OUTPUT_FORMAT_MAPPING,
+            sanitize_filename,
+            wikijs.fetch_page_content,
+            debug_log,
+            fetch_workers=EXPORT_FETCH_WORKERS,
+            pdf_engine=options['pdf_engine'],
+            book_title=options['book_title'],
+            profiled=profiled
+        )
+    else:
+        converted_files, failed_files, debug_data = export.export_pages_to_formats(
+            page_paths,
+            options['formats'],
+            session_id,
+            RESULT_FOLDER,
+            WIKIJS_URL,
+            WIKIJS_TOKEN,
+            OUTPUT_FORMAT_MAPPING,
+            sanitize_filename,
+            wikijs.fetch_page_content,
+            debug_log,
+            fetch_workers=EXPORT_FETCH_WORKERS,
+            convert_workers=EXPORT_CONVERT_WORKERS,
+            queue_size=EXPORT_QUEUE_SIZE,
+            pdf_engine=options['pdf_engine'],
+            fetch_batch_fn=wikijs.fetch_page_contents if prefix is not None else None,
+            batch_size=EXPORT_BATCH_SIZE,
+            keep_hierarchy=prefix is not None,
+            completed=completed,
+            on_page_done=on_page_done,
+            profiled=profiled
+        )
+
+    for name, data in debug_data.items():
+        if 'timings' in data:
+            try:
+                stage_timing.write_jsonl(TIMING_LOG, 'export', session_id, name, data['timings'])
+            except OSError as e:
+                log_debug(f"Zeitprofil konnte nicht geschrieben werden: {e}", "warning")
+
+    return converted_files, failed_files, debug_data
+
+def run_journaled_export(session_id, options, debug_log, resume=False):
+    """Runs an export and records its outcome in the job journal"""
+    try:
+        converted_files, failed_files, debug_data = run_export(session_id, options, debug_log, resume=resume)
+    except Exception as e:
+        if batch_journal is not None:
+            batch_journal.finish(session_id, {'error': str(e)}, state='failed')
+        raise
+    if batch_journal is not None:
+        batch_journal.finish(session_id, {'converted_files': converted_files, 'failed_files': failed_files})
+    return converted_files, failed_files, debug_data
+
+def resume_export(job):
+    """Continues an export that was interrupted by a restart (in the background)"""
+    threading.Thread(
+        target=run_journaled_export, args=(job['id'], job['options'], DebugLog(), True),
+        name=f"resume-export-{job['id'][:8]}", daemon=True
+    ).start()
+
+def run_export_job(payload):
+    """Runs an export job of the distributed mode (called by worker.py)"""
+    session_id = payload['session_id']
+    debug_log = DebugLog()
+    try:
+        converted_files, failed_files, debug_data = run_export(session_id, payload, debug_log)
+        job_queue.push_directory(job_backend, session_id, job_queue.RESULTS, os.path.join(RESULT_FOLDER, session_id))
+    finally:
+        remove_local_session(session_id)
+    return {
+        'converted_files': converted_files,
+        'failed_files': failed_files,
+        'debug_data': debug_data,
+        'debug_logs': debug_log.entries,
+    }
+
+@app.route('/queue_stats', methods=['GET'])
+def queue_stats():
+    """Returns the local conversion scheduler state and the job counts of the shared queue"""
+    stats = {'scheduler': conversion_scheduler.stats(), 'enabled': job_backend is not None}
+    if batch_journal is not None:
+        stats['journal'] = batch_journal.stats()
+    if job_backend is not None:
+        stats.update(job_backend.stats())
+    return stats
+
+def journal_client():
+    """
+    Kennung des Browsers im Sitzungs-Cookie, unter der fortgesetzte Exporte
+    angezeigt werden (die IP-Adresse teilen sich Nutzer hinter einem Proxy)
+    """
+    if 'client_id' not in session:
+        session['client_id'] = uuid.uuid4().hex
+        session.permanent = True
+    return session['client_id']
+
 @app.route('/export', methods=['GET', 'POST'], endpoint='export')
 def wiki_export():
     if request.method == 'POST':
         selected_pages = request.form.getlist('pages')
         selected_formats = request.form.getlist('formats')
+        pdf_engine = request.form.get('pdf_engine', PDF_ENGINE)
+        # A path prefix exports a whole subtree; '/' exports the whole wiki
+        path_prefix = request.form.get('path_prefix', '').strip() or None
 
-        if not selected_pages:
-            flash('Bitte wählen Sie mindestens eine Wiki.js-Seite aus.')
+        if not selected_pages and path_prefix is None:
+            flash('Bitte wählen Sie mindestens eine Wiki.js-Seite aus oder geben Sie einen Pfad an.')
             return redirect(request.url)
 
         if not selected_formats:
@@ -394,53 +1739,89 @@ def wiki_export():
 
         session_id = str(uuid.uuid4())
 
-        # Reset debug logs for this session
-        global debug_logs
-        debug_logs = []
-
-        # Use the export module function
-        converted_files, failed_files, debug_data = export.export_pages_to_formats(
-            selected_pages,
-            selected_formats,
-            session_id,
-            RESULT_FOLDER,
-            WIKIJS_URL,
-            WIKIJS_TOKEN,
-            OUTPUT_FORMAT_MAPPING,
-            sanitize_filename,
-            wikijs.fetch_page_content,
-            log_debug
-        )
+        # Debug log for this export only
+        debug_log = DebugLog()
+        export_options = {
+            'pages': [] if path_prefix is not None else selected_pages,
+            'prefix': path_prefix,
+            'formats': selected_formats,
+            'pdf_engine': pdf_engine,
+            'combined': request.form.get('export_mode') == 'combined',
+            'book_title': request.form.get('book_title', ''),
+        }
+
+        if job_backend is not None:
+            # Distributed mode: a worker runs the export, any web node serves the downloads
+            job_id = job_backend.enqueue('export', dict(export_options, session_id=session_id))
+            debug_log(f"Export job {job_id} queued")
+            job = job_queue.wait_for_job(job_backend, job_id, JOB_WAIT_TIMEOUT)
+            if job is None or job['status'] != 'done':
+                flash(f"Export fehlgeschlagen: {job['error'] if job else 'Zeitüberschreitung beim Warten auf einen Worker'}")
+                return redirect(request.url)
+            converted_files = job['result']['converted_files']
+            failed_files = job['result']['failed_files']
+            debug_data = job['result']['debug_data']
+            debug_log.entries.extend(job['result']['debug_logs'])
+        else:
+            if batch_journal is not None:
+                batch_journal.create(session_id, 'export', export_options, client=journal_client())
+            converted_files, failed_files, debug_data = run_journaled_export(session_id, export_options, debug_log)
 
-        return render_template_string(
-            load_template('export_results.html'),
+        return render_template(
+            'export_results.html',
             converted_files=converted_files,
             failed_files=failed_files,
             session_id=session_id,
-            debug_logs=debug_logs,
+            debug_logs=debug_log.entries,
             debug_data=debug_data
         )
 
     # GET request: Show the export interface
     pages, error = wikijs.fetch_pages(WIKIJS_URL, WIKIJS_TOKEN, limit=200, debug_logger=log_debug)
 
-    return render_template_string(
-        load_template('export.html'),
+    return render_template(
+        'export.html',
         pages=pages,
         error=error,
         output_formats=OUTPUT_FORMAT_MAPPING.keys(),
-        wiki_url=WIKIJS_URL
+        pdf_engines=export.get_available_pdf_engines(),
+        default_pdf_engine=PDF_ENGINE,
+        wiki_url=WIKIJS_URL,
+        resumed_exports=batch_journal.resumed_jobs('export', journal_client()) if batch_journal is not None else []
     )
 
-@app.route('/download_exported_file/<session_id>/<filename>', methods=['GET'])
+@app.route('/export_results/<session_id>', methods=['GET'])
+def resumed_export_results(session_id):
+    """Results of an export that finished after a restart (job journal)"""
+    job = batch_journal.get(session_id) if batch_journal is not None else None
+    if job is None or job['kind'] != 'export' or job['state'] == 'running':
+        abort(404)
+    result = job['result'] or {}
+    return render_template(
+        'export_results.html',
+        converted_files=result.get('converted_files', []),
+        failed_files=result.get('failed_files', [result['error']] if result.get('error') else []),
+        session_id=session_id,
+        debug_logs=[],
+        debug_data={}
+    )
+
+@app.route('/download_exported_file/<session_id>/<path:filename>', methods=['GET'])
 def download_exported_file(session_id, filename):
     """Download a single exported file"""
+    fetch_shared_results(session_id)
     session_result_dir = os.path.join(RESULT_FOLDER, session_id)
+    if not os.path.isfile(os.path.join(session_result_dir, filename)):
+        # Text formats are streamed into the export archive without a file of their own
+        data = export.read_exported_file(session_id, RESULT_FOLDER, filename)
+        if data is not None:
+            return send_file(io.BytesIO(data), download_name=os.path.basename(filename), as_attachment=True)
     return send_from_directory(session_result_dir, filename, as_attachment=True)
 
 @app.route('/download_exported_zip/<session_id>', methods=['GET'])
 def download_exported_zip(session_id):
     """Download all exported files as a ZIP archive"""
+    fetch_shared_results(session_id)
     memory_file = export.create_exported_zip(session_id, RESULT_FOLDER)
 
     if not memory_file:
@@ -455,6 +1836,18 @@ def download_exported_zip(session_id):
         as_attachment=True
     )
 
+def resume_job(job):
+    """Continues a job of the job journal whose process ended (called by the journal thread)"""
+    if job['kind'] == 'upload':
+        resume_upload_batch(job)
+    else:
+        resume_export(job)
+
+if batch_journal is not None:
+    # Every process picks up orphaned jobs; the journal makes sure each job is taken over only once
+    batch_journal.configure_resume(resume_job)
+    batch_journal.start()
+
 if __name__ == '__main__':
     # Stelle sicher, dass das Templates-Verzeichnis existiert
     templates_dir = os.path.join(app.root_path, 'templates')
@@ -465,4 +1858,9 @@ if __name__ == '__main__':
     # Ensure static files exist
     ensure_static_files_exist(app.root_path)
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Entwicklungsserver; im Produktivbetrieb wird die App über Gunicorn gestartet (gunicorn.conf.py)
+    app.run(
+        debug=os.getenv('DEBUG', 'True').lower() in ('1', 'true', 'yes'),
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', 5000))
+    )
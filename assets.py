@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Static asset pipeline: fingerprinted, precompressed CSS/JS bundles
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is used without it
+    brotli = None
+
+# Directories below static/ that are served as fingerprinted bundles
+ASSET_DIRECTORIES = ('css', 'js')
+
+# Fingerprinted files never change, so browsers may keep them for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+MIMETYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+}
+
+_assets = {}
+_fingerprinted = {}
+_lock = threading.Lock()
+
+def _build_asset(name, file_path):
+    """Reads an asset and prepares its fingerprint and compressed variants"""
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    digest = hashlib.sha256(content).hexdigest()
+    base, ext = os.path.splitext(name)
+
+    asset = {
+        'name': name,
+        'path': file_path,
+        'mtime': os.path.getmtime(file_path),
+        'fingerprinted': f"{base}.{digest[:12]}{ext}",
+        'etag': digest[:32],
+        'mimetype': MIMETYPES.get(ext, 'application/octet-stream'),
+        'identity': content,
+        'gzip': gzip.compress(content, compresslevel=9, mtime=0),
+        'br': brotli.compress(content, quality=11) if brotli else None,
+    }
+    return asset
+
+def build_assets(static_folder):
+    """Builds all bundles below the asset directories of the static folder"""
+    with _lock:
+        _assets.clear()
+        _fingerprinted.clear()
+
+        for directory in ASSET_DIRECTORIES:
+            asset_dir = os.path.join(static_folder, directory)
+            if not os.path.isdir(asset_dir):
+                continue
+
+            for filename in sorted(os.listdir(asset_dir)):
+                if os.path.splitext(filename)[1] not in MIMETYPES:
+                    continue
+                name = f"{directory}/{filename}"
+                asset = _build_asset(name, os.path.join(asset_dir, filename))
+                _assets[name] = asset
+                _fingerprinted[asset['fingerprinted']] = asset
+
+    return len(_assets)
+
+def _refresh(asset):
+    """Rebuilds an asset whose source file changed since it was built"""
+    try:
+        if os.path.getmtime(asset['path']) == asset['mtime']:
+            return asset
+        fresh = _build_asset(asset['name'], asset['path'])
+    except OSError:
+        return asset
+
+    with _lock:
+        _fingerprinted.pop(asset['fingerprinted'], None)
+        _assets[fresh['name']] = fresh
+        _fingerprinted[fresh['fingerprinted']] = fresh
+    return fresh
+
+def fingerprinted_name(name):
+    """Returns the fingerprinted file name of a bundle, e.g. css/index.3f2a1b9c0d7e.css"""
+    asset = _assets.get(name)
+    if asset is None:
+        return None
+    return _refresh(asset)['fingerprinted']
+
+def get_asset(fingerprinted):
+    """Returns the asset for a fingerprinted file name or None"""
+    return _fingerprinted.get(fingerprinted)
+
+def choose_encoding(asset, accept_encoding):
+    """Selects the best precompressed variant the client accepts"""
+    accepted = {part.split(';')[0].strip() for part in (accept_encoding or '').lower().split(',')}
+    if asset['br'] is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return 'identity'
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Load test: concurrent uploads against a running DocFlow instance
+
+Usage:
+    python benchmarks/load_upload.py --url http://localhost:5000 --clients 8 --requests 10
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+def generate_document(size_kb):
+    """Generates a small HTML document of roughly the given size"""
+    paragraph = "<p>DocFlow Lasttest mit Umlauten: äöü ß. " + "Lorem ipsum dolor sit amet. " * 4 + "</p>\n"
+    body = paragraph * max(1, (size_kb * 1024) // len(paragraph))
+    return f"<html><body><h1>Lasttest</h1>\n{body}</body></html>".encode('utf-8')
+
+def upload(url, document, index):
+    """Uploads one document (without Wiki.js upload) and returns (ok, seconds)"""
+    start = time.perf_counter()
+    try:
+        response = requests.post(
+            url,
+            files={'files': (f'lasttest_{index}.html', document, 'text/html')},
+            data={'username': 'lasttest'},
+            timeout=600
+        )
+        ok = response.status_code == 200 and 'Fehlerhafte Exporte' not in response.text
+    except requests.RequestException:
+        ok = False
+    return ok, time.perf_counter() - start
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent upload throughput against DocFlow")
+    parser.add_argument('--url', default='http://localhost:5000/', help="DocFlow base URL")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--requests', type=int, default=10, help="Uploads per client")
+    parser.add_argument('--size-kb', type=int, default=20, help="Size of each uploaded document")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    document = generate_document(args.size_kb)
+    total = args.clients * args.requests
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda i: upload(args.url, document, i), range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds for _, seconds in results]
+    succeeded = sum(1 for ok, _ in results if ok)
+
+    summary = {
+        'clients': args.clients,
+        'requests': total,
+        'succeeded': succeeded,
+        'failed': total - succeeded,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+        'p50_s': round(percentile(latencies, 0.5), 3),
+        'p95_s': round(percentile(latencies, 0.95), 3),
+        'mean_s': round(statistics.mean(latencies), 3),
+    }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for key, value in summary.items():
+            print(f"{key:<16} {value}")
+    return 0 if succeeded == total else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
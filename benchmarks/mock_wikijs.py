@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Local mock of the Wiki.js GraphQL API for benchmarks
+
+Answers the queries DocFlow sends (page list, single page, bulk page
+contents, page creation) with an optional artificial latency, so upload
+and export round trips can be measured without a real Wiki.js instance.
+
+Usage:
+    python benchmarks/mock_wikijs.py [--port 3999] [--pages 200] [--latency-ms 20]
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Aliased single-page fields of a bulk content query: p0: pages { single(id: 12) { ... } }
+_ALIAS_PATTERN = re.compile(r'(\w+):\s*pages\s*\{\s*single\(id:\s*(\d+)\)')
+
+def generate_pages(count, paragraphs=20):
+    """Generates Markdown pages in a few nested folders"""
+    pages = {}
+    for i in range(1, count + 1):
+        body = "\n\n".join(
+            f"Absatz {p} der Seite {i}: Zugriffsrechte, Aufbewahrung und **Freigaben** im Überblick."
+            for p in range(paragraphs)
+        )
+        pages[i] = {
+            'id': i,
+            'path': f"bench/bereich-{i % 5}/seite-{i}",
+            'title': f"Seite {i}",
+            'contentType': 'markdown',
+            'updatedAt': '2025-01-01T00:00:00.000Z',
+            'description': '',
+            'content': f"# Seite {i}\n\n{body}\n",
+        }
+    return pages
+
+class MockWikiJS:
+    """Threaded HTTP server with an in-memory page store"""
+
+    def __init__(self, host='127.0.0.1', port=0, pages=100, latency_ms=0):
+        self.pages = generate_pages(pages)
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if mock.latency:
+                    time.sleep(mock.latency)
+                body = json.dumps(mock.answer(payload.get('query', ''), payload.get('variables') or {}))
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def answer(self, query, variables):
+        """Builds the GraphQL response for the query types DocFlow uses"""
+        with self._lock:
+            self.requests += 1
+
+            if 'create' in query:
+                page_id = max(self.pages, default=0) + 1
+                self.pages[page_id] = {
+                    'id': page_id,
+                    'path': variables.get('path', f"page-{page_id}"),
+                    'title': variables.get('title', ''),
+                    'contentType': 'markdown',
+                    'updatedAt': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+                    'description': variables.get('description', ''),
+                    'content': variables.get('content', ''),
+                }
+                page = self.pages[page_id]
+                return {'data': {'pages': {'create': {
+                    'responseResult': {'succeeded': True, 'errorCode': 0, 'slug': 'ok', 'message': 'Page created'},
+                    'page': {'id': page_id, 'path': page['path'], 'title': page['title']},
+                }}}}
+
+            aliases = _ALIAS_PATTERN.findall(query)
+            if aliases:
+                data = {}
+                errors = []
+                for alias, page_id in aliases:
+                    page = self.pages.get(int(page_id))
+                    if page is None:
+                        errors.append({'message': 'Page not found', 'path': [alias, 'single']})
+                        data[alias] = {'single': None}
+                    else:
+                        data[alias] = {'single': {'content': page['content'], 'title': page['title']}}
+                return dict({'data': data}, **({'errors': errors} if errors else {}))
+
+            if 'single' in query:
+                page = self.pages.get(int(variables.get('id', 0)))
+                if page is None:
+                    return {'errors': [{'message': 'Page not found'}]}
+                fields = ('id', 'path', 'title', 'description', 'content', 'updatedAt')
+                return {'data': {'pages': {'single': {key: page[key] for key in fields}}}}
+
+            if 'list' in query:
+                fields = ('id', 'path', 'title', 'contentType', 'updatedAt')
+                pages = [{key: page[key] for key in fields} for page in self.pages.values()]
+                return {'data': {'pages': {'list': pages}}}
+
+            return {'errors': [{'message': 'Unsupported query'}]}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Wiki.js GraphQL server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3999)
+    parser.add_argument('--pages', type=int, default=200, help="Number of generated pages")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Artificial latency per request")
+    args = parser.parse_args()
+
+    mock = MockWikiJS(args.host, args.port, args.pages, args.latency_ms)
+    print(f"Mock Wiki.js läuft unter {mock.url}/graphql ({args.pages} Seiten)")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
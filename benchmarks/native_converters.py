@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Benchmark and differential check: native HTML/RST/Org converters vs. Pandoc
+
+Every sample is converted natively and with Pandoc. The timings are
+compared, and both Markdown results are rendered to plain text with Pandoc
+so that formatting differences (list markers, escaping, line wrapping) do
+not count as mismatches. Samples the native converter hands over to Pandoc
+are reported as fallbacks.
+
+Usage:
+    python benchmarks/native_converters.py [--repeat 20] [--min-similarity 0.98] [--json]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import native_convert
+import process_runner
+
+SAMPLES = {
+    'notiz.html': (
+        "<html><head><title>Notiz</title><style>p { color: red; }</style></head><body>\n"
+        "<h1>Besprechung vom 12. März</h1>\n"
+        "<p>Teilnehmer: <strong>Vertrieb</strong>, <em>Technik</em> und die Geschäftsführung.</p>\n"
+        "<h2>Beschlüsse</h2>\n"
+        "<ul><li>Angebot für <a href=\"https://example.com/kunde\">Kunde A</a> bis Freitag</li>\n"
+        "<li>Neue Preise ab 1. April\n<ul><li>Standard: 10 %</li><li>Premium: 5 %</li></ul></li></ul>\n"
+        "<ol><li>Entwurf</li><li>Freigabe</li><li>Versand</li></ol>\n"
+        "<blockquote><p>Termine bitte im Kalender eintragen.</p></blockquote>\n"
+        "<pre><code>make release VERSION=2.1\n  --dry-run</code></pre>\n"
+        "<p>Zeile eins<br>Zeile zwei mit <code>inline_code()</code> &amp; Sonderzeichen [x] *y*.</p>\n"
+        "<hr><p><img src=\"logo.png\" alt=\"Logo\"> Ende.</p>\n"
+        "</body></html>\n"
+    ),
+    'tabelle.html': (
+        "<html><body><h1>Preisliste</h1>\n"
+        "<table><tr><th>Produkt</th><th>Preis</th></tr><tr><td>A</td><td>10</td></tr></table>\n"
+        "</body></html>\n"
+    ),
+    'handbuch.rst': (
+        "=========\n"
+        "Handbuch\n"
+        "=========\n\n"
+        "Einleitung\n"
+        "==========\n\n"
+        "Dieses Dokument beschreibt **wichtige** Abläufe und *optionale* Schritte.\n"
+        "Befehle wie ``docflow --help`` stehen im Anhang, siehe\n"
+        "`Projektseite <https://example.com/docflow>`_.\n\n"
+        "Installation\n"
+        "------------\n\n"
+        "- Pakete installieren\n"
+        "- Dienst starten\n\n"
+        "  - Status prüfen\n\n"
+        "1. Erster Schritt\n"
+        "2. Zweiter Schritt\n\n"
+        "Beispiel::\n\n"
+        "    sudo systemctl restart docflow\n"
+        "    sudo journalctl -u docflow\n\n"
+        "Abschluss des Kapitels.\n"
+    ),
+    'direktive.rst': (
+        "Hinweise\n"
+        "========\n\n"
+        ".. note::\n\n"
+        "   Direktiven werden an Pandoc übergeben.\n"
+    ),
+    'aufgaben.org': (
+        "#+TITLE: Aufgaben\n"
+        "#+OPTIONS: toc:nil\n\n"
+        "* Projekt Alpha\n"
+        "Die Umsetzung ist *dringend* und /gut dokumentiert/. Siehe [[https://example.com][Wiki]].\n"
+        "Befehl: =make test= oder ~pytest~.\n\n"
+        "** Schritte\n"
+        "- Planung\n"
+        "- Umsetzung\n"
+        "  - Code\n"
+        "  - Review\n"
+        "1. Abnahme\n"
+        "2. Rollout\n\n"
+        "#+BEGIN_SRC python\n"
+        "print('hallo')\n"
+        "#+END_SRC\n\n"
+        "#+BEGIN_QUOTE\n"
+        "Qualität vor Tempo.\n"
+        "#+END_QUOTE\n"
+    ),
+    'tabelle.org': (
+        "* Zahlen\n"
+        "| Monat | Umsatz |\n"
+        "|-------+--------|\n"
+        "| Jan   | 100    |\n"
+    ),
+}
+
+def pandoc_convert(path, input_format):
+    result = process_runner.run(['pandoc', path, '-f', input_format, '-t', 'markdown'])
+    return result.stdout
+
+def render_plain(markdown):
+    """Renders Markdown to normalized plain text for the comparison"""
+    result = process_runner.run(['pandoc', '-f', 'markdown', '-t', 'plain', '--wrap=none'], input=markdown)
+    return ' '.join(result.stdout.split())
+
+def time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare native converters against Pandoc")
+    parser.add_argument('--repeat', type=int, default=20, help="Repetitions per sample for the timings")
+    parser.add_argument('--min-similarity', type=float, default=0.98,
+                        help="Minimum plain-text similarity to Pandoc's result")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    formats = {'html': 'html', 'rst': 'rst', 'org': 'org'}
+    results = []
+    failed = False
+
+    with tempfile.TemporaryDirectory(prefix='docflow-native-') as work_dir:
+        for name, content in SAMPLES.items():
+            path = os.path.join(work_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            input_format = formats[name.rsplit('.', 1)[1]]
+
+            native = native_convert.try_convert(path, input_format)
+            pandoc = pandoc_convert(path, input_format)
+            entry = {'sample': name, 'native': native is not None}
+
+            if native is not None:
+                native_plain, pandoc_plain = render_plain(native), render_plain(pandoc)
+                similarity = difflib.SequenceMatcher(None, native_plain, pandoc_plain).ratio()
+                entry['similarity'] = round(similarity, 4)
+                entry['native_ms'] = round(time_call(lambda: native_convert.try_convert(path, input_format),
+                                                     args.repeat) * 1000, 3)
+                if similarity < args.min_similarity:
+                    failed = True
+                    entry['diff'] = list(difflib.unified_diff(
+                        pandoc_plain.split('. '), native_plain.split('. '), 'pandoc', 'native', lineterm=''))
+            entry['pandoc_ms'] = round(time_call(lambda: pandoc_convert(path, input_format),
+                                                 max(1, args.repeat // 4)) * 1000, 3)
+            results.append(entry)
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'Sample':<16} {'Pfad':<9} {'Ähnlichkeit':>11} {'Nativ ms':>10} {'Pandoc ms':>10}")
+        for entry in results:
+            print(f"{entry['sample']:<16} {'nativ' if entry['native'] else 'Pandoc':<9} "
+                  f"{entry.get('similarity', '-'):>11} {entry.get('native_ms', '-'):>10} {entry['pandoc_ms']:>10}")
+            for line in entry.get('diff', []):
+                print(f"    {line}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Benchmark: per-page PDF export time for every installed PDF backend
+
+Usage:
+    python benchmarks/pdf_backends.py [--pages 5] [--paragraphs 30] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export
+import process_runner
+
+def generate_page(index, paragraphs):
+    """Generates a Markdown page similar to a typical Wiki.js policy page"""
+    lines = [f"# Richtlinie {index}", ""]
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            lines += [f"## Abschnitt {i // 10 + 1}", ""]
+        lines += [
+            f"Absatz {i}: Diese Richtlinie beschreibt den Umgang mit Dokumenten, "
+            "Zugriffsrechten und Aufbewahrungsfristen im Unternehmen. "
+            "**Wichtig:** Änderungen müssen freigegeben werden.",
+            ""
+        ]
+        if i % 7 == 0:
+            lines += ["| Rolle | Recht |", "|---|---|", "| Admin | Schreiben |", "| Gast | Lesen |", ""]
+    return "\n".join(lines)
+
+def benchmark_engine(engine, md_files, work_dir):
+    """Exports every page to PDF with one backend and returns the timings in seconds"""
+    timings = []
+    failures = 0
+    for md_file in md_files:
+        output = os.path.join(work_dir, f"{engine}-{os.path.basename(md_file)}.pdf")
+        cmd = export.build_pandoc_export_command(md_file, output, 'pdf', {}, engine)
+        start = time.perf_counter()
+        try:
+            process_runner.run(cmd)
+            timings.append(time.perf_counter() - start)
+        except Exception:
+            failures += 1
+    return timings, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-page PDF export times across backends")
+    parser.add_argument('--pages', type=int, default=5, help="Number of pages per backend")
+    parser.add_argument('--paragraphs', type=int, default=30, help="Paragraphs per page")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable results")
+    args = parser.parse_args()
+
+    engines = export.get_available_pdf_engines()
+    if not engines:
+        print("Keine PDF-Engine installiert.", file=sys.stderr)
+        return 1
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        md_files = []
+        for i in range(args.pages):
+            md_file = os.path.join(work_dir, f"page{i}.md")
+            with open(md_file, 'w', encoding='utf-8') as f:
+                f.write(generate_page(i, args.paragraphs))
+            md_files.append(md_file)
+
+        for engine, label in engines:
+            timings, failures = benchmark_engine(engine, md_files, work_dir)
+            results[engine] = {
+                'label': label,
+                'pages': len(timings),
+                'failures': failures,
+                'mean_s': round(statistics.mean(timings), 3) if timings else None,
+                'median_s': round(statistics.median(timings), 3) if timings else None,
+                'max_s': round(max(timings), 3) if timings else None,
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Backend':<22} {'Seiten':>6} {'Fehler':>6} {'Mittel':>8} {'Median':>8} {'Max':>8}")
+        for result in results.values():
+            print(f"{result['label']:<22} {result['pages']:>6} {result['failures']:>6} "
+                  f"{result['mean_s'] or '-':>8} {result['median_s'] or '-':>8} {result['max_s'] or '-':>8}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
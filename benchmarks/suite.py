@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Benchmark suite: conversion, cleaning, sanitizing and Wiki.js round trips
+
+Generates a corpus (DOCX, ODT, PPTX and HTML in three sizes), starts the
+mock Wiki.js server from mock_wikijs.py and measures every stage in this
+process. The results are written as JSON with the current commit, so two
+runs can be compared with --compare.
+
+Usage:
+    python benchmarks/suite.py [--repeat 5] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app
+import utils
+import wikijs
+from mock_wikijs import MockWikiJS
+
+# Paragraph count per corpus size
+CORPUS_SIZES = {'small': 10, 'medium': 200, 'large': 2000}
+PANDOC_FORMATS = ('docx', 'odt', 'pptx')
+
+def quiet(message, log_type='info'):
+    """Discards the debug output of the measured functions"""
+
+def generate_markdown(paragraphs):
+    """Generates a document with headings, lists, tables and typical conversion artifacts"""
+    lines = ["# Handbuch", ""]
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            lines += [f"## Kapitel {i // 10 + 1}", ""]
+        lines += [
+            f"Absatz {i}: Dieses Dokument beschreibt **Abläufe**, *Zuständigkeiten* und "
+            "Fristen im Unternehmen. Seite 1 von 3",
+            ""
+        ]
+        if i % 5 == 0:
+            lines += ["- Punkt eins", "- Punkt zwei", "", "> zitierter Hinweis", ""]
+        if i % 20 == 0:
+            lines += ["| Rolle | Recht |", "|---|---|", "| Admin | Schreiben |", ""]
+    return "\n".join(lines) + "\n"
+
+def generate_html(paragraphs):
+    """Generates HTML directly, so the HTML benchmarks also run without Pandoc"""
+    parts = ["<html><body><h1>Handbuch</h1>"]
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"<h2>Kapitel {i // 10 + 1}</h2>")
+        parts.append(f"<p>Absatz {i}: Dieses Dokument beschreibt <strong>Abläufe</strong> und "
+                     "<em>Zuständigkeiten</em>.</p>")
+        if i % 5 == 0:
+            parts.append("<ul><li>Punkt eins</li><li>Punkt zwei</li></ul>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+def build_corpus(corpus_dir, has_pandoc):
+    """Writes the corpus files and returns {(format, size): path}"""
+    corpus = {}
+    for size, paragraphs in CORPUS_SIZES.items():
+        markdown = generate_markdown(paragraphs)
+        md_path = os.path.join(corpus_dir, f"{size}.md")
+        with open(md_path, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+
+        html_path = os.path.join(corpus_dir, f"{size}.html")
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(generate_html(paragraphs))
+        corpus[('html', size)] = html_path
+
+        if has_pandoc:
+            for fmt in PANDOC_FORMATS:
+                path = os.path.join(corpus_dir, f"{size}.{fmt}")
+                subprocess.run(['pandoc', md_path, '-o', path], check=True)
+                corpus[(fmt, size)] = path
+    return corpus
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+def measure(func, repeat, workers=1):
+    """Runs func repeat times (optionally in parallel) and summarizes the latencies"""
+    def timed(_):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(timed, range(repeat)))
+    else:
+        latencies = [timed(i) for i in range(repeat)]
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        'n': repeat,
+        'workers': workers,
+        'throughput_ops': round(repeat / elapsed, 2) if elapsed else None,
+        'p50_ms': round(ordered[int(0.5 * (len(ordered) - 1))] * 1000, 3),
+        'p95_ms': round(ordered[int(round(0.95 * (len(ordered) - 1)))] * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'children_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+def run_suite(args):
+    has_pandoc = shutil.which('pandoc') is not None
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix='docflow-bench-')
+
+    try:
+        corpus_dir = os.path.join(work_dir, 'corpus')
+        os.makedirs(corpus_dir)
+        corpus = build_corpus(corpus_dir, has_pandoc)
+
+        # Conversion: the full convert_to_markdown path (native or Pandoc)
+        for (fmt, size), path in sorted(corpus.items()):
+            output = os.path.join(work_dir, 'out', f"{size}-{fmt}.md")
+
+            def convert(path=path, output=output):
+                success, error = app.convert_to_markdown(path, output)
+                if not success:
+                    raise RuntimeError(error)
+
+            repeat = max(1, args.repeat // 5) if size == 'large' else args.repeat
+            results[f"convert.{fmt}.{size}"] = measure(convert, repeat)
+            results[f"convert.{fmt}.{size}"]['input_bytes'] = os.path.getsize(path)
+
+        # Cleaning and sanitizing
+        large_markdown = generate_markdown(CORPUS_SIZES['large'])
+        results['clean_markdown.large'] = measure(lambda: utils.clean_markdown_content(large_markdown),
+                                                  args.repeat * 4)
+        names = [f"Abteilung Öffentlichkeit/Bericht {i}: Übersicht & Maßnahmen?" for i in range(1000)]
+        results['sanitize.path_x1000'] = measure(lambda: [utils.sanitize_wikijs_path(n) for n in names],
+                                                 args.repeat * 4)
+        results['sanitize.title_x1000'] = measure(lambda: [utils.sanitize_wikijs_title(n) for n in names],
+                                                  args.repeat * 4)
+
+        # Wiki.js round trips against the mock server
+        mock = MockWikiJS(pages=args.pages, latency_ms=args.latency_ms).start()
+        try:
+            medium_markdown = generate_markdown(CORPUS_SIZES['medium'])
+            counter = iter(range(10 ** 9))
+
+            def upload():
+                success, _ = wikijs.upload_content(
+                    medium_markdown, f"bench-{next(counter)}.md", 'bench', mock.url, 'token',
+                    custom_path='bench/upload', debug_logger=quiet,
+                    sanitize_wikijs_path_fn=utils.sanitize_wikijs_path,
+                    sanitize_wikijs_title_fn=utils.sanitize_wikijs_title,
+                    clean_markdown_content_fn=utils.clean_markdown_content
+                )
+                if not success:
+                    raise RuntimeError("Upload fehlgeschlagen")
+
+            results['wikijs.upload'] = measure(upload, args.repeat * 4, workers=args.workers)
+
+            paths = [page['path'] for page in list(mock.pages.values())[:args.repeat * 4]]
+            path_iter = iter(paths * 2)
+
+            def fetch():
+                content, _ = wikijs.fetch_page_content(next(path_iter), mock.url, 'token', debug_logger=quiet)
+                if content is None:
+                    raise RuntimeError("Abruf fehlgeschlagen")
+
+            wikijs.page_content_cache.clear()
+            results['wikijs.fetch_cold'] = measure(fetch, len(paths), workers=args.workers)
+            results['wikijs.fetch_cached'] = measure(fetch, len(paths), workers=args.workers)
+            results['wikijs.requests'] = {'n': mock.requests}
+        finally:
+            mock.stop()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {'meta': collect_meta(has_pandoc, args), 'results': results}
+
+def collect_meta(has_pandoc, args):
+    def command_output(cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=ROOT).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    pandoc_version = command_output(['pandoc', '--version']) if has_pandoc else None
+    return {
+        'commit': command_output(['git', 'rev-parse', '--short', 'HEAD']),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandoc': pandoc_version.splitlines()[0] if pandoc_version else None,
+        'repeat': args.repeat,
+        'workers': args.workers,
+        'latency_ms': args.latency_ms,
+    }
+
+def compare(baseline, current):
+    """Prints the change of p50 latency and throughput per benchmark"""
+    print(f"\nVergleich mit {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    print(f"{'Benchmark':<28} {'p50 alt':>10} {'p50 neu':>10} {'Änderung':>9}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old or 'p50_ms' not in result or not old.get('p50_ms'):
+            continue
+        change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100
+        print(f"{name:<28} {old['p50_ms']:>10} {result['p50_ms']:>10} {change:>+8.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="DocFlow benchmark suite")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetitions per benchmark")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel requests for Wiki.js benchmarks")
+    parser.add_argument('--pages', type=int, default=100, help="Pages in the mock Wiki.js")
+    parser.add_argument('--latency-ms', type=float, default=5, help="Latency of the mock Wiki.js per request")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Compare with the results of an earlier run")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
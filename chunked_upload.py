@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Chunked, resumable file uploads
+
+Every upload is described by a small JSON file next to the partially
+received data in the session's upload directory. Because all state lives
+on disk, an interrupted upload can be resumed later, even if the next
+chunk is handled by another worker process.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, only threads are serialized there
+    fcntl = None
+
+# Suggested chunk size for clients
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Largest file accepted through the chunked upload
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024
+
+# Subdirectory of the session upload directory holding the upload state
+STATE_DIR = '.uploads'
+
+_ID_PATTERN = re.compile(r'^[0-9a-f\-]{32,36}$')
+_lock = threading.Lock()
+
+class UploadError(Exception):
+    """Raised for invalid upload requests; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, received=None):
+        super().__init__(message)
+        self.status = status
+        self.received = received
+
+def is_valid_id(value):
+    """Session and upload IDs are UUIDs; anything else could escape the upload folder"""
+    return bool(value and _ID_PATTERN.match(value))
+
+def _state_path(upload_folder, session_id, upload_id):
+    return os.path.join(upload_folder, session_id, STATE_DIR, f"{upload_id}.json")
+
+def _part_path(upload_folder, session_id, upload_id):
+    return os.path.join(upload_folder, session_id, STATE_DIR, f"{upload_id}.part")
+
+def _claim_path(upload_folder, session_id, upload_id):
+    return os.path.join(upload_folder, session_id, STATE_DIR, f"{upload_id}.finalizing")
+
+def _lock_path(upload_folder, session_id, upload_id):
+    return os.path.join(upload_folder, session_id, STATE_DIR, f"{upload_id}.lock")
+
+@contextmanager
+def _locked(upload_folder, session_id, upload_id):
+    """
+    Serializes read-modify-write of an upload state across threads and worker
+    processes (flock on a lock file, the state file itself is replaced on write)
+    """
+    if not is_valid_id(session_id) or not is_valid_id(upload_id):
+        raise UploadError("Ungültige Upload-ID", 404)
+
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        try:
+            lock_file = open(_lock_path(upload_folder, session_id, upload_id), 'a')
+        except FileNotFoundError:
+            raise UploadError("Upload nicht gefunden", 404)
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+def _write_state(upload_folder, state):
+    """Writes the upload state atomically"""
+    path = _state_path(upload_folder, state['session_id'], state['upload_id'])
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    state['updated'] = datetime.now().isoformat(timespec='seconds')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def get_upload(upload_folder, session_id, upload_id):
+    """Returns the state of an upload or raises UploadError(404)"""
+    if not is_valid_id(session_id) or not is_valid_id(upload_id):
+        raise UploadError("Ungültige Upload-ID", 404)
+
+    try:
+        with open(_state_path(upload_folder, session_id, upload_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        raise UploadError("Upload nicht gefunden", 404)
+
+def update_upload(upload_folder, session_id, upload_id, **changes):
+    """Changes fields of an upload state, e.g. the conversion status"""
+    with _locked(upload_folder, session_id, upload_id):
+        state = get_upload(upload_folder, session_id, upload_id)
+        state.update(changes)
+        _write_state(upload_folder, state)
+    return state
+
+def list_uploads(upload_folder, session_id):
+    """Returns the states of all uploads of a session, oldest first"""
+    if not is_valid_id(session_id):
+        return []
+
+    state_dir = os.path.join(upload_folder, session_id, STATE_DIR)
+    if not os.path.isdir(state_dir):
+        return []
+
+    uploads = []
+    for name in os.listdir(state_dir):
+        if name.endswith('.json'):
+            try:
+                uploads.append(get_upload(upload_folder, session_id, name[:-5]))
+            except UploadError:
+                continue
+    return sorted(uploads, key=lambda state: state['created'])
+
+def init_upload(upload_folder, session_id, filename, size, sha256=None, options=None,
+                max_file_size=DEFAULT_MAX_FILE_SIZE):
+    """
+    Registers a new upload
+
+    Args:
+        upload_folder: Base folder for uploads
+        session_id: Session the file belongs to (new session if None)
+        filename: Sanitized target filename
+        size: Total size in bytes
+        sha256: Expected SHA-256 hex digest of the complete file
+        options: Conversion options stored with the upload (wiki path, title, ...)
+
+    Returns:
+        dict: The upload state
+    """
+    if session_id is None:
+        session_id = str(uuid.uuid4())
+    elif not is_valid_id(session_id):
+        raise UploadError("Ungültige Session-ID")
+
+    if size < 0 or size > max_file_size:
+        raise UploadError(f"Datei zu groß (maximal {max_file_size // (1024 * 1024)} MB)", 413)
+
+    if not sha256:
+        raise UploadError("SHA-256-Prüfsumme fehlt")
+    if not re.match(r'^[0-9a-fA-F]{64}$', sha256):
+        raise UploadError("Ungültige SHA-256-Prüfsumme")
+
+    upload_id = uuid.uuid4().hex
+    os.makedirs(os.path.join(upload_folder, session_id, STATE_DIR), exist_ok=True)
+
+    # Create the empty part file, chunks are written into it at their offset
+    open(_part_path(upload_folder, session_id, upload_id), 'wb').close()
+
+    state = {
+        'upload_id': upload_id,
+        'session_id': session_id,
+        'filename': filename,
+        'size': size,
+        'sha256': sha256.lower(),
+        'received': 0,
+        'status': 'uploading',
+        'options': options or {},
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }
+    with _locked(upload_folder, session_id, upload_id):
+        _write_state(upload_folder, state)
+    return state
+
+def write_chunk(upload_folder, session_id, upload_id, offset, stream, chunk_size_limit=None):
+    """
+    Writes a chunk at the given offset
+
+    Chunks must be sent in order; resending already received data is allowed,
+    so a client may always resume from the 'received' value of the state.
+
+    Returns:
+        dict: The updated upload state
+    """
+    state = get_upload(upload_folder, session_id, upload_id)
+
+    if state['status'] != 'uploading':
+        raise UploadError("Upload ist bereits abgeschlossen", 409, state['received'])
+    if offset < 0 or offset > state['received']:
+        raise UploadError("Ungültiger Offset, bitte ab 'received' fortsetzen", 409, state['received'])
+
+    part_path = _part_path(upload_folder, session_id, upload_id)
+    written = 0
+    try:
+        f = open(part_path, 'r+b')
+    except FileNotFoundError:
+        # finalize_upload claimed the data in the meantime
+        raise UploadError("Upload wird bereits abgeschlossen", 409, state['received'])
+    with f:
+        f.seek(offset)
+        while True:
+            block = stream.read(64 * 1024)
+            if not block:
+                break
+            written += len(block)
+            if offset + written > state['size'] or (chunk_size_limit and written > chunk_size_limit):
+                raise UploadError("Chunk überschreitet die angemeldete Dateigröße", 413, state['received'])
+            f.write(block)
+
+    with _locked(upload_folder, session_id, upload_id):
+        state = get_upload(upload_folder, session_id, upload_id)
+        state['received'] = max(state['received'], offset + written)
+        _write_state(upload_folder, state)
+    return state
+
+def finalize_upload(upload_folder, session_id, upload_id):
+    """
+    Verifies size and checksum and moves the file into the session directory
+
+    The part file is first renamed to a claim file. The rename succeeds for
+    exactly one caller, even across worker processes, so concurrent finalize
+    requests for the same upload get a 409 instead of racing for the file.
+
+    Returns:
+        tuple: (state, path of the complete file)
+    """
+    state = get_upload(upload_folder, session_id, upload_id)
+
+    if state['status'] != 'uploading':
+        raise UploadError("Upload ist bereits abgeschlossen", 409, state['received'])
+    if state['received'] != state['size']:
+        raise UploadError("Upload ist unvollständig", 409, state['received'])
+
+    part_path = _part_path(upload_folder, session_id, upload_id)
+    claim_path = _claim_path(upload_folder, session_id, upload_id)
+    try:
+        os.rename(part_path, claim_path)
+    except FileNotFoundError:
+        raise UploadError("Upload wird bereits abgeschlossen", 409, state['received'])
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(claim_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+            size += len(block)
+    if size != state['size'] or digest.hexdigest() != state['sha256']:
+        # Start over: the data on disk is corrupt
+        open(part_path, 'wb').close()
+        os.remove(claim_path)
+        update_upload(upload_folder, session_id, upload_id, received=0)
+        raise UploadError("Prüfsumme stimmt nicht überein, bitte erneut hochladen", 422, 0)
+
+    file_path = os.path.join(upload_folder, session_id, state['filename'])
+    os.replace(claim_path, file_path)
+
+    state = update_upload(upload_folder, session_id, upload_id, status='queued')
+    return state, file_path
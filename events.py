@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Per-session event journal and server-sent events (SSE) stream
+
+Events are appended as JSON lines to a journal file in the session's
+upload directory. The SSE stream tails that file, so events written by
+any thread or worker process reach the browser, and the byte offset is
+used as event ID so a reconnecting browser continues where it stopped.
+
+In the distributed worker mode the events are kept in the shared job
+queue backend instead (see job_queue.py), so a browser connected to one
+web node sees the events written by a worker on another node.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+# File states reported for every uploaded file
+FILE_STATES = ('queued', 'converting', 'converted', 'uploading', 'uploaded', 'failed')
+
+JOURNAL_NAME = '.events.jsonl'
+
+# A single stream is closed after this time; EventSource reconnects on its own
+STREAM_MAX_SECONDS = 300
+HEARTBEAT_SECONDS = 15
+POLL_INTERVAL = 0.3
+# Reconnect delay suggested to browsers while all stream slots are taken
+BUSY_RETRY_MS = 10000
+
+_lock = threading.Lock()
+
+# Every open stream holds a web server thread; None = unlimited
+_stream_slots = None
+
+# Shared backend of the distributed worker mode; None keeps the local journal files
+_backend = None
+
+def configure(backend):
+    """Stores events in a job_queue backend instead of the local session directory"""
+    global _backend
+    _backend = backend
+
+def limit_streams(max_streams):
+    """Limits the number of SSE streams open at the same time in this process (0 = unlimited)"""
+    global _stream_slots
+    _stream_slots = threading.BoundedSemaphore(max_streams) if max_streams > 0 else None
+
+def _journal_path(upload_folder, session_id):
+    return os.path.join(upload_folder, session_id, JOURNAL_NAME)
+
+def emit(upload_folder, session_id, event, data):
+    """Appends an event to the session journal"""
+    entry = {
+        'event': event,
+        'time': datetime.now().strftime("%H:%M:%S"),
+        'data': data
+    }
+
+    if _backend is not None:
+        _backend.append_event(session_id, entry)
+        return
+
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    path = _journal_path(upload_folder, session_id)
+    with _lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One write call per line in append mode keeps lines from different processes intact
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+def read_events(upload_folder, session_id, offset=0):
+    """
+    Reads all complete events after a byte offset
+
+    Returns:
+        list: (offset after the event, event dict) tuples
+    """
+    if _backend is not None:
+        return _backend.read_events(session_id, offset)
+
+    path = _journal_path(upload_folder, session_id)
+    events = []
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Line is still being written, read it next time
+                    break
+                offset += len(raw)
+                try:
+                    events.append((offset, json.loads(raw)))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return events
+
+def format_sse(event_id, event):
+    """Formats an event in the text/event-stream format"""
+    data = json.dumps(dict(event['data'], time=event['time']), ensure_ascii=False)
+    return f"id: {event_id}\nevent: {event['event']}\ndata: {data}\n\n"
+
+def stream(upload_folder, session_id, last_event_id=0):
+    """
+    Generator for an SSE response: sends new events as they are written
+
+    The stream ends after the 'done' event or after STREAM_MAX_SECONDS.
+    When all slots of limit_streams are taken, it ends at once and asks the
+    browser to reconnect after BUSY_RETRY_MS, so the streams never occupy
+    every web server thread.
+    """
+    slots = _stream_slots
+    if slots is not None and not slots.acquire(blocking=False):
+        yield f"retry: {BUSY_RETRY_MS}\n\n"
+        return
+
+    try:
+        offset = last_event_id
+        started = time.monotonic()
+        last_sent = started
+
+        # Tell the browser how long to wait before reconnecting
+        yield "retry: 2000\n\n"
+
+        while time.monotonic() - started < STREAM_MAX_SECONDS:
+            events = read_events(upload_folder, session_id, offset)
+            for offset, event in events:
+                yield format_sse(offset, event)
+                if event['event'] == 'done':
+                    return
+
+            now = time.monotonic()
+            if events:
+                last_sent = now
+            elif now - last_sent >= HEARTBEAT_SECONDS:
+                # Comment line keeps proxies from closing the idle connection
+                yield ": heartbeat\n\n"
+                last_sent = now
+
+            time.sleep(POLL_INTERVAL)
+    finally:
+        # Also runs when the browser disconnects and the server closes the generator
+        if slots is not None:
+            slots.release()
@@ -12,17 +12,143 @@ import os
 import subprocess
 import zipfile
 import io
+import json
+import queue
+import re
+import shutil
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def log_debug(message, log_type='info'):
-    """Placeholder for log_debug function - will be replaced with app's function"""
+import process_runner
+import stage_timing
+
+def default_log_debug(message, log_type='info'):
+    """Fallback logger used when no debug_logger is passed"""
     print(f"[{log_type.upper()}] {message}")
 
+# Default sizes for the export pipeline (fetch -> convert -> archive)
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_CONVERT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DEFAULT_QUEUE_SIZE = 8
+# Pages per GraphQL request when a whole subtree is exported
+DEFAULT_BATCH_SIZE = 25
+
+# Name of the ZIP archive assembled while the export is running
+EXPORT_ARCHIVE_NAME = 'exported_pages.zip'
+
+# Text formats Pandoc writes to stdout; they go into the archive without an intermediate file
+STDOUT_FORMATS = ('html', 'tex', 'rtf')
+
+# File extensions that belong into the export archive
+EXPORT_EXTENSIONS = ('.md', '.docx', '.odt', '.rtf', '.pdf', '.html', '.tex', '.epub', '.pptx')
+
+# Marks the end of a pipeline queue
+_STOP = object()
+
+# PDF backends selectable per export: label, Pandoc --pdf-engine and whether LaTeX is used
+PDF_ENGINES = {
+    'latex': ('LaTeX (pdflatex)', 'pdflatex', True),
+    'xelatex': ('LaTeX (xelatex)', 'xelatex', True),
+    'weasyprint': ('HTML (WeasyPrint)', 'weasyprint', False),
+    'wkhtmltopdf': ('HTML (wkhtmltopdf)', 'wkhtmltopdf', False),
+}
+DEFAULT_PDF_ENGINE = 'latex'
+
+def get_available_pdf_engines():
+    """Returns the PDF backends whose engine is installed as list of (key, label)"""
+    return [(key, label) for key, (label, binary, _) in PDF_ENGINES.items() if shutil.which(binary)]
+
+def resolve_pdf_engine(pdf_engine):
+    """Returns a known PDF backend, falling back to the default for unknown values"""
+    if pdf_engine in PDF_ENGINES:
+        return pdf_engine
+    return DEFAULT_PDF_ENGINE
+
+def build_pandoc_export_command(md_filepath, output_filepath, output_format, output_format_mapping,
+                                pdf_engine=DEFAULT_PDF_ENGINE, extra_args=None):
+    """
+    Builds the Pandoc command line for exporting a Markdown file
+
+    Without md_filepath Pandoc reads the Markdown from stdin, without
+    output_filepath it writes to stdout (only for STDOUT_FORMATS).
+    """
+    extra_args = list(extra_args or [])
+    output_args = ['-o', output_filepath] if output_filepath else []
+    input_args = [md_filepath] if md_filepath else []
+
+    if output_format == "pdf":
+        _, engine_binary, _ = PDF_ENGINES[resolve_pdf_engine(pdf_engine)]
+        return [
+            'pandoc',
+            '-f', 'markdown',
+            '-t', 'pdf',
+            f'--pdf-engine={engine_binary}',
+            *extra_args,
+            *output_args,
+            *input_args
+        ]
+
+    return [
+        'pandoc',
+        '-f', 'markdown',
+        '-t', output_format_mapping[output_format],
+        *extra_args,
+        *output_args,
+        *input_args
+    ]
+
+def run_pandoc_export(markdown, output_filepath, output_format, output_format_mapping,
+                      pdf_engine=DEFAULT_PDF_ENGINE, extra_args=None):
+    """
+    Converts Markdown text with Pandoc through stdin
+
+    Text formats (STDOUT_FORMATS) come back through stdout and are returned
+    as bytes without touching the disk; binary formats and PDF are written
+    to output_filepath by Pandoc.
+
+    Returns:
+        bytes or None: The converted document for text formats, None if it was written to output_filepath
+    """
+    streamed = output_format in STDOUT_FORMATS
+    cmd = build_pandoc_export_command(None, None if streamed else output_filepath, output_format,
+                                      output_format_mapping, pdf_engine, extra_args=extra_args)
+    # Bytes in both directions: Pandoc reads and writes UTF-8 regardless of the service locale,
+    # and the output goes into the archive without a decode/encode round trip
+    try:
+        completed = process_runner.run(cmd, heavy=is_heavy_export(output_format, pdf_engine),
+                                       input=markdown.encode('utf-8'), text=False)
+    except subprocess.CalledProcessError as e:
+        # Callers log stderr as text
+        e.stderr = e.stderr.decode('utf-8', 'replace') if e.stderr else e.stderr
+        raise
+    return completed.stdout if streamed else None
+
+def is_heavy_export(output_format, pdf_engine=DEFAULT_PDF_ENGINE):
+    """PDF exports through LaTeX are the most expensive conversions"""
+    if output_format != "pdf":
+        return False
+    return PDF_ENGINES[resolve_pdf_engine(pdf_engine)][2]
+
 def export_pages_to_formats(page_paths, formats, session_id, result_folder, wikijs_url, wikijs_token,
-                            output_format_mapping, sanitize_filename_fn, fetch_page_content_fn, debug_logger=None):
+                            output_format_mapping, sanitize_filename_fn, fetch_page_content_fn, debug_logger=None,
+                            fetch_workers=DEFAULT_FETCH_WORKERS, convert_workers=DEFAULT_CONVERT_WORKERS,
+                            queue_size=DEFAULT_QUEUE_SIZE, pdf_engine=DEFAULT_PDF_ENGINE,
+                            fetch_batch_fn=None, batch_size=DEFAULT_BATCH_SIZE, keep_hierarchy=False,
+                            completed=None, on_page_done=None, profiled=None):
     """
     Export Wiki.js pages to various document formats using Pandoc
 
+    The export runs as a pipeline: fetcher threads load page contents from
+    Wiki.js, a pool of Pandoc workers converts them and a single archive
+    writer adds finished files to the session ZIP. The queues between the
+    stages are bounded, so fetching pauses while the converters are busy.
+    Pandoc reads the Markdown from memory through stdin; the Markdown and
+    text formats are added to the ZIP straight from memory, only binary
+    formats and PDF are written to the session directory.
+
     Args:
         page_paths: List of Wiki.js page paths to export
         formats: List of output formats
@@ -34,106 +160,582 @@ def export_pages_to_formats(page_paths, formats, session_id, result_folder, wiki
         sanitize_filename_fn: Function to sanitize filenames
         fetch_page_content_fn: Function to fetch page content
         debug_logger: Debug logger function
+        fetch_workers: Number of threads fetching page contents
+        convert_workers: Number of parallel Pandoc conversions
+        queue_size: Maximum number of fetched pages waiting for conversion
+        pdf_engine: PDF backend from PDF_ENGINES used for PDF exports
+        fetch_batch_fn: Optional function fetching several pages with one request,
+            returns a dict path -> (content, title); used instead of fetch_page_content_fn
+        batch_size: Number of pages per fetch_batch_fn call
+        keep_hierarchy: Name the files after the Wiki.js path (folders included)
+            instead of the page title
+        completed: Pages finished by an interrupted run of this export, dict
+            path -> output file names; they are neither fetched nor converted
+            again and their entries are kept from the existing session archive
+        on_page_done: Called with (path, converted file names, failed exports,
+            archive entries) once all formats of a page are converted
+        profiled: Optional wrapper for the functions run in the worker threads
+            (RequestProfiler.profiled of a profiled request)
 
     Returns:
-        tuple: (converted_files, failed_files, debug_data)
+        tuple: (converted_files, failed_files, debug_data); debug_data contains the
+        stage timings (fetch, pandoc_<format>) of every page. With
+        keep_hierarchy the file names are paths relative to the archive root.
+        Pages whose file names would collide with an earlier page get their
+        page number appended (e.g. Title_3.pdf).
     """
-    global log_debug
-    if debug_logger:
-        log_debug = debug_logger
+    log_debug = debug_logger or default_log_debug
+    profiled = profiled or (lambda func: func)
 
+    completed = completed or {}
     log_debug(f"Starting export of {len(page_paths)} pages to formats: {', '.join(formats)}")
+    if completed:
+        log_debug(f"Resuming export: {len(completed)} pages were already exported")
+
+    pdf_engine = resolve_pdf_engine(pdf_engine)
+    if "pdf" in formats:
+        log_debug(f"Using PDF backend: {PDF_ENGINES[pdf_engine][0]}")
 
     # Create session directories
     export_dir = os.path.join(result_folder, session_id)
     os.makedirs(export_dir, exist_ok=True)
 
-    converted_files = []
-    failed_files = []
+    # Finished pages keep their position, so the result lists stay in page order
+    converted = [((index, file_index), name)
+                 for index, page_path in enumerate(page_paths) if page_path in completed
+                 for file_index, name in enumerate(completed[page_path])]
+    pending = [(index, page_path) for index, page_path in enumerate(page_paths) if page_path not in completed]
+
+    fetch_tasks = len(pending) if fetch_batch_fn is None else -(-len(pending) // max(1, batch_size))
+    fetch_workers = max(1, min(fetch_workers, fetch_tasks or 1))
+    convert_workers = max(1, convert_workers)
+
+    # Results are collected with their position so the final lists keep the page order
+    failed = []
     debug_data = {}
+    # A page is handled by one fetch thread and then one converter, never concurrently
+    timers = {path: stage_timing.StageTimer() for path in page_paths}
 
-    for page_path in page_paths:
-        try:
-            # Get page content from Wiki.js
-            log_debug(f"Fetching content for page: {page_path}")
-            page_content, page_title = fetch_page_content_fn(page_path, wikijs_url, wikijs_token, debug_logger)
+    convert_queue = queue.Queue(maxsize=max(1, queue_size))
+    archive_queue = queue.Queue(maxsize=max(1, queue_size) * max(1, len(formats) + 1))
+
+    # Archive entries of the finished pages: the Markdown and one file per converted format
+    completed_stems = {os.path.splitext(name)[0] for names in completed.values() for name in names}
+    completed_entries = ({archive_name(name) for names in completed.values() for name in names}
+                         | {archive_name(f"{stem}.md") for stem in completed_stems})
+
+    # File names already in use (case-insensitive, the archive may be unpacked on Windows)
+    used_stems = {stem.casefold() for stem in completed_stems}
+    # Pages are named in page order, so a collision suffix does not depend on which fetch finishes first
+    naming = threading.Condition()
+    naming_order = [index for index, _ in pending]
+    named = set()
+    next_to_name = [0]
+
+    def unique_stem(stem, index):
+        """
+        Appends the page number when an earlier page already uses the file name
+
+        Waits until all earlier pages are named; pages that fail pass stem=None
+        so the following ones can go on.
+        """
+        with naming:
+            if index in named:
+                return stem
+            while naming_order[next_to_name[0]] != index:
+                naming.wait()
+            candidate, attempt = stem, 0
+            while candidate is not None and candidate.casefold() in used_stems:
+                attempt += 1
+                candidate = f"{stem}_{index + 1}" if attempt == 1 else f"{stem}_{index + 1}_{attempt}"
+            if candidate is not None:
+                used_stems.add(candidate.casefold())
+            named.add(index)
+            while next_to_name[0] < len(naming_order) and naming_order[next_to_name[0]] in named:
+                next_to_name[0] += 1
+            naming.notify_all()
+            return candidate
 
-            # Store debug data for this page
-            debug_data[page_path] = {
-                'title': page_title,
-                'content_length': len(page_content) if page_content else 0,
-                'has_content': bool(page_content)
-            }
+    def store_page(index, page_path, page_content, page_title):
+        """Adds a fetched page to the archive and hands it to the converters"""
+        timer = timers[page_path]
 
-            if not page_content:
-                error_msg = "No content found"
-                log_debug(f"No content found for page: {page_path}", "error")
-                failed_files.append(f"{page_path} (no content)")
-                continue
+        # Store debug data for this page
+        debug_data[page_path] = {
+            'title': page_title,
+            'content_length': len(page_content) if page_content else 0,
+            'has_content': bool(page_content)
+        }
 
-            # If no title was returned, use the last part of the path
-            if not page_title:
-                page_title = os.path.basename(page_path)
+        if not page_content:
+            log_debug(f"No content found for page: {page_path}", "error")
+            failed.append(((index, -1), f"{page_path} (no content)"))
+            unique_stem(None, index)
+            return
 
-            if not page_title:
-                page_title = "untitled"
+        # If no title was returned, use the last part of the path
+        if not page_title:
+            page_title = os.path.basename(page_path)
 
+        if not page_title:
+            page_title = "untitled"
+
+        if keep_hierarchy:
+            # Every path segment becomes a folder, so the archive mirrors the Wiki.js tree
+            safe_title = hierarchy_file_stem(page_path, sanitize_filename_fn)
+        else:
             # Sanitize the title for filename use
             safe_title = sanitize_filename_fn(page_title)
-            log_debug(f"Using title: {page_title} (sanitized as: {safe_title})")
+        # Two titles with the same sanitized name must not share a file
+        safe_title = unique_stem(safe_title, index)
+        log_debug(f"Using title: {page_title} (sanitized as: {safe_title})")
 
-            # Create temporary markdown file
-            md_filename = f"{safe_title}.md"
-            md_filepath = os.path.join(export_dir, md_filename)
+        # The Markdown goes into the archive from memory, no file is written
+        archive_queue.put((archive_name(f"{safe_title}.md"), page_content.encode('utf-8')))
 
-            with open(md_filepath, 'w', encoding='utf-8') as f:
-                f.write(page_content)
+        # Blocks while the converters are behind (backpressure)
+        convert_queue.put((index, page_path, page_title, safe_title, page_content, timer))
+
+    def fetch_page(index, page_path):
+        """Fetch stage: loads a page from Wiki.js and passes it on"""
+        timer = timers[page_path]
+        try:
+            # Get page content from Wiki.js
+            log_debug(f"Fetching content for page: {page_path}")
+            with timer.stage('fetch') as info:
+                page_content, page_title = fetch_page_content_fn(page_path, wikijs_url, wikijs_token, debug_logger)
+                info['bytes_out'] = len(page_content.encode('utf-8')) if page_content else 0
+
+            store_page(index, page_path, page_content, page_title)
+
+        except Exception as e:
+            log_debug(f"Unexpected error processing {page_path}: {str(e)}", "error")
+            failed.append(((index, -1), page_path))
+            unique_stem(None, index)
+
+    def fetch_batch(batch):
+        """Fetch stage for fetch_batch_fn: one request for several pages"""
+        paths = [page_path for _, page_path in batch]
+        try:
+            log_debug(f"Fetching content for {len(paths)} pages: {paths[0]} ...")
+            with stage_timing.StageTimer().stage('fetch') as info:
+                contents = fetch_batch_fn(paths, wikijs_url, wikijs_token, debug_logger)
+                info['batch_pages'] = len(paths)
+        except Exception as e:
+            log_debug(f"Unexpected error fetching {len(paths)} pages: {str(e)}", "error")
+            contents = {}
+            info = None
+
+        for index, page_path in batch:
+            try:
+                page_content, page_title = contents.get(page_path, (None, None))
+                if info is not None:
+                    timers[page_path].record(dict(
+                        info, bytes_out=len(page_content.encode('utf-8')) if page_content else 0))
+                store_page(index, page_path, page_content, page_title)
+            except Exception as e:
+                log_debug(f"Unexpected error processing {page_path}: {str(e)}", "error")
+                failed.append(((index, -1), page_path))
+                unique_stem(None, index)
+
+    def convert_worker():
+        """Convert stage: runs Pandoc for every requested format of a page"""
+        while True:
+            job = convert_queue.get()
+            if job is _STOP:
+                break
+
+            index, page_path, page_title, safe_title, page_content, timer = job
+            md_size = len(page_content.encode('utf-8'))
+            page_converted = []
+            page_failed = []
 
             # Convert to requested formats
-            for output_format in formats:
+            for format_index, output_format in enumerate(formats):
                 output_filename = f"{safe_title}.{output_format}"
                 output_filepath = os.path.join(export_dir, output_filename)
 
-                log_debug(f"Converting {page_path} to {output_format}")
-
-                # Prepare command
-                if output_format == "pdf":
-                    cmd = [
-                        'pandoc',
-                        '-f', 'markdown',
-                        '-t', 'pdf',
-                        '-o', output_filepath,
-                        md_filepath
-                    ]
-                else:
-                    cmd = [
-                        'pandoc',
-                        '-f', 'markdown',
-                        '-t', output_format_mapping[output_format],
-                        '-o', output_filepath,
-                        md_filepath
-                    ]
+                log_debug(f"Converting {page_title} to {output_format}")
 
                 # Execute conversion
                 try:
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        check=True
-                    )
-                    converted_files.append(output_filename)
+                    if output_format not in STDOUT_FORMATS:
+                        os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
+                    with timer.stage(f"pandoc_{output_format}", bytes_in=md_size) as info:
+                        data = run_pandoc_export(page_content, output_filepath, output_format,
+                                                 output_format_mapping, pdf_engine)
+                        info['bytes_out'] = len(data) if data is not None else os.path.getsize(output_filepath)
+                    converted.append(((index, format_index), output_filename))
+                    page_converted.append(output_filename)
+                    archive_queue.put((archive_name(output_filename), data) if data is not None else output_filepath)
                     log_debug(f"Successfully converted {page_title} to {output_format}", "success")
+                except process_runner.ConversionTimeout as e:
+                    log_debug(f"Timeout converting {page_title} to {output_format}: {str(e)}", "error")
+                    page_failed.append((format_index, f"{page_title} ({output_format}, timeout)"))
+                except process_runner.ConversionRejected as e:
+                    log_debug(f"Conversion of {page_title} to {output_format} rejected: {str(e)}", "error")
+                    page_failed.append((format_index, f"{page_title} ({output_format}, rejected)"))
                 except subprocess.CalledProcessError as e:
                     log_debug(f"Pandoc error converting {page_title} to {output_format}: {e.stderr}", "error")
-                    failed_files.append(f"{page_title} ({output_format})")
+                    page_failed.append((format_index, f"{page_title} ({output_format})"))
                 except Exception as e:
                     log_debug(f"Error converting {page_title} to {output_format}: {str(e)}", "error")
-                    failed_files.append(f"{page_title} ({output_format})")
+                    page_failed.append((format_index, f"{page_title} ({output_format})"))
+            failed.extend(((index, format_index), name) for format_index, name in page_failed)
+
+            if on_page_done is not None:
+                entries = [archive_name(f"{safe_title}.md")] + [archive_name(name) for name in page_converted]
+                try:
+                    on_page_done(page_path, page_converted, [name for _, name in page_failed], entries)
+                except Exception as e:
+                    log_debug(f"Error recording progress of {page_path}: {str(e)}", "error")
+
+    def archive_writer():
+        """Archive stage: adds finished files to the session ZIP as they arrive"""
+        archive_path = os.path.join(export_dir, EXPORT_ARCHIVE_NAME)
+        salvaged_path = f"{archive_path}.salvaged"
+        written = set()
+        stopped = False
+        # A resumed export keeps the entries of the finished pages from the archive salvaged by
+        # recover_archive; entries of unfinished pages are dropped, as these pages are exported again
+        if completed and os.path.exists(archive_path):
+            os.replace(archive_path, salvaged_path)
+        try:
+            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                if os.path.exists(salvaged_path):
+                    with zipfile.ZipFile(salvaged_path) as salvaged:
+                        for info in salvaged.infolist():
+                            if info.filename in completed_entries:
+                                with salvaged.open(info) as src, zipf.open(info, 'w') as dst:
+                                    shutil.copyfileobj(src, dst)
+                                written.add(info.filename)
+                    os.remove(salvaged_path)
+                while True:
+                    item = archive_queue.get()
+                    if item is _STOP:
+                        stopped = True
+                        break
+
+                    # Either (name, data) from memory or the path of a file Pandoc wrote
+                    if isinstance(item, tuple):
+                        arcname, data = item
+                    else:
+                        arcname, data = archive_name(os.path.relpath(item, export_dir)), None
+                    if arcname in written:
+                        continue
+                    if data is None:
+                        zipf.write(item, arcname)
+                    else:
+                        zipf.writestr(arcname, data)
+                    written.add(arcname)
+        except Exception as e:
+            log_debug(f"Error writing export archive: {str(e)}", "error")
+            # Keep draining the queue so the converters never block; files that only
+            # existed in memory are written to disk for the directory based fallback
+            while not stopped:
+                item = archive_queue.get()
+                if item is _STOP:
+                    break
+                if isinstance(item, tuple):
+                    write_export_file(export_dir, *item)
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
+
+    archive_thread = threading.Thread(target=profiled(archive_writer), name=f"export-archive-{session_id[:8]}")
+    archive_thread.start()
+
+    converter_threads = [
+        threading.Thread(target=profiled(convert_worker), name=f"export-convert-{session_id[:8]}-{i}")
+        for i in range(convert_workers)
+    ]
+    for thread in converter_threads:
+        thread.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix=f"export-fetch-{session_id[:8]}") as pool:
+            if fetch_batch_fn is None:
+                for index, page_path in pending:
+                    pool.submit(profiled(fetch_page), index, page_path)
+            else:
+                step = max(1, batch_size)
+                for start in range(0, len(pending), step):
+                    pool.submit(profiled(fetch_batch), pending[start:start + step])
+    finally:
+        for _ in converter_threads:
+            convert_queue.put(_STOP)
+        for thread in converter_threads:
+            thread.join()
+
+        archive_queue.put(_STOP)
+        archive_thread.join()
+
+    converted_files = [name for _, name in sorted(converted, key=lambda item: item[0])]
+    failed_files = [name for _, name in sorted(failed, key=lambda item: item[0])]
+    debug_data = {path: debug_data[path] for path in page_paths if path in debug_data}
+    for path, data in debug_data.items():
+        data['timings'] = timers[path].as_dict()
+
+    return converted_files, failed_files, debug_data
+
+def normalize_path_prefix(prefix):
+    """Removes surrounding slashes and whitespace from a Wiki.js path prefix"""
+    return (prefix or '').strip().strip('/')
+
+def select_pages_by_prefix(pages_by_path, prefix):
+    """
+    Selects the pages at and below a Wiki.js path
+
+    'handbook/it' matches 'handbook/it' and 'handbook/it/vpn', but not
+    'handbook/items'. An empty prefix selects every page.
+
+    Returns:
+        list: Matching page paths, sorted so that folders stay together
+    """
+    prefix = normalize_path_prefix(prefix)
+    if not prefix:
+        return sorted(pages_by_path)
+    return sorted(path for path in pages_by_path if path == prefix or path.startswith(prefix + '/'))
+
+def archive_name(relative_path):
+    """Name of a file inside the export archive (always with forward slashes)"""
+    return relative_path.replace(os.sep, '/')
+
+def write_export_file(export_dir, arcname, data):
+    """Writes an in-memory archive entry to the session directory"""
+    file_path = os.path.join(export_dir, *arcname.split('/'))
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'wb') as f:
+        f.write(data)
+
+def hierarchy_file_stem(page_path, sanitize_filename_fn):
+    """Relative file path without extension for a page, one folder per path segment"""
+    segments = [sanitize_filename_fn(segment) for segment in page_path.strip('/').split('/') if segment]
+    return os.path.join(*[segment or 'untitled' for segment in segments]) if segments else 'untitled'
+
+# Setext underline ("Title" followed by "=====" or "-----")
+_SETEXT_UNDERLINE = re.compile(r'^ {0,3}(=+|-+)[ \t]*$')
+# Lines that open a block other than a paragraph (list, quote, heading, table, HTML, indented code)
+# Opening or closing code fence (CommonMark): at least three backticks or tildes
+_CODE_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$')
+_NON_PARAGRAPH_START = re.compile(r'^(?: {4}|\t| {0,3}(?:[-+*>#|<]|\d+[.)](?:\s|$)))')
+
+def shift_markdown_headings(content, shift=1):
+    """
+    Shifts all headings by the given number of levels.
+    ATX headings ("# Title") keep their form, Setext headings ("Title" underlined
+    with "=" or "-") are rewritten as ATX headings of the shifted level.
+    Headings inside fenced code blocks are left untouched, the deepest level is 6.
+    """
+    lines = []
+    # Fence of the open code block; it closes only with the same character and at least its length
+    fence = None
+    # Index of the first line of the open paragraph, -1 inside another block
+    paragraph = None
+
+    for line in content.splitlines():
+        stripped = line.lstrip()
+        code_fence = _CODE_FENCE.match(line)
+        if fence is None and code_fence and not (code_fence.group(1)[0] == '`' and '`' in code_fence.group(2)):
+            fence = code_fence.group(1)
+            paragraph = None
+            lines.append(line)
+            continue
+
+        if fence is not None:
+            if (code_fence and code_fence.group(1)[0] == fence[0] and len(code_fence.group(1)) >= len(fence)
+                    and not code_fence.group(2).strip()):
+                fence = None
+            lines.append(line)
+            continue
+
+        if not stripped:
+            paragraph = None
+            lines.append(line)
+            continue
+
+        setext = _SETEXT_UNDERLINE.match(line)
+        if setext and paragraph is not None and paragraph >= 0:
+            # The whole paragraph above the underline is the heading text
+            text = ' '.join(previous.strip() for previous in lines[paragraph:])
+            level = min(6, (1 if setext.group(1).startswith('=') else 2) + shift)
+            del lines[paragraph:]
+            lines.append('#' * level + ' ' + text)
+            paragraph = None
+            continue
+
+        match = re.match(r'^(#{1,6})(\s)', line)
+        if match:
+            level = min(6, len(match.group(1)) + shift)
+            line = '#' * level + line[len(match.group(1)):]
+            paragraph = None
+        elif paragraph is None:
+            paragraph = -1 if _NON_PARAGRAPH_START.match(line) else len(lines)
+
+        lines.append(line)
+
+    return "\n".join(lines) + ("\n" if content.endswith("\n") else "")
+
+def build_combined_markdown(pages, book_title):
+    """
+    Concatenates pages into one Markdown document.
+
+    Args:
+        pages: List of (page_path, page_title, page_content), already ordered
+        book_title: Title of the combined document
+
+    Returns:
+        str: Markdown with a title block and one top-level chapter per page
+    """
+    # A JSON string is a valid double-quoted YAML scalar (backslashes and quotes escaped)
+    parts = [f'---\ntitle: {json.dumps(book_title, ensure_ascii=False)}\n---\n']
+
+    for page_path, page_title, page_content in pages:
+        parts.append(f"# {page_title}\n")
+        parts.append(shift_markdown_headings(page_content, 1).strip() + "\n")
+
+    return "\n".join(parts)
+
+def export_pages_combined(page_paths, formats, session_id, result_folder, wikijs_url, wikijs_token,
+                          output_format_mapping, sanitize_filename_fn, fetch_page_content_fn, debug_logger=None,
+                          fetch_workers=DEFAULT_FETCH_WORKERS, pdf_engine=DEFAULT_PDF_ENGINE, book_title=None,
+                          profiled=None):
+    """
+    Export Wiki.js pages as one combined document per format
+
+    The pages are ordered by their path hierarchy, each page becomes a chapter
+    with its headings shifted one level down, and Pandoc runs only once per
+    format with a generated table of contents.
 
+    Args:
+        page_paths: List of Wiki.js page paths to export
+        formats: List of output formats
+        session_id: Session ID for storing results
+        result_folder: Folder for storing results
+        wikijs_url: Wiki.js URL
+        wikijs_token: Wiki.js API token
+        output_format_mapping: Mapping of formats to pandoc format strings
+        sanitize_filename_fn: Function to sanitize filenames
+        fetch_page_content_fn: Function to fetch page content
+        debug_logger: Debug logger function
+        fetch_workers: Number of threads fetching page contents
+        pdf_engine: PDF backend from PDF_ENGINES used for PDF exports
+        book_title: Title of the combined document
+        profiled: Optional wrapper for the functions run in the fetch threads
+            (RequestProfiler.profiled of a profiled request)
+
+    Returns:
+        tuple: (converted_files, failed_files, debug_data); debug_data contains the fetch
+        timings of every page and an entry for the combined document itself
+    """
+    log_debug = debug_logger or default_log_debug
+    profiled = profiled or (lambda func: func)
+
+    log_debug(f"Starting combined export of {len(page_paths)} pages to formats: {', '.join(formats)}")
+
+    pdf_engine = resolve_pdf_engine(pdf_engine)
+    book_title = (book_title or "").strip() or f"Wiki.js Export {datetime.now().strftime('%Y-%m-%d')}"
+
+    # Create session directories
+    export_dir = os.path.join(result_folder, session_id)
+    os.makedirs(export_dir, exist_ok=True)
+
+    converted_files = []
+    failed_files = []
+    debug_data = {}
+
+    # Order by path hierarchy so parent pages come before their children
+    ordered_paths = sorted(page_paths, key=lambda path: path.strip('/').split('/'))
+
+    timers = {path: stage_timing.StageTimer() for path in ordered_paths}
+
+    def fetch_page(page_path):
+        log_debug(f"Fetching content for page: {page_path}")
+        try:
+            with timers[page_path].stage('fetch') as info:
+                page_content, page_title = fetch_page_content_fn(page_path, wikijs_url, wikijs_token, debug_logger)
+                info['bytes_out'] = len(page_content.encode('utf-8')) if page_content else 0
+            return page_content, page_title
         except Exception as e:
             log_debug(f"Unexpected error processing {page_path}: {str(e)}", "error")
-            failed_files.append(page_path)
+            return None, None
+
+    fetch_workers = max(1, min(fetch_workers, len(ordered_paths) or 1))
+    with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix=f"export-fetch-{session_id[:8]}") as pool:
+        fetched = list(pool.map(profiled(fetch_page), ordered_paths))
+
+    pages = []
+    for page_path, (page_content, page_title) in zip(ordered_paths, fetched):
+        debug_data[page_path] = {
+            'title': page_title,
+            'content_length': len(page_content) if page_content else 0,
+            'has_content': bool(page_content),
+            'timings': timers[page_path].as_dict()
+        }
+
+        if not page_content:
+            log_debug(f"No content found for page: {page_path}", "error")
+            failed_files.append(f"{page_path} (no content)")
+            continue
+
+        pages.append((page_path, page_title or os.path.basename(page_path) or "untitled", page_content))
+
+    if not pages:
+        log_debug("No page content available for the combined document", "error")
+        return converted_files, failed_files, debug_data
+
+    safe_title = sanitize_filename_fn(book_title)
+    md_filename = f"{safe_title}.md"
+    md_filepath = os.path.join(export_dir, md_filename)
+
+    combined_markdown = build_combined_markdown(pages, book_title)
+    combined_timer = stage_timing.StageTimer()
+    # The Markdown file is part of the download; Pandoc gets the text through stdin
+    with combined_timer.stage('write_markdown') as info:
+        with open(md_filepath, 'w', encoding='utf-8') as f:
+            f.write(combined_markdown)
+        info['bytes_out'] = os.path.getsize(md_filepath)
+    md_size = info['bytes_out']
+
+    log_debug(f"Combined {len(pages)} pages into {md_filename}")
+
+    for output_format in formats:
+        output_filename = f"{safe_title}.{output_format}"
+        output_filepath = os.path.join(export_dir, output_filename)
+
+        log_debug(f"Converting combined document to {output_format}")
+
+        try:
+            with combined_timer.stage(f"pandoc_{output_format}", bytes_in=md_size) as info:
+                data = run_pandoc_export(combined_markdown, output_filepath, output_format,
+                                         output_format_mapping, pdf_engine,
+                                         extra_args=['--standalone', '--toc'])
+                if data is not None:
+                    # A single document is downloaded on its own, so text formats are stored as well
+                    with open(output_filepath, 'wb') as f:
+                        f.write(data)
+                info['bytes_out'] = os.path.getsize(output_filepath)
+            converted_files.append(output_filename)
+            log_debug(f"Successfully converted combined document to {output_format}", "success")
+        except process_runner.ConversionTimeout as e:
+            log_debug(f"Timeout converting combined document to {output_format}: {str(e)}", "error")
+            failed_files.append(f"{book_title} ({output_format}, timeout)")
+        except process_runner.ConversionRejected as e:
+            log_debug(f"Conversion of combined document to {output_format} rejected: {str(e)}", "error")
+            failed_files.append(f"{book_title} ({output_format}, rejected)")
+        except subprocess.CalledProcessError as e:
+            log_debug(f"Pandoc error converting combined document to {output_format}: {e.stderr}", "error")
+            failed_files.append(f"{book_title} ({output_format})")
+        except Exception as e:
+            log_debug(f"Error converting combined document to {output_format}: {str(e)}", "error")
+            failed_files.append(f"{book_title} ({output_format})")
+
+    debug_data[md_filename] = {
+        'title': book_title,
+        'content_length': md_size,
+        'has_content': True,
+        'combined': True,
+        'timings': combined_timer.as_dict()
+    }
 
     return converted_files, failed_files, debug_data
 
@@ -152,6 +754,82 @@ def create_zip_file(session_id, result_folder):
     memory_file.seek(0)
     return memory_file
 
+def _zip_date_time(dos_date, dos_time):
+    return ((dos_date >> 9) + 1980, max(1, (dos_date >> 5) & 0x0F), max(1, dos_date & 0x1F),
+            dos_time >> 11, (dos_time >> 5) & 0x3F, (dos_time & 0x1F) * 2)
+
+def recover_archive(archive_path):
+    """
+    Salvages the complete entries of an export archive whose writer was interrupted
+
+    An archive the process could not close has no central directory, but
+    zipfile writes the size and CRC of every finished entry into its
+    local header. The entries are read one after another up to the first
+    incomplete one and copied into a new archive that replaces the old one.
+
+    Returns:
+        set: Entry names of the (repaired) archive, empty without an archive
+    """
+    try:
+        with zipfile.ZipFile(archive_path) as zipf:
+            return set(zipf.namelist())
+    except FileNotFoundError:
+        return set()
+    except (OSError, zipfile.BadZipFile):
+        pass
+
+    names = set()
+    recovered_path = archive_path + '.recovered'
+    with open(archive_path, 'rb') as src, zipfile.ZipFile(recovered_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        while True:
+            header = src.read(30)
+            if len(header) < 30 or header[:4] != b'PK\x03\x04':
+                break
+            (flags, method, dos_time, dos_date, crc,
+             compressed_size, file_size, name_length, extra_length) = struct.unpack('<6xHHHHIIIHH', header)
+            name = src.read(name_length).decode('utf-8' if flags & 0x800 else 'cp437')
+            extra = src.read(extra_length)
+            if compressed_size == 0xFFFFFFFF or file_size == 0xFFFFFFFF:
+                # ZIP64: the sizes are in the extra field with ID 1
+                offset = 0
+                while offset + 4 <= len(extra):
+                    field_id, field_size = struct.unpack_from('<HH', extra, offset)
+                    if field_id == 1 and field_size >= 16:
+                        file_size, compressed_size = struct.unpack_from('<QQ', extra, offset + 4)
+                        break
+                    offset += 4 + field_size
+            # Sizes in a data descriptor are only used for unseekable output; not written here
+            if flags & 0x08 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                break
+            data = src.read(compressed_size)
+            if len(data) < compressed_size:
+                break
+            try:
+                content = zlib.decompress(data, -15) if method == zipfile.ZIP_DEFLATED else data
+            except zlib.error:
+                break
+            if len(content) != file_size or zlib.crc32(content) != crc:
+                break
+            zipf.writestr(zipfile.ZipInfo(name, _zip_date_time(dos_date, dos_time)), content,
+                          compress_type=zipfile.ZIP_DEFLATED)
+            names.add(name)
+    os.replace(recovered_path, archive_path)
+    return names
+
+def read_exported_file(session_id, result_folder, filename):
+    """
+    Reads an exported file that only exists inside the export archive
+
+    Returns:
+        bytes or None: File content, None if neither archive nor entry exist
+    """
+    archive_path = os.path.join(result_folder, session_id, EXPORT_ARCHIVE_NAME)
+    try:
+        with zipfile.ZipFile(archive_path) as zipf:
+            return zipf.read(archive_name(filename))
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
 def create_exported_zip(session_id, result_folder):
     """Creates a ZIP file with all exported files"""
     session_result_dir = os.path.join(result_folder, session_id)
@@ -159,16 +837,19 @@ def create_exported_zip(session_id, result_folder):
     if not os.path.exists(session_result_dir):
         return None
 
+    # The export pipeline already assembled the archive while converting
+    archive_path = os.path.join(session_result_dir, EXPORT_ARCHIVE_NAME)
+    if os.path.exists(archive_path):
+        return open(archive_path, 'rb')
+
     memory_file = io.BytesIO()
 
     with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
         for root, dirs, files in os.walk(session_result_dir):
             for file in files:
-                if file.endswith(('.md', '.docx', '.odt', '.rtf', '.pdf', '.html', '.tex', '.epub', '.pptx')):
-                    zipf.write(
-                        os.path.join(root, file),
-                        os.path.basename(file)
-                    )
+                if file.endswith(EXPORT_EXTENSIONS):
+                    file_path = os.path.join(root, file)
+                    zipf.write(file_path, os.path.relpath(file_path, session_result_dir))
 
     memory_file.seek(0)
     return memory_file
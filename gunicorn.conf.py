@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Gunicorn configuration for production mode
+
+Start:   gunicorn --config gunicorn.conf.py app:app
+Reload:  kill -HUP <master pid>   (systemctl reload tresorhaus-docflow)
+"""
+
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Netzwerk
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Worker-Prozesse und Threads pro Worker. Konvertierungen laufen als
+# Pandoc-Unterprozesse, daher reichen wenige Prozesse mit mehreren Threads.
+workers = int(os.getenv('WEB_WORKERS', min(4, multiprocessing.cpu_count())))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 4))
+
+# Große Uploads und PDF-Exporte können lange dauern
+timeout = int(os.getenv('WEB_TIMEOUT', 600))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 120))
+keepalive = 5
+
+# Worker regelmäßig erneuern, um Speicherwachstum zu begrenzen. Gunicorn wartet dabei nur
+# auf offene Anfragen; Konvertierungen im Hintergrund (Live-Fortschritt) setzt das
+# Job-Journal (JOB_JOURNAL_DB, vom Installationsskript gesetzt) in einem anderen Worker fort
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = 100
+
+# Begrenzung der Anfragegröße (die Body-Größe begrenzt MAX_UPLOAD_MB in app.py)
+limit_request_line = 8190
+limit_request_fields = 200
+limit_request_field_size = 8190
+
+# Logging ins Journal
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+def on_starting(server):
+    """Stellt vor dem Start der Worker sicher, dass die statischen Dateien existieren"""
+    from utils import ensure_static_files_exist
+    ensure_static_files_exist(os.path.dirname(os.path.abspath(__file__)))
@@ -48,6 +48,23 @@ if [ -z "$WIKIJS_EXTERNAL_URL" ]; then
     warning "Keine externe URL angegeben. Verwende Wiki.js URL als externe URL."
 fi
 
+# Betriebsmodus abfragen
+read -p "Betriebsmodus wählen (1 = Produktion mit Gunicorn, 2 = Flask-Entwicklungsserver) [1]: " SERVER_MODE
+if [ "$SERVER_MODE" = "2" ]; then
+    warning "Entwicklungsserver gewählt. Nicht für den Produktivbetrieb geeignet."
+    EXEC_START="$VENV_DIR/bin/python $INSTALL_DIR/app.py"
+    EXEC_RELOAD=""
+    DEBUG_MODE="True"
+else
+    SERVER_MODE="1"
+    EXEC_START="$VENV_DIR/bin/gunicorn --config $INSTALL_DIR/gunicorn.conf.py app:app"
+    EXEC_RELOAD="ExecReload=/bin/kill -s HUP \$MAINPID"
+    DEBUG_MODE="False"
+fi
+
+# Gemeinsamer Schlüssel für alle Worker-Prozesse
+SECRET_KEY=$(python3 -c "import secrets; print(secrets.token_hex(32))")
+
 # SystemD Service Definition
 SERVICE_CONTENT="[Unit]
 Description= DocFlow Service
@@ -59,7 +76,10 @@ User=$SERVICE_USER
 Group=$SERVICE_USER
 WorkingDirectory=$INSTALL_DIR
 Environment=PATH=$VENV_DIR/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin
-ExecStart=$VENV_DIR/bin/python $INSTALL_DIR/app.py
+ExecStart=$EXEC_START
+$EXEC_RELOAD
+KillMode=mixed
+TimeoutStopSec=130
 Restart=always
 RestartSec=3
 
@@ -69,11 +89,11 @@ WantedBy=multi-user.target"
 # Benötigte Pakete installieren
 log "Installiere benötigte System-Pakete..."
 apt-get update
-apt-get install -y python3-venv python3-pip pandoc \
+apt-get install -y python3-venv python3-pip pandoc poppler-utils \
     texlive-latex-base texlive-fonts-recommended texlive-latex-extra \
     wget curl imagemagick python3-pil \
-    libreoffice-writer libreoffice-common \
-    librsvg2-bin fonts-liberation2
+    libreoffice-writer libreoffice-impress libreoffice-calc libreoffice-common python3-uno \
+    librsvg2-bin fonts-liberation2 weasyprint
 # Benutzer erstellen
 log "Erstelle Service-Benutzer..."
 if id "$SERVICE_USER" &>/dev/null; then
@@ -87,11 +107,31 @@ log "Erstelle Installationsverzeichnis..."
 mkdir -p $INSTALL_DIR
 mkdir -p $INSTALL_DIR/static
 mkdir -p $TEMPLATES_DIR
+# Job-Journal: Hintergrund-Konvertierungen überstehen das Erneuern von Gunicorn-Workern
+mkdir -p $INSTALL_DIR/data
 
 # Kopiere Anwendungsdateien
 log "Kopiere Anwendungsdateien..."
 cp app.py $INSTALL_DIR/
 cp utils.py $INSTALL_DIR/
+cp process_runner.py $INSTALL_DIR/
+cp page_cache.py $INSTALL_DIR/
+cp assets.py $INSTALL_DIR/
+cp chunked_upload.py $INSTALL_DIR/
+cp events.py $INSTALL_DIR/
+cp native_convert.py $INSTALL_DIR/
+cp page_split.py $INSTALL_DIR/
+cp libreoffice.py $INSTALL_DIR/
+cp stage_timing.py $INSTALL_DIR/
+cp job_queue.py $INSTALL_DIR/
+cp worker.py $INSTALL_DIR/
+cp scheduler.py $INSTALL_DIR/
+cp wiki_mirror.py $INSTALL_DIR/
+cp similarity.py $INSTALL_DIR/
+cp spreadsheet.py $INSTALL_DIR/
+cp pdf_extract.py $INSTALL_DIR/
+cp job_journal.py $INSTALL_DIR/
+cp gunicorn.conf.py $INSTALL_DIR/
 
 # Kopiere neue Moduldateien
 if [ -f "wikijs.py" ]; then
@@ -131,6 +171,9 @@ cat > $INSTALL_DIR/.env << EOF
 WIKIJS_URL=$WIKIJS_URL
 WIKIJS_TOKEN=$WIKIJS_TOKEN
 WIKIJS_EXTERNAL_URL=$WIKIJS_EXTERNAL_URL
+SECRET_KEY=$SECRET_KEY
+DEBUG=$DEBUG_MODE
+JOB_JOURNAL_DB=$INSTALL_DIR/data/jobs.db
 EOF
 
 # Erstelle requirements.txt falls nicht vorhanden
@@ -141,12 +184,14 @@ Flask==2.3.3
 Werkzeug==2.3.7
 requests==2.31.0
 python-dotenv==1.0.0
+gunicorn==21.2.0
 EOF
 fi
 
-# Python Virtual Environment erstellen
+# Python Virtual Environment erstellen; die System-Pakete bleiben sichtbar,
+# damit python3-uno (LibreOffice-Prozesspool) importiert werden kann
 log "Erstelle Python Virtual Environment..."
-python3 -m venv $VENV_DIR
+python3 -m venv --system-site-packages $VENV_DIR
 
 # Abhängigkeiten installieren
 log "Installiere Python-Abhängigkeiten..."
@@ -190,6 +235,11 @@ echo -e "\n${GREEN}===  DocFlow Installation ====${NC}"
 echo -e "Installationsverzeichnis: $INSTALL_DIR"
 echo -e "Service-Name: $SERVICE_NAME"
 echo -e "Service-Benutzer: $SERVICE_USER"
+if [ "$SERVER_MODE" = "1" ]; then
+    echo -e "Betriebsmodus: Produktion (Gunicorn, Konfiguration: $INSTALL_DIR/gunicorn.conf.py)"
+else
+    echo -e "Betriebsmodus: Entwicklungsserver"
+fi
 echo -e "Web-Interface: http://localhost:5000"
 echo -e "Wiki.js URL: $WIKIJS_URL"
 echo -e "Wiki.js External URL: $WIKIJS_EXTERNAL_URL"
@@ -197,6 +247,7 @@ echo -e "Templates-Verzeichnis: $TEMPLATES_DIR"
 echo -e "\nBefehle für die Verwaltung:"
 echo -e "  Status anzeigen:    sudo systemctl status $SERVICE_NAME"
 echo -e "  Service neustarten: sudo systemctl restart $SERVICE_NAME"
+echo -e "  Sanft neu laden:    sudo systemctl reload $SERVICE_NAME (nur Produktionsmodus)"
 echo -e "  Logs anzeigen:      sudo journalctl -u $SERVICE_NAME -f"
 echo -e "\nWiki.js Konfiguration:"
 echo -e "  Konfigurationsdatei: $INSTALL_DIR/.env"
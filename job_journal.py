@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Crash-safe journal of running upload batches and exports
+
+Every batch is recorded in a local SQLite database (WAL mode) before its
+work starts, together with one item per file or page whose state is
+updated after each completed step (saved, converted, uploading with the
+resolved Wiki.js path, uploaded). The process running a job refreshes a
+heartbeat; when the service restarts or a worker process exits, jobs of
+dead processes are claimed by another process and continued from the
+last recorded step instead of from scratch.
+
+The journal is local to one node and is not used in the distributed
+worker mode, where the shared job queue takes care of lost jobs.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+# Interval of the heartbeat and of the search for orphaned jobs
+HEARTBEAT_SECONDS = 10
+# Jobs whose owner has not refreshed the heartbeat for this long are taken over
+STALE_SECONDS = 60
+# A job that was resumed this often without finishing (e.g. it crashes the process) is given up
+MAX_ATTEMPTS = 3
+DEFAULT_RETENTION_HOURS = 24
+
+JOB_STATES = ('running', 'done', 'failed')
+
+def _connect(db_path):
+    return sqlite3.connect(db_path, timeout=30, isolation_level=None)
+
+class JobJournal:
+    """Journal of jobs and their items in SQLite"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT 'running',
+            options TEXT NOT NULL,
+            client TEXT,
+            owner TEXT,
+            owner_host TEXT,
+            owner_pid INTEGER,
+            heartbeat_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            finished_at REAL,
+            result TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, heartbeat_at);
+        CREATE TABLE IF NOT EXISTS items (
+            job_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            details TEXT NOT NULL DEFAULT '{}',
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (job_id, name)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path, retention_hours=DEFAULT_RETENTION_HOURS, debug_logger=None):
+        self.db_path = os.path.abspath(db_path)
+        self.retention = retention_hours * 3600
+        self.log_debug = debug_logger or (lambda message, log_type='info': None)
+        self._local = threading.local()
+        self._host = socket.gethostname()
+        self._owner = None
+        self._owner_pid = None
+        self._runner_pid = None
+        self._resume_fn = None
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = _connect(self.db_path)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _conn(self):
+        """One connection per thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = _connect(self.db_path)
+            # Durable once the commit returns, also if the process is killed right after
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @property
+    def owner(self):
+        """Identity of this process; a new one after a fork"""
+        if self._owner_pid != os.getpid():
+            self._owner = f"{self._host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._owner_pid = os.getpid()
+        return self._owner
+
+    def create(self, job_id, kind, options, items=(), client=None):
+        """
+        Records a new job owned by this process
+
+        Args:
+            job_id: Session ID of the batch
+            kind: 'upload' or 'export'
+            options: JSON-serializable options needed to run the job again
+            items: (position, name) of the files or pages, state 'saved'
+            client: Identifier of the client (browser session), shown with resumed jobs
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, options, client, owner, owner_host, owner_pid, heartbeat_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(options, ensure_ascii=False), client, self.owner, self._host,
+                 os.getpid(), now, now))
+            self._insert_items(conn, job_id, items, now)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.start()
+
+    def _insert_items(self, conn, job_id, items, now):
+        conn.executemany(
+            "INSERT OR IGNORE INTO items (job_id, name, position, state, updated_at) VALUES (?, ?, ?, 'saved', ?)",
+            [(job_id, name, position, now) for position, name in items])
+
+    def add_items(self, job_id, items):
+        """Adds items to a job once they are known (e.g. the pages below an export prefix)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._insert_items(conn, job_id, items, time.time())
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def item_state(self, job_id, name, state, **details):
+        """Records the completed step of an item; details are merged with the earlier ones"""
+        self._conn().execute(
+            "UPDATE items SET state = ?, details = json_patch(details, ?), updated_at = ? WHERE job_id = ? AND name = ?",
+            (state, json.dumps(details, ensure_ascii=False), time.time(), job_id, name))
+
+    def state_reporter(self, job_id, on_state=None):
+        """
+        Wraps an on_state callback (filename, state, **details) so every
+        state is recorded in the journal before it is passed on
+        """
+        def report(name, state, **details):
+            try:
+                self.item_state(job_id, name, state, **details)
+            except Exception as e:
+                self.log_debug(f"Job-Journal konnte Status von {name} nicht speichern: {e}", "warning")
+            if on_state is not None:
+                on_state(name, state, **details)
+        return report
+
+    def items(self, job_id):
+        """Items of a job in their original order"""
+        rows = self._conn().execute(
+            "SELECT name, position, state, details FROM items WHERE job_id = ? ORDER BY position", (job_id,))
+        return [{'name': name, 'position': position, 'state': state, 'details': json.loads(details)}
+                for name, position, state, details in rows]
+
+    def finish(self, job_id, result=None, state='done'):
+        """Marks a job as finished; unknown job IDs are ignored"""
+        self._conn().execute(
+            "UPDATE jobs SET state = ?, result = ?, finished_at = ?, owner = NULL WHERE id = ?",
+            (state, json.dumps(result, ensure_ascii=False) if result is not None else None, time.time(), job_id))
+
+    def discard(self, job_id):
+        """Removes a job that was never started (e.g. rejected by the scheduler)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def release(self, job_id):
+        """Gives a claimed job back so it is picked up again later"""
+        self._conn().execute("UPDATE jobs SET owner = NULL, attempts = attempts - 1 WHERE id = ? AND owner = ?",
+                             (job_id, self.owner))
+
+    def get(self, job_id):
+        row = self._conn().execute(
+            "SELECT id, kind, state, options, client, attempts, created_at, finished_at, result FROM jobs WHERE id = ?",
+            (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def _job(self, row):
+        job_id, kind, state, options, client, attempts, created_at, finished_at, result = row
+        return {
+            'id': job_id,
+            'kind': kind,
+            'state': state,
+            'options': json.loads(options),
+            'client': client,
+            'attempts': attempts,
+            'created_at': created_at,
+            'finished_at': finished_at,
+            'result': json.loads(result) if result else None,
+        }
+
+    def resumed_jobs(self, kind, client):
+        """Finished jobs of a client that were completed after a restart, newest first"""
+        rows = self._conn().execute(
+            "SELECT id, kind, state, options, client, attempts, created_at, finished_at, result FROM jobs "
+            "WHERE kind = ? AND client = ? AND attempts > 0 AND state != 'running' ORDER BY created_at DESC LIMIT 20",
+            (kind, client))
+        return [self._job(row) for row in rows]
+
+    def _is_orphaned(self, owner, owner_host, owner_pid, heartbeat_at, now):
+        if owner is None:
+            return True
+        if owner == self.owner:
+            return False
+        if owner_host == self._host and owner_pid:
+            try:
+                os.kill(owner_pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return (heartbeat_at or 0) < now - STALE_SECONDS
+
+    def claim_orphans(self):
+        """
+        Takes over running jobs whose process is gone
+
+        Returns:
+            list: Job dicts now owned by this process (attempts counts the takeovers)
+        """
+        now = time.time()
+        conn = self._conn()
+        candidates = conn.execute(
+            "SELECT id, owner, owner_host, owner_pid, heartbeat_at, attempts FROM jobs WHERE state = 'running'"
+        ).fetchall()
+
+        claimed = []
+        for job_id, owner, owner_host, owner_pid, heartbeat_at, attempts in candidates:
+            if not self._is_orphaned(owner, owner_host, owner_pid, heartbeat_at, now):
+                continue
+            if attempts >= MAX_ATTEMPTS:
+                self.log_debug(f"Job {job_id} nach {attempts} Wiederaufnahmen aufgegeben", "error")
+                self.finish(job_id, {'error': 'Verarbeitung wurde mehrfach abgebrochen'}, state='failed')
+                continue
+            # Only one process wins the update; owner IS ? also matches NULL
+            cursor = conn.execute(
+                "UPDATE jobs SET owner = ?, owner_host = ?, owner_pid = ?, heartbeat_at = ?, attempts = attempts + 1 "
+                "WHERE id = ? AND state = 'running' AND owner IS ?",
+                (self.owner, self._host, os.getpid(), now, job_id, owner))
+            if cursor.rowcount == 1:
+                claimed.append(self.get(job_id))
+        return claimed
+
+    def heartbeat(self):
+        self._conn().execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND state = 'running'",
+                             (time.time(), self.owner))
+
+    def prune(self):
+        """Deletes finished jobs older than the retention time"""
+        conn = self._conn()
+        cutoff = time.time() - self.retention
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute("DELETE FROM items WHERE job_id IN "
+                         "(SELECT id FROM jobs WHERE state != 'running' AND finished_at < ?)", (cutoff,))
+            conn.execute("DELETE FROM jobs WHERE state != 'running' AND finished_at < ?", (cutoff,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def configure_resume(self, resume_fn):
+        """Sets the function called with every job taken over by this process"""
+        self._resume_fn = resume_fn
+
+    def start(self):
+        """Starts the heartbeat and resume thread of this process (again after a fork)"""
+        if self._runner_pid == os.getpid():
+            return
+        self._runner_pid = os.getpid()
+        threading.Thread(target=self._run, name='job-journal', daemon=True).start()
+
+    def _run(self):
+        last_prune = 0
+        while True:
+            try:
+                self.heartbeat()
+                # Processes that cannot run jobs (e.g. scripts importing the app) only keep their heartbeat
+                for job in self.claim_orphans() if self._resume_fn is not None else ():
+                    self.log_debug(f"Setze unterbrochenen Job {job['id']} ({job['kind']}) fort, "
+                                   f"Versuch {job['attempts']}", "warning")
+                    try:
+                        self._resume_fn(job)
+                    except Exception as e:
+                        self.log_debug(f"Job {job['id']} konnte nicht fortgesetzt werden: {e}", "error")
+                        self.finish(job['id'], {'error': str(e)}, state='failed')
+                if time.time() - last_prune > 3600:
+                    self.prune()
+                    last_prune = time.time()
+            except Exception as e:
+                self.log_debug(f"Job-Journal: {e}", "error")
+            time.sleep(HEARTBEAT_SECONDS)
+
+    def stats(self):
+        """Returns the job counts for monitoring"""
+        counts = dict(self._conn().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in JOB_STATES}
+
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Shared job queue and session storage for the distributed worker mode
+
+Web nodes put conversion and export jobs into a shared queue and store the
+uploaded files in a shared storage; worker processes (worker.py) on any
+node claim the jobs, run them in their local directories and store the
+results back. Session events (events.py) go through the same backend, so
+every web node can stream progress and serve downloads of every session.
+
+Two backends share one interface:
+- SQLiteBackend ("sqlite:///path/queue.db"): SQLite database plus a file
+  directory next to it. Meant for several worker processes on one host
+  and for tests; SQLite locking is not reliable on network file systems.
+- RedisBackend ("redis://host:6379/0"): any Redis-compatible server
+  (Redis, Valkey, KeyDB). Needs the optional `redis` package.
+
+A running job is kept alive by heartbeats; jobs of a worker that stopped
+sending them are queued again (at most MAX_ATTEMPTS times).
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import redis
+except ImportError:  # Optional, only needed for redis:// queue URLs
+    redis = None
+
+# Job status values
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_RESULT_TTL = 24 * 3600
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 0.5
+# Size of the parts a file is stored in with Redis (a Redis value holds at most 512 MB)
+FILE_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Storage areas of a session
+UPLOADS = 'uploads'
+RESULTS = 'results'
+
+def _check_name(name):
+    """Stored names are relative paths inside a session; nothing may escape it"""
+    parts = name.replace('\\', '/').split('/')
+    if not name or name.startswith('/') or any(part in ('', '.', '..') for part in parts):
+        raise ValueError(f"Ungültiger Dateiname: {name}")
+    return '/'.join(parts)
+
+class SQLiteBackend:
+    """Queue and events in SQLite, session files in a directory next to the database"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            created REAL NOT NULL,
+            heartbeat REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            event TEXT NOT NULL,
+            created REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS events_session ON events (session_id, id);
+    """
+
+    def __init__(self, db_path, storage_dir=None, result_ttl=DEFAULT_RESULT_TTL):
+        self.db_path = os.path.abspath(db_path)
+        self.storage_dir = storage_dir or os.path.join(os.path.dirname(self.db_path), 'files')
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        os.makedirs(self.storage_dir, exist_ok=True)
+
+        # Separate connection, so no connection is shared with forked worker processes
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _conn(self):
+        """One connection per thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, sql, params=()):
+        return self._conn().execute(sql, params)
+
+    # Jobs
+
+    def enqueue(self, kind, payload):
+        job_id = uuid.uuid4().hex
+        self._write(
+            "INSERT INTO jobs (id, kind, payload, status, created) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), time.time())
+        )
+        return job_id
+
+    def _claim_once(self, worker_id):
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so two workers never claim the same job
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, heartbeat = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker_id, time.time(), row['id'])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if row is None:
+            return None
+        return {'id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload']),
+                'attempts': row['attempts'] + 1}
+
+    def claim(self, worker_id, timeout=5):
+        """Waits up to timeout seconds for the oldest queued job and marks it as running"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self._claim_once(worker_id)
+            if job is not None or time.monotonic() >= deadline:
+                return job
+            time.sleep(POLL_INTERVAL)
+
+    def heartbeat(self, job_id):
+        self._write("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+
+    def finish(self, job_id, result=None, error=None):
+        self._write(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, heartbeat = ? WHERE id = ?",
+            ('failed' if error else 'done', json.dumps(result, ensure_ascii=False), error, time.time(), job_id)
+        )
+
+    def get_job(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'attempts': row['attempts'],
+        }
+
+    def requeue_stale(self, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Queues jobs again whose worker stopped sending heartbeats; returns their number"""
+        limit = time.time() - lease_seconds
+        self._write(
+            "UPDATE jobs SET status = 'failed', error = 'Worker nicht mehr erreichbar' "
+            "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+            (limit, max_attempts)
+        )
+        cursor = self._write(
+            "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat < ?",
+            (limit,)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {state: 0 for state in JOB_STATES}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+
+    # Events
+
+    def append_event(self, session_id, event):
+        self._write(
+            "INSERT INTO events (session_id, event, created) VALUES (?, ?, ?)",
+            (session_id, json.dumps(event, ensure_ascii=False), time.time())
+        )
+
+    def read_events(self, session_id, offset=0):
+        rows = self._conn().execute(
+            "SELECT id, event FROM events WHERE session_id = ? AND id > ? ORDER BY id", (session_id, offset)
+        ).fetchall()
+        return [(row['id'], json.loads(row['event'])) for row in rows]
+
+    # Files
+
+    def _file_path(self, session_id, name):
+        return os.path.join(self.storage_dir, _check_name(session_id), *_check_name(name).split('/'))
+
+    def put_file(self, session_id, name, source_path):
+        target = self._file_path(session_id, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, target)
+
+    def get_file(self, session_id, name, target_path):
+        """Copies a stored file to target_path; returns False if it does not exist"""
+        try:
+            shutil.copyfile(self._file_path(session_id, name), target_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list_files(self, session_id, area):
+        base = os.path.join(self.storage_dir, _check_name(session_id), area)
+        names = []
+        for root, _, files in os.walk(base):
+            for file in files:
+                if not file.endswith('.tmp'):
+                    rel_path = os.path.relpath(os.path.join(root, file), base).replace(os.sep, '/')
+                    names.append(f"{area}/{rel_path}")
+        return sorted(names)
+
+    def delete_session(self, session_id):
+        shutil.rmtree(os.path.join(self.storage_dir, _check_name(session_id)), ignore_errors=True)
+        self._write("DELETE FROM events WHERE session_id = ?", (session_id,))
+
+    def cleanup(self):
+        """Removes sessions, events and finished jobs older than result_ttl"""
+        limit = time.time() - self.result_ttl
+        self._write("DELETE FROM events WHERE created < ?", (limit,))
+        self._write("DELETE FROM jobs WHERE status IN ('done', 'failed') AND heartbeat < ?", (limit,))
+        for name in os.listdir(self.storage_dir):
+            path = os.path.join(self.storage_dir, name)
+            if os.path.isdir(path) and os.path.getmtime(path) < limit:
+                shutil.rmtree(path, ignore_errors=True)
+
+class RedisBackend:
+    """
+    Queue, events and session files in a Redis-compatible server
+
+    Claimed jobs move atomically from the queue list to a processing list,
+    so a job is never lost between claiming and the first heartbeat. Files
+    are kept as lists of FILE_CHUNK_SIZE parts, listed in one hash per
+    session, and expire with the session.
+    """
+
+    def __init__(self, url, prefix='docflow', result_ttl=DEFAULT_RESULT_TTL):
+        if redis is None:
+            raise RuntimeError("Für eine redis://-Warteschlange wird das Paket 'redis' benötigt (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+
+    def _key(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    # Jobs
+
+    def enqueue(self, kind, payload):
+        job_id = uuid.uuid4().hex
+        pipe = self.client.pipeline()
+        pipe.hset(self._key('job', job_id), mapping={
+            'kind': kind,
+            'payload': json.dumps(payload, ensure_ascii=False),
+            'status': 'queued',
+            'attempts': 0,
+            'created': time.time(),
+        })
+        pipe.lpush(self._key('queue'), job_id)
+        pipe.execute()
+        return job_id
+
+    def claim(self, worker_id, timeout=5):
+        job_id = self.client.brpoplpush(self._key('queue'), self._key('processing'), timeout=max(1, int(timeout)))
+        if job_id is None:
+            return None
+        job_id = job_id.decode()
+        key = self._key('job', job_id)
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={'status': 'running', 'worker': worker_id, 'heartbeat': time.time()})
+        pipe.hincrby(key, 'attempts', 1)
+        pipe.hmget(key, 'kind', 'payload')
+        _, attempts, (kind, payload) = pipe.execute()
+        if kind is None:
+            # Job hash expired or was removed
+            self.client.lrem(self._key('processing'), 0, job_id)
+            return None
+        return {'id': job_id, 'kind': kind.decode(), 'payload': json.loads(payload), 'attempts': attempts}
+
+    def heartbeat(self, job_id):
+        self.client.hset(self._key('job', job_id), 'heartbeat', time.time())
+
+    def finish(self, job_id, result=None, error=None):
+        key = self._key('job', job_id)
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping={
+            'status': 'failed' if error else 'done',
+            'result': json.dumps(result, ensure_ascii=False),
+            'error': error or '',
+            'heartbeat': time.time(),
+        })
+        pipe.expire(key, self.result_ttl)
+        pipe.lrem(self._key('processing'), 0, job_id)
+        pipe.execute()
+
+    def get_job(self, job_id):
+        data = {key.decode(): value.decode() for key, value in self.client.hgetall(self._key('job', job_id)).items()}
+        if not data:
+            return None
+        return {
+            'id': job_id,
+            'kind': data['kind'],
+            'status': data['status'],
+            'result': json.loads(data['result']) if data.get('result') else None,
+            'error': data.get('error') or None,
+            'attempts': int(data.get('attempts', 0)),
+        }
+
+    def requeue_stale(self, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        limit = time.time() - lease_seconds
+        requeued = 0
+        for raw_id in self.client.lrange(self._key('processing'), 0, -1):
+            job_id = raw_id.decode()
+            key = self._key('job', job_id)
+            heartbeat, created, attempts = self.client.hmget(key, 'heartbeat', 'created', 'attempts')
+            last_seen = float(heartbeat or created or 0)
+            if last_seen >= limit:
+                continue
+            # Only the worker that removes the entry from the processing list requeues the job
+            if not self.client.lrem(self._key('processing'), 1, job_id):
+                continue
+            if int(attempts or 0) >= max_attempts:
+                self.finish(job_id, error='Worker nicht mehr erreichbar')
+            else:
+                pipe = self.client.pipeline()
+                pipe.hset(key, 'status', 'queued')
+                pipe.rpush(self._key('queue'), job_id)
+                pipe.execute()
+                requeued += 1
+        return requeued
+
+    def stats(self):
+        return {
+            'queued': self.client.llen(self._key('queue')),
+            'running': self.client.llen(self._key('processing')),
+        }
+
+    # Events
+
+    def append_event(self, session_id, event):
+        key = self._key('events', session_id)
+        pipe = self.client.pipeline()
+        pipe.rpush(key, json.dumps(event, ensure_ascii=False))
+        pipe.expire(key, self.result_ttl)
+        pipe.execute()
+
+    def read_events(self, session_id, offset=0):
+        # The offset is the number of events already read
+        raw_events = self.client.lrange(self._key('events', session_id), offset, -1)
+        return [(offset + i + 1, json.loads(raw)) for i, raw in enumerate(raw_events)]
+
+    # Files
+
+    def _file_key(self, session_id, name):
+        return self._key('file', session_id, _check_name(name))
+
+    def put_file(self, session_id, name, source_path):
+        """Stores the file part by part, so it is never held in memory as a whole"""
+        key = self._file_key(session_id, name)
+        tmp_key = f"{key}:{uuid.uuid4().hex}.tmp"
+        chunks = 0
+        with open(source_path, 'rb') as f:
+            while True:
+                data = f.read(FILE_CHUNK_SIZE)
+                if not data:
+                    break
+                pipe = self.client.pipeline()
+                pipe.rpush(tmp_key, data)
+                pipe.expire(tmp_key, self.result_ttl)
+                pipe.execute()
+                chunks += 1
+
+        index_key = self._key('files', session_id)
+        pipe = self.client.pipeline()
+        if chunks:
+            # Readers see either the old or the complete new file
+            pipe.rename(tmp_key, key)
+        else:
+            pipe.delete(key)
+        pipe.hset(index_key, _check_name(name), chunks)
+        pipe.expire(index_key, self.result_ttl)
+        pipe.execute()
+
+    def get_file(self, session_id, name, target_path):
+        chunks = self.client.hget(self._key('files', session_id), _check_name(name))
+        if chunks is None:
+            return False
+        key = self._file_key(session_id, name)
+        with open(target_path, 'wb') as f:
+            for index in range(int(chunks)):
+                data = self.client.lindex(key, index)
+                if data is None:
+                    # Expired or replaced meanwhile
+                    return False
+                f.write(data)
+        return True
+
+    def list_files(self, session_id, area):
+        names = [name.decode() for name in self.client.hkeys(self._key('files', session_id))]
+        return sorted(name for name in names if name.startswith(area + '/'))
+
+    def delete_session(self, session_id):
+        index_key = self._key('files', session_id)
+        file_keys = [self._file_key(session_id, name.decode()) for name in self.client.hkeys(index_key)]
+        self.client.delete(index_key, self._key('events', session_id), *file_keys)
+
+    def cleanup(self):
+        """Nothing to do, Redis expires sessions and finished jobs itself"""
+
+def create_backend(url, result_ttl=DEFAULT_RESULT_TTL):
+    """Creates the backend for a queue URL (sqlite:///path/queue.db or redis://host:port/db)"""
+    if url.startswith('sqlite://'):
+        return SQLiteBackend(url[len('sqlite://'):], result_ttl=result_ttl)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url, result_ttl=result_ttl)
+    raise ValueError(f"Unbekannte QUEUE_URL: {url}")
+
+def wait_for_job(backend, job_id, timeout):
+    """Waits until a job is done or failed; returns the job or None after the timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = backend.get_job(job_id)
+        if job is None or job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(POLL_INTERVAL)
+    return None
+
+def push_directory(backend, session_id, area, directory):
+    """Stores all files of a local directory in an area of the session storage"""
+    for root, _, files in os.walk(directory):
+        for file in files:
+            path = os.path.join(root, file)
+            rel_path = os.path.relpath(path, directory).replace(os.sep, '/')
+            backend.put_file(session_id, f"{area}/{rel_path}", path)
+
+def pull_directory(backend, session_id, area, directory):
+    """Copies all files of an area of the session storage into a local directory; returns their number"""
+    names = backend.list_files(session_id, area)
+    for name in names:
+        target = os.path.join(directory, *name[len(area) + 1:].split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        backend.get_file(session_id, name, target)
+    return len(names)
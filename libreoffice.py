@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Preconversion of legacy binary Office files (.doc, .ppt, .xls) with LibreOffice
+
+Neither Pandoc nor the spreadsheet module reads the old binary formats,
+so they are converted to OOXML first. A small pool of headless soffice
+processes is kept running and driven through the UNO pipe interface,
+which saves the start-up time of several seconds per file. Each pool
+slot locks a user profile of its own, which the next worker process takes
+over after a recycle, a watchdog kills a slot that exceeds the timeout,
+and crashed or killed processes are restarted for the next file.
+
+Without the Python UNO bindings (python3-uno) every file is converted
+with a separate `soffice --convert-to` call; the pool then only limits
+the number of parallel calls and keeps the per-slot profiles warm.
+"""
+
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, profiles are then per process
+    fcntl = None
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # Optional, the soffice command line is used without it
+    uno = None
+
+import process_runner
+
+# Legacy extension -> (target extension, LibreOffice export filter)
+PRECONVERT_FORMATS = {
+    'doc': ('docx', 'MS Word 2007 XML'),
+    'ppt': ('pptx', 'Impress MS PowerPoint 2007 XML'),
+    'xls': ('xlsx', 'Calc MS Excel 2007 XML'),
+}
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 120
+DEFAULT_QUEUE_TIMEOUT = 300
+STARTUP_TIMEOUT = 30
+
+PROFILE_ROOT = os.path.join(tempfile.gettempdir(), 'doc_converter_libreoffice')
+
+_config = {
+    'binary': 'soffice',
+    'workers': DEFAULT_WORKERS,
+    'timeout': DEFAULT_TIMEOUT,
+    'queue_timeout': DEFAULT_QUEUE_TIMEOUT,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+class DocumentError(RuntimeError):
+    """LibreOffice is running but cannot read the document"""
+
+def configure(binary=None, workers=None, timeout=None, queue_timeout=None):
+    """Sets the pool size and limits; takes effect when the pool is (re)started"""
+    for key, value in (('binary', binary), ('workers', workers), ('timeout', timeout),
+                       ('queue_timeout', queue_timeout)):
+        if value is not None:
+            _config[key] = value
+
+def needs_preconversion(file_path):
+    """Checks whether a file is a legacy format that Pandoc cannot read"""
+    ext = file_path.rsplit('.', 1)[-1].lower()
+    return ext in PRECONVERT_FORMATS
+
+def is_available():
+    """Checks whether the soffice binary is installed"""
+    return shutil.which(_config['binary']) is not None
+
+def has_uno():
+    """Checks whether the pool can keep soffice running (Python UNO bindings importable)"""
+    return uno is not None
+
+def _file_url(path):
+    if uno is not None:
+        return uno.systemPathToFileUrl(os.path.abspath(path))
+    return 'file://' + os.path.abspath(path)
+
+def _property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+def _claim_profile_dir(index):
+    """
+    Claims a user profile that no other running process uses
+
+    The profiles are numbered and locked with flock for the lifetime of the
+    process, so the successor of a recycled worker process takes over a warm
+    profile instead of creating a new one in the temp directory.
+
+    Returns:
+        tuple: (profile directory, open lock file or None without flock)
+    """
+    os.makedirs(PROFILE_ROOT, exist_ok=True)
+    if fcntl is None:
+        return os.path.join(PROFILE_ROOT, f"{os.getpid()}-{index}"), None
+
+    number = 0
+    while True:
+        profile_dir = os.path.join(PROFILE_ROOT, f"profile-{number}")
+        lock_file = open(f"{profile_dir}.lock", 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return profile_dir, lock_file
+        except BlockingIOError:
+            lock_file.close()
+            number += 1
+
+class _Slot:
+    """One pool slot: a user profile and, with UNO, a running soffice listener"""
+
+    def __init__(self, index):
+        self.index = index
+        # A named pipe instead of a TCP port: the name is unique per worker process and slot,
+        # so pools of several Gunicorn workers never collide and nothing listens on the network
+        self.pipe_name = f"docflow-{os.getpid()}-{index}"
+        self.profile_dir, self.profile_lock = _claim_profile_dir(index)
+        self.process = None
+        self.desktop = None
+        self.conversions = 0
+
+    def _alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """Starts the soffice listener and connects to it"""
+        self.stop()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.process = subprocess.Popen([
+            _config['binary'],
+            '--headless', '--invisible', '--nologo', '--norestore', '--nodefault', '--nolockcheck',
+            f"-env:UserInstallation={_file_url(self.profile_dir)}",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context)
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if not self._alive() or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("LibreOffice konnte nicht gestartet werden")
+                time.sleep(0.25)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+
+    def stop(self):
+        """Terminates the listener; used on shutdown and for crash recovery"""
+        self.desktop = None
+        if self.process is not None:
+            if self.process.poll() is None:
+                try:
+                    os.killpg(self.process.pid, 9)
+                except OSError:
+                    pass
+                self.process.wait()
+            self.process = None
+
+    def release_profile(self):
+        """Hands the profile over to the next process; profiles without lock are removed"""
+        if self.profile_lock is not None:
+            self.profile_lock.close()
+            self.profile_lock = None
+        else:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def convert(self, input_path, output_path, filter_name):
+        """Converts one file through the running listener, restarting it if necessary"""
+        if not self._alive() or self.desktop is None:
+            self.start()
+
+        # Watchdog: a hanging import cannot be cancelled via UNO, so the process is killed
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            self.stop()
+
+        watchdog = threading.Timer(_config['timeout'], kill)
+        watchdog.start()
+        document = None
+        try:
+            document = self.desktop.loadComponentFromURL(
+                _file_url(input_path), '_blank', 0,
+                (_property('Hidden', True), _property('ReadOnly', True))
+            )
+            if document is None:
+                raise DocumentError("Datei konnte von LibreOffice nicht geöffnet werden")
+            document.storeToURL(_file_url(output_path), (_property('FilterName', filter_name),))
+            self.conversions += 1
+        except DocumentError:
+            raise
+        except Exception:
+            if timed_out.is_set():
+                raise process_runner.ConversionTimeout([_config['binary']], _config['timeout'])
+            # The listener may have crashed; start a fresh one for the next file
+            self.stop()
+            raise
+        finally:
+            watchdog.cancel()
+            if document is not None:
+                try:
+                    document.close(True)
+                except Exception:
+                    pass
+
+    def convert_cli(self, input_path, output_dir, target_ext):
+        """Converts one file with a separate soffice call using the slot's profile"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        try:
+            process_runner.run([
+                _config['binary'],
+                '--headless', '--norestore', '--nolockcheck',
+                f"-env:UserInstallation={_file_url(self.profile_dir)}",
+                '--convert-to', target_ext,
+                '--outdir', output_dir,
+                input_path
+            ], timeout=_config['timeout'], encoding='utf-8', errors='replace')
+        except process_runner.ConversionTimeout:
+            # A killed soffice can leave a broken profile behind
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            raise
+        self.conversions += 1
+
+class _Pool:
+    def __init__(self, size):
+        self.slots = [_Slot(i) for i in range(max(1, size))]
+        self.idle = queue.Queue()
+        for slot in self.slots:
+            self.idle.put(slot)
+
+    def acquire(self):
+        try:
+            return self.idle.get(timeout=_config['queue_timeout'])
+        except queue.Empty:
+            raise process_runner.ConversionRejected(
+                "Alle LibreOffice-Prozesse sind ausgelastet, bitte später erneut versuchen")
+
+    def release(self, slot):
+        self.idle.put(slot)
+
+    def shutdown(self):
+        for slot in self.slots:
+            slot.stop()
+            slot.release_profile()
+
+def _get_pool():
+    """Creates the pool on first use, so every worker process gets its own"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _Pool(_config['workers'])
+            atexit.register(_pool.shutdown)
+        return _pool
+
+def shutdown():
+    """Stops all LibreOffice processes of this process"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+def preconvert(input_path, output_dir):
+    """
+    Converts a legacy .doc/.ppt/.xls file to .docx/.pptx/.xlsx
+
+    Returns:
+        str: Path of the converted file in output_dir
+
+    Raises:
+        ConversionTimeout, ConversionRejected, RuntimeError (including DocumentError)
+        or subprocess.CalledProcessError
+    """
+    ext = input_path.rsplit('.', 1)[-1].lower()
+    target_ext, filter_name = PRECONVERT_FORMATS[ext]
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    output_path = os.path.join(output_dir, f"{base_name}.{target_ext}")
+
+    pool = _get_pool()
+    slot = pool.acquire()
+    try:
+        if uno is not None:
+            try:
+                slot.convert(input_path, output_path, filter_name)
+            except (process_runner.ConversionTimeout, DocumentError):
+                raise
+            except Exception:
+                # One retry on a fresh process covers crashes caused by a previous document
+                slot.convert(input_path, output_path, filter_name)
+        else:
+            slot.convert_cli(input_path, output_dir, target_ext)
+    finally:
+        pool.release(slot)
+
+    if not os.path.exists(output_path):
+        raise RuntimeError("LibreOffice hat keine Ausgabedatei erzeugt")
+    return output_path
+
+def get_stats():
+    """Returns the pool state for monitoring"""
+    pool = _pool
+    return {
+        'mode': 'uno' if has_uno() else 'cli',
+        'workers': _config['workers'],
+        'idle': pool.idle.qsize() if pool else _config['workers'],
+        'running': sum(1 for slot in pool.slots if slot._alive()) if pool else 0,
+        'conversions': sum(slot.conversions for slot in pool.slots) if pool else 0,
+    }
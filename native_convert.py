@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+In-process converters for simple HTML, reStructuredText and Org files
+
+Small files in these formats make up a large share of the uploads, and
+starting Pandoc costs far more than converting them. The converters below
+handle the common subset (headings, paragraphs, emphasis, code, links,
+lists, quotes) and give up with UnsupportedInput as soon as they meet
+anything else, in which case the caller falls back to Pandoc.
+"""
+
+import os
+import re
+from html.parser import HTMLParser
+
+# Larger files go to Pandoc; the fast path is meant for small notes and exports
+DEFAULT_MAX_BYTES = 512 * 1024
+
+class UnsupportedInput(Exception):
+    """The input uses constructs the native converters do not handle"""
+
+def _escape(text):
+    """Escapes characters that would otherwise start Markdown syntax"""
+    return re.sub(r'([\\`*_\[\]<>])', r'\\\1', text)
+
+# Text at the start of a line that Markdown would read as heading, list item,
+# thematic break or Setext underline ('>' and '*' are already escaped by _escape)
+_LINE_START_MARKER = re.compile(r'^(\s*)(?:(#)|([-+])(?=\s|$|-)|(\d+)([.)])(?=\s|$)|(=)(?==*\s*$))')
+
+def _escape_line_start(text):
+    """Escapes block markers at the start of every line of a paragraph"""
+    return '\n'.join(
+        _LINE_START_MARKER.sub(
+            lambda m: m.group(1) + (f"{m.group(4)}\\{m.group(5)}" if m.group(4)
+                                    else '\\' + (m.group(2) or m.group(3) or m.group(6))),
+            line)
+        for line in text.split('\n'))
+
+def _longest_backtick_run(code):
+    return max((len(run) for run in re.findall(r'`+', code)), default=0)
+
+def _fence(code):
+    """Backtick fence longer than any backtick run inside the code"""
+    return '`' * max(3, _longest_backtick_run(code) + 1)
+
+def _code_span(code):
+    """Inline code delimited by a backtick run longer than any inside it (spaced as Pandoc does)"""
+    longest = _longest_backtick_run(code)
+    if not longest:
+        return f"`{code}`"
+    ticks = '`' * (longest + 1)
+    return f"{ticks} {code} {ticks}"
+
+def _link_target(url):
+    """Percent-encodes characters that would end or break a Markdown link target"""
+    return re.sub(r'[\s()<>]', lambda m: ''.join(f"%{byte:02X}" for byte in m.group(0).encode('utf-8')), url)
+
+# --- HTML -------------------------------------------------------------------
+
+_HTML_SKIP = {'head', 'title', 'script', 'style', 'noscript', 'template'}
+_HTML_TRANSPARENT = {'html', 'body', 'div', 'span', 'section', 'article', 'main', 'header', 'footer',
+                     'nav', 'aside', 'font', 'center', 'small', 'big', 'meta', 'link', 'abbr', 'cite'}
+_HTML_INLINE = {'strong': '**', 'b': '**', 'em': '*', 'i': '*'}
+_HTML_HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_HTML_VOID = {'br', 'hr', 'img', 'meta', 'link'}
+_LINE_BREAK = '\x00'
+
+class _HtmlConverter(HTMLParser):
+    """Streams HTML into Markdown blocks"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self.inline = []
+        self.lists = []
+        self.quote_depth = 0
+        self.heading = None
+        self.pre = None
+        # Text of the open <code> element, None outside of one
+        self.code = None
+        self.skip_depth = 0
+        self.links = []
+        self.item_marker = None
+        self.last_was_item = False
+        # Quote depth of the previous block; blank lines between blocks of one quote keep its '>'
+        self.last_quote_depth = 0
+        # (depth, type) of a list closed right before, a following list of that type needs a separator
+        self.closed_list = None
+
+    # Output helpers
+
+    def _indent(self):
+        return '    ' * max(0, len(self.lists) - 1) if self.lists else ''
+
+    def _add_block(self, lines, list_item=False):
+        prefix = '> ' * self.quote_depth
+        text = '\n'.join((prefix + line).rstrip() if line else prefix.rstrip() for line in lines)
+        if list_item and self.last_was_item:
+            separator = '\n'
+        else:
+            separator = '\n' + ('> ' * min(self.quote_depth, self.last_quote_depth)).rstrip() + '\n'
+        self.blocks.append((separator, text))
+        self.last_was_item = list_item
+        self.last_quote_depth = self.quote_depth
+        self.closed_list = None
+
+    def _flush(self):
+        raw = ''.join(self.inline)
+        self.inline = []
+        text = ' '.join(raw.split())
+        text = re.sub(r'\s*' + _LINE_BREAK + r'\s*', '\\\\\n', text).strip()
+        if not text:
+            return
+
+        if self.heading:
+            self._add_block(['#' * self.heading + ' ' + text.replace('\\\n', ' ')])
+            return
+
+        lines = _escape_line_start(text).split('\n')
+        if self.lists:
+            indent = self._indent()
+            if self.item_marker:
+                current = self.lists[-1]
+                if current[1] == 1 and self.closed_list == (len(self.lists) - 1, current[0]):
+                    # Without a separator Markdown would continue the list closed right before
+                    self._add_block([indent + '<!-- -->'])
+                marker = self.item_marker
+                self.item_marker = None
+                first = indent + marker + lines[0]
+                rest = [indent + ' ' * len(marker) + line for line in lines[1:]]
+                self._add_block([first] + rest, list_item=True)
+            else:
+                pad = indent + '    '
+                self._add_block([pad + line for line in lines])
+        else:
+            self._add_block(lines)
+
+    # Parser callbacks
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth:
+            if tag not in _HTML_VOID:
+                self.skip_depth += 1
+            return
+        if tag in _HTML_SKIP:
+            self.skip_depth = 1
+            return
+
+        attrs = dict(attrs)
+
+        if self.pre is not None:
+            if tag == 'code':
+                return
+            raise UnsupportedInput(f"<{tag}> in <pre>")
+
+        if self.code is not None:
+            raise UnsupportedInput(f"<{tag}> in <code>")
+
+        if tag in _HTML_TRANSPARENT:
+            if tag == 'div':
+                self._flush()
+            return
+        if tag in _HTML_INLINE:
+            self.inline.append(_HTML_INLINE[tag])
+        elif tag == 'code':
+            self.code = []
+        elif tag == 'a':
+            self.links.append(attrs.get('href'))
+            if attrs.get('href'):
+                self.inline.append('[')
+        elif tag == 'img':
+            alt = _escape(attrs.get('alt') or '')
+            self.inline.append(f"![{alt}]({_link_target(attrs.get('src') or '')})")
+        elif tag == 'br':
+            self.inline.append(_LINE_BREAK)
+        elif tag == 'p':
+            self._flush()
+        elif tag in _HTML_HEADINGS:
+            self._flush()
+            self.heading = _HTML_HEADINGS[tag]
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            self.lists.append([tag, 0])
+        elif tag == 'li':
+            self._flush()
+            if not self.lists:
+                raise UnsupportedInput("<li> outside of a list")
+            current = self.lists[-1]
+            current[1] += 1
+            self.item_marker = '- ' if current[0] == 'ul' else f"{current[1]}. "
+        elif tag == 'blockquote':
+            self._flush()
+            self.last_quote_depth = min(self.last_quote_depth, self.quote_depth)
+            self.quote_depth += 1
+            self.last_was_item = False
+        elif tag == 'pre':
+            self._flush()
+            self.pre = []
+        elif tag == 'hr':
+            self._flush()
+            self._add_block(['------------------------------------------------------------------------'])
+        else:
+            raise UnsupportedInput(f"<{tag}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _HTML_VOID:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+
+        if self.pre is not None:
+            if tag == 'pre':
+                code = ''.join(self.pre).strip('\n')
+                self.pre = None
+                indent = self._indent() + ('    ' if self.lists else '')
+                fence = _fence(code)
+                lines = [fence] + code.split('\n') + [fence]
+                self._add_block([indent + line if line else '' for line in lines])
+            return
+
+        if tag in _HTML_INLINE:
+            self.inline.append(_HTML_INLINE[tag])
+        elif tag == 'code':
+            if self.code is not None:
+                self.inline.append(_code_span(''.join(self.code)))
+            self.code = None
+        elif tag == 'a':
+            href = self.links.pop() if self.links else None
+            if href:
+                self.inline.append(f"]({_link_target(href)})")
+        elif tag in ('p', 'div'):
+            self._flush()
+        elif tag in _HTML_HEADINGS:
+            self._flush()
+            self.heading = None
+        elif tag == 'li':
+            self._flush()
+            self.item_marker = None
+        elif tag in ('ul', 'ol'):
+            self._flush()
+            if self.lists:
+                self.lists.pop()
+                self.closed_list = (len(self.lists), tag)
+            self.last_was_item = bool(self.lists)
+        elif tag == 'blockquote':
+            self._flush()
+            self.quote_depth = max(0, self.quote_depth - 1)
+            # A following quote must not continue this one
+            self.last_quote_depth = min(self.last_quote_depth, self.quote_depth)
+            self.last_was_item = False
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.pre is not None:
+            self.pre.append(data)
+        elif self.code is not None:
+            self.code.append(data)
+        else:
+            self.inline.append(_escape(data))
+
+    def result(self):
+        self._flush()
+        if not self.blocks:
+            return ''
+        text = self.blocks[0][1]
+        for separator, block in self.blocks[1:]:
+            text += separator + block
+        return text + '\n'
+
+def html_to_markdown(source):
+    """Converts simple HTML to Markdown or raises UnsupportedInput"""
+    converter = _HtmlConverter()
+    converter.feed(source)
+    converter.close()
+    return converter.result()
+
+# --- Lightweight markup helpers ---------------------------------------------
+
+class _Protector:
+    """Replaces code spans by placeholders so emphasis rules do not touch them"""
+
+    def __init__(self):
+        self.values = []
+
+    def protect(self, value):
+        self.values.append(value)
+        return f"\x01{len(self.values) - 1}\x02"
+
+    def restore(self, text):
+        return re.sub(r'\x01(\d+)\x02', lambda m: self.values[int(m.group(1))], text)
+
+def _append_item(items, indent_stack, indent, ordered, text):
+    """
+    Adds a list item, nesting it by its indentation
+
+    Returns False if the item starts a new top-level list of a different type;
+    the caller then has to flush the current list first.
+    """
+    while indent_stack and indent_stack[-1] > indent:
+        indent_stack.pop()
+    if not indent_stack or indent_stack[-1] < indent:
+        indent_stack.append(indent)
+    depth = len(indent_stack) - 1
+
+    number = 1
+    previous = None
+    for item_depth, marker, _ in reversed(items):
+        if item_depth < depth:
+            break
+        if item_depth == depth:
+            previous = previous or marker
+            number += marker[0].isdigit()
+    if depth == 0 and previous is not None and previous[0].isdigit() != ordered:
+        return False
+
+    items.append((depth, f"{number}. " if ordered else '- ', text))
+    return True
+
+def _list_lines(items):
+    """Renders (depth, marker, text) list items as a tight Markdown list"""
+    return ['    ' * depth + marker + _escape_line_start(text) for depth, marker, text in items]
+
+def _join_blocks(blocks):
+    return '\n\n'.join(block for block in blocks if block) + ('\n' if blocks else '')
+
+# --- reStructuredText ---------------------------------------------------------
+
+_RST_ADORNMENT = re.compile(r'^([=\-~^"\'`#*+_:.])\1{2,}\s*$')
+_RST_BULLET = re.compile(r'^(\s*)([-*+]|\d+[.)]|#[.)])\s+(.*)$')
+_RST_UNSUPPORTED = [
+    re.compile(r'^\s*\.\.\s'),              # directives, comments, targets
+    re.compile(r'^\s*\+[-=+]+\+\s*$'),       # grid tables
+    re.compile(r'^\s*=+\s+=+[\s=]*$'),       # simple tables
+    re.compile(r'^\s*:[\w -]+:\s'),          # field lists
+    re.compile(r'\[#?\w*\]_'),               # footnotes and citations
+    re.compile(r':\w+:`'),                   # roles
+    re.compile(r'\|\w[^|]*\|'),              # substitutions
+    re.compile(r'`[^`<]+`_'),                # reference links
+]
+
+def _rst_inline(text):
+    protector = _Protector()
+    text = re.sub(r'``(.+?)``', lambda m: protector.protect(f"`{m.group(1)}`"), text)
+    text = re.sub(r'`([^`<]+?)\s*<([^>]+)>`__?',
+                  lambda m: protector.protect(f"[{_escape(m.group(1))}]({_link_target(m.group(2))})"), text)
+    if '`' in text:
+        raise UnsupportedInput("interpreted text")
+    text = re.sub(r'\*\*(\S(?:.*?\S)?)\*\*', lambda m: protector.protect(f"**{_escape(m.group(1))}**"), text)
+    text = re.sub(r'(?<![\w*])\*(\S(?:.*?\S)?)\*(?![\w*])',
+                  lambda m: protector.protect(f"*{_escape(m.group(1))}*"), text)
+    return protector.restore(_escape(text))
+
+def rst_to_markdown(source):
+    """Converts simple reStructuredText to Markdown or raises UnsupportedInput"""
+    lines = source.expandtabs(4).splitlines()
+    for line in lines:
+        for pattern in _RST_UNSUPPORTED:
+            if pattern.search(line):
+                raise UnsupportedInput(f"reStructuredText construct: {line.strip()[:40]}")
+
+    blocks = []
+    styles = []
+    paragraph = []
+    items = []
+    indent_stack = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            text = ' '.join(part.strip() for part in paragraph)
+            literal = text.endswith('::')
+            if literal:
+                text = text[:-1] if not text.endswith(' ::') else text[:-3]
+            if text.strip():
+                blocks.append(_escape_line_start(_rst_inline(text)))
+            paragraph.clear()
+            return literal
+        return False
+
+    def flush_items():
+        if items:
+            blocks.append('\n'.join(_list_lines(items)))
+            items.clear()
+            indent_stack.clear()
+
+    def heading_level(style):
+        if style not in styles:
+            styles.append(style)
+        return styles.index(style) + 1
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        # Heading with overline and underline
+        if _RST_ADORNMENT.match(stripped) and i + 2 < len(lines) and \
+                lines[i + 2].strip() == stripped and lines[i + 1].strip():
+            flush_paragraph()
+            flush_items()
+            level = heading_level((stripped[0], True))
+            blocks.append('#' * min(level, 6) + ' ' + _rst_inline(lines[i + 1].strip()))
+            i += 3
+            continue
+
+        # Heading with underline only
+        if stripped and not line.startswith(' ') and i + 1 < len(lines) and \
+                _RST_ADORNMENT.match(lines[i + 1].strip()) and \
+                len(lines[i + 1].strip()) >= len(stripped) and not paragraph:
+            flush_items()
+            level = heading_level((lines[i + 1].strip()[0], False))
+            blocks.append('#' * min(level, 6) + ' ' + _rst_inline(stripped))
+            i += 2
+            continue
+
+        if _RST_ADORNMENT.match(stripped) and len(stripped) >= 4 and not paragraph:
+            flush_items()
+            blocks.append('------------------------------------------------------------------------')
+            i += 1
+            continue
+
+        if not stripped:
+            literal = flush_paragraph()
+            if literal:
+                # Collect the indented literal block
+                i += 1
+                while i < len(lines) and not lines[i].strip():
+                    i += 1
+                code = []
+                while i < len(lines) and (not lines[i].strip() or lines[i].startswith(' ')):
+                    code.append(lines[i])
+                    i += 1
+                while code and not code[-1].strip():
+                    code.pop()
+                if not code:
+                    raise UnsupportedInput("empty literal block")
+                depth = min(len(l) - len(l.lstrip()) for l in code if l.strip())
+                code = '\n'.join(l[depth:] for l in code)
+                fence = _fence(code)
+                blocks.append(f"{fence}\n{code}\n{fence}")
+                continue
+            i += 1
+            continue
+
+        if stripped == '::':
+            paragraph.append('::')
+            i += 1
+            continue
+
+        bullet = _RST_BULLET.match(line)
+        if bullet and not paragraph:
+            indent = len(bullet.group(1))
+            ordered = bullet.group(2)[0] not in '-*+'
+            if _RST_BULLET.match(bullet.group(3)):
+                raise UnsupportedInput("nested list on the item line")
+            text = _rst_inline(bullet.group(3).strip())
+            if not _append_item(items, indent_stack, indent, ordered, text):
+                flush_items()
+                _append_item(items, indent_stack, indent, ordered, text)
+            i += 1
+            continue
+
+        if items and line.startswith(' '):
+            # Continuation line of the last list item
+            depth, marker, text = items[-1]
+            items[-1] = (depth, marker, text + ' ' + _rst_inline(stripped))
+            i += 1
+            continue
+
+        if line.startswith(' ') and not paragraph:
+            raise UnsupportedInput("block quote")
+
+        flush_items()
+        paragraph.append(line)
+        i += 1
+
+    if flush_paragraph():
+        raise UnsupportedInput("literal block without content")
+    flush_items()
+    return _join_blocks(blocks)
+
+# --- Org --------------------------------------------------------------------
+
+_ORG_LIST = re.compile(r'^(\s*)([-+]|\d+[.)])\s+(.*)$')
+_ORG_UNSUPPORTED = [
+    re.compile(r'^\s*\|'),                           # tables
+    re.compile(r'^\s*:[A-Za-z_]+:\s*$'),             # drawers
+    re.compile(r'\[fn:'),                            # footnotes
+    re.compile(r'^\s*#\+(INCLUDE|BEGIN_(?!SRC|EXAMPLE|QUOTE))', re.IGNORECASE),
+    re.compile(r'\\begin\{'),                        # LaTeX environments
+    re.compile(r'(^|\s)_\S(.*?\S)?_(\s|$)'),         # underline
+    re.compile(r'^\s*(SCHEDULED|DEADLINE|CLOSED):'),
+]
+
+def _org_link_target(url):
+    """Org marks local files with 'file:', Markdown links them by their path"""
+    return _link_target(url[len('file:'):] if url.startswith('file:') else url)
+
+def _org_plain_link(url):
+    """Autolink for [[url]]; file links and targets an autolink cannot hold become a regular link"""
+    if url.startswith('file:') or re.search(r'[\s<>]', url):
+        return f"[{_escape(url)}]({_org_link_target(url)})"
+    return f"<{url}>"
+
+def _org_inline(text):
+    protector = _Protector()
+    text = re.sub(r'(?<![\w=~])[=~](\S(?:.*?\S)?)[=~](?![\w=~])',
+                  lambda m: protector.protect(f"`{m.group(1)}`"), text)
+    text = re.sub(r'\[\[([^\]]+)\]\[([^\]]+)\]\]',
+                  lambda m: protector.protect(f"[{_escape(m.group(2))}]({_org_link_target(m.group(1))})"), text)
+    text = re.sub(r'\[\[([^\]]+)\]\]', lambda m: protector.protect(_org_plain_link(m.group(1))), text)
+    text = re.sub(r'(?<![\w*])\*(\S(?:.*?\S)?)\*(?![\w*])',
+                  lambda m: protector.protect(f"**{_escape(m.group(1))}**"), text)
+    text = re.sub(r'(?<![\w/:])/(\S(?:.*?\S)?)/(?![\w/])',
+                  lambda m: protector.protect(f"*{_escape(m.group(1))}*"), text)
+    text = re.sub(r'(?<![\w+])\+(\S(?:.*?\S)?)\+(?![\w+])',
+                  lambda m: protector.protect(f"~~{_escape(m.group(1))}~~"), text)
+    return protector.restore(_escape(text))
+
+def org_to_markdown(source):
+    """Converts simple Org markup to Markdown or raises UnsupportedInput"""
+    lines = source.expandtabs(4).splitlines()
+    for line in lines:
+        for pattern in _ORG_UNSUPPORTED:
+            if pattern.search(line):
+                raise UnsupportedInput(f"Org construct: {line.strip()[:40]}")
+
+    blocks = []
+    paragraph = []
+    items = []
+    indent_stack = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(_escape_line_start(_org_inline(' '.join(part.strip() for part in paragraph))))
+            paragraph.clear()
+
+    def flush_items():
+        if items:
+            blocks.append('\n'.join(_list_lines(items)))
+            items.clear()
+            indent_stack.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        block = re.match(r'^\s*#\+BEGIN_(SRC|EXAMPLE|QUOTE)\b\s*(\S*)', line, re.IGNORECASE)
+        if block:
+            flush_paragraph()
+            flush_items()
+            kind = block.group(1).upper()
+            end = re.compile(rf'^\s*#\+END_{kind}\b', re.IGNORECASE)
+            content = []
+            i += 1
+            while i < len(lines) and not end.match(lines[i]):
+                content.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                raise UnsupportedInput(f"unterminated {kind} block")
+            i += 1
+            if kind == 'QUOTE':
+                if any(_ORG_LIST.match(l) or re.match(r'^\*+\s', l) for l in content):
+                    raise UnsupportedInput("structured quote")
+                text = _org_inline(' '.join(l.strip() for l in content if l.strip()))
+                blocks.append('> ' + _escape_line_start(text))
+            else:
+                depth = min([len(l) - len(l.lstrip()) for l in content if l.strip()] or [0])
+                language = block.group(2) if kind == 'SRC' else ''
+                code = '\n'.join(l[depth:] for l in content)
+                fence = _fence(code)
+                blocks.append(f"{fence} {language}".rstrip() + f"\n{code}\n{fence}")
+            continue
+
+        if stripped.startswith('#+') or stripped == '#' or stripped.startswith('# '):
+            # Keywords (#+TITLE, #+OPTIONS, ...) and comments carry no body text
+            flush_paragraph()
+            i += 1
+            continue
+
+        heading = re.match(r'^(\*+)\s+(.*)$', line)
+        if heading:
+            flush_paragraph()
+            flush_items()
+            level = min(len(heading.group(1)), 6)
+            title = re.sub(r'\s+:[\w@#%:]+:\s*$', '', heading.group(2))
+            blocks.append('#' * level + ' ' + _org_inline(title.strip()))
+            i += 1
+            continue
+
+        if re.match(r'^\s*-{5,}\s*$', line):
+            flush_paragraph()
+            flush_items()
+            blocks.append('------------------------------------------------------------------------')
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        item = _ORG_LIST.match(line)
+        if item and not paragraph:
+            indent = len(item.group(1))
+            ordered = item.group(2)[0].isdigit()
+            text = item.group(3)
+            if re.match(r'^\[[ X-]\]', text) or ' :: ' in text:
+                raise UnsupportedInput("checkbox or description list")
+            if _ORG_LIST.match(text):
+                raise UnsupportedInput("nested list on the item line")
+            text = _org_inline(text.strip())
+            if not _append_item(items, indent_stack, indent, ordered, text):
+                flush_items()
+                _append_item(items, indent_stack, indent, ordered, text)
+            i += 1
+            continue
+
+        if items and line.startswith(' '):
+            depth, marker, text = items[-1]
+            items[-1] = (depth, marker, text + ' ' + _org_inline(stripped))
+            i += 1
+            continue
+
+        flush_items()
+        paragraph.append(line)
+        i += 1
+
+    flush_paragraph()
+    flush_items()
+    return _join_blocks(blocks)
+
+# --- Dispatch -----------------------------------------------------------------
+
+# Native converters by Pandoc input format, i.e. the values of FORMAT_MAPPING
+NATIVE_CONVERTERS = {
+    'html': html_to_markdown,
+    'rst': rst_to_markdown,
+    'org': org_to_markdown,
+}
+
+def try_convert(input_path, input_format, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Converts a file in-process if possible
+
+    Returns:
+        str: The Markdown, or None if the file has to go through Pandoc
+    """
+    converter = NATIVE_CONVERTERS.get(input_format)
+    if converter is None:
+        return None
+
+    try:
+        if os.path.getsize(input_path) > max_bytes:
+            return None
+        with open(input_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        return converter(source)
+    except (UnsupportedInput, UnicodeDecodeError, OSError, RecursionError):
+        return None
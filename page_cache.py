@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Size-bounded in-memory cache for Wiki.js page contents
+"""
+
+import threading
+from collections import OrderedDict
+
+# Default size of the process-wide page content cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class ByteLRUCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its values in bytes.
+
+    Values are (content, title) tuples. Entries larger than the whole cache
+    are not stored at all.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(value):
+        content, title = value
+        return len((content or '').encode('utf-8')) + len((title or '').encode('utf-8'))
+
+    def get(self, key):
+        """Returns the cached value or None, counting hits and misses"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value[0]
+
+    def put(self, key, value):
+        """Stores a value and evicts the least recently used entries if needed"""
+        size = self._entry_size(value)
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def discard_page(self, page_id):
+        """Removes all cached versions of a page"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == page_id]:
+                _, size = self._entries.pop(key)
+                self._size -= size
+
+    def resize(self, max_bytes):
+        """Changes the size limit, evicting entries if the cache shrinks"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self._size > max(0, max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Removes all entries, keeping the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
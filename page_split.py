@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Splits a large converted document into a hierarchy of Wiki.js pages
+
+Every heading up to the chosen level starts a new page. Pages of deeper
+headings are placed below the page of their parent heading, an index page
+with the text before the first heading and a table of contents is created
+at the target path, and links to anchors in other parts are rewritten to
+point to the page that now holds the anchor.
+"""
+
+import re
+
+_ATX_HEADING = re.compile(r'^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+_SETEXT_UNDERLINE = re.compile(r'^(=+|-+)\s*$')
+_FENCE = re.compile(r'^\s*(```+|~~~+)')
+_ATTRIBUTES = re.compile(r'\s*\{([^}]*)\}\s*$')
+_ANCHOR_LINK = re.compile(r'\]\(#([^)\s]+)\)')
+
+def heading_identifier(text):
+    """Computes the identifier Pandoc gives a heading without explicit ID"""
+    text = re.sub(r'!?\[([^\]]*)\]\([^)]*\)', r'\1', text)
+    text = re.sub(r'[*_`~\\]', '', text)
+    text = re.sub(r'[^\w\s.\-]', '', text).strip().lower()
+    text = re.sub(r'\s+', '-', text)
+    # Up to the first letter; Pandoc keeps non-ASCII letters such as umlauts
+    text = re.sub(r'^[\W\d_]+', '', text)
+    return text or 'section'
+
+def _plain_title(text):
+    """Heading text without Markdown formatting, used as page title"""
+    text = re.sub(r'!?\[([^\]]*)\]\([^)]*\)', r'\1', text)
+    text = re.sub(r'\\(.)', r'\1', text)
+    return re.sub(r'[*_`]', '', text).strip()
+
+def find_headings(lines):
+    """
+    Finds all ATX and Setext headings outside of code blocks
+
+    Returns:
+        list: dicts with start line, line count, level, text and identifier
+    """
+    headings = []
+    used = {}
+    fence = None
+
+    for i, line in enumerate(lines):
+        match = _FENCE.match(line)
+        if match:
+            marker = match.group(1)[0]
+            if fence is None:
+                fence = marker
+            elif fence == marker:
+                fence = None
+            continue
+        if fence is not None:
+            continue
+
+        heading = None
+        atx = _ATX_HEADING.match(line)
+        if atx:
+            heading = {'start': i, 'count': 1, 'level': len(atx.group(1)), 'raw': atx.group(2)}
+        elif i > 0 and _SETEXT_UNDERLINE.match(line) and lines[i - 1].strip() and \
+                not lines[i - 1].startswith((' ', '\t', '>', '-', '*', '|')) and \
+                (i < 2 or not lines[i - 2].strip()):
+            level = 1 if line.startswith('=') else 2
+            heading = {'start': i - 1, 'count': 2, 'level': level, 'raw': lines[i - 1].strip()}
+        if heading is None:
+            continue
+
+        raw = heading['raw']
+        explicit = None
+        attributes = _ATTRIBUTES.search(raw)
+        if attributes:
+            raw = raw[:attributes.start()]
+            explicit = next((part[1:] for part in attributes.group(1).split() if part.startswith('#')), None)
+        heading['text'] = raw.strip()
+
+        identifier = explicit or heading_identifier(heading['text'])
+        if not explicit and identifier in used:
+            # Pandoc numbers duplicate identifiers: intro, intro-1, intro-2, ...
+            used[identifier] += 1
+            identifier = f"{identifier}-{used[identifier]}"
+        else:
+            used.setdefault(identifier, 0)
+        heading['id'] = identifier
+        headings.append(heading)
+
+    return headings
+
+def _slug(text, sanitize_path_fn, number):
+    slug = sanitize_path_fn(_plain_title(text)).lower().strip('-')[:60].strip('-')
+    # Leading numbers keep the parts in document order in the Wiki.js navigation
+    return f"{number:02d}-{slug}" if slug else f"{number:02d}-teil"
+
+def split_markdown(content, level, base_path, title, sanitize_path_fn, sanitize_title_fn):
+    """
+    Splits Markdown at all headings up to the given level
+
+    Args:
+        content: Converted Markdown
+        level: Deepest heading level that starts a new page (1-6)
+        base_path: Resolved Wiki.js path of the document, used for the index page
+        title: Title of the index page
+        sanitize_path_fn / sanitize_title_fn: Sanitizers for page paths and titles
+
+    Returns:
+        list: dicts with path, title, content and depth (index page first),
+              or None if the document has no heading to split at
+    """
+    lines = content.splitlines()
+    headings = find_headings(lines)
+    split_points = [h for h in headings if h['level'] <= level]
+    if not split_points:
+        return None
+
+    # Build the page hierarchy: each part lives below the last part with a lower heading level
+    parts = []
+    stack = []
+    counters = {}
+    for index, heading in enumerate(split_points):
+        while stack and stack[-1]['level'] >= heading['level']:
+            stack.pop()
+        parent_path = stack[-1]['path'] if stack else base_path
+        counters[parent_path] = counters.get(parent_path, 0) + 1
+
+        end = split_points[index + 1]['start'] if index + 1 < len(split_points) else len(lines)
+        part = {
+            'path': f"{parent_path}/{_slug(heading['text'], sanitize_path_fn, counters[parent_path])}",
+            'title': sanitize_title_fn(_plain_title(heading['text'])) or title,
+            'level': heading['level'],
+            'depth': len(stack) + 1,
+            'id': heading['id'],
+            'start': heading['start'],
+            # The heading itself becomes the page title
+            'body_start': heading['start'] + heading['count'],
+            'end': end,
+        }
+        parts.append(part)
+        stack.append(part)
+
+    # Anchor -> page that contains it (split headings point to the page itself)
+    anchors = {}
+    first_start = split_points[0]['start']
+    for heading in headings:
+        owner = None
+        for part in parts:
+            if part['start'] <= heading['start'] < part['end']:
+                owner = part
+                break
+        if owner is None:
+            anchors[heading['id']] = (base_path, heading['id'])
+        elif owner['id'] == heading['id']:
+            anchors[heading['id']] = (owner['path'], None)
+        else:
+            anchors[heading['id']] = (owner['path'], heading['id'])
+
+    def fix_links(text, page_path):
+        def replace(match):
+            target = anchors.get(match.group(1))
+            if target is None or (target[0] == page_path and target[1] is not None):
+                return match.group(0)
+            path, anchor = target
+            return f"](/{path}#{anchor})" if anchor else f"](/{path})"
+        return _ANCHOR_LINK.sub(replace, text)
+
+    # Index page: text before the first split heading plus a table of contents
+    intro = '\n'.join(lines[:first_start]).strip()
+    toc = ['## Inhalt', '']
+    for part in parts:
+        toc.append('    ' * (part['depth'] - 1) + f"- [{part['title']}](/{part['path']})")
+    index_content = (intro + '\n\n' if intro else '') + '\n'.join(toc) + '\n'
+
+    pages = [{'path': base_path, 'title': title, 'content': fix_links(index_content, base_path), 'depth': 0}]
+    for part in parts:
+        body = '\n'.join(lines[part['body_start']:part['end']]).strip()
+        if not body:
+            # Chapters without own text list their sections instead of staying empty
+            children = [child for child in parts if child['path'].startswith(part['path'] + '/')]
+            body = '\n'.join('    ' * (child['depth'] - part['depth'] - 1) + f"- [{child['title']}](/{child['path']})"
+                             for child in children) or part['title']
+        body += '\n'
+        pages.append({
+            'path': part['path'],
+            'title': part['title'],
+            'content': fix_links(body, part['path']),
+            'depth': part['depth'],
+        })
+    return pages
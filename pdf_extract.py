@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Page-parallel text extraction from PDF files
+
+Pandoc cannot read PDF. The pages are split into ranges, and every range
+is extracted by its own `pdftohtml -xml` process (poppler-utils), which
+returns the text fragments of each page with position and font size; a
+pool of threads keeps several of these processes running at once, within
+the limit for heavy conversions of process_runner. The pages are
+reassembled in order and turned into Markdown on document level:
+
+- rows are formed from fragments on the same baseline; rows with several
+  aligned cells in a run become tables
+- single rows set in a larger font than the body text become headings,
+  one level per font size (largest first)
+- body rows are joined into paragraphs, also across page breaks, with
+  hyphenation removed; bullet characters become list items
+- lines that repeat at the top or bottom of most pages (running headers,
+  page numbers) are dropped
+
+Scanned PDFs without a text layer produce no text; OCR is out of scope.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+import process_runner
+
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# Largest page range per pdftohtml process; longer documents get more ranges than workers
+MAX_RANGE_PAGES = 25
+
+# A row counts as heading if its font is this much larger than the body text
+HEADING_RATIO = 1.15
+MAX_HEADING_LEVELS = 3
+MAX_HEADING_CHARS = 150
+# Share of the page height at the top and bottom searched for running headers and footers
+MARGIN_SHARE = 0.08
+# Vertical gap (in row heights) that starts a new paragraph
+PARAGRAPH_GAP = 1.6
+
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_BULLET_PATTERN = re.compile(r'^[•●▪■◦‣∙\-–*]\s+')
+_NUMBERED_PATTERN = re.compile(r'^(\d{1,3})[.)]\s+')
+_PAGE_NUMBER_PATTERN = re.compile(r'^[-–\s]*(?:[Ss]eite\s+)?\d+(?:\s*(?:/|von)\s*\d+)?[-–\s]*$')
+
+class PdfError(RuntimeError):
+    """The PDF cannot be read (damaged, encrypted or poppler missing)"""
+
+def is_pdf(file_path):
+    return file_path.rsplit('.', 1)[-1].lower() == 'pdf'
+
+def is_available():
+    """Checks whether pdfinfo and pdftohtml (poppler-utils) are installed"""
+    return shutil.which('pdfinfo') is not None and shutil.which('pdftohtml') is not None
+
+def _escape(text):
+    """Escapes characters that would otherwise start Markdown syntax"""
+    return re.sub(r'([\\`*_\[\]<>|])', r'\\\1', text)
+
+def _escape_block_start(text):
+    """Escapes a heading, list or quote marker at the start of a block ('>' is escaped by _escape)"""
+    return re.sub(r'^(?:(#|[-+])(?=\s|$)|(\d+)([.)])(?=\s|$))|^#',
+                  lambda m: f"{m.group(2)}\\{m.group(3)}" if m.group(2) else '\\' + m.group(0), text)
+
+def page_count(file_path):
+    completed = process_runner.run(['pdfinfo', file_path], encoding='utf-8', errors='replace')
+    match = re.search(r'^Pages:\s+(\d+)', completed.stdout, re.MULTILINE)
+    if not match:
+        raise PdfError("Seitenzahl des PDF konnte nicht ermittelt werden")
+    return int(match.group(1))
+
+# --- Extraction (runs in parallel) ------------------------------------------
+
+def _rows(fragments):
+    """Groups text fragments on the same baseline into rows of cells"""
+    rows = []
+    for fragment in sorted(fragments, key=lambda item: (item['top'], item['left'])):
+        row = rows[-1] if rows else None
+        if row is not None and abs(fragment['top'] - row['top']) <= max(2, row['height'] * 0.3):
+            row['fragments'].append(fragment)
+            row['height'] = max(row['height'], fragment['height'])
+        else:
+            rows.append({'top': fragment['top'], 'height': fragment['height'], 'fragments': [fragment]})
+
+    for row in rows:
+        cells = []
+        for fragment in sorted(row['fragments'], key=lambda item: item['left']):
+            # Fragments closer than about one character belong to the same cell
+            if cells and fragment['left'] - cells[-1]['right'] < fragment['size'] * 0.8:
+                cell = cells[-1]
+                gap = '' if cell['text'].endswith(' ') or fragment['text'].startswith(' ') else ' '
+                cell['text'] += gap + fragment['text']
+                cell['right'] = max(cell['right'], fragment['right'])
+                cell['bold'] = cell['bold'] and fragment['bold']
+            else:
+                cells.append(dict(fragment))
+        row['cells'] = [dict(cell, text=cell['text'].strip()) for cell in cells if cell['text'].strip()]
+        row['size'] = max((cell['size'] for cell in row['cells']), default=0)
+        row['bold'] = bool(row['cells']) and all(cell['bold'] for cell in row['cells'])
+        del row['fragments']
+    return [row for row in rows if row['cells']]
+
+def page_ranges(pages_total, workers):
+    """Splits the pages into contiguous (first, last) ranges, about one per worker"""
+    size = max(1, min(MAX_RANGE_PAGES, -(-pages_total // max(1, workers))))
+    return [(first, min(first + size - 1, pages_total)) for first in range(1, pages_total + 1, size)]
+
+def extract_pages(file_path, first, last):
+    """
+    Extracts the text rows of a range of pages with one pdftohtml process
+
+    Returns:
+        list: One dict per page from first to last: number, height and rows
+        (page, top, height, size, bold, cells with left/right/text)
+    """
+    completed = process_runner.run([
+        'pdftohtml', '-xml', '-i', '-q', '-nodrm', '-stdout',
+        '-f', str(first), '-l', str(last), file_path
+    ], heavy=True, encoding='utf-8', errors='replace')
+    try:
+        root = ElementTree.fromstring(_INVALID_XML_CHARS.sub('', completed.stdout).encode('utf-8'))
+    except ElementTree.ParseError as e:
+        raise PdfError(f"Seiten {first}-{last} konnten nicht gelesen werden: {e}") from e
+
+    # Font IDs are numbered across all pages of one pdftohtml run
+    sizes = {spec.get('id'): float(spec.get('size', 0)) for spec in root.iter('fontspec')}
+    pages = {number: {'number': number, 'height': 0, 'rows': []} for number in range(first, last + 1)}
+    for position, page in enumerate(root.findall('page')):
+        number = int(page.get('number', first + position))
+        if number not in pages:
+            continue
+        fragments = []
+        for text in page.iter('text'):
+            content = ''.join(text.itertext())
+            if not content.strip():
+                continue
+            left = float(text.get('left', 0))
+            fragments.append({
+                'top': float(text.get('top', 0)),
+                'left': left,
+                'right': left + float(text.get('width', 0)),
+                'height': float(text.get('height', 0)),
+                'size': sizes.get(text.get('font'), 0),
+                # Only fragments that are bold as a whole count as bold
+                'bold': text.find('b') is not None and ''.join(text.find('b').itertext()).strip() == content.strip(),
+                'text': content,
+            })
+        rows = _rows(fragments)
+        for row in rows:
+            row['page'] = number
+        pages[number] = {'number': number, 'height': float(page.get('height', 0)), 'rows': rows}
+    return [pages[number] for number in range(first, last + 1)]
+
+# --- Markdown (runs once on the whole document) -----------------------------
+
+def _normalized(row):
+    return re.sub(r'\d+', '#', ' '.join(cell['text'] for cell in row['cells']).lower())
+
+def _strip_running_lines(pages):
+    """Removes page numbers and headers/footers that repeat on most pages"""
+    def margin_rows(page):
+        limit = page['height'] * MARGIN_SHARE
+        return [row for row in page['rows']
+                if row['top'] < limit or row['top'] + row['height'] > page['height'] - limit]
+
+    counts = Counter()
+    for page in pages:
+        counts.update({_normalized(row) for row in margin_rows(page)})
+    repeating = {text for text, count in counts.items() if len(pages) >= 3 and count >= len(pages) / 2}
+
+    for page in pages:
+        margin = {id(row) for row in margin_rows(page)}
+        page['rows'] = [
+            row for row in page['rows']
+            if id(row) not in margin or not (
+                _normalized(row) in repeating
+                or _PAGE_NUMBER_PATTERN.match(' '.join(cell['text'] for cell in row['cells']))
+            )
+        ]
+
+def _heading_levels(pages):
+    """Maps the font sizes used for headings to Markdown levels"""
+    weights = Counter()
+    for page in pages:
+        for row in page['rows']:
+            weights[round(row['size'])] += sum(len(cell['text']) for cell in row['cells'])
+    if not weights:
+        return {}
+    body_size = weights.most_common(1)[0][0]
+    heading_sizes = sorted(
+        {round(row['size']) for page in pages for row in page['rows']
+         if len(row['cells']) == 1 and round(row['size']) >= body_size * HEADING_RATIO
+         and len(row['cells'][0]['text']) <= MAX_HEADING_CHARS},
+        reverse=True
+    )
+    return {size: min(index + 1, MAX_HEADING_LEVELS) for index, size in enumerate(heading_sizes)}
+
+def _table(rows):
+    """Aligns the cells of consecutive multi-cell rows to the columns of the widest row"""
+    anchors = [cell['left'] for cell in max(rows, key=lambda row: len(row['cells']))['cells']]
+    grid = []
+    for row in rows:
+        values = [''] * len(anchors)
+        for cell in row['cells']:
+            column = min(range(len(anchors)), key=lambda index: abs(anchors[index] - cell['left']))
+            values[column] = (values[column] + ' ' + _escape(cell['text'])).strip()
+        grid.append(values)
+    lines = ['| ' + ' | '.join(grid[0]) + ' |', '|' + '---|' * len(anchors)]
+    lines.extend('| ' + ' | '.join(values) + ' |' for values in grid[1:])
+    return '\n'.join(lines)
+
+def _join_lines(text, line):
+    if not text:
+        return line
+    # "Konver-" + "tierung" -> "Konvertierung"
+    if text.endswith('-') and line[:1].islower():
+        return text[:-1] + line
+    return f"{text} {line}"
+
+def _is_list_item(block):
+    return block.startswith('- ') or bool(re.match(r'\d{1,3}\. ', block))
+
+def to_markdown(pages):
+    """Builds the Markdown of the extracted pages (in page order)"""
+    _strip_running_lines(pages)
+    levels = _heading_levels(pages)
+
+    blocks = []
+    paragraph = ''
+    previous = None
+
+    def flush():
+        nonlocal paragraph
+        if paragraph:
+            blocks.append(paragraph)
+            paragraph = ''
+
+    for page in pages:
+        rows = page['rows']
+        index = 0
+        while index < len(rows):
+            row = rows[index]
+
+            # A run of at least two rows with several cells is a table
+            if len(row['cells']) > 1:
+                end = index
+                while end < len(rows) and len(rows[end]['cells']) > 1:
+                    end += 1
+                if end - index >= 2:
+                    flush()
+                    blocks.append(_table(rows[index:end]))
+                    previous = None
+                    index = end
+                    continue
+
+            text = ' '.join(cell['text'] for cell in row['cells'])
+            level = levels.get(round(row['size'])) if len(row['cells']) == 1 else None
+            if level:
+                flush()
+                blocks.append('#' * level + ' ' + _escape(text))
+                previous = None
+            elif _BULLET_PATTERN.match(text):
+                flush()
+                paragraph = '- ' + _escape_block_start(_escape(_BULLET_PATTERN.sub('', text)))
+                previous = row
+            elif _NUMBERED_PATTERN.match(text):
+                flush()
+                number = _NUMBERED_PATTERN.match(text).group(1)
+                paragraph = f"{number}. " + _escape_block_start(_escape(_NUMBERED_PATTERN.sub('', text)))
+                previous = row
+            else:
+                # A large gap starts a new paragraph; at a page break the paragraph continues
+                # unless the previous one ended with a full stop
+                new_paragraph = previous is None or (
+                    previous['page'] == page['number']
+                    and row['top'] - previous['top'] > previous['height'] * PARAGRAPH_GAP
+                ) or (previous['page'] != page['number'] and paragraph.endswith(('.', ':', '!', '?')))
+                if new_paragraph:
+                    flush()
+                # Paragraphs are one line, so only their start could be read as a block marker
+                line = _escape(text)
+                paragraph = _join_lines(paragraph, line) if paragraph else _escape_block_start(line)
+                previous = row
+            index += 1
+    flush()
+
+    # Consecutive list items form one list
+    output = []
+    for block in blocks:
+        if output and _is_list_item(block) and _is_list_item(output[-1]):
+            output.append('\n')
+        elif output:
+            output.append('\n\n')
+        output.append(block)
+    return ''.join(output) + '\n'
+
+def convert(file_path, workers=DEFAULT_WORKERS, timer=None):
+    """
+    Converts a PDF to Markdown, extracting page ranges in parallel
+
+    Args:
+        file_path: PDF file
+        workers: Number of pdftohtml processes running at the same time
+        timer: Optional stage_timing.StageTimer; every page range is recorded as
+            nested stage pdf_pages_<first>-<last> with its number of pages (wall
+            time only, the work is done by one pdftohtml process per range)
+
+    Returns:
+        str: The Markdown (empty if the PDF has no text layer)
+
+    Raises:
+        PdfError: The PDF cannot be read
+    """
+
+    def timed_extract(page_range):
+        """Extracts a page range and measures it like a stage of stage_timing.StageTimer"""
+        first, last = page_range
+        wall_start = time.perf_counter()
+        pages = extract_pages(file_path, first, last)
+        timing = {
+            'stage': f"pdf_pages_{first}-{last}",
+            'nested': True,
+            'wall_ms': round((time.perf_counter() - wall_start) * 1000, 2),
+            'pages': last - first + 1,
+            'bytes_out': sum(len(cell['text'].encode('utf-8'))
+                             for page in pages for row in page['rows'] for cell in row['cells']),
+        }
+        return pages, timing
+
+    try:
+        ranges = page_ranges(page_count(file_path), workers)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ranges) or 1)),
+                                thread_name_prefix='pdf-pages') as pool:
+            # map keeps the page order, whatever order the ranges finish in
+            results = list(pool.map(timed_extract, ranges))
+    except subprocess.CalledProcessError as e:
+        raise PdfError((e.stderr or '').strip() or "PDF konnte nicht gelesen werden") from e
+
+    if timer is not None:
+        for _, timing in results:
+            timer.record(timing)
+    return to_markdown([page for pages, _ in results for page in pages])
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Managed subprocess execution for Pandoc and other external converters
+"""
+
+import os
+import signal
+import subprocess
+import threading
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Default limits, can be changed with configure()
+DEFAULT_TIMEOUT = 300
+DEFAULT_MEMORY_LIMIT_MB = 2048
+DEFAULT_CPU_LIMIT = 600
+DEFAULT_MAX_HEAVY = 2
+DEFAULT_MAX_QUEUE = 20
+DEFAULT_QUEUE_TIMEOUT = 600
+
+# Inputs larger than this are treated as heavy conversions
+HEAVY_INPUT_BYTES = 5 * 1024 * 1024
+
+class ConversionTimeout(Exception):
+    """Raised when a conversion exceeds its wall-clock or CPU time limit"""
+
+    def __init__(self, cmd, timeout):
+        super().__init__(f"Zeitüberschreitung nach {timeout} Sekunden: {cmd[0]}")
+        self.cmd = cmd
+        self.timeout = timeout
+
+class ConversionRejected(Exception):
+    """Raised when the queue for heavy conversions is full"""
+
+_config = {
+    'timeout': DEFAULT_TIMEOUT,
+    'memory_limit_mb': DEFAULT_MEMORY_LIMIT_MB,
+    'cpu_limit': DEFAULT_CPU_LIMIT,
+    'max_heavy': DEFAULT_MAX_HEAVY,
+    'max_queue': DEFAULT_MAX_QUEUE,
+    'queue_timeout': DEFAULT_QUEUE_TIMEOUT,
+}
+
+_heavy_slots = threading.BoundedSemaphore(DEFAULT_MAX_HEAVY)
+_queue_lock = threading.Lock()
+_waiting = 0
+
+def configure(timeout=None, memory_limit_mb=None, cpu_limit=None, max_heavy=None, max_queue=None,
+              queue_timeout=None):
+    """Sets the limits for all following conversions (0 disables a limit)"""
+    global _heavy_slots
+
+    for key, value in (('timeout', timeout), ('memory_limit_mb', memory_limit_mb),
+                       ('cpu_limit', cpu_limit), ('max_queue', max_queue),
+                       ('queue_timeout', queue_timeout)):
+        if value is not None:
+            _config[key] = value
+
+    if max_heavy is not None and max_heavy != _config['max_heavy']:
+        _config['max_heavy'] = max(1, max_heavy)
+        _heavy_slots = threading.BoundedSemaphore(_config['max_heavy'])
+
+def get_config():
+    """Returns a copy of the active limits"""
+    return dict(_config)
+
+def is_heavy_input(file_path):
+    """Checks whether an input file is large enough to count as heavy conversion"""
+    try:
+        return os.path.getsize(file_path) >= HEAVY_INPUT_BYTES
+    except OSError:
+        return False
+
+def _apply_limits(process, memory_limit_mb, cpu_limit):
+    """
+    Applies the resource limits to a started child process
+
+    preexec_fn is not safe in a parent with threads, so the limits are set
+    from outside with prlimit right after the spawn. Processes the child
+    starts afterwards (e.g. LaTeX started by Pandoc) inherit them.
+    """
+    if resource is None or not hasattr(resource, 'prlimit') or (not memory_limit_mb and not cpu_limit):
+        return
+    try:
+        if memory_limit_mb:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.prlimit(process.pid, resource.RLIMIT_AS, (limit, limit))
+        if cpu_limit:
+            # Soft limit sends SIGXCPU, hard limit a few seconds later SIGKILL
+            resource.prlimit(process.pid, resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 5))
+    except ProcessLookupError:
+        # Already finished
+        pass
+
+def _kill_process_group(process):
+    """Kills the process and all its children (e.g. LaTeX started by Pandoc)"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        process.kill()
+
+def _acquire_heavy_slot():
+    """Waits for a free slot for a heavy conversion"""
+    global _waiting
+
+    slots = _heavy_slots
+    if slots.acquire(blocking=False):
+        return slots
+
+    with _queue_lock:
+        if _config['max_queue'] and _waiting >= _config['max_queue']:
+            raise ConversionRejected("Zu viele Konvertierungen in der Warteschlange")
+        _waiting += 1
+
+    try:
+        queue_timeout = _config['queue_timeout'] or None
+        if not slots.acquire(timeout=queue_timeout):
+            raise ConversionRejected("Wartezeit für Konvertierung überschritten")
+    finally:
+        with _queue_lock:
+            _waiting -= 1
+
+    return slots
+
+def run(cmd, heavy=False, timeout=None, input=None, text=True, check=True, encoding=None, errors=None):
+    """
+    Runs an external command with timeout, memory and CPU limits.
+
+    With text=True, input and output are decoded with encoding (default: the
+    locale's, which is ASCII under a service's C locale) and errors as in
+    subprocess.Popen; pass text=False to exchange bytes.
+
+    The command runs in its own process group, so on timeout all children are
+    killed as well. Heavy conversions (PDF exports, large inputs) are admitted
+    only up to the configured number in parallel, further ones wait in a queue.
+
+    Returns:
+        subprocess.CompletedProcess with captured stdout and stderr
+
+    Raises:
+        ConversionTimeout: If the wall-clock or CPU time limit was exceeded
+        ConversionRejected: If the queue for heavy conversions is full
+        subprocess.CalledProcessError: If the command failed and check is set
+    """
+    if timeout is None:
+        timeout = _config['timeout'] or None
+
+    slots = _acquire_heavy_slot() if heavy else None
+
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=text,
+            encoding=encoding,
+            errors=errors,
+            start_new_session=True
+        )
+
+        try:
+            _apply_limits(process, _config['memory_limit_mb'], _config['cpu_limit'])
+            stdout, stderr = process.communicate(input=input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.communicate()
+            raise ConversionTimeout(cmd, timeout)
+        except BaseException:
+            _kill_process_group(process)
+            process.wait()
+            raise
+    finally:
+        if slots is not None:
+            slots.release()
+
+    # SIGXCPU at the soft CPU limit, SIGKILL if the process ignored it until the hard limit
+    if process.returncode in (-signal.SIGXCPU, -signal.SIGKILL) and _config['cpu_limit']:
+        raise ConversionTimeout(cmd, _config['cpu_limit'])
+
+    if check and process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
+
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Fair-share scheduler for file conversions
+
+Every uploaded file becomes one task in the queue of its user. Workers
+take tasks round-robin across users, so somebody uploading hundreds of
+files does not delay a colleague's single document by more than one file
+per worker. Small inputs (by size and, for Office files, estimated page
+count) go into a fast lane that is served first and has its own workers,
+so they never wait behind large presentations. A user never has more than
+max_in_flight tasks running at once, and when too many tasks are queued
+new batches are rejected with SchedulerFull, which carries a Retry-After
+estimate for a 503 response. A batch larger than the whole queue limit is
+admitted once the queue is empty, so it is delayed but never rejected forever.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+DEFAULT_WORKERS = 2
+DEFAULT_FAST_WORKERS = 1
+DEFAULT_FAST_LANE_BYTES = 256 * 1024
+DEFAULT_FAST_LANE_PAGES = 20
+DEFAULT_MAX_IN_FLIGHT = 2
+DEFAULT_MAX_QUEUED = 200
+
+LANES = ('fast', 'normal')
+
+# Assumed task duration until the first tasks have been measured
+INITIAL_TASK_SECONDS = 5.0
+MIN_RETRY_AFTER = 5
+MAX_RETRY_AFTER = 300
+
+_SLIDE_PATTERN = re.compile(r'^ppt/slides/slide\d+\.xml$')
+_PDF_PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+class SchedulerFull(Exception):
+    """Raised when the queue is saturated; retry_after is a wait estimate in seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def estimate_pages(file_path):
+    """
+    Estimates the page count of an Office file from its metadata
+
+    Returns:
+        int or None: Pages (DOCX/ODT/PDF) or slides (PPTX/ODP), None if unknown
+    """
+    ext = file_path.rsplit('.', 1)[-1].lower()
+    if ext == 'pdf':
+        # Only called for small files; page objects in compressed object streams are not visible
+        try:
+            with open(file_path, 'rb') as f:
+                return len(_PDF_PAGE_PATTERN.findall(f.read())) or None
+        except OSError:
+            return None
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            if ext == 'pptx':
+                return sum(1 for name in zf.namelist() if _SLIDE_PATTERN.match(name))
+            if ext == 'docx':
+                match = re.search(rb'<Pages>(\d+)</Pages>', zf.read('docProps/app.xml'))
+            elif ext in ('odt', 'odp'):
+                match = re.search(rb'meta:(?:page|object)-count="(\d+)"', zf.read('meta.xml'))
+            else:
+                return None
+            return int(match.group(1)) if match else None
+    except (zipfile.BadZipFile, KeyError, OSError):
+        return None
+
+class _Task:
+    __slots__ = ('future', 'func', 'args', 'kwargs', 'user', 'lane', 'queued_at')
+
+    def __init__(self, func, args, kwargs, user, lane):
+        self.future = Future()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.user = user
+        self.lane = lane
+        self.queued_at = time.monotonic()
+
+class FairScheduler:
+    """Runs tasks on a fixed set of threads with per-user fair queuing"""
+
+    def __init__(self, workers=DEFAULT_WORKERS, fast_workers=DEFAULT_FAST_WORKERS,
+                 fast_lane_bytes=DEFAULT_FAST_LANE_BYTES, fast_lane_pages=DEFAULT_FAST_LANE_PAGES,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_queued=DEFAULT_MAX_QUEUED, name='convert'):
+        self.workers = max(1, workers)
+        self.fast_workers = max(0, fast_workers)
+        self.fast_lane_bytes = fast_lane_bytes
+        self.fast_lane_pages = fast_lane_pages
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queued = max_queued
+        self.name = name
+
+        # lane -> user -> queued tasks; the order of the users is the round-robin order
+        self._queues = {lane: OrderedDict() for lane in LANES}
+        self._queued = 0
+        self._in_flight = {}
+        self._task_seconds = INITIAL_TASK_SECONDS
+        self._completed = 0
+        self._rejected = 0
+        self._condition = threading.Condition()
+        self._threads = []
+
+    def _start(self):
+        """Starts the threads on first use, so every (forked) worker process gets its own"""
+        if self._threads:
+            return
+        lanes = [('fast', 'normal')] * self.workers + [('fast',)] * self.fast_workers
+        for i, worker_lanes in enumerate(lanes):
+            thread = threading.Thread(target=self._work, args=(worker_lanes,),
+                                      name=f"{self.name}-{'-'.join(worker_lanes)}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def lane_for(self, file_path):
+        """Small files and short documents go into the fast lane"""
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            return 'normal'
+        if size > self.fast_lane_bytes:
+            return 'normal'
+        pages = estimate_pages(file_path)
+        return 'fast' if pages is None or pages <= self.fast_lane_pages else 'normal'
+
+    def retry_after(self):
+        """Estimates when the queue will have room again"""
+        with self._condition:
+            seconds = self._queued * self._task_seconds / (self.workers + self.fast_workers)
+        return int(min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(seconds))))
+
+    def _is_full(self, count):
+        """Queue limit check; an empty queue takes any batch (caller holds the condition)"""
+        return bool(self.max_queued and self._queued and self._queued + count > self.max_queued)
+
+    def check_capacity(self, count=1):
+        """Raises SchedulerFull if count more tasks would exceed the queue limit"""
+        with self._condition:
+            full = self._is_full(count)
+            if full:
+                self._rejected += 1
+        if full:
+            raise SchedulerFull("Der Server ist ausgelastet, bitte später erneut versuchen", self.retry_after())
+
+    def submit_batch(self, user, items, admitted=False):
+        """
+        Queues several tasks of one user at once, or none if the queue is full
+
+        Args:
+            user: Key for fair queuing (user name or client address)
+            items: List of (file_path, func, args, kwargs); file_path decides the lane
+            admitted: The caller already passed check_capacity for these tasks and
+                cannot take them back, so the queue limit is not checked again
+
+        Returns:
+            list: One Future per item
+        """
+        tasks = [_Task(func, args, kwargs, user, self.lane_for(file_path))
+                 for file_path, func, args, kwargs in items]
+        with self._condition:
+            if not admitted and self._is_full(len(tasks)):
+                self._rejected += 1
+                full = True
+            else:
+                full = False
+                self._start()
+                for task in tasks:
+                    self._queues[task.lane].setdefault(user, deque()).append(task)
+                self._queued += len(tasks)
+                self._condition.notify_all()
+        if full:
+            raise SchedulerFull("Der Server ist ausgelastet, bitte später erneut versuchen", self.retry_after())
+        return [task.future for task in tasks]
+
+    def submit(self, user, file_path, func, *args, **kwargs):
+        """Queues a single task; raises SchedulerFull when the queue is saturated"""
+        return self.submit_batch(user, [(file_path, func, args, kwargs)])[0]
+
+    def _next_task(self, lanes):
+        """Takes the next task round-robin over the users below their in-flight limit"""
+        for lane in lanes:
+            queues = self._queues[lane]
+            for user in list(queues):
+                if self._in_flight.get(user, 0) >= self.max_in_flight:
+                    continue
+                user_queue = queues[user]
+                task = user_queue.popleft()
+                if user_queue:
+                    queues.move_to_end(user)
+                else:
+                    del queues[user]
+                return task
+        return None
+
+    def _work(self, lanes):
+        while True:
+            with self._condition:
+                task = self._next_task(lanes)
+                while task is None:
+                    self._condition.wait()
+                    task = self._next_task(lanes)
+                self._queued -= 1
+                self._in_flight[task.user] = self._in_flight.get(task.user, 0) + 1
+
+            started = time.monotonic()
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.func(*task.args, **task.kwargs))
+                except BaseException as e:
+                    task.future.set_exception(e)
+
+            with self._condition:
+                self._in_flight[task.user] -= 1
+                if not self._in_flight[task.user]:
+                    del self._in_flight[task.user]
+                # Moving average of the task duration for the Retry-After estimate
+                self._task_seconds = 0.8 * self._task_seconds + 0.2 * (time.monotonic() - started)
+                self._completed += 1
+                # A user below the limit again may unblock tasks for any worker
+                self._condition.notify_all()
+
+    def stats(self):
+        """Returns queue depths and counters for monitoring"""
+        with self._condition:
+            return {
+                'workers': self.workers,
+                'fast_workers': self.fast_workers,
+                'queued': self._queued,
+                'queued_by_lane': {lane: sum(len(q) for q in self._queues[lane].values()) for lane in LANES},
+                'queued_users': len(set().union(*(self._queues[lane].keys() for lane in LANES))),
+                'in_flight': dict(self._in_flight),
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'avg_task_seconds': round(self._task_seconds, 2),
+            }
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Near-duplicate detection for uploads
+
+Every page is reduced to the set of its word 3-grams (shingles) and a
+MinHash signature of NUM_HASHES values, whose agreement estimates the
+Jaccard similarity of two shingle sets. The signature is computed with
+one-permutation hashing (one hash per shingle, one bin per signature
+value), so it costs a single pass over the text. Signatures are split
+into bands; pages sharing at least one band bucket are candidates (LSH),
+so a lookup touches a handful of rows of an indexed SQLite table instead
+of comparing against every page, also with tens of thousands of pages.
+
+The index lives in a local SQLite file shared by all processes. It is
+updated on every upload (wikijs.configure_similarity) and, with the local
+mirror, from every mirror sync.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+NUM_HASHES = 128
+# 32 bands of 4 values: pages with a similarity of 80 % share a bucket with a probability of 99.9 %
+BANDS = 32
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 90
+DEFAULT_MODE = 'warn'
+MODES = ('off', 'warn', 'block')
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def shingles(content, size=SHINGLE_SIZE):
+    """
+    Hashes of the word n-grams of a text
+
+    Markdown syntax, punctuation and case are ignored, so formatting
+    changes between two uploads do not reduce the similarity.
+    """
+    words = _WORD_PATTERN.findall(content.lower())
+    if len(words) < size:
+        return {_hash64(' '.join(words))} if words else set()
+    return {_hash64(' '.join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+def signature(hashes, num_hashes=NUM_HASHES):
+    """
+    MinHash signature with one-permutation hashing
+
+    Each shingle hash goes into one of num_hashes bins and every bin keeps
+    its minimum. Empty bins (short texts) borrow the value of the next
+    filled bin, so the signature stays comparable position by position.
+
+    Returns:
+        array: num_hashes unsigned 32-bit values ('I'), empty for an empty text
+    """
+    if not hashes:
+        return array('I')
+    bins = [None] * num_hashes
+    for value in hashes:
+        index = value % num_hashes
+        low = (value // num_hashes) & 0xFFFFFFFF
+        if bins[index] is None or low < bins[index]:
+            bins[index] = low
+    for index in range(num_hashes):
+        if bins[index] is None:
+            offset = 1
+            while bins[(index + offset) % num_hashes] is None:
+                offset += 1
+            # The offset is mixed in so borrowed values do not match filled bins of other pages
+            bins[index] = (bins[(index + offset) % num_hashes] + offset * 0x9E3779B1) & 0xFFFFFFFF
+    return array('I', bins)
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures (0.0 - 1.0)"""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+def band_buckets(sig, bands=BANDS):
+    """One bucket key per band; the band number is part of the key"""
+    rows = len(sig) // bands
+    buckets = []
+    for band in range(bands):
+        part = sig[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(part.tobytes(), digest_size=8, person=band.to_bytes(2, 'little')).digest()
+        # SQLite integers are signed 64 bit
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+def _encode(sig):
+    return sig.tobytes()
+
+def _decode(blob):
+    sig = array('I')
+    sig.frombytes(blob)
+    return sig
+
+class SimilarityIndex:
+    """LSH index of page signatures in SQLite"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS signatures (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE,
+            title TEXT,
+            updated_at TEXT,
+            signature BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS buckets (
+            bucket INTEGER NOT NULL,
+            signature_id INTEGER NOT NULL,
+            PRIMARY KEY (bucket, signature_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS buckets_signature ON buckets (signature_id);
+    """
+
+    def __init__(self, db_path, threshold=DEFAULT_THRESHOLD, mode=DEFAULT_MODE, debug_logger=None):
+        self.db_path = os.path.abspath(db_path)
+        self.threshold = min(max(threshold, 1), 100)
+        self.mode = mode if mode in MODES else DEFAULT_MODE
+        self.log_debug = debug_logger or (lambda message, log_type='info': None)
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _conn(self):
+        """One connection per thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, conn, entries, removed=()):
+        """Replaces the signatures of entries [(path, title, updated_at, sig)] and removes paths"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for path in removed:
+                conn.execute("DELETE FROM buckets WHERE signature_id = (SELECT id FROM signatures WHERE path = ?)",
+                             (path,))
+                conn.execute("DELETE FROM signatures WHERE path = ?", (path,))
+            for path, title, updated_at, sig in entries:
+                row = conn.execute("SELECT id FROM signatures WHERE path = ?", (path,)).fetchone()
+                if row is None:
+                    signature_id = conn.execute(
+                        "INSERT INTO signatures (path, title, updated_at, signature) VALUES (?, ?, ?, ?)",
+                        (path, title, updated_at, _encode(sig))).lastrowid
+                else:
+                    signature_id = row['id']
+                    conn.execute("UPDATE signatures SET title = ?, updated_at = ?, signature = ? WHERE id = ?",
+                                 (title, updated_at, _encode(sig), signature_id))
+                    conn.execute("DELETE FROM buckets WHERE signature_id = ?", (signature_id,))
+                conn.executemany("INSERT OR IGNORE INTO buckets (bucket, signature_id) VALUES (?, ?)",
+                                 [(bucket, signature_id) for bucket in band_buckets(sig)])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def add(self, path, content, title=None, updated_at=None):
+        """Indexes (or re-indexes) the content of a page"""
+        sig = signature(shingles(content or ''))
+        conn = self._conn()
+        if sig:
+            self._write(conn, [(path, title, updated_at, sig)])
+        else:
+            self._write(conn, [], removed=[path])
+
+    def remove(self, path):
+        self._write(self._conn(), [], removed=[path])
+
+    def find_similar(self, content, min_similarity=None, limit=5, exclude_paths=()):
+        """
+        Looks up indexed pages whose content is similar to the given text
+
+        Args:
+            content: Markdown text to check
+            min_similarity: Minimum similarity in percent (default: threshold of the index)
+            limit: Maximum number of matches
+            exclude_paths: Paths that are not reported (e.g. the page being replaced)
+
+        Returns:
+            list: Dicts with path, title and similarity (percent), most similar first
+        """
+        min_similarity = self.threshold if min_similarity is None else min_similarity
+        sig = signature(shingles(content or ''))
+        if not sig:
+            return []
+        buckets = band_buckets(sig)
+        conn = self._conn()
+        placeholders = ','.join('?' * len(buckets))
+        rows = conn.execute(
+            "SELECT path, title, signature FROM signatures WHERE id IN "
+            f"(SELECT signature_id FROM buckets WHERE bucket IN ({placeholders}))",
+            buckets
+        ).fetchall()
+
+        matches = []
+        for row in rows:
+            if row['path'] in exclude_paths:
+                continue
+            similarity = round(estimate_similarity(sig, _decode(row['signature'])) * 100)
+            if similarity >= min_similarity:
+                matches.append({'path': row['path'], 'title': row['title'], 'similarity': similarity})
+        matches.sort(key=lambda match: -match['similarity'])
+        return matches[:limit]
+
+    def sync_from_mirror(self, mirror):
+        """
+        Brings the index up to date with the pages of the local mirror
+
+        Only pages whose content version differs from the indexed one are
+        hashed again; pages that are no longer in the mirror are removed.
+        Pages that were uploaded but are not yet mirrored stay indexed.
+
+        Returns:
+            tuple: (indexed, removed)
+        """
+        started = time.monotonic()
+        conn = self._conn()
+        indexed = {row['path']: row['updated_at'] for row in conn.execute("SELECT path, updated_at FROM signatures")}
+        mirror_conn = mirror._conn()
+        mirrored = {row['path']: row['content_updated_at'] for row in mirror_conn.execute(
+            "SELECT path, content_updated_at FROM pages WHERE content IS NOT NULL")}
+        known_paths = {row['path'] for row in mirror_conn.execute("SELECT path FROM pages")}
+
+        changed = [path for path, updated_at in mirrored.items()
+                   if path not in indexed or indexed[path] != updated_at]
+        # Entries with a version came from the mirror; without it they are fresh uploads
+        removed = [path for path, updated_at in indexed.items() if updated_at and path not in known_paths]
+
+        for start in range(0, len(changed), 200):
+            entries = []
+            for path in changed[start:start + 200]:
+                row = mirror_conn.execute(
+                    "SELECT title, content, content_updated_at FROM pages WHERE path = ? AND content IS NOT NULL",
+                    (path,)).fetchone()
+                if row is None:
+                    continue
+                sig = signature(shingles(row['content']))
+                if sig:
+                    entries.append((path, row['title'], row['content_updated_at'], sig))
+            self._write(conn, entries)
+        if removed:
+            self._write(conn, [], removed=removed)
+
+        if changed or removed:
+            self.log_debug(f"Ähnlichkeitsindex aktualisiert: {len(changed)} Seiten indexiert, {len(removed)} entfernt "
+                           f"({time.monotonic() - started:.1f}s)", "info")
+        return len(changed), len(removed)
+
+    def stats(self):
+        """Returns the size of the index for monitoring"""
+        conn = self._conn()
+        return {
+            'pages': conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0],
+            'threshold': self.threshold,
+            'mode': self.mode,
+        }
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Streaming conversion of spreadsheets (XLSX, ODS, CSV) to Markdown tables
+
+Pandoc cannot read spreadsheets, and loading a whole workbook into memory
+does not work for exports with hundreds of thousands of rows. The sheets
+are therefore parsed row by row (iterparse on the XML inside the ZIP, the
+csv module for CSV), and every processed row is dropped from the parse
+tree right away. Each sheet becomes a "# <sheet>" section; sheets with
+more than page_rows rows are emitted as several tables of page_rows rows
+under "## Zeilen a–b" headings, each repeating the header row, so the
+page split of the upload can turn them into separate Wiki.js pages.
+Only the rows of the current table are held in memory.
+
+Old binary .xls files are converted to .xlsx by LibreOffice beforehand
+(see libreoffice.PRECONVERT_FORMATS).
+"""
+
+import csv
+import io
+import os
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+
+SPREADSHEET_FORMATS = ('xlsx', 'ods', 'csv')
+DEFAULT_PAGE_ROWS = 500
+
+# Bytes read to guess encoding and delimiter of a CSV file
+CSV_SAMPLE_BYTES = 64 * 1024
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_NS_TABLE = '{urn:oasis:names:tc:opendocument:xmlns:table:1.0}'
+_NS_TEXT = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}'
+_NS_OFFICE = '{urn:oasis:names:tc:opendocument:xmlns:office:1.0}'
+
+# Built-in Excel number formats that display dates or times
+_EXCEL_DATE_FORMATS = set(range(14, 23)) | {45, 46, 47}
+# Date/time tokens of a custom format code, after removing quoted text and [colors]
+_DATE_TOKEN_PATTERN = re.compile(r'[dmyhs]', re.IGNORECASE)
+_CELL_REF_PATTERN = re.compile(r'([A-Z]+)')
+
+class UnreadableSpreadsheet(ValueError):
+    """The file is damaged or not a spreadsheet of the expected format"""
+
+def is_spreadsheet(file_path):
+    """Checks whether a file is converted by this module instead of Pandoc"""
+    return file_path.rsplit('.', 1)[-1].lower() in SPREADSHEET_FORMATS
+
+# --- Streaming helpers ------------------------------------------------------
+
+def _iter_elements(source, tag_names):
+    """
+    Yields the finished elements with the given tags and removes them from the tree afterwards
+
+    The parents are tracked from the start events, so processed rows do not
+    accumulate in the tree even if they are nested in groups.
+    """
+    stack = []
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(element)
+            continue
+        stack.pop()
+        if element.tag in tag_names:
+            yield element
+            if stack:
+                stack[-1].remove(element)
+            element.clear()
+
+def _cell_text(value):
+    """Makes a cell value safe for a Markdown table cell"""
+    value = value.strip().replace('\\', '\\\\').replace('|', '\\|')
+    return re.sub(r'\s*\n\s*', '<br>', value)
+
+def _format_number(value):
+    """Formats a stored number without float noise (0.1 + 0.2 -> 0.3, 5.0 -> 5)"""
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    if number.is_integer() and abs(number) < 1e15:
+        return str(int(number))
+    return f"{number:.15g}"
+
+def _column_index(reference):
+    """Zero-based column of a cell reference such as 'AB12'"""
+    index = 0
+    for char in _CELL_REF_PATTERN.match(reference).group(1):
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+# --- XLSX -------------------------------------------------------------------
+
+def _xlsx_shared_strings(archive):
+    try:
+        source = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+    strings = []
+    with source:
+        for item in _iter_elements(source, {f'{_NS_MAIN}si'}):
+            # Rich text consists of several runs; phonetic hints (rPh) are not part of the text
+            strings.append(''.join(
+                text.text or '' for run in [item] + list(item.iter(f'{_NS_MAIN}r'))
+                for text in run.findall(f'{_NS_MAIN}t')
+            ))
+    return strings
+
+def _xlsx_date_styles(archive):
+    """Indexes of the cell styles that format numbers as dates"""
+    try:
+        root = ElementTree.fromstring(archive.read('xl/styles.xml'))
+    except KeyError:
+        return set()
+    custom_dates = set()
+    for number_format in root.iter(f'{_NS_MAIN}numFmt'):
+        code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', '', number_format.get('formatCode', ''))
+        if _DATE_TOKEN_PATTERN.search(code):
+            custom_dates.add(int(number_format.get('numFmtId')))
+    cell_formats = root.find(f'{_NS_MAIN}cellXfs')
+    if cell_formats is None:
+        return set()
+    return {
+        index for index, xf in enumerate(cell_formats.findall(f'{_NS_MAIN}xf'))
+        if int(xf.get('numFmtId', 0)) in _EXCEL_DATE_FORMATS | custom_dates
+    }
+
+def _xlsx_sheets(archive):
+    """(name, member) of the visible worksheets in workbook order, plus the date system"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{_NS_PKG_REL}Relationship')}
+
+    properties = workbook.find(f'{_NS_MAIN}workbookPr')
+    date1904 = properties is not None and properties.get('date1904') in ('1', 'true')
+
+    sheets = []
+    for sheet in workbook.iter(f'{_NS_MAIN}sheet'):
+        if sheet.get('state') in ('hidden', 'veryHidden'):
+            continue
+        target = targets.get(sheet.get(f'{_NS_REL}id'))
+        if not target:
+            continue
+        member = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        sheets.append((sheet.get('name'), member))
+    return sheets, date1904
+
+def _excel_date(value, date1904):
+    try:
+        serial = float(value)
+    except ValueError:
+        return value
+    base = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+    moment = base + timedelta(days=serial)
+    if serial.is_integer():
+        return moment.strftime('%Y-%m-%d')
+    if serial < 1:
+        return moment.strftime('%H:%M:%S')
+    return moment.strftime('%Y-%m-%d %H:%M')
+
+def _xlsx_rows(archive, member, shared_strings, date_styles, date1904):
+    with archive.open(member) as source:
+        for row in _iter_elements(source, {f'{_NS_MAIN}row'}):
+            values = []
+            for cell in row.iter(f'{_NS_MAIN}c'):
+                cell_type = cell.get('t', 'n')
+                if cell_type == 'inlineStr':
+                    value = ''.join(text.text or '' for text in cell.iter(f'{_NS_MAIN}t'))
+                else:
+                    raw = cell.findtext(f'{_NS_MAIN}v')
+                    if raw is None:
+                        continue
+                    if cell_type == 's':
+                        value = shared_strings[int(raw)]
+                    elif cell_type == 'b':
+                        value = 'WAHR' if raw == '1' else 'FALSCH'
+                    elif cell_type in ('str', 'e'):
+                        value = raw
+                    elif int(cell.get('s', 0)) in date_styles:
+                        value = _excel_date(raw, date1904)
+                    else:
+                        value = _format_number(raw)
+
+                reference = cell.get('r')
+                column = _column_index(reference) if reference else len(values)
+                if column >= len(values):
+                    values.extend([''] * (column - len(values) + 1))
+                values[column] = value
+            yield values
+
+def _iter_xlsx(file_path):
+    with zipfile.ZipFile(file_path) as archive:
+        shared_strings = _xlsx_shared_strings(archive)
+        date_styles = _xlsx_date_styles(archive)
+        sheets, date1904 = _xlsx_sheets(archive)
+        for name, member in sheets:
+            yield name, _xlsx_rows(archive, member, shared_strings, date_styles, date1904)
+
+# --- ODS --------------------------------------------------------------------
+
+def _ods_cell_value(cell):
+    """Displayed text of a cell (the text:p paragraphs), falling back to the stored value"""
+    paragraphs = [''.join(paragraph.itertext()) for paragraph in cell.iter(f'{_NS_TEXT}p')]
+    if paragraphs:
+        return '\n'.join(paragraphs)
+    for attribute in ('value', 'date-value', 'time-value', 'boolean-value', 'string-value'):
+        value = cell.get(f'{_NS_OFFICE}{attribute}')
+        if value is not None:
+            return value
+    return ''
+
+def _ods_row(row):
+    values = []
+    # Empty cells are only added when a value follows, so "1024 empty columns" costs nothing
+    pending_empty = 0
+    for cell in row:
+        if cell.tag not in (f'{_NS_TABLE}table-cell', f'{_NS_TABLE}covered-table-cell'):
+            continue
+        repeat = int(cell.get(f'{_NS_TABLE}number-columns-repeated', 1))
+        value = _ods_cell_value(cell)
+        if not value.strip():
+            pending_empty += repeat
+            continue
+        values.extend([''] * pending_empty)
+        pending_empty = 0
+        values.extend([value] * repeat)
+    return values
+
+def _ods_events(source):
+    """Yields ('table', name), ('row', values) and ('end', None) while parsing content.xml"""
+    stack = []
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(element)
+            if element.tag == f'{_NS_TABLE}table':
+                yield 'table', element.get(f'{_NS_TABLE}name')
+            continue
+        stack.pop()
+        if element.tag == f'{_NS_TABLE}table-row':
+            values = _ods_row(element)
+            if values:
+                for _ in range(int(element.get(f'{_NS_TABLE}number-rows-repeated', 1))):
+                    yield 'row', values
+        elif element.tag == f'{_NS_TABLE}table':
+            yield 'end', None
+        else:
+            continue
+        if stack:
+            stack[-1].remove(element)
+        element.clear()
+
+def _ods_sheet_rows(events):
+    for kind, value in events:
+        if kind == 'end':
+            return
+        if kind == 'row':
+            yield value
+
+def _iter_ods(file_path):
+    """Yields (sheet name, rows); the rows of a sheet must be consumed before the next sheet"""
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open('content.xml') as source:
+            events = _ods_events(source)
+            for kind, name in events:
+                if kind == 'table':
+                    yield name, _ods_sheet_rows(events)
+
+# --- CSV --------------------------------------------------------------------
+
+class _SemicolonDialect(csv.excel):
+    delimiter = ';'
+
+def _csv_encoding(sample):
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    # The sample may end in the middle of a multi-byte character
+    for cut in range(4):
+        try:
+            sample[:len(sample) - cut].decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError:
+            continue
+    # Excel exports in Western Europe
+    return 'cp1252'
+
+def _iter_csv(file_path):
+    with open(file_path, 'rb') as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+    encoding = _csv_encoding(sample)
+    text_sample = sample.decode(encoding, errors='ignore')
+    try:
+        dialect = csv.Sniffer().sniff(text_sample, delimiters=',;\t|')
+    except csv.Error:
+        # German Excel writes semicolons
+        dialect = csv.excel if text_sample.count(',') >= text_sample.count(';') else _SemicolonDialect
+
+    def rows():
+        with open(file_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+            yield from csv.reader(f, dialect)
+
+    yield None, rows()
+
+# --- Markdown ---------------------------------------------------------------
+
+def _table(header, rows):
+    width = max([len(header)] + [len(row) for row in rows]) or 1
+    lines = []
+    header = list(header) + [''] * (width - len(header))
+    lines.append('| ' + ' | '.join(_cell_text(value) for value in header) + ' |')
+    lines.append('|' + '---|' * width)
+    for row in rows:
+        row = list(row) + [''] * (width - len(row))
+        lines.append('| ' + ' | '.join(_cell_text(value) for value in row) + ' |')
+    return '\n'.join(lines) + '\n\n'
+
+def _sheet_markdown(name, rows, page_rows):
+    """Yields the Markdown of one sheet table by table"""
+    header = None
+    page = []
+    first_row = 1
+    paged = False
+
+    if name is not None:
+        yield f"# {name}\n\n"
+
+    for values in rows:
+        # Trailing empty cells and empty rows carry no information
+        while values and not values[-1].strip():
+            values = values[:-1]
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        # A full table is written once the next row shows that the sheet needs several tables
+        if len(page) >= page_rows:
+            yield f"## Zeilen {first_row}–{first_row + len(page) - 1}\n\n"
+            yield _table(header, page)
+            first_row += len(page)
+            paged = True
+            page = []
+        page.append(values)
+
+    if header is None:
+        yield "*Leere Tabelle*\n\n"
+        return
+    if paged:
+        yield f"## Zeilen {first_row}–{first_row + len(page) - 1}\n\n"
+    yield _table(header, page)
+
+def iter_markdown(file_path, page_rows=DEFAULT_PAGE_ROWS):
+    """
+    Converts a spreadsheet to Markdown piece by piece
+
+    Args:
+        file_path: XLSX, ODS or CSV file
+        page_rows: Data rows per table; longer sheets are split into several tables
+
+    Yields:
+        str: Markdown chunks (one table or heading at a time)
+    """
+    page_rows = max(1, page_rows)
+    ext = file_path.rsplit('.', 1)[-1].lower()
+    if ext == 'xlsx':
+        sheets = _iter_xlsx(file_path)
+    elif ext == 'ods':
+        sheets = _iter_ods(file_path)
+    elif ext == 'csv':
+        sheets = _iter_csv(file_path)
+    else:
+        raise ValueError(f"Kein Tabellenformat: {os.path.basename(file_path)}")
+
+    for name, rows in sheets:
+        yield from _sheet_markdown(name, rows, page_rows)
+
+def convert(file_path, page_rows=DEFAULT_PAGE_ROWS):
+    """
+    Converts a spreadsheet to Markdown
+
+    Returns:
+        str: The Markdown of all visible sheets
+
+    Raises:
+        UnreadableSpreadsheet: The file cannot be parsed
+    """
+    output = io.StringIO()
+    try:
+        for chunk in iter_markdown(file_path, page_rows):
+            output.write(chunk)
+    except (zipfile.BadZipFile, KeyError, IndexError, ElementTree.ParseError, csv.Error) as e:
+        raise UnreadableSpreadsheet(str(e)) from e
+    return output.getvalue()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Per-stage timing of conversions and exports
+
+Every processed file gets a StageTimer that records wall time, CPU time
+of the processing thread and the number of bytes for each stage (saving,
+Pandoc, cleaning, Wiki.js, ...). External programs such as Pandoc run in
+their own process, so their work shows up as wall time only. The profiles
+are returned with the results, can be appended to a JSON lines file and a
+single request, including the work it hands to other threads, can be run
+under cProfile.
+"""
+
+import cProfile
+import functools
+import itertools
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+_log_lock = threading.Lock()
+
+class StageTimer:
+    """Collects the stages of one file; stages started inside another stage are marked as nested"""
+
+    def __init__(self):
+        self.stages = []
+        self._active = 0
+
+    @contextmanager
+    def stage(self, name, bytes_in=None):
+        """
+        Measures a stage; the yielded dict can be used to add bytes_out or other details
+
+        Example:
+            with timer.stage('pandoc', bytes_in=size) as info:
+                ...
+                info['bytes_out'] = os.path.getsize(output_path)
+        """
+        info = {'stage': name}
+        if bytes_in is not None:
+            info['bytes_in'] = bytes_in
+        if self._active:
+            info['nested'] = True
+        self._active += 1
+        # Appended at the start, so the list keeps the order in which stages began
+        self.stages.append(info)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield info
+        finally:
+            info['wall_ms'] = round((time.perf_counter() - wall_start) * 1000, 2)
+            info['cpu_ms'] = round((time.thread_time() - cpu_start) * 1000, 2)
+            self._active -= 1
+
+    def wrap(self, name, func):
+        """Returns func with every call measured as a stage, e.g. for injected helper functions"""
+        def timed(*args, **kwargs):
+            with self.stage(name) as info:
+                result = func(*args, **kwargs)
+                if isinstance(result, str):
+                    info['bytes_out'] = len(result.encode('utf-8'))
+                return result
+        return timed
+
+    def record(self, info):
+        """Adds a stage measured elsewhere, e.g. one request shared by several files"""
+        self.stages.append(dict(info))
+
+    def as_dict(self):
+        """Stages in start order plus totals of the top-level stages"""
+        stages = [info for info in self.stages if 'wall_ms' in info]
+        top_level = [info for info in stages if not info.get('nested')]
+        return {
+            'stages': stages,
+            'total_wall_ms': round(sum(info['wall_ms'] for info in top_level), 2),
+            'total_cpu_ms': round(sum(info['cpu_ms'] for info in top_level), 2),
+        }
+
+def write_jsonl(path, kind, session_id, name, timings):
+    """Appends the profile of one file to a JSON lines file for offline analysis"""
+    if not path:
+        return
+    line = json.dumps({
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'kind': kind,
+        'session_id': session_id,
+        'name': name,
+        **timings
+    }, ensure_ascii=False) + "\n"
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+class RequestProfiler:
+    """
+    cProfile for a single request
+
+    The profile is written in the pstats format, which snakeviz, gprof2dot
+    and `python -m pstats` read. Process and thread ID are returned as well,
+    so a long request can be sampled with `py-spy dump --pid <pid>` meanwhile.
+
+    cProfile only sees the thread that enabled it. Work handed to scheduler
+    or executor threads is wrapped with profiled(); calls that finish before
+    stop() are merged into the request profile, later ones (live conversions)
+    get a file of their own next to it.
+    """
+
+    def __init__(self, profile_dir, label):
+        self.profile_dir = profile_dir
+        self.label = label
+        self.profiler = cProfile.Profile()
+        self.stem = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{label}-{os.getpid()}"
+        self.worker_profiles = []
+        self.late_profiles = itertools.count(1)
+        self.path = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.profiler.enable()
+        return self
+
+    def stop(self):
+        """Stops profiling and writes the .prof file; returns its path"""
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler)
+        with self._lock:
+            for profiler in self.worker_profiles:
+                stats.add(profiler)
+            self.worker_profiles = []
+            self.path = self._file_path(self.stem)
+        stats.dump_stats(self.path)
+        return self.path
+
+    def profiled(self, func):
+        """Wraps func so that its calls in other threads are profiled for this request"""
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler, which then covers all threads
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                self._collect(profiler)
+        return run
+
+    def _collect(self, profiler):
+        with self._lock:
+            if self.path is None:
+                self.worker_profiles.append(profiler)
+                return
+            path = self._file_path(f"{self.stem}-{next(self.late_profiles)}")
+        profiler.dump_stats(path)
+
+    def _file_path(self, stem):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        return os.path.join(self.profile_dir, f"{stem}.prof")
+
+    @property
+    def ids(self):
+        return {'pid': os.getpid(), 'thread_id': threading.get_native_id()}
@@ -0,0 +1,214 @@
+// DocFlow - export.html
+document.addEventListener('DOMContentLoaded', function() {
+    // Theme switching functionality
+    const toggleSwitch = document.querySelector('.theme-switch input[type="checkbox"]');
+
+    function switchTheme(e) {
+        if (e.target.checked) {
+            document.body.classList.add('dark-theme');
+            localStorage.setItem('theme', 'dark');
+        } else {
+            document.body.classList.remove('dark-theme');
+            localStorage.setItem('theme', 'light');
+        }
+    }
+
+    toggleSwitch.addEventListener('change', switchTheme, false);
+
+    // Check for saved theme preference
+    const currentTheme = localStorage.getItem('theme');
+    if (currentTheme) {
+        if (currentTheme === 'dark') {
+            toggleSwitch.checked = true;
+            document.body.classList.add('dark-theme');
+        }
+    }
+
+    // Test Wiki.js connection button
+    const testWikiButton = document.getElementById('testWikiButton');
+    if (testWikiButton) {
+        testWikiButton.addEventListener('click', function() {
+            this.disabled = true;
+            this.textContent = 'Verbindung wird getestet...';
+
+            fetch('/test_wikijs_connection', {
+                method: 'POST',
+            })
+            .then(response => response.json())
+            .then(data => {
+                alert(data.message);
+            })
+            .catch(error => {
+                alert('Fehler beim Testen der Verbindung: ' + error);
+            })
+            .finally(() => {
+                this.disabled = false;
+                this.textContent = 'Wiki.js API testen';
+            });
+        });
+    }
+
+    // Search functionality: the listed pages are filtered right away, then the server
+    // searches all pages (full text when the local Wiki.js mirror is enabled)
+    const searchInput = document.getElementById('searchPages');
+    const searchResults = document.getElementById('searchResults');
+    let searchTimer = null;
+    if (searchInput) {
+        searchInput.addEventListener('input', function() {
+            const searchTerm = this.value.toLowerCase();
+            const pageItems = document.querySelectorAll('.pages-container .page-item');
+
+            pageItems.forEach(item => {
+                const title = item.querySelector('label').textContent.toLowerCase();
+                if (title.includes(searchTerm)) {
+                    item.style.display = 'flex';
+                } else {
+                    item.style.display = 'none';
+                }
+            });
+
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => searchServer(this.value.trim()), 250);
+        });
+    }
+
+    function searchServer(query) {
+        if (!searchResults) {
+            return;
+        }
+
+        // Selected hits stay, so a new search does not drop them from the export
+        searchResults.querySelectorAll('.page-item').forEach(item => {
+            if (!item.querySelector('input').checked) {
+                item.remove();
+            }
+        });
+
+        if (query.length < 2) {
+            updateSearchResults();
+            return;
+        }
+
+        fetch('/search_pages?q=' + encodeURIComponent(query))
+            .then(response => response.json())
+            .then(data => {
+                // Ignore answers to an older query
+                if (searchInput.value.trim() !== query) {
+                    return;
+                }
+
+                const listed = {};
+                document.querySelectorAll('input[name="pages"]').forEach(checkbox => {
+                    listed[checkbox.value] = checkbox;
+                });
+
+                (data.results || []).forEach((page, index) => {
+                    if (listed[page.path]) {
+                        // Content matches of listed pages become visible in the list
+                        listed[page.path].parentElement.style.display = 'flex';
+                        return;
+                    }
+                    searchResults.appendChild(createSearchItem(page, index));
+                });
+                updateSearchResults(data.fulltext);
+            })
+            .catch(error => {
+                console.error('Suche fehlgeschlagen:', error);
+            });
+    }
+
+    function createSearchItem(page, index) {
+        const item = document.createElement('div');
+        item.className = 'page-item';
+
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.name = 'pages';
+        checkbox.value = page.path;
+        checkbox.id = 'search_page_' + Date.now() + '_' + index;
+
+        const label = document.createElement('label');
+        label.htmlFor = checkbox.id;
+        label.textContent = page.title || page.path;
+
+        const path = document.createElement('span');
+        path.className = 'page-path';
+        path.textContent = page.path;
+        label.appendChild(path);
+
+        if (page.snippet) {
+            // The server escapes the snippet and only adds <mark> around the hits
+            const snippet = document.createElement('span');
+            snippet.className = 'page-snippet';
+            snippet.innerHTML = page.snippet;
+            label.appendChild(snippet);
+        }
+
+        item.appendChild(checkbox);
+        item.appendChild(label);
+        return item;
+    }
+
+    function updateSearchResults(fulltext) {
+        let heading = searchResults.querySelector('h4');
+        const hasItems = searchResults.querySelector('.page-item') !== null;
+        if (!hasItems) {
+            searchResults.innerHTML = '';
+            searchResults.style.display = 'none';
+            return;
+        }
+        if (!heading) {
+            heading = document.createElement('h4');
+            searchResults.insertBefore(heading, searchResults.firstChild);
+        }
+        if (fulltext !== undefined) {
+            heading.textContent = fulltext ? 'Weitere Treffer (Volltextsuche)' : 'Weitere Treffer (Titel und Pfad)';
+        }
+        searchResults.style.display = 'block';
+    }
+
+    // Show the title field only for the combined export
+    const bookTitleInput = document.getElementById('book_title');
+    if (bookTitleInput) {
+        document.querySelectorAll('input[name="export_mode"]').forEach(radio => {
+            radio.addEventListener('change', function() {
+                bookTitleInput.style.display = this.value === 'combined' ? 'block' : 'none';
+            });
+        });
+    }
+
+    // Select all pages checkbox
+    const selectAllCheckbox = document.getElementById('selectAll');
+    if (selectAllCheckbox) {
+        selectAllCheckbox.addEventListener('change', function() {
+            const checkboxes = document.querySelectorAll('input[name="pages"]');
+            checkboxes.forEach(checkbox => {
+                if (checkbox.parentElement.style.display !== 'none') {
+                    checkbox.checked = this.checked;
+                }
+            });
+        });
+    }
+
+    // Validation before form submission
+    const exportForm = document.getElementById('exportForm');
+    if (exportForm) {
+        exportForm.addEventListener('submit', function(event) {
+            const selectedFormats = document.querySelectorAll('input[name="formats"]:checked');
+            const selectedPages = document.querySelectorAll('input[name="pages"]:checked');
+            const pathPrefix = document.getElementById('path_prefix');
+
+            if (selectedFormats.length === 0) {
+                event.preventDefault();
+                alert('Bitte wählen Sie mindestens ein Ausgabeformat aus.');
+                return;
+            }
+
+            if (selectedPages.length === 0 && !(pathPrefix && pathPrefix.value.trim())) {
+                event.preventDefault();
+                alert('Bitte wählen Sie mindestens eine Wiki.js-Seite aus oder geben Sie einen Pfad an.');
+                return;
+            }
+        });
+    }
+});
@@ -0,0 +1,64 @@
+// DocFlow - export_results.html
+document.addEventListener('DOMContentLoaded', function() {
+    // Theme switching
+    const toggleSwitch = document.querySelector('.theme-switch input[type="checkbox"]');
+
+    // Apply dark theme by default
+    document.body.classList.add('dark-theme');
+    localStorage.setItem('theme', 'dark');
+
+    // Check for saved theme preference, but prioritize dark theme
+    const currentTheme = localStorage.getItem('theme');
+
+    // But still allow the user to override if they've explicitly set a preference
+    if (currentTheme) {
+        if (currentTheme === 'dark') {
+            toggleSwitch.checked = true;
+            document.body.classList.add('dark-theme');
+        } else {
+            toggleSwitch.checked = false;
+            document.body.classList.remove('dark-theme');
+        }
+    } else {
+        // No saved preference, use dark theme by default
+        toggleSwitch.checked = true;
+        localStorage.setItem('theme', 'dark');
+    }
+
+    // Rest of theme switching logic
+    function switchTheme(e) {
+        if (e.target.checked) {
+            document.body.classList.add('dark-theme');
+            localStorage.setItem('theme', 'dark');
+        } else {
+            document.body.classList.remove('dark-theme');
+            localStorage.setItem('theme', 'light');
+        }
+    }
+
+    toggleSwitch.addEventListener('change', switchTheme, false);
+
+    // Test Wiki.js connection button
+    const testWikiButton = document.getElementById('testWikiButton');
+    if (testWikiButton) {
+        testWikiButton.addEventListener('click', function() {
+            this.disabled = true;
+            this.textContent = 'Verbindung wird getestet...';
+
+            fetch('/test_wikijs_connection', {
+                method: 'POST',
+            })
+            .then(response => response.json())
+            .then(data => {
+                alert(data.message);
+            })
+            .catch(error => {
+                alert('Fehler beim Testen der Verbindung: ' + error);
+            })
+            .finally(() => {
+                this.disabled = false;
+                this.textContent = 'Wiki.js API testen';
+            });
+        });
+    }
+});
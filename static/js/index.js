@@ -0,0 +1,646 @@
+// DocFlow - index.html
+document.addEventListener('DOMContentLoaded', function() {
+    const fileInput = document.getElementById('file');
+    const fileList = document.getElementById('fileList');
+    const wikiUpload = document.getElementById('wikiUpload');
+    const wikiOptions = document.getElementById('wikiOptions');
+    const wikiFileSettings = document.getElementById('wikiFileSettings');
+    const testWikiButton = document.getElementById('testWikiButton');
+    const usernameInput = document.getElementById('username');
+    const usernameHidden = document.getElementById('userNameHidden');
+    const toggleSettings = document.getElementById('toggleSettings');
+    const userSettingsSection = document.getElementById('userSettingsSection');
+    const saveUserSettings = document.getElementById('saveUserSettings');
+    const defaultFolder = document.getElementById('defaultFolder');
+    const helpFormatsButton = document.getElementById('helpFormatsButton');
+    const formatsModal = document.getElementById('formatsModal');
+    const closeFormatsModal = document.getElementById('closeFormatsModal');
+    const toggleSwitch = document.querySelector('#checkbox');
+
+    // Dark mode functions
+    function enableDarkMode() {
+        document.body.classList.add('dark-theme');
+        localStorage.setItem('theme', 'dark');
+        toggleSwitch.checked = true;
+    }
+
+    function disableDarkMode() {
+        document.body.classList.remove('dark-theme');
+        localStorage.setItem('theme', 'light');
+        toggleSwitch.checked = false;
+    }
+
+    // Check user's theme preference
+    const currentTheme = localStorage.getItem('theme') || 'light';
+    if (currentTheme === 'dark') {
+        enableDarkMode();
+    } else {
+        disableDarkMode();
+    }
+
+    // Listen for toggle switch change
+    toggleSwitch.addEventListener('change', function(e) {
+        if (e.target.checked) {
+            enableDarkMode();
+        } else {
+            disableDarkMode();
+        }
+    });
+
+    // Cookie management functions
+    function setCookie(name, value, days) {
+        const date = new Date();
+        date.setTime(date.getTime() + (days * 24 * 60 * 60 * 1000));
+        const expires = "; expires=" + date.toUTCString();
+        document.cookie = name + "=" + encodeURIComponent(value) + expires + "; path=/; SameSite=Lax";
+    }
+
+    function getCookie(name) {
+        const nameEQ = name + "=";
+        const ca = document.cookie.split(';');
+        for(let i = 0; i < ca.length; i++) {
+            let c = ca[i];
+            while (c.charAt(0) === ' ') c = c.substring(1, c.length);
+            if (c.indexOf(nameEQ) === 0) return decodeURIComponent(c.substring(nameEQ.length, c.length));
+        }
+        return null;
+    }
+
+    // Load saved settings
+    function loadSavedSettings() {
+        const savedUsername = getCookie('docflow_username');
+        if (savedUsername) {
+            usernameInput.value = savedUsername;
+            usernameHidden.value = savedUsername;
+            updateUserDisplay(savedUsername);
+
+            // Show greeting
+            const userGreeting = document.getElementById('userGreeting');
+            const greetingUsername = document.getElementById('greetingUsername');
+            if (userGreeting && greetingUsername) {
+                greetingUsername.textContent = savedUsername;
+                userGreeting.style.display = 'block';
+            }
+        }
+    }
+
+    // Update any UI elements that show the username
+    function updateUserDisplay(username) {
+        // Update the hidden field
+        usernameHidden.value = username;
+
+        // Show greeting if username is set
+        const userGreeting = document.getElementById('userGreeting');
+        const greetingUsername = document.getElementById('greetingUsername');
+        if (username && userGreeting && greetingUsername) {
+            greetingUsername.textContent = username;
+            userGreeting.style.display = 'block';
+        } else if (userGreeting) {
+            userGreeting.style.display = 'none';
+        }
+
+        // Update the placeholder in the default folder input if it exists
+        if (defaultFolder) {
+            defaultFolder.placeholder = `z.B. DocFlow/${username || 'Benutzer'}`;
+        }
+
+        // Update the example default path display with actual user values
+        function updateDefaultPathExample() {
+            const currentDate = new Date();
+            const datePart = currentDate.toISOString().split('T')[0];
+            const timePart = `${currentDate.getHours()}${currentDate.getMinutes()}`;
+            const username = usernameHidden.value || 'Benutzer';
+            const defaultPathExample = document.getElementById('default-path-example');
+
+            if (defaultPathExample) {
+                defaultPathExample.textContent = `DocFlow/${username}/${datePart}-${timePart}`;
+            }
+        }
+
+        // Call the function initially and when username changes
+        updateDefaultPathExample();
+        usernameInput.addEventListener('input', updateDefaultPathExample);
+        saveUserSettings.addEventListener('click', updateDefaultPathExample);
+    }
+
+    // Settings toggle
+    toggleSettings.addEventListener('click', function() {
+        if (userSettingsSection.style.display === 'none') {
+            userSettingsSection.style.display = 'block';
+            toggleSettings.textContent = 'Benutzereinstellungen ausblenden';
+        } else {
+            userSettingsSection.style.display = 'none';
+            toggleSettings.textContent = 'Benutzereinstellungen';
+        }
+    });
+
+    // Save user settings
+    saveUserSettings.addEventListener('click', function() {
+        const username = usernameInput.value.trim();
+        if (username) {
+            setCookie('docflow_username', username, 365); // Save for 1 year
+            updateUserDisplay(username);
+            userSettingsSection.style.display = 'none';
+            toggleSettings.textContent = 'Benutzereinstellungen';
+
+            alert(`Benutzereinstellungen für "${username}" wurden gespeichert.`);
+        } else {
+            alert('Bitte geben Sie einen Benutzernamen ein.');
+        }
+    });
+
+    // Regulärer Ausdruck für gültige Wiki.js-Pfade
+    const validPathRegex = /^[a-zA-Z0-9\-_\/]+$/;
+
+    // Funktion zum Sanitieren von Wiki.js Seitentiteln
+    function sanitizeWikiTitle(title) {
+        if (!title) return '';
+
+        // First, normalize special characters to their ASCII equivalents
+        const normalizedTitle = title
+            .replace(/[äÄ]/g, 'ae')
+            .replace(/[öÖ]/g, 'oe')
+            .replace(/[üÜ]/g, 'ue')
+            .replace(/[ß]/g, 'ss');
+
+        // Then remove all remaining disallowed characters
+        return normalizedTitle.replace(/[^a-zA-Z0-9 \-_]/g, '').trim();
+    }
+
+    // Funktion zum Sanitieren von Wiki.js Pfaden
+    function sanitizeWikiPath(path) {
+        if (!path) return '';
+
+        // First, normalize special characters
+        const normalizedPath = path
+            .replace(/[äÄ]/g, 'ae')
+            .replace(/[öÖ]/g, 'oe')
+            .replace(/[üÜ]/g, 'ue')
+            .replace(/[ß]/g, 'ss');
+
+        // Replace spaces with dashes and remove disallowed characters
+        return normalizedPath.replace(/ /g, '-').replace(/[^a-zA-Z0-9\-_\/]/g, '').trim();
+    }
+
+    // Function to validate Wiki.js path input
+    function validateWikiInput(input) {
+        const value = input.value.trim();
+        const warningId = `warning-${input.id}`;
+        let warning = document.getElementById(warningId);
+
+        if (!warning) {
+            warning = document.createElement('div');
+            warning.id = warningId;
+            warning.className = 'input-warning';
+            input.insertAdjacentElement('afterend', warning);
+        }
+
+        // Validate path (no spaces, no special chars)
+        if (value && !validPathRegex.test(value)) {
+            input.classList.add('invalid-input');
+            warning.textContent = 'Ungültige Zeichen! Nur Buchstaben, Zahlen, Bindestriche, Unterstriche und Schrägstriche sind erlaubt.';
+            warning.style.display = 'block';
+            return false;
+        }
+
+        input.classList.remove('invalid-input');
+        warning.style.display = 'none';
+        return true;
+    }
+
+    // File input change handler
+    fileInput.addEventListener('change', function() {
+        if (fileInput.files.length > 0) {
+            let filesHtml = '<h3>Ausgewählte Dateien:</h3><ul>';
+
+            for (let i = 0; i < fileInput.files.length; i++) {
+                const file = fileInput.files[i];
+                filesHtml += `<li>${file.name} (${(file.size / 1024).toFixed(2)} KB)</li>`;
+            }
+
+            filesHtml += '</ul>';
+            fileList.innerHTML = filesHtml;
+
+            // Update Wiki.js settings if the checkbox is checked
+            if (wikiUpload.checked) {
+                updateWikiSettings();
+            }
+        } else {
+            fileList.innerHTML = '<p>Keine Dateien ausgewählt</p>';
+            wikiFileSettings.innerHTML = '';
+        }
+    });
+
+    // Wiki.js upload checkbox change handler
+    wikiUpload.addEventListener('change', function() {
+        if (this.checked) {
+            wikiOptions.classList.remove('hidden');
+            updateWikiSettings();
+        } else {
+            wikiOptions.classList.add('hidden');
+        }
+    });
+
+    // Function to update Wiki.js settings based on selected files
+    function updateWikiSettings() {
+        wikiFileSettings.innerHTML = '';
+
+        if (fileInput.files.length > 0) {
+            // Update the toggle text to show number of files
+            const filesToggle = document.getElementById('filesToggle');
+            const filesToggleHeader = document.getElementById('filesToggleHeader');
+
+            if (filesToggle) {
+                filesToggle.textContent = `Ausklappen (${fileInput.files.length} ${fileInput.files.length === 1 ? 'Datei' : 'Dateien'})`;
+            }
+
+            // Make the header visible
+            if (filesToggleHeader) {
+                filesToggleHeader.style.display = 'block';
+            }
+
+            for (let i = 0; i < fileInput.files.length; i++) {
+                const file = fileInput.files[i];
+                const fileName = file.name;
+
+                // Store the original filename without extension
+                const fileNameWithoutExt = fileName.split('.').slice(0, -1).join('.');
+
+                // Sanitize the title correctly
+                const sanitizedTitle = sanitizeWikiTitle(fileNameWithoutExt);
+
+                // Generate default path
+                const currentDate = new Date();
+                const datePart = currentDate.toISOString().split('T')[0];
+                const timePart = `${currentDate.getHours()}${currentDate.getMinutes()}`;
+                const defaultFolderValue = defaultFolder ? defaultFolder.value : '';
+                const username = usernameHidden.value || 'Benutzer';
+                const defaultPath = `${defaultFolderValue || 'DocFlow'}/${username}/${datePart}-${timePart}`;
+
+                const fileDetail = document.createElement('div');
+                fileDetail.className = 'file-detail';
+                fileDetail.style.display = 'block';
+
+                fileDetail.innerHTML = `
+                    <h4>Datei: ${fileName}</h4>
+                    <div>
+                        <input type="hidden" id="wiki_title_hidden_${i}" name="wiki_title_${i}" value="${sanitizedTitle}">
+                    </div>
+                    <div>
+                        <label for="wiki_path_display_${i}">Wiki.js Pfad: <span class="path-toggle" id="path_toggle_${i}">[Bearbeiten]</span></label>
+                        <div class="path-display" id="wiki_path_display_${i}">${defaultPath}</div>
+                        <div class="path-input-container" id="path_input_container_${i}">
+                            <input type="text" id="wiki_path_${i}" name="wiki_path_${i}" value="${defaultPath}"
+                                   placeholder="z.B. ${defaultPath}">
+                            <div class="input-help">Erlaubt: Buchstaben, Zahlen, Bindestriche, Unterstriche, Schrägstriche</div>
+                        </div>
+                    </div>
+                `;
+
+                wikiFileSettings.appendChild(fileDetail);
+
+                // Add event listeners for the path display and toggle
+                const pathToggle = document.getElementById(`path_toggle_${i}`);
+                const pathDisplay = document.getElementById(`wiki_path_display_${i}`);
+                const pathInputContainer = document.getElementById(`path_input_container_${i}`);
+                const pathInput = document.getElementById(`wiki_path_${i}`);
+
+                // Function to toggle path input visibility
+                function togglePathInput() {
+                    const isVisible = pathInputContainer.style.display === 'block';
+                    pathInputContainer.style.display = isVisible ? 'none' : 'block';
+                    pathToggle.textContent = isVisible ? '[Bearbeiten]' : '[Schließen]';
+                }
+
+                // Add click event to both toggle and display
+                pathToggle.addEventListener('click', togglePathInput);
+                pathDisplay.addEventListener('click', togglePathInput);
+
+                // Update display when input changes
+                pathInput.addEventListener('input', function() {
+                    // Store original value for comparison
+                    const originalValue = this.value;
+                    // Auto-sanitize path on input
+                    const sanitizedValue = sanitizeWikiPath(originalValue);
+
+                    if (sanitizedValue !== originalValue) {
+                        this.value = sanitizedValue;
+                    }
+
+                    // Update the display
+                    pathDisplay.textContent = this.value;
+
+                    validateWikiInput(this);
+                });
+            }
+        } else {
+            // Hide the files toggle header if no files selected
+            const filesToggleHeader = document.getElementById('filesToggleHeader');
+            if (filesToggleHeader) {
+                filesToggleHeader.style.display = 'none';
+            }
+        }
+    }
+
+    // Show live progress on the results page when the browser supports it
+    if (window.EventSource) {
+        document.getElementById('liveProgress').value = '1';
+    }
+
+    // Validate all wiki settings before form submission
+    document.getElementById('uploadForm').addEventListener('submit', function(event) {
+        // Check if username is set
+        const username = usernameHidden.value.trim();
+        if (!username) {
+            event.preventDefault();
+            alert('Bitte geben Sie zuerst einen Benutzernamen in den Einstellungen ein, bevor Sie fortfahren können.');
+            userSettingsSection.style.display = 'block';
+            toggleSettings.textContent = 'Benutzereinstellungen ausblenden';
+            usernameInput.focus();
+            return;
+        }
+
+        if (wikiUpload.checked) {
+            let hasErrors = false;
+
+            // Check all path inputs
+            for (let i = 0; i < fileInput.files.length; i++) {
+                const pathInput = document.getElementById(`wiki_path_${i}`);
+                if (pathInput && !validateWikiInput(pathInput)) {
+                    hasErrors = true;
+                }
+            }
+
+            if (hasErrors) {
+                event.preventDefault();
+                alert('Bitte korrigieren Sie die markierten Fehler bei den Wiki.js-Einstellungen.');
+            }
+        }
+    });
+
+    // Large selections are uploaded in parts, so an interrupted connection only repeats the
+    // current part and the upload continues when the same files are selected again
+    const uploadForm = document.getElementById('uploadForm');
+    uploadForm.addEventListener('submit', function(event) {
+        const files = Array.from(fileInput.files);
+        const totalSize = files.reduce((sum, file) => sum + file.size, 0);
+        if (event.defaultPrevented || !window.EventSource || !DocFlowUpload.isSupported() ||
+                totalSize <= parseInt(uploadForm.dataset.chunkSize, 10)) {
+            return;
+        }
+        event.preventDefault();
+
+        const submitButton = uploadForm.querySelector('button[type="submit"]');
+        submitButton.disabled = true;
+
+        fileList.innerHTML = '<h3>Upload in Teilen:</h3><ul></ul>';
+        const progressItems = files.map(file => {
+            const item = document.createElement('li');
+            item.textContent = `${file.name}: wartet`;
+            fileList.querySelector('ul').appendChild(item);
+            return item;
+        });
+
+        function optionsFor(i) {
+            const pathInput = document.getElementById(`wiki_path_${i}`);
+            const titleInput = document.getElementById(`wiki_title_hidden_${i}`);
+            return {
+                upload_to_wiki: wikiUpload.checked,
+                wiki_path: wikiUpload.checked && pathInput ? pathInput.value : '',
+                wiki_title: wikiUpload.checked && titleInput ? titleInput.value : '',
+                username: usernameHidden.value,
+                default_folder: defaultFolder ? defaultFolder.value : '',
+                split_level: document.getElementById('splitLevel').value
+            };
+        }
+
+        function showProgress(i, phase, done) {
+            const percent = files[i].size ? Math.floor(done * 100 / files[i].size) : 100;
+            const label = phase === 'hash' ? 'Prüfsumme wird berechnet' : 'wird hochgeladen';
+            progressItems[i].textContent = `${files[i].name}: ${label} (${percent} %)`;
+        }
+
+        DocFlowUpload.uploadFiles(files, optionsFor, showProgress)
+            .then(sessionId => {
+                window.location.href = uploadForm.dataset.resultsUrl.replace('__SESSION__', sessionId);
+            })
+            .catch(error => {
+                alert(`Upload unterbrochen: ${error.message}. Wählen Sie dieselben Dateien erneut aus, ` +
+                      'um den Upload an der unterbrochenen Stelle fortzusetzen.');
+                submitButton.disabled = false;
+            });
+    });
+
+    // Test Wiki.js connection button
+    testWikiButton.addEventListener('click', function() {
+        this.disabled = true;
+        this.textContent = 'Verbindung wird getestet...';
+
+        fetch('/test_wikijs_connection', {
+            method: 'POST',
+        })
+        .then(response => response.json())
+        .then(data => {
+            alert(data.message);
+        })
+        .catch(error => {
+            alert('Fehler beim Testen der Verbindung: ' + error);
+        })
+        .finally(() => {
+            this.disabled = false;
+            this.textContent = 'Wiki.js API testen';
+        });
+    });
+
+    // Initialize by loading saved settings
+    loadSavedSettings();
+
+    // Help formats button click handler
+    helpFormatsButton.addEventListener('click', function() {
+        formatsModal.style.display = 'block';
+    });
+
+    // Close formats modal
+    closeFormatsModal.addEventListener('click', function() {
+        formatsModal.style.display = 'none';
+    });
+
+    // Close formats modal when clicking outside
+    window.addEventListener('click', function(event) {
+        if (event.target === formatsModal) {
+            formatsModal.style.display = 'none';
+        }
+    });
+
+    // Directory browser elements
+    const browseFoldersBtn = document.getElementById('browseFolders');
+    const directoryBrowserModal = document.getElementById('directoryBrowserModal');
+    const directoryTree = document.getElementById('directoryTree');
+    const loadingDirectories = document.getElementById('loadingDirectories');
+    const selectDirectoryBtn = document.getElementById('selectDirectoryBtn');
+    const cancelDirectoryBtn = document.getElementById('cancelDirectoryBtn');
+    const closeModalBtn = document.querySelector('.close');
+    let selectedDirectory = null;
+
+    // Wiki path display and toggle elements
+    const wikiPathToggle = document.getElementById('wiki_path_toggle');
+    const wikiPathDisplay = document.getElementById('wiki_path_display');
+    const wikiPathInputContainer = document.getElementById('wiki_path_input_container');
+
+    // Files toggle elements
+    const filesToggleHeader = document.getElementById('filesToggleHeader');
+    const filesToggle = document.getElementById('filesToggle');
+
+    // Function to toggle the files section
+    function toggleFilesSection() {
+        const isVisible = wikiFileSettings.style.display === 'block';
+        wikiFileSettings.style.display = isVisible ? 'none' : 'block';
+        filesToggle.textContent = isVisible ?
+            `Ausklappen${fileInput.files.length ? ` (${fileInput.files.length} ${fileInput.files.length === 1 ? 'Datei' : 'Dateien'})` : ''}` :
+            'Einklappen';
+    }
+
+    // Add click event to files toggle
+    if (filesToggleHeader) filesToggleHeader.addEventListener('click', function(e) {
+        if (e.target === filesToggle) return; // Don't trigger if button is clicked directly
+        toggleFilesSection();
+    });
+    if (filesToggle) filesToggle.addEventListener('click', function(e) {
+        e.stopPropagation(); // Prevent double-triggering with the header click
+        toggleFilesSection();
+    });
+
+    // Function to toggle Wiki path input visibility
+    function toggleWikiPathInput() {
+        const isVisible = wikiPathInputContainer.style.display === 'block';
+        wikiPathInputContainer.style.display = isVisible ? 'none' : 'block';
+        wikiPathToggle.textContent = isVisible ? '[Bearbeiten]' : '[Schließen]';
+    }
+
+    // Add click event to both toggle and display for Wiki path
+    if (wikiPathToggle) wikiPathToggle.addEventListener('click', toggleWikiPathInput);
+    if (wikiPathDisplay) wikiPathDisplay.addEventListener('click', toggleWikiPathInput);
+
+    // Update Wiki path display when input changes
+    if (defaultFolder) {
+        defaultFolder.addEventListener('input', function() {
+            // Auto-sanitize path on input
+            const sanitizedValue = sanitizeWikiPath(this.value);
+            if (sanitizedValue !== this.value) {
+                this.value = sanitizedValue;
+            }
+
+            // Update the display
+            if (wikiPathDisplay) {
+                wikiPathDisplay.textContent = this.value || 'DocFlow';
+            }
+        });
+    }
+
+    // Open directory browser modal
+    if (browseFoldersBtn) {
+        browseFoldersBtn.addEventListener('click', function() {
+            directoryBrowserModal.style.display = 'block';
+            loadDirectories();
+        });
+    }
+
+    // Close modal functions
+    function closeModal() {
+        directoryBrowserModal.style.display = 'none';
+    }
+
+    if (closeModalBtn) closeModalBtn.addEventListener('click', closeModal);
+    if (cancelDirectoryBtn) cancelDirectoryBtn.addEventListener('click', closeModal);
+
+    // Close modal when clicking outside
+    window.addEventListener('click', function(event) {
+        if (event.target === directoryBrowserModal) {
+            closeModal();
+        }
+    });
+
+    // Fetch Wiki.js directories
+    function loadDirectories() {
+        loadingDirectories.style.display = 'block';
+        directoryTree.style.display = 'none';
+        directoryTree.innerHTML = '';
+
+        fetch('/get_wikijs_directories')
+            .then(response => response.json())
+            .then(data => {
+                loadingDirectories.style.display = 'none';
+                directoryTree.style.display = 'block';
+
+                if (data.success) {
+                    renderDirectoryTree(data.directories);
+                } else {
+                    directoryTree.innerHTML = `<div class="error">${data.message}</div>`;
+                }
+            })
+            .catch(error => {
+                loadingDirectories.style.display = 'none';
+                directoryTree.style.display = 'block';
+                directoryTree.innerHTML = `<div class="error">Fehler beim Laden der Verzeichnisse: ${error}</div>`;
+            });
+    }
+
+    // Render the directory tree
+    function renderDirectoryTree(directories) {
+        directoryTree.innerHTML = '';
+
+        // Add root directory first
+        const rootItem = document.createElement('div');
+        rootItem.className = 'directory-item directory-level-0';
+        rootItem.textContent = '/ (Root)';
+        rootItem.dataset.path = '';
+        rootItem.addEventListener('click', function() {
+            selectDirectory(this);
+        });
+        directoryTree.appendChild(rootItem);
+
+        // Add all other directories
+        directories.forEach(dir => {
+            if (dir === '') return; // Skip root as it's already added
+
+            const parts = dir.split('/');
+            const level = Math.min(parts.length, 5); // Limit nesting level to 5
+
+            const item = document.createElement('div');
+            item.className = `directory-item directory-level-${level}`;
+            item.textContent = parts[parts.length - 1] || dir;
+            item.dataset.path = dir;
+            item.addEventListener('click', function() {
+                selectDirectory(this);
+            });
+            directoryTree.appendChild(item);
+        });
+    }
+
+    // Handle directory selection
+    function selectDirectory(element) {
+        // Remove selected class from all items
+        const items = directoryTree.querySelectorAll('.directory-item');
+        items.forEach(item => item.classList.remove('selected'));
+
+        // Add selected class to clicked item
+        element.classList.add('selected');
+        selectedDirectory = element.dataset.path;
+    }
+
+    // Handle select button click
+    if (selectDirectoryBtn) {
+        selectDirectoryBtn.addEventListener('click', function() {
+            if (selectedDirectory !== null && defaultFolder) {
+                defaultFolder.value = selectedDirectory;
+                // Update the Wiki path display
+                if (wikiPathDisplay) {
+                    wikiPathDisplay.textContent = selectedDirectory || 'DocFlow';
+                }
+                closeModal();
+            } else {
+                alert('Bitte wählen Sie ein Verzeichnis aus.');
+            }
+        });
+    }
+});
@@ -0,0 +1,171 @@
+// DocFlow - results.html
+// Toggle debug panel
+document.getElementById('debug-toggle').addEventListener('click', function() {
+    const debugContainer = document.getElementById('debug-container');
+    if (debugContainer.style.display === 'none') {
+        debugContainer.style.display = 'block';
+        this.textContent = 'Debug-Informationen ausblenden';
+    } else {
+        debugContainer.style.display = 'none';
+        this.textContent = 'Debug-Informationen anzeigen';
+    }
+});
+
+// Dark mode functions
+const toggleSwitch = document.querySelector('#checkbox');
+
+function enableDarkMode() {
+    document.body.classList.add('dark-theme');
+    localStorage.setItem('theme', 'dark');
+    toggleSwitch.checked = true;
+}
+
+function disableDarkMode() {
+    document.body.classList.remove('dark-theme');
+    localStorage.setItem('theme', 'light');
+    toggleSwitch.checked = false;
+}
+
+// Check user's theme preference
+const currentTheme = localStorage.getItem('theme') || 'light';
+if (currentTheme === 'dark') {
+    enableDarkMode();
+} else {
+    disableDarkMode();
+}
+
+// Listen for toggle switch change
+toggleSwitch.addEventListener('change', function(e) {
+    if (e.target.checked) {
+        enableDarkMode();
+    } else {
+        disableDarkMode();
+    }
+});
+
+// Live progress via Server-Sent Events
+const container = document.querySelector('.container');
+const eventsUrl = container.dataset.eventsUrl;
+
+const STATE_LABELS = {
+    queued: 'In Warteschlange',
+    converting: 'Wird konvertiert …',
+    converted: 'Konvertiert',
+    uploading: 'Wird zu Wiki.js hochgeladen …',
+    uploaded: 'In Wiki.js hochgeladen',
+    failed: 'Fehlgeschlagen'
+};
+
+function findFileItem(filename) {
+    const items = document.querySelectorAll('#live-file-list li');
+    for (const item of items) {
+        if (item.dataset.filename === filename) {
+            return item;
+        }
+    }
+    // Files from other sources (e.g. chunked uploads) are added on the fly
+    const item = document.createElement('li');
+    item.dataset.filename = filename;
+    item.innerHTML = '<div class="filename"><span class="name"></span> <span class="state-badge"></span> ' +
+        '<span class="state-details"></span></div><div class="actions"></div>';
+    item.querySelector('.name').textContent = filename;
+    document.getElementById('live-file-list').appendChild(item);
+    return item;
+}
+
+function updateFileState(data) {
+    const item = findFileItem(data.filename);
+    const badge = item.querySelector('.state-badge');
+    const details = item.querySelector('.state-details');
+    const actions = item.querySelector('.actions');
+
+    badge.className = 'state-badge state-' + data.state;
+    badge.textContent = STATE_LABELS[data.state] || data.state;
+
+    if (data.state === 'failed' && data.error) {
+        details.innerHTML = '<br/><small class="error-badge"></small>';
+        details.querySelector('small').textContent = data.error;
+    }
+
+    if (data.wiki_url) {
+        details.innerHTML = '<br/><small><a target="_blank" class="wiki-link">In Wiki.js öffnen</a></small>';
+        details.querySelector('a').href = data.wiki_url;
+    }
+
+    if (data.warning) {
+        const warning = document.createElement('small');
+        warning.className = 'warning-badge';
+        warning.textContent = data.warning;
+        details.appendChild(document.createElement('br'));
+        details.appendChild(warning);
+    }
+
+    if (data.output_filename && !actions.querySelector('a')) {
+        const link = document.createElement('a');
+        link.className = 'btn btn-secondary';
+        link.textContent = 'Herunterladen';
+        link.href = container.dataset.downloadUrl.replace('__FILE__', encodeURIComponent(data.output_filename));
+        actions.appendChild(link);
+    }
+}
+
+function appendLogLine(data) {
+    const line = document.createElement('li');
+    line.className = data.type;
+    const timestamp = document.createElement('span');
+    timestamp.className = 'timestamp';
+    timestamp.textContent = data.time;
+    line.appendChild(timestamp);
+    line.appendChild(document.createTextNode(' ' + data.message));
+    document.getElementById('debug-log').appendChild(line);
+}
+
+function appendTimingRow(cells, className) {
+    const row = document.createElement('tr');
+    if (className) {
+        row.className = className;
+    }
+    for (const value of cells) {
+        const cell = document.createElement('td');
+        cell.textContent = value === undefined ? '' : value;
+        row.appendChild(cell);
+    }
+    document.getElementById('timing-rows').appendChild(row);
+}
+
+function renderTimings(timings) {
+    for (const [filename, profile] of Object.entries(timings || {})) {
+        profile.stages.forEach(function(stage, index) {
+            appendTimingRow([index === 0 ? filename : '', stage.stage, stage.wall_ms, stage.cpu_ms,
+                             stage.bytes_in, stage.bytes_out], stage.nested ? 'nested' : '');
+        });
+        appendTimingRow(['', 'Gesamt', profile.total_wall_ms, profile.total_cpu_ms, '', ''], 'total');
+    }
+}
+
+if (eventsUrl && window.EventSource) {
+    const source = new EventSource(eventsUrl);
+    // Log lines written before the page was rendered are already in the list
+    let skipLogLines = document.querySelectorAll('#debug-log li').length;
+
+    source.addEventListener('file', function(event) {
+        updateFileState(JSON.parse(event.data));
+    });
+
+    source.addEventListener('log', function(event) {
+        if (skipLogLines > 0) {
+            skipLogLines--;
+            return;
+        }
+        appendLogLine(JSON.parse(event.data));
+    });
+
+    source.addEventListener('done', function(event) {
+        const summary = JSON.parse(event.data);
+        document.getElementById('live-summary').textContent =
+            summary.converted + ' Datei(en) erfolgreich konvertiert, ' + summary.failed + ' Fehler.';
+        document.getElementById('zip-download').style.display = '';
+        renderTimings(summary.timings);
+        source.close();
+    });
+}
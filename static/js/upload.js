@@ -0,0 +1,277 @@
+// DocFlow - index.html: resumable upload of large files in parts (/upload/...)
+const DocFlowUpload = (function() {
+    // Round constants of SHA-256
+    const K = new Int32Array([
+        0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+        0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+        0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+        0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+        0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+        0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+        0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+        0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+    ]);
+
+    // Incremental SHA-256; crypto.subtle can only hash a file that fits into memory at once
+    class Sha256 {
+        constructor() {
+            this.state = new Int32Array([
+                0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19
+            ]);
+            this.words = new Int32Array(64);
+            this.buffer = new Uint8Array(64);
+            this.buffered = 0;
+            this.length = 0;
+        }
+
+        update(data) {
+            let position = 0;
+            this.length += data.length;
+            if (this.buffered > 0) {
+                position = Math.min(64 - this.buffered, data.length);
+                this.buffer.set(data.subarray(0, position), this.buffered);
+                this.buffered += position;
+                if (this.buffered < 64) {
+                    return;
+                }
+                this.block(this.buffer, 0);
+                this.buffered = 0;
+            }
+            for (; position + 64 <= data.length; position += 64) {
+                this.block(data, position);
+            }
+            this.buffer.set(data.subarray(position), 0);
+            this.buffered = data.length - position;
+        }
+
+        block(data, offset) {
+            const w = this.words;
+            for (let i = 0; i < 16; i++) {
+                const j = offset + i * 4;
+                w[i] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | data[j + 3];
+            }
+            for (let i = 16; i < 64; i++) {
+                const x = w[i - 15];
+                const y = w[i - 2];
+                const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+                const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+                w[i] = (w[i - 16] + s0 + w[i - 7] + s1) | 0;
+            }
+
+            let [a, b, c, d, e, f, g, h] = this.state;
+            for (let i = 0; i < 64; i++) {
+                const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+                const t1 = (h + S1 + ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+                const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+                const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+                h = g;
+                g = f;
+                f = e;
+                e = (d + t1) | 0;
+                d = c;
+                c = b;
+                b = a;
+                a = (t1 + t2) | 0;
+            }
+            [a, b, c, d, e, f, g, h].forEach((value, i) => {
+                this.state[i] = (this.state[i] + value) | 0;
+            });
+        }
+
+        hex() {
+            // Padding: 0x80, zeros and the message length in bits (big-endian, 64 bit)
+            const length = this.length;
+            const padding = new Uint8Array((this.buffered < 56 ? 56 : 120) - this.buffered + 8);
+            const view = new DataView(padding.buffer);
+            padding[0] = 0x80;
+            view.setUint32(padding.length - 8, Math.floor(length / 0x20000000));
+            view.setUint32(padding.length - 4, (length % 0x20000000) * 8);
+            this.update(padding);
+            return Array.from(this.state, value => (value >>> 0).toString(16).padStart(8, '0')).join('');
+        }
+    }
+
+    // Requests failing on the network or with a server error are repeated this often
+    const MAX_RETRIES = 8;
+    const STORAGE_PREFIX = 'docflow_upload:';
+    // Bytes read at once when computing the checksum
+    const HASH_READ_SIZE = 8 * 1024 * 1024;
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    function storageKey(file) {
+        return STORAGE_PREFIX + [file.name, file.size, file.lastModified].join(':');
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, Object.assign({ headers: { 'Accept': 'application/json' } }, options));
+        let data = {};
+        try {
+            data = await response.json();
+        } catch (error) {
+            // Proxies answer errors with HTML
+        }
+        return { status: response.status, data: data, retryAfter: parseInt(response.headers.get('Retry-After'), 10) };
+    }
+
+    // Repeats a request after network errors and 5xx answers (e.g. 503 with a full queue)
+    async function withRetries(send) {
+        for (let attempt = 0; ; attempt++) {
+            let result = null;
+            try {
+                result = await send();
+                if (result.status < 500) {
+                    return result;
+                }
+            } catch (error) {
+                if (attempt >= MAX_RETRIES) {
+                    throw error;
+                }
+            }
+            if (attempt >= MAX_RETRIES) {
+                return result;
+            }
+            await sleep(result && result.retryAfter > 0 ? result.retryAfter * 1000 : Math.min(30000, 1000 * 2 ** attempt));
+        }
+    }
+
+    function failure(result) {
+        return new Error((result.data && result.data.message) || `HTTP ${result.status}`);
+    }
+
+    async function hashFile(file, chunkSize, onProgress) {
+        const hash = new Sha256();
+        for (let offset = 0; offset < file.size; offset += chunkSize) {
+            const end = Math.min(file.size, offset + chunkSize);
+            hash.update(new Uint8Array(await file.slice(offset, end).arrayBuffer()));
+            onProgress(end);
+        }
+        return hash.hex();
+    }
+
+    // An upload of the same file that was interrupted earlier (page closed, connection lost)
+    async function findResumable(file) {
+        const saved = JSON.parse(localStorage.getItem(storageKey(file)) || 'null');
+        if (!saved) {
+            return null;
+        }
+        try {
+            const result = await requestJson(`/upload/${saved.session_id}/${saved.upload_id}`);
+            if (result.status === 200 && result.data.status === 'uploading') {
+                return result.data;
+            }
+        } catch (error) {
+            return null;
+        }
+        localStorage.removeItem(storageKey(file));
+        return null;
+    }
+
+    async function sendFile(file, state, onProgress) {
+        const base = `/upload/${state.session_id}/${state.upload_id}`;
+        let received = state.received;
+        let conflicts = 0;
+
+        for (;;) {
+            while (received < file.size) {
+                const offset = received;
+                const result = await withRetries(() => requestJson(`${base}/chunk?offset=${offset}`, {
+                    method: 'PUT',
+                    headers: { 'Accept': 'application/json', 'Content-Type': 'application/octet-stream' },
+                    body: file.slice(offset, Math.min(file.size, offset + state.chunk_size))
+                }));
+                if (result.status === 409 && result.data.received !== undefined && conflicts++ < MAX_RETRIES) {
+                    // Continue from the position the server has
+                    received = result.data.received;
+                } else if (result.status === 200) {
+                    received = result.data.received;
+                } else {
+                    throw failure(result);
+                }
+                onProgress(received);
+            }
+
+            const result = await withRetries(() => requestJson(`${base}/finalize`, { method: 'POST' }));
+            if (result.status === 202) {
+                return;
+            }
+            if (result.status === 422 && result.data.received === 0 && conflicts++ < MAX_RETRIES) {
+                // Checksum mismatch, the server discarded the data
+                received = 0;
+                continue;
+            }
+            if (result.status !== 409 || conflicts++ >= MAX_RETRIES) {
+                throw failure(result);
+            }
+            // A repeated finalize whose first answer was lost, or data missing on the server
+            await sleep(1000);
+            const status = await withRetries(() => requestJson(base));
+            if (status.status !== 200) {
+                throw failure(status);
+            }
+            if (status.data.status !== 'uploading') {
+                return;
+            }
+            received = status.data.received;
+        }
+    }
+
+    /**
+     * Uploads files in parts and starts their conversion.
+     *
+     * All files are registered in one session before the first part is sent,
+     * so the session only reports 'done' once every file is converted. An
+     * upload interrupted earlier continues from the position the server has
+     * when the same files are selected again.
+     *
+     * @param {File[]} files
+     * @param {function(number): object} optionsFor Conversion options of the file with this index
+     * @param {function(number, string, number)} onProgress (file index, 'hash' or 'upload', bytes done)
+     * @returns {Promise<string>} Session ID
+     */
+    async function uploadFiles(files, optionsFor, onProgress) {
+        const states = await Promise.all(files.map(findResumable));
+        const resumed = states.find(state => state);
+        let sessionId = resumed ? resumed.session_id : null;
+
+        for (let i = 0; i < files.length; i++) {
+            if (states[i] && states[i].session_id !== sessionId) {
+                states[i] = null;
+            }
+            if (states[i]) {
+                continue;
+            }
+            const file = files[i];
+            const sha256 = await hashFile(file, HASH_READ_SIZE, done => onProgress(i, 'hash', done));
+            const result = await withRetries(() => requestJson('/upload/init', {
+                method: 'POST',
+                headers: { 'Accept': 'application/json', 'Content-Type': 'application/json' },
+                body: JSON.stringify(Object.assign({
+                    filename: file.name, size: file.size, sha256: sha256, session_id: sessionId
+                }, optionsFor(i)))
+            }));
+            if (result.status !== 201) {
+                throw failure(result);
+            }
+            states[i] = result.data;
+            sessionId = result.data.session_id;
+            localStorage.setItem(storageKey(file), JSON.stringify({
+                session_id: sessionId, upload_id: result.data.upload_id
+            }));
+        }
+
+        for (let i = 0; i < files.length; i++) {
+            await sendFile(files[i], states[i], done => onProgress(i, 'upload', done));
+            localStorage.removeItem(storageKey(files[i]));
+        }
+        return sessionId;
+    }
+
+    function isSupported() {
+        return Boolean(window.fetch && window.localStorage && window.Blob && Blob.prototype.arrayBuffer);
+    }
+
+    return { Sha256: Sha256, uploadFiles: uploadFiles, isSupported: isSupported };
+})();
@@ -0,0 +1,113 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the chunked, resumable upload
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import chunked_upload
+
+DATA = os.urandom(100_000)
+
+
+def start_upload(tmp_path, data=DATA, sha256=None):
+    return chunked_upload.init_upload(str(tmp_path), None, 'file.docx', len(data),
+                                      sha256=sha256 or hashlib.sha256(data).hexdigest())
+
+
+def send(tmp_path, state, data, offset, size):
+    return chunked_upload.write_chunk(str(tmp_path), state['session_id'], state['upload_id'], offset,
+                                      io.BytesIO(data[offset:offset + size]))
+
+
+def test_chunks_are_assembled_and_resent_data_is_accepted(tmp_path):
+    state = start_upload(tmp_path)
+    send(tmp_path, state, DATA, 0, 40_000)
+    # Resume from an earlier offset, e.g. after a lost response
+    send(tmp_path, state, DATA, 30_000, 40_000)
+    state = send(tmp_path, state, DATA, 70_000, 30_000)
+    assert state['received'] == len(DATA)
+
+    state, file_path = chunked_upload.finalize_upload(str(tmp_path), state['session_id'], state['upload_id'])
+    assert state['status'] == 'queued'
+    with open(file_path, 'rb') as f:
+        assert f.read() == DATA
+
+
+def test_chunk_beyond_the_received_data_is_rejected(tmp_path):
+    state = start_upload(tmp_path)
+    with pytest.raises(chunked_upload.UploadError) as error:
+        send(tmp_path, state, DATA, 10, 100)
+    assert error.value.status == 409 and error.value.received == 0
+
+
+def test_checksum_is_required(tmp_path):
+    with pytest.raises(chunked_upload.UploadError) as error:
+        chunked_upload.init_upload(str(tmp_path), None, 'file.docx', 10)
+    assert error.value.status == 400
+
+
+def test_checksum_mismatch_restarts_the_upload(tmp_path):
+    state = start_upload(tmp_path, sha256='0' * 64)
+    send(tmp_path, state, DATA, 0, len(DATA))
+
+    with pytest.raises(chunked_upload.UploadError) as error:
+        chunked_upload.finalize_upload(str(tmp_path), state['session_id'], state['upload_id'])
+    assert error.value.status == 422
+
+    state = chunked_upload.get_upload(str(tmp_path), state['session_id'], state['upload_id'])
+    assert state['received'] == 0 and state['status'] == 'uploading'
+    # The client can send the file again from the start
+    assert send(tmp_path, state, DATA, 0, 1000)['received'] == 1000
+
+
+def test_concurrent_finalize_succeeds_once(tmp_path):
+    state = start_upload(tmp_path)
+    send(tmp_path, state, DATA, 0, len(DATA))
+
+    results = []
+    barrier = threading.Barrier(4)
+
+    def finalize():
+        barrier.wait()
+        try:
+            chunked_upload.finalize_upload(str(tmp_path), state['session_id'], state['upload_id'])
+            results.append(200)
+        except chunked_upload.UploadError as e:
+            results.append(e.status)
+
+    threads = [threading.Thread(target=finalize) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [200, 409, 409, 409]
+
+
+@pytest.mark.skipif(chunked_upload.fcntl is None, reason='flock is not available')
+def test_state_updates_wait_for_other_processes(tmp_path):
+    state = start_upload(tmp_path)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Another worker process holding the state lock
+        with chunked_upload._locked(str(tmp_path), state['session_id'], state['upload_id']):
+            os.write(write_fd, b'x')
+            time.sleep(0.5)
+        os._exit(0)
+
+    os.read(read_fd, 1)
+    started = time.monotonic()
+    chunked_upload.update_upload(str(tmp_path), state['session_id'], state['upload_id'], status='queued')
+    assert time.monotonic() - started >= 0.4
+    os.waitpid(pid, 0)
@@ -0,0 +1,35 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the session event journal and the SSE stream
+"""
+
+import events
+
+SESSION = '0' * 32
+
+
+def test_stream_ends_after_done(tmp_path):
+    events.emit(str(tmp_path), SESSION, 'file', {'filename': 'a.docx', 'state': 'converted'})
+    events.emit(str(tmp_path), SESSION, 'done', {'converted': 1, 'failed': 0})
+    chunks = list(events.stream(str(tmp_path), SESSION))
+    assert chunks[0] == 'retry: 2000\n\n'
+    assert [chunk.split('\n')[1] for chunk in chunks[1:]] == ['event: file', 'event: done']
+
+
+def test_streams_beyond_the_limit_are_asked_to_reconnect(tmp_path):
+    events.limit_streams(1)
+    try:
+        first = events.stream(str(tmp_path), SESSION)
+        assert next(first) == 'retry: 2000\n\n'
+        assert list(events.stream(str(tmp_path), SESSION)) == [f'retry: {events.BUSY_RETRY_MS}\n\n']
+
+        # Closing the first stream frees its slot
+        first.close()
+        second = events.stream(str(tmp_path), SESSION)
+        assert next(second) == 'retry: 2000\n\n'
+        second.close()
+    finally:
+        events.limit_streams(0)
@@ -0,0 +1,181 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the export pipeline
+"""
+
+import os
+import shutil
+import threading
+import zipfile
+
+import pytest
+
+import export
+from utils import sanitize_filename
+
+FORMAT_MAPPING = {'html': 'html'}
+
+
+def fake_pandoc(markdown, output_filepath, output_format, output_format_mapping, pdf_engine=None, extra_args=None):
+    return f"<p>{markdown}</p>".encode('utf-8')
+
+
+def run_export(tmp_path, monkeypatch, pages, **kwargs):
+    monkeypatch.setattr(export, 'run_pandoc_export', fake_pandoc)
+
+    def fetch(page_path, wikijs_url, wikijs_token, debug_logger):
+        return pages[page_path]
+
+    result = export.export_pages_to_formats(
+        list(pages), ['html'], 'session', str(tmp_path), 'http://wiki', 'token', FORMAT_MAPPING,
+        sanitize_filename, fetch, debug_logger=lambda message, log_type='info': None, **kwargs)
+    with zipfile.ZipFile(os.path.join(tmp_path, 'session', export.EXPORT_ARCHIVE_NAME)) as zipf:
+        entries = {name: zipf.read(name).decode('utf-8') for name in zipf.namelist()}
+    return result, entries
+
+
+def test_pages_with_the_same_title_get_distinct_files(tmp_path, monkeypatch):
+    pages = {
+        'team-a/notes': ('Notes of team A', 'Notes'),
+        'team-b/notes': ('Notes of team B', 'Notes'),
+    }
+    (converted, failed, _), entries = run_export(tmp_path, monkeypatch, pages, fetch_workers=2)
+
+    assert failed == []
+    assert len(converted) == 2 and len(set(converted)) == 2
+    assert sorted(content for name, content in entries.items() if name.endswith('.md')) == [
+        'Notes of team A', 'Notes of team B']
+    assert sorted(content for name, content in entries.items() if name.endswith('.html')) == [
+        '<p>Notes of team A</p>', '<p>Notes of team B</p>']
+
+
+def test_titles_differing_in_case_do_not_share_a_file(tmp_path, monkeypatch):
+    pages = {
+        'a': ('first', 'README'),
+        'b': ('second', 'readme'),
+    }
+    (converted, failed, _), entries = run_export(tmp_path, monkeypatch, pages, fetch_workers=1)
+
+    assert failed == []
+    assert converted == ['README.html', 'readme_2.html']
+    assert entries['readme_2.md'] == 'second'
+
+
+def test_collision_suffixes_follow_the_page_order(tmp_path, monkeypatch):
+    pages = {'first': ('first page', 'Notes'), 'second': ('second page', 'Notes')}
+    second_fetched = threading.Event()
+
+    def fetch(page_path, wikijs_url, wikijs_token, debug_logger):
+        # The first page arrives last
+        if page_path == 'first':
+            assert second_fetched.wait(5)
+        else:
+            second_fetched.set()
+        return pages[page_path]
+
+    monkeypatch.setattr(export, 'run_pandoc_export', fake_pandoc)
+    converted, failed, _ = export.export_pages_to_formats(
+        list(pages), ['html'], 'session', str(tmp_path), 'http://wiki', 'token', FORMAT_MAPPING,
+        sanitize_filename, fetch, debug_logger=lambda message, log_type='info': None, fetch_workers=2)
+
+    assert failed == []
+    assert converted == ['Notes.html', 'Notes_2.html']
+    with zipfile.ZipFile(os.path.join(tmp_path, 'session', export.EXPORT_ARCHIVE_NAME)) as zipf:
+        assert zipf.read('Notes.md').decode('utf-8') == 'first page'
+
+
+def test_shift_markdown_headings_rewrites_setext_headings():
+    content = "Intro\n=====\n\nText\n\nDetails\nmore\n---\n\n## Sub\n\n```\nCode\n====\n# comment\n```"
+    assert export.shift_markdown_headings(content, 1).splitlines() == [
+        '## Intro', '', 'Text', '', '### Details more', '', '### Sub', '',
+        '```', 'Code', '====', '# comment', '```']
+
+
+def test_shift_markdown_headings_keeps_thematic_breaks_and_lists():
+    content = "Text\n\n---\n\n- item\n---\n> quote\n==="
+    assert export.shift_markdown_headings(content, 1) == content
+
+
+def test_combined_markdown_title_escapes_backslashes_and_quotes():
+    markdown = export.build_combined_markdown([('a', 'A', 'Body')], 'C:\\Temp "Handbuch"')
+    assert markdown.startswith('---\ntitle: "C:\\\\Temp \\"Handbuch\\""\n---\n')
+
+
+@pytest.mark.skipif(shutil.which('pandoc') is None, reason='Pandoc is not installed')
+def test_streamed_export_keeps_non_ascii_text():
+    data = export.run_pandoc_export('# Grüße ✓\n\nÄrger', None, 'html', FORMAT_MAPPING)
+    assert 'Grüße ✓'.encode('utf-8') in data and 'Ärger'.encode('utf-8') in data
+
+
+def test_recover_archive_keeps_the_complete_entries(tmp_path):
+    archive_path = str(tmp_path / export.EXPORT_ARCHIVE_NAME)
+    assert export.recover_archive(archive_path) == set()
+
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for name in ('a.md', 'b.md', 'c.md'):
+            zipf.writestr(name, f"content of {name} " * 50)
+        cut = zipf.getinfo('c.md').header_offset + 40
+    # The writer died while writing the last entry, before the central directory
+    with open(archive_path, 'r+b') as f:
+        f.truncate(cut)
+
+    assert export.recover_archive(archive_path) == {'a.md', 'b.md'}
+    with zipfile.ZipFile(archive_path) as zipf:
+        assert zipf.read('b.md').decode('utf-8') == "content of b.md " * 50
+    assert export.recover_archive(archive_path) == {'a.md', 'b.md'}
+
+
+def test_resumed_export_only_fetches_pages_missing_from_the_archive(tmp_path, monkeypatch):
+    pages = {'a': ('first', 'A'), 'b': ('second', 'B'), 'c': ('third', 'C')}
+    done = {}
+    run_export(tmp_path, monkeypatch, pages, fetch_workers=1, convert_workers=1,
+               on_page_done=lambda path, files, failures, entries: done.update({path: (files, failures, entries)}))
+
+    # Interrupted while the last file was written to the archive
+    archive_path = os.path.join(tmp_path, 'session', export.EXPORT_ARCHIVE_NAME)
+    with zipfile.ZipFile(archive_path) as zipf:
+        cut = zipf.infolist()[-1].header_offset + 40
+    with open(archive_path, 'r+b') as f:
+        f.truncate(cut)
+
+    archived = export.recover_archive(archive_path)
+    completed = {path: files for path, (files, failures, entries) in done.items() if set(entries) <= archived}
+    assert completed and len(completed) < len(pages)
+
+    fetched = []
+
+    def fetch(page_path, wikijs_url, wikijs_token, debug_logger):
+        fetched.append(page_path)
+        return pages[page_path]
+
+    converted, failed, _ = export.export_pages_to_formats(
+        list(pages), ['html'], 'session', str(tmp_path), 'http://wiki', 'token', FORMAT_MAPPING,
+        sanitize_filename, fetch, debug_logger=lambda message, log_type='info': None, completed=completed)
+
+    assert sorted(fetched) == sorted(set(pages) - set(completed)) and failed == []
+    assert converted == ['A.html', 'B.html', 'C.html']
+    with zipfile.ZipFile(archive_path) as zipf:
+        assert sorted(zipf.namelist()) == ['A.html', 'A.md', 'B.html', 'B.md', 'C.html', 'C.md']
+        assert zipf.read('C.html').decode('utf-8') == '<p>third</p>'
+
+
+def test_shift_markdown_headings_closes_fences_per_commonmark():
+    content = "````\n```\n# not a heading\n```\n````\n# Heading\n~~~\n```\n# code\n~~~\n"
+    assert export.shift_markdown_headings(content, 1) == (
+        "````\n```\n# not a heading\n```\n````\n## Heading\n~~~\n```\n# code\n~~~\n")
+
+
+def test_resumed_export_replaces_archive_entries_of_unfinished_pages(tmp_path, monkeypatch):
+    pages = {'a': ('first', 'A'), 'b': ('second', 'B')}
+    run_export(tmp_path, monkeypatch, pages)
+
+    # The journal only knows page a as done; the entries of page b are left over from the interrupted run
+    pages['b'] = ('second, edited', 'B')
+    (converted, failed, _), entries = run_export(tmp_path, monkeypatch, pages, completed={'a': ['A.html']})
+
+    assert failed == [] and converted == ['A.html', 'B.html']
+    assert entries == {'A.md': 'first', 'A.html': '<p>first</p>',
+                       'B.md': 'second, edited', 'B.html': '<p>second, edited</p>'}
@@ -0,0 +1,93 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the job journal
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import job_journal
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # No heartbeat thread; the tests drive the journal themselves
+    monkeypatch.setattr(job_journal.JobJournal, 'start', lambda self: None)
+    return str(tmp_path / 'jobs.db')
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def orphan(journal, job_id):
+    """Makes a job look like its process was killed"""
+    journal._conn().execute("UPDATE jobs SET owner_pid = ? WHERE id = ?", (dead_pid(), job_id))
+
+
+def test_item_states_are_merged_and_kept_in_order(db_path):
+    journal = job_journal.JobJournal(db_path)
+    journal.create('job', 'export', {'prefix': 'docs'}, [(1, 'b'), (0, 'a')], client='browser')
+    journal.add_items('job', [(2, 'c'), (0, 'a')])
+    journal.item_state('job', 'a', 'uploading', path='/docs/a')
+    journal.item_state('job', 'a', 'uploaded', url='http://wiki/docs/a')
+
+    items = journal.items('job')
+    assert [item['name'] for item in items] == ['a', 'b', 'c']
+    assert items[0]['state'] == 'uploaded'
+    assert items[0]['details'] == {'path': '/docs/a', 'url': 'http://wiki/docs/a'}
+    assert items[1]['state'] == 'saved'
+
+
+def test_jobs_of_a_live_process_are_not_claimed(db_path):
+    job_journal.JobJournal(db_path).create('job', 'upload', {})
+    assert job_journal.JobJournal(db_path).claim_orphans() == []
+
+
+def test_an_orphaned_job_is_claimed_by_one_process(db_path):
+    first = job_journal.JobJournal(db_path)
+    first.create('job', 'export', {'pages': ['a']}, [(0, 'a')], client='browser')
+    orphan(first, 'job')
+
+    second = job_journal.JobJournal(db_path)
+    third = job_journal.JobJournal(db_path)
+    claimed = second.claim_orphans()
+    assert [(job['id'], job['attempts'], job['options']) for job in claimed] == [('job', 1, {'pages': ['a']})]
+    # The new owner is alive, so nobody else takes the job over
+    assert third.claim_orphans() == []
+
+    # A released job is picked up again without counting the attempt
+    second.release('job')
+    assert [job['attempts'] for job in third.claim_orphans()] == [1]
+
+
+def test_resumed_jobs_are_listed_for_their_client_only(db_path):
+    first = job_journal.JobJournal(db_path)
+    first.create('resumed', 'export', {}, client='browser')
+    first.create('plain', 'export', {}, client='browser')
+    orphan(first, 'resumed')
+    second = job_journal.JobJournal(db_path)
+    second.claim_orphans()
+    second.finish('resumed', {'converted_files': ['a.html']})
+    first.finish('plain', {'converted_files': []})
+
+    jobs = second.resumed_jobs('export', 'browser')
+    assert [(job['id'], job['result']) for job in jobs] == [('resumed', {'converted_files': ['a.html']})]
+    assert second.resumed_jobs('export', 'other-browser') == []
+
+
+def test_a_job_that_keeps_crashing_is_given_up(db_path):
+    journal = job_journal.JobJournal(db_path)
+    journal.create('job', 'upload', {})
+    journal._conn().execute("UPDATE jobs SET attempts = ? WHERE id = 'job'", (job_journal.MAX_ATTEMPTS,))
+    orphan(journal, 'job')
+
+    assert job_journal.JobJournal(db_path).claim_orphans() == []
+    assert journal.get('job')['state'] == 'failed'
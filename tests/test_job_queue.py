@@ -0,0 +1,82 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the shared job queue (SQLite backend)
+"""
+
+import threading
+
+import pytest
+
+import job_queue
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return job_queue.SQLiteBackend(str(tmp_path / 'queue.db'))
+
+
+def test_every_job_is_claimed_exactly_once(backend):
+    job_ids = {backend.enqueue('convert', {'number': i}) for i in range(30)}
+    claimed = []
+    claimed_lock = threading.Lock()
+
+    def worker(worker_id):
+        while True:
+            job = backend.claim(worker_id, timeout=0)
+            if job is None:
+                return
+            with claimed_lock:
+                claimed.append(job['id'])
+
+    threads = [threading.Thread(target=worker, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+    assert backend.stats()['running'] == 30
+
+
+def test_stale_jobs_are_requeued_until_max_attempts(backend):
+    job_id = backend.enqueue('export', {})
+
+    for attempt in range(1, job_queue.MAX_ATTEMPTS + 1):
+        job = backend.claim('worker', timeout=0)
+        assert job['id'] == job_id
+        assert job['attempts'] == attempt
+        # A job with a recent heartbeat stays with its worker
+        assert backend.requeue_stale(lease_seconds=60) == 0
+        backend.requeue_stale(lease_seconds=-1)
+
+    job = backend.get_job(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'Worker nicht mehr erreichbar'
+    assert backend.claim('worker', timeout=0) is None
+
+
+def test_file_round_trip(backend, tmp_path):
+    source = tmp_path / 'source.bin'
+    source.write_bytes(bytes(range(256)) * 100)
+    backend.put_file('session', 'uploads/ordner/datei.docx', str(source))
+    backend.put_file('session', 'results/datei.md', str(source))
+
+    assert backend.list_files('session', job_queue.UPLOADS) == ['uploads/ordner/datei.docx']
+
+    target = tmp_path / 'target.bin'
+    assert backend.get_file('session', 'uploads/ordner/datei.docx', str(target))
+    assert target.read_bytes() == source.read_bytes()
+    assert not backend.get_file('session', 'uploads/fehlt.docx', str(tmp_path / 'fehlt'))
+
+    with pytest.raises(ValueError):
+        backend.put_file('session', 'uploads/../../ausserhalb', str(source))
+
+    pulled = tmp_path / 'pulled'
+    assert job_queue.pull_directory(backend, 'session', job_queue.RESULTS, str(pulled)) == 1
+    assert (pulled / 'datei.md').read_bytes() == source.read_bytes()
+
+    backend.delete_session('session')
+    assert backend.list_files('session', job_queue.UPLOADS) == []
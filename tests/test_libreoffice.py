@@ -0,0 +1,25 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the LibreOffice profile handling
+"""
+
+import libreoffice
+
+
+def test_profiles_are_locked_and_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(libreoffice, 'PROFILE_ROOT', str(tmp_path))
+
+    first = libreoffice._Slot(0)
+    second = libreoffice._Slot(1)
+    assert first.profile_dir != second.profile_dir
+
+    first.release_profile()
+    successor = libreoffice._Slot(0)
+    assert successor.profile_dir == first.profile_dir
+
+    second.release_profile()
+    successor.release_profile()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['profile-0.lock', 'profile-1.lock']
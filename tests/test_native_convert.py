@@ -0,0 +1,129 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the in-process HTML, reStructuredText and Org converters
+"""
+
+import json
+import shutil
+import subprocess
+from urllib.parse import unquote
+
+import pytest
+
+import native_convert
+
+HTML_SAMPLES = [
+    '<p># not a heading</p><p>1. no list<br>- nor this<br>+ nor that</p><p>2024) year</p>',
+    '<p>Title</p><p>===</p><p>---</p>',
+    '<blockquote><p>first</p><p>second</p></blockquote><blockquote><p>separate</p></blockquote>',
+    '<blockquote><p>outer</p><blockquote><p>inner</p></blockquote><p>outer again</p></blockquote>',
+    '<ol><li>one</li></ol><ol><li>other</li></ol><ul><li>a</li></ul><ul><li>b</li></ul>',
+    '<pre><code>run ``` and `` here</code></pre>',
+    '<p><a href="files/my file (1).pdf">file</a> <img src="a b.png" alt="pic"></p>',
+    '<h2>Intro</h2><ul><li># tagged</li><li>1. numbered</li></ul>',
+    '<p>Run <code>a`b</code>, <code>``x`</code> or <code>y</code></p>',
+]
+
+RST_SAMPLES = [
+    'Title\n=====\n\nText with `a link <my file (2).html>`_ here.\n\nCode::\n\n    x = "```"\n',
+    '- # hash\n- 2024 + plus\n\n12) not a list\n    continued\n',
+]
+
+ORG_SAMPLES = [
+    '* Heading\n\nParagraph\n\n#+BEGIN_SRC python\nprint("```")\n#+END_SRC\n\n[[file:my notes.org]]\n',
+    '#+BEGIN_QUOTE\n#hashtag and\nmore\n#+END_QUOTE\n',
+    '- # hash\n- a\n  + b\n',
+]
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('<p># not a heading</p>', '\\# not a heading\n'),
+    ('<p>1. no list<br>- nor this</p>', '1\\. no list\\\n\\- nor this\n'),
+    ('<p>Title<br>===</p>', 'Title\\\n\\===\n'),
+    ('<blockquote><p>a</p><p>b</p></blockquote>', '> a\n>\n> b\n'),
+    ('<blockquote><p>a</p></blockquote><blockquote><p>b</p></blockquote>', '> a\n\n> b\n'),
+    ('<ol><li>a</li></ol><ol><li>b</li></ol>', '1. a\n\n<!-- -->\n\n1. b\n'),
+    ('<pre>a ``` b</pre>', '````\na ``` b\n````\n'),
+    ('<p><code>a`b</code> and <code>x</code></p>', '`` a`b `` and `x`\n'),
+    ('<a href="my file (1).pdf">f</a>', '[f](my%20file%20%281%29.pdf)\n'),
+])
+def test_html_output(source, expected):
+    assert native_convert.html_to_markdown(source) == expected
+
+
+def test_rst_and_org_output():
+    assert native_convert.rst_to_markdown('See `doc <a b.html>`_\n\nCode::\n\n    ````\n') == \
+        'See [doc](a%20b.html)\n\nCode:\n\n`````\n````\n`````\n'
+    assert native_convert.org_to_markdown('#+BEGIN_QUOTE\n#hashtag\n#+END_QUOTE\n[[file:a b.org]]\n') == \
+        '> \\#hashtag\n\n[file:a b.org](a%20b.org)\n'
+
+
+@pytest.mark.parametrize('source, convert', [
+    ('- + nested\n', native_convert.rst_to_markdown),
+    ('- + nested\n', native_convert.org_to_markdown),
+    ('#+BEGIN_QUOTE\n- item\n#+END_QUOTE\n', native_convert.org_to_markdown),
+    ('<p><code>a <b>b</b></code></p>', native_convert.html_to_markdown),
+])
+def test_nested_structures_go_to_pandoc(source, convert):
+    with pytest.raises(native_convert.UnsupportedInput):
+        convert(source)
+
+
+# --- Differential test against Pandoc ------------------------------------------
+
+def _pandoc_ast(source, input_format):
+    completed = subprocess.run(['pandoc', '-f', input_format, '-t', 'json'], input=source,
+                               capture_output=True, text=True, encoding='utf-8', check=True)
+    return json.loads(completed.stdout)['blocks']
+
+
+def _structure(node):
+    """Reduces a Pandoc AST to block/inline types and text, ignoring attributes and line breaking"""
+    if isinstance(node, list):
+        parts = []
+        for child in node:
+            reduced = _structure(child)
+            if isinstance(reduced, str) and parts and isinstance(parts[-1], str):
+                parts[-1] += reduced
+            elif reduced != '':
+                parts.append(reduced)
+        return parts
+    if not isinstance(node, dict):
+        return node
+    kind, content = node['t'], node.get('c')
+    if kind == 'Str':
+        return content
+    if kind in ('Space', 'SoftBreak'):
+        return ' '
+    if kind == 'Plain':
+        kind = 'Para'
+    if kind in ('Header', 'CodeBlock', 'Code', 'Link', 'Image', 'Div', 'Span'):
+        # Drop the attributes, keep level/text/target
+        content = content[1:] if kind != 'Header' else [content[0], content[2]]
+        if kind in ('Link', 'Image'):
+            # Targets may be percent-encoded differently
+            content = [content[0], unquote(content[1][0])]
+        if kind == 'CodeBlock':
+            content = [content[0].rstrip('\n')]
+    if kind in ('Div', 'Span'):
+        return _structure(content[-1])
+    if kind == 'RawBlock':
+        return ''
+    if kind == 'OrderedList':
+        content = content[1]
+    return [kind, _structure(content) if isinstance(content, list) else content]
+
+
+@pytest.mark.skipif(shutil.which('pandoc') is None, reason='Pandoc is not installed')
+@pytest.mark.parametrize('source, input_format, convert', (
+    [(sample, 'html', native_convert.html_to_markdown) for sample in HTML_SAMPLES]
+    + [(sample, 'rst', native_convert.rst_to_markdown) for sample in RST_SAMPLES]
+    + [(sample, 'org', native_convert.org_to_markdown) for sample in ORG_SAMPLES]
+))
+def test_same_document_structure_as_pandoc(source, input_format, convert):
+    expected = _structure(_pandoc_ast(source, input_format))
+    # Wiki.js does not turn -- and --- into dashes, so neither does the reader here
+    assert _structure(_pandoc_ast(convert(source), 'markdown-smart')) == expected
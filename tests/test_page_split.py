@@ -0,0 +1,97 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for splitting large documents into Wiki.js pages
+"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import page_split
+from utils import sanitize_wikijs_path, sanitize_wikijs_title
+
+TITLES = ['Übersicht', '1. Änderungen am System', 'Straße & Weg', '2024 -- Plan', 'Ärger (2)', 'Intro', 'Intro']
+
+DOCUMENT = """Vorwort mit [Link](#änderungen-am-system).
+
+# Übersicht
+
+Siehe [Details](#details) und [Weg](#straße-und-weg).
+
+## Details
+
+Text
+
+## Straße und Weg
+
+Zurück zur [Übersicht](#übersicht) oder zu den [Details](#details).
+
+# 1. Änderungen am System
+
+```
+# kein Kapitel
+```
+"""
+
+
+def split(content, level):
+    return page_split.split_markdown(content, level, 'docs/handbuch', 'Handbuch',
+                                     sanitize_wikijs_path, sanitize_wikijs_title)
+
+
+def test_heading_identifiers_keep_non_ascii_letters():
+    headings = page_split.find_headings(['# ' + title for title in TITLES] + ['# Mit ID {#eigene-id}'])
+    assert [heading['id'] for heading in headings] == [
+        'übersicht', 'änderungen-am-system', 'straße-weg', 'plan', 'ärger-2', 'intro', 'intro-1', 'eigene-id']
+
+
+@pytest.mark.skipif(shutil.which('pandoc') is None, reason='Pandoc is not installed')
+def test_heading_identifiers_match_pandoc():
+    source = '\n\n'.join('# ' + title for title in TITLES)
+    completed = subprocess.run(['pandoc', '-f', 'markdown', '-t', 'json'], input=source,
+                               capture_output=True, text=True, encoding='utf-8', check=True)
+    expected = [block['c'][1][0] for block in json.loads(completed.stdout)['blocks']]
+    assert [heading['id'] for heading in page_split.find_headings(source.splitlines())] == expected
+
+
+def test_document_without_split_heading_is_not_split():
+    assert split('Text\n\n### Tief\n', 2) is None
+
+
+def test_parts_are_nested_below_their_parent_heading():
+    pages = split(DOCUMENT, 2)
+    assert [(page['path'], page['depth']) for page in pages] == [
+        ('docs/handbuch', 0),
+        ('docs/handbuch/01-uebersicht', 1),
+        ('docs/handbuch/01-uebersicht/01-details', 2),
+        ('docs/handbuch/01-uebersicht/02-strasse-und-weg', 2),
+        ('docs/handbuch/02-1-aenderungen-am-system', 1),
+    ]
+    # The heading in the code block does not start a page
+    assert pages[4]['content'] == '```\n# kein Kapitel\n```\n'
+    assert '- [Uebersicht](/docs/handbuch/01-uebersicht)\n    - [Details](/docs/handbuch/01-uebersicht/01-details)' \
+        in pages[0]['content']
+
+
+def test_links_to_anchors_point_to_the_page_holding_them():
+    pages = {page['path']: page['content'] for page in split(DOCUMENT, 2)}
+    assert '[Link](/docs/handbuch/02-1-aenderungen-am-system)' in pages['docs/handbuch']
+    assert pages['docs/handbuch/01-uebersicht'] == (
+        'Siehe [Details](/docs/handbuch/01-uebersicht/01-details) und '
+        '[Weg](/docs/handbuch/01-uebersicht/02-strasse-und-weg).\n')
+    assert pages['docs/handbuch/01-uebersicht/02-strasse-und-weg'] == (
+        'Zurück zur [Übersicht](/docs/handbuch/01-uebersicht) oder zu den '
+        '[Details](/docs/handbuch/01-uebersicht/01-details).\n')
+
+
+def test_anchor_inside_a_part_is_kept_on_its_page():
+    pages = {page['path']: page['content'] for page in split(DOCUMENT, 1)}
+    overview = pages['docs/handbuch/01-uebersicht']
+    # Details stays on the chapter page, so the link keeps its local anchor
+    assert 'Siehe [Details](#details)' in overview
+    assert 'Zurück zur [Übersicht](/docs/handbuch/01-uebersicht)' in overview
@@ -0,0 +1,57 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the PDF text extraction
+"""
+
+import subprocess
+
+import pdf_extract
+
+RANGE_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<pdf2xml producer="poppler" version="22.02.0">
+<page number="3" position="absolute" top="0" left="0" height="1000" width="800">
+    <fontspec id="0" size="24" family="Times" color="#000000"/>
+    <fontspec id="1" size="12" family="Times" color="#000000"/>
+<text top="100" left="100" width="300" height="26" font="0">Kapitel</text>
+<text top="150" left="100" width="500" height="14" font="1">2024. war ein gutes Jahr.</text>
+</page>
+<page number="4" position="absolute" top="0" left="0" height="1000" width="800">
+<text top="100" left="100" width="500" height="14" font="1"># keine Überschrift</text>
+<text top="150" left="100" width="20" height="14" font="1">•</text>
+<text top="150" left="115" width="400" height="14" font="1">+ kein Unterpunkt</text>
+</page>
+</pdf2xml>
+'''
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    assert pdf_extract.page_ranges(1, 4) == [(1, 1)]
+    assert pdf_extract.page_ranges(10, 4) == [(1, 3), (4, 6), (7, 9), (10, 10)]
+    ranges = pdf_extract.page_ranges(1000, 4)
+    assert ranges[0] == (1, pdf_extract.MAX_RANGE_PAGES) and ranges[-1][1] == 1000
+    assert all(last + 1 == first for (_, last), (first, _) in zip(ranges, ranges[1:]))
+
+
+def test_one_process_per_range_and_escaped_block_markers(monkeypatch):
+    calls = []
+
+    def run(cmd, **kwargs):
+        # Every range is admitted like other heavy conversions
+        assert kwargs['heavy']
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, RANGE_XML, '')
+
+    monkeypatch.setattr(pdf_extract.process_runner, 'run', run)
+    pages = pdf_extract.extract_pages('file.pdf', 3, 5)
+
+    assert len(calls) == 1 and calls[0][calls[0].index('-f') + 1:calls[0].index('-l') + 2] == ['3', '-l', '5']
+    # Page 5 is missing in the output and stays empty
+    assert [page['number'] for page in pages] == [3, 4, 5] and pages[2]['rows'] == []
+    # The font of page 4 was declared on page 3
+    assert pages[1]['rows'][0]['size'] == 12
+
+    assert pdf_extract.to_markdown(pages).split('\n\n') == [
+        '# Kapitel', '2024\\. war ein gutes Jahr.', '\\# keine Überschrift', '- \\+ kein Unterpunkt\n']
@@ -0,0 +1,47 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the managed subprocess execution
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+import process_runner
+
+
+@pytest.fixture
+def limits():
+    saved = process_runner.get_config()
+    yield process_runner.configure
+    process_runner.configure(**{key: saved[key] for key in ('timeout', 'memory_limit_mb', 'cpu_limit')})
+
+
+@pytest.mark.skipif(not hasattr(process_runner.resource, 'prlimit'), reason='prlimit is not available')
+def test_limits_are_applied_to_the_child(limits):
+    limits(memory_limit_mb=512, cpu_limit=30)
+    script = "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0], resource.getrlimit(resource.RLIMIT_CPU))"
+    completed = process_runner.run([sys.executable, '-c', script])
+    assert completed.stdout.split(' ', 1) == [str(512 * 1024 * 1024), '(30, 35)\n']
+
+
+@pytest.mark.skipif(not hasattr(process_runner.resource, 'prlimit'), reason='prlimit is not available')
+def test_cpu_limit_is_reported_as_timeout(limits):
+    limits(cpu_limit=1)
+    with pytest.raises(process_runner.ConversionTimeout):
+        process_runner.run([sys.executable, '-c', 'while True: pass'])
+
+
+def test_a_process_killed_without_cpu_limit_is_a_conversion_error(limits):
+    limits(cpu_limit=0)
+    with pytest.raises(subprocess.CalledProcessError):
+        process_runner.run([sys.executable, '-c', 'import os, signal; os.kill(os.getpid(), signal.SIGKILL)'])
+
+
+def test_wall_clock_timeout(limits):
+    with pytest.raises(process_runner.ConversionTimeout):
+        process_runner.run([sys.executable, '-c', 'import time; time.sleep(10)'], timeout=0.5)
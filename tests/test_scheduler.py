@@ -0,0 +1,117 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the fair-share conversion scheduler
+"""
+
+import threading
+import time
+
+import pytest
+
+import scheduler
+
+
+def small_file(tmp_path, name='a.txt', size=10):
+    path = tmp_path / name
+    path.write_bytes(b'x' * size)
+    return str(path)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_oversized_batch_is_admitted_when_the_queue_is_empty(tmp_path):
+    fair = scheduler.FairScheduler(workers=1, fast_workers=0, max_queued=2)
+    path = small_file(tmp_path)
+    release = threading.Event()
+
+    futures = fair.submit_batch('alice', [(path, release.wait, (), {})] * 3)
+    assert len(futures) == 3
+
+    # With tasks waiting, the limit applies again
+    with pytest.raises(scheduler.SchedulerFull) as error:
+        fair.check_capacity()
+    assert error.value.retry_after >= scheduler.MIN_RETRY_AFTER
+    with pytest.raises(scheduler.SchedulerFull):
+        fair.submit('bob', path, lambda: None)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert fair.stats()['rejected'] == 2
+
+
+def test_admitted_task_bypasses_the_limit(tmp_path):
+    fair = scheduler.FairScheduler(workers=1, fast_workers=0, max_queued=1)
+    path = small_file(tmp_path)
+    release = threading.Event()
+    first = fair.submit('alice', path, release.wait)
+    wait_until(lambda: fair.stats()['queued'] == 0)
+    second = fair.submit('alice', path, release.wait)
+
+    third = fair.submit_batch('bob', [(path, lambda: 'done', (), {})], admitted=True)[0]
+    release.set()
+    assert third.result(timeout=5) == 'done'
+    first.result(timeout=5)
+    second.result(timeout=5)
+
+
+def test_users_are_served_round_robin(tmp_path):
+    fair = scheduler.FairScheduler(workers=1, fast_workers=0, max_in_flight=1, max_queued=0)
+    path = small_file(tmp_path)
+    order = []
+    gate = threading.Event()
+
+    blocker = fair.submit('carol', path, gate.wait)
+    futures = fair.submit_batch('alice', [(path, order.append, ('alice',), {})] * 3)
+    futures += fair.submit_batch('bob', [(path, order.append, ('bob',), {})])
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(timeout=5)
+
+    # Bob's single file does not wait behind all of Alice's files
+    assert order == ['alice', 'bob', 'alice', 'alice']
+
+
+def test_fast_lane_is_served_first(tmp_path):
+    fair = scheduler.FairScheduler(workers=1, fast_workers=0, fast_lane_bytes=100, max_queued=0)
+    small, large = small_file(tmp_path, 'small.txt', 10), small_file(tmp_path, 'large.txt', 1000)
+    assert fair.lane_for(small) == 'fast' and fair.lane_for(large) == 'normal'
+
+    order = []
+    gate = threading.Event()
+    blocker = fair.submit('alice', small, gate.wait)
+    futures = [fair.submit('alice', large, order.append, 'large'), fair.submit('bob', small, order.append, 'small')]
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(timeout=5)
+    assert order == ['small', 'large']
+
+
+def test_in_flight_limit_per_user(tmp_path):
+    fair = scheduler.FairScheduler(workers=3, fast_workers=0, max_in_flight=1, max_queued=0)
+    path = small_file(tmp_path)
+    running = []
+    lock = threading.Lock()
+    peak = [0]
+    gate = threading.Event()
+
+    def task():
+        with lock:
+            running.append(1)
+            peak[0] = max(peak[0], len(running))
+        gate.wait(0.05)
+        with lock:
+            running.pop()
+
+    futures = fair.submit_batch('alice', [(path, task, (), {})] * 4)
+    for future in futures:
+        future.result(timeout=5)
+    assert peak[0] == 1
@@ -0,0 +1,53 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the request profiler
+"""
+
+import pstats
+import sys
+import threading
+
+import pytest
+
+import stage_timing
+
+pytestmark = pytest.mark.skipif(sys.version_info >= (3, 12), reason="one profiler covers all threads")
+
+
+def worker_function():
+    return sum(range(1000))
+
+
+def late_function():
+    return sum(range(10))
+
+
+def function_names(path):
+    return {name for _, _, name in pstats.Stats(path).stats}
+
+
+def test_worker_threads_are_part_of_the_request_profile(tmp_path):
+    profiler = stage_timing.RequestProfiler(str(tmp_path), 'index').start()
+    thread = threading.Thread(target=profiler.profiled(worker_function))
+    thread.start()
+    thread.join()
+    path = profiler.stop()
+
+    assert 'worker_function' in function_names(path)
+
+
+def test_calls_finishing_after_the_request_get_their_own_file(tmp_path):
+    profiler = stage_timing.RequestProfiler(str(tmp_path), 'index').start()
+    late = profiler.profiled(late_function)
+    path = profiler.stop()
+
+    thread = threading.Thread(target=late)
+    thread.start()
+    thread.join()
+
+    late_path = path[:-len('.prof')] + '-1.prof'
+    assert 'late_function' in function_names(late_path)
+    assert 'late_function' not in function_names(path)
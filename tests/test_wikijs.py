@@ -0,0 +1,98 @@
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Tests for the shared Wiki.js page index and the adaptive request limiter
+"""
+
+import types
+
+import wikijs
+
+
+def test_forced_page_index_refreshes_are_rate_limited(monkeypatch):
+    calls = []
+
+    def list_pages(wikijs_url, wikijs_token, debug_logger=None):
+        calls.append(wikijs_url)
+        return [{'id': len(calls), 'path': 'home', 'updatedAt': str(len(calls))}], None
+
+    monkeypatch.setattr(wikijs, 'list_pages', list_pages)
+    monkeypatch.setattr(wikijs, '_page_index', {'url': None, 'pages': {}, 'fetched_at': 0.0})
+    clock = [1000.0]
+    monkeypatch.setattr(wikijs, 'time', types.SimpleNamespace(monotonic=lambda: clock[0]))
+
+    def index(refresh=False):
+        return wikijs.get_page_index('http://wiki', 'token', debug_logger=lambda *args: None, refresh=refresh)[0]
+
+    assert index()['home']['id'] == 1
+    # Lookups of unknown paths right after a load reuse it
+    for _ in range(10):
+        index(refresh=True)
+    assert len(calls) == 1
+
+    clock[0] += wikijs.PAGE_INDEX_REFRESH_SECONDS
+    assert index(refresh=True)['home']['id'] == 2
+    clock[0] += wikijs.PAGE_INDEX_TTL - 1
+    assert index()['home']['id'] == 2
+    clock[0] += 1
+    assert index()['home']['id'] == 3
+
+
+def limiter_with_clock(monkeypatch, **kwargs):
+    clock = [1000.0]
+    monkeypatch.setattr(wikijs, 'time', types.SimpleNamespace(monotonic=lambda: clock[0]))
+    return wikijs.AdaptiveLimiter(**kwargs), clock
+
+
+def record(limiter, clock, seconds, operation='default', units=1, result='ok'):
+    """One saturated request finishing after seconds"""
+    limiter._in_flight += 1
+    clock[0] += seconds
+    limiter._record(result, seconds, True, operation, units)
+
+
+def test_limiter_grows_while_latency_stays_low(monkeypatch):
+    limiter, clock = limiter_with_clock(monkeypatch, initial=4, max_limit=8)
+    for _ in range(40):
+        record(limiter, clock, 0.1)
+    assert limiter.stats()['limit'] == 8
+    assert limiter.stats()['decreases'] == 0
+
+
+def test_limiter_halves_once_per_round_trip_on_overload(monkeypatch):
+    limiter, clock = limiter_with_clock(monkeypatch, initial=8)
+    record(limiter, clock, 0.1)
+    record(limiter, clock, 0.2, result='overload')
+    record(limiter, clock, 0.0, result='overload')
+    assert limiter.stats()['limit'] == 4
+
+    record(limiter, clock, 0.2, result='overload')
+    assert limiter.stats()['limit'] == 2
+
+
+def test_limiter_eases_off_when_latency_rises(monkeypatch):
+    limiter, clock = limiter_with_clock(monkeypatch, initial=8)
+    for _ in range(5):
+        record(limiter, clock, 0.1, 'pages.single')
+    for _ in range(10):
+        record(limiter, clock, 1.0, 'pages.single')
+    assert limiter.stats()['limit'] < 8
+    assert limiter.stats()['decreases'] > 0
+
+
+def test_slow_operations_are_compared_with_their_own_baseline(monkeypatch):
+    limiter, clock = limiter_with_clock(monkeypatch, initial=4, max_limit=4)
+    for _ in range(5):
+        record(limiter, clock, 0.01, 'pages.list')
+    for _ in range(10):
+        record(limiter, clock, 1.0, 'pages.create')
+        # A batch of 50 pages takes longer than a single page, but not per page
+        record(limiter, clock, 0.5, 'pages.single', units=50)
+        record(limiter, clock, 0.01, 'pages.single')
+
+    stats = limiter.stats()
+    assert stats['decreases'] == 0
+    assert stats['operations']['pages.create']['baseline_ms'] == 1000.0
+    assert stats['operations']['pages.single']['baseline_ms'] == 10.0
@@ -75,6 +75,24 @@ systemctl stop $SERVICE_NAME
 log "Aktualisiere Anwendungsdateien..."
 cp app.py $INSTALL_DIR/
 cp utils.py $INSTALL_DIR/
+cp process_runner.py $INSTALL_DIR/
+cp page_cache.py $INSTALL_DIR/
+cp assets.py $INSTALL_DIR/
+cp chunked_upload.py $INSTALL_DIR/
+cp events.py $INSTALL_DIR/
+cp native_convert.py $INSTALL_DIR/
+cp page_split.py $INSTALL_DIR/
+cp libreoffice.py $INSTALL_DIR/
+cp stage_timing.py $INSTALL_DIR/
+cp job_queue.py $INSTALL_DIR/
+cp worker.py $INSTALL_DIR/
+cp scheduler.py $INSTALL_DIR/
+cp wiki_mirror.py $INSTALL_DIR/
+cp similarity.py $INSTALL_DIR/
+cp spreadsheet.py $INSTALL_DIR/
+cp pdf_extract.py $INSTALL_DIR/
+cp job_journal.py $INSTALL_DIR/
+cp gunicorn.conf.py $INSTALL_DIR/
 
 # Aktualisiere Moduldateien
 if [ -f "wikijs.py" ]; then
@@ -113,6 +131,12 @@ else
     warning "Keine Template-Dateien gefunden."
 fi
 
+# Ältere Installationen: System-Pakete im venv freischalten, damit python3-uno importiert werden kann
+if [ -f "$VENV_DIR/pyvenv.cfg" ] && grep -q "^include-system-site-packages = false" "$VENV_DIR/pyvenv.cfg"; then
+    log "Aktiviere System-Pakete im Python Virtual Environment (python3-uno)..."
+    sed -i 's/^include-system-site-packages = false/include-system-site-packages = true/' "$VENV_DIR/pyvenv.cfg"
+fi
+
 # Update requirements.txt und installiere neue Abhängigkeiten
 if [ -f "requirements.txt" ]; then
     log "Aktualisiere Python-Abhängigkeiten..."
@@ -148,6 +172,22 @@ WIKIJS_URL=$WIKIJS_URL
 WIKIJS_TOKEN=$WIKIJS_TOKEN
 WIKIJS_EXTERNAL_URL=$WIKIJS_EXTERNAL_URL
 EOF
+    # Weitere Einstellungen aus dem Backup übernehmen
+    grep -v -E "^(WIKIJS_URL|WIKIJS_TOKEN|WIKIJS_EXTERNAL_URL)=" $BACKUP_DIR/.env >> $INSTALL_DIR/.env 2>/dev/null || true
+fi
+
+# Gemeinsamer Schlüssel für alle Worker-Prozesse (ältere Installationen haben keinen)
+if ! grep -q "^SECRET_KEY=" $INSTALL_DIR/.env; then
+    log "Erzeuge SECRET_KEY..."
+    echo "SECRET_KEY=$(python3 -c 'import secrets; print(secrets.token_hex(32))')" >> $INSTALL_DIR/.env
+fi
+
+# Job-Journal (ältere Installationen haben keins): ohne Journal gehen Konvertierungen im
+# Hintergrund verloren, wenn Gunicorn einen Worker erneuert oder der Dienst neu startet
+if ! grep -q "^JOB_JOURNAL_DB=" $INSTALL_DIR/.env; then
+    log "Aktiviere Job-Journal..."
+    mkdir -p $INSTALL_DIR/data
+    echo "JOB_JOURNAL_DB=$INSTALL_DIR/data/jobs.db" >> $INSTALL_DIR/.env
 fi
 
 # Service-User auslesen
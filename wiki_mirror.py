@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Local mirror of Wiki.js pages with full-text search
+
+Page metadata and Markdown content are kept in a SQLite database with an
+FTS5 index. A background thread polls Wiki.js: every round loads the page
+list (metadata only) and fetches the content of the pages whose updatedAt
+changed since the last round, so Wiki.js only sees delta traffic. Page
+lists, directory listings and page contents are then served from the
+mirror (see wikijs.configure_mirror), and search runs locally.
+
+Several processes can share one database file; a sync claim in the meta
+table makes sure only one of them polls Wiki.js per interval.
+"""
+
+import html
+import os
+import sqlite3
+import threading
+import time
+
+import wikijs
+
+DEFAULT_INTERVAL = 60
+# Pages per GraphQL request when contents are synced
+SYNC_BATCH_SIZE = 25
+# A sync claim older than this is considered abandoned (process crashed)
+SYNC_CLAIM_SECONDS = 600
+
+# Markers for snippet(); escaped HTML is produced from them afterwards
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+class WikiMirror:
+    """SQLite/FTS5 copy of the pages of one Wiki.js instance"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            title TEXT,
+            content_type TEXT,
+            updated_at TEXT,
+            content TEXT,
+            content_updated_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS pages_path ON pages (path);
+        CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+            title, path, content, tokenize = 'unicode61 remove_diacritics 2'
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', '0');
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('sync_claim', '0');
+    """
+
+    def __init__(self, db_path, wikijs_url, wikijs_token, interval=DEFAULT_INTERVAL, debug_logger=None):
+        self.db_path = os.path.abspath(db_path)
+        self.wikijs_url = wikijs_url
+        self.wikijs_token = wikijs_token
+        self.interval = interval
+        self.log_debug = debug_logger or wikijs.default_log_debug
+
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._index = None
+        self._index_generation = None
+        self._poller_pid = None
+        self._listeners = []
+        self._stats = {'syncs': 0, 'changed': 0, 'deleted': 0, 'last_error': None, 'last_sync_seconds': None}
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _conn(self):
+        """One connection per thread and process"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _meta(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def add_listener(self, listener):
+        """Registers listener(mirror), called after every sync that changed pages and after the first one"""
+        self._listeners.append(listener)
+
+    # Background polling
+
+    def start(self):
+        """Starts the polling thread of this process (again after a fork)"""
+        if self._poller_pid == os.getpid() or not self.interval:
+            return
+        self._poller_pid = os.getpid()
+        threading.Thread(target=self._poll, name='wiki-mirror-sync', daemon=True).start()
+
+    def _poll(self):
+        while True:
+            try:
+                self.sync(min_age=self.interval)
+            except Exception as e:
+                self._stats['last_error'] = str(e)
+                self.log_debug(f"Abgleich des Wiki.js-Spiegels fehlgeschlagen: {e}", "error")
+            time.sleep(max(1, self.interval / 4))
+
+    def ready(self):
+        """True once a complete sync has finished; starts polling on first use"""
+        self.start()
+        return self._meta('last_sync') is not None
+
+    def _claim(self, min_age):
+        """Takes the sync claim unless another process synced within min_age seconds"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            last_sync = float(self._meta('last_sync', 0) or 0)
+            claim = float(self._meta('sync_claim', 0) or 0)
+            free = now - last_sync >= min_age and now - claim >= SYNC_CLAIM_SECONDS
+            if free:
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'sync_claim'", (str(now),))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return free
+
+    def sync(self, min_age=0):
+        """
+        Brings the mirror up to date with Wiki.js
+
+        Loads the page list and fetches the contents of new and changed
+        pages; pages missing from the list are removed.
+
+        Returns:
+            bool: False if the sync was skipped because it is not due
+        """
+        with self._sync_lock:
+            if not self._claim(min_age):
+                return False
+            try:
+                return self._sync()
+            finally:
+                self._conn().execute("UPDATE meta SET value = '0' WHERE key = 'sync_claim'")
+
+    def _sync(self):
+        started = time.monotonic()
+        pages, error = wikijs.list_pages(self.wikijs_url, self.wikijs_token, debug_logger=self.log_debug)
+        if error:
+            raise RuntimeError(error)
+
+        conn = self._conn()
+        known = {row['id']: row for row in conn.execute(
+            "SELECT id, path, title, updated_at, content_updated_at FROM pages")}
+        listed = {int(page['id']): page for page in pages if page.get('id') and page.get('path')}
+
+        changed_meta = [page for page_id, page in listed.items()
+                        if page_id not in known
+                        or (known[page_id]['path'], known[page_id]['title'], known[page_id]['updated_at'])
+                        != (page['path'], page.get('title'), page.get('updatedAt'))]
+        deleted = [page_id for page_id in known if page_id not in listed]
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                "INSERT INTO pages (id, path, title, content_type, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET path = excluded.path, title = excluded.title, "
+                "content_type = excluded.content_type, updated_at = excluded.updated_at",
+                [(int(page['id']), page['path'], page.get('title'), page.get('contentType'), page.get('updatedAt'))
+                 for page in changed_meta]
+            )
+            conn.executemany("DELETE FROM pages WHERE id = ?", [(page_id,) for page_id in deleted])
+            conn.executemany("DELETE FROM pages_fts WHERE rowid = ?", [(page_id,) for page_id in deleted])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        # Contents only for pages whose stored content is older than their updatedAt
+        stale = [dict(listed[row['id']], id=row['id']) for row in conn.execute(
+            "SELECT id FROM pages WHERE content_updated_at IS NOT updated_at")]
+        for start in range(0, len(stale), SYNC_BATCH_SIZE):
+            batch = stale[start:start + SYNC_BATCH_SIZE]
+            contents = wikijs.fetch_contents_by_id(batch, self.wikijs_url, self.wikijs_token,
+                                                   debug_logger=self.log_debug)
+            for page in batch:
+                content, title = contents.get(page['id'], (None, None))
+                if content is not None:
+                    self.store_content(page['id'], page.get('updatedAt'), content, title)
+
+        changed = bool(changed_meta or deleted or stale)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if changed:
+                conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (str(time.time()),))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        first_sync = not self._stats['syncs']
+        self._stats['syncs'] += 1
+        self._stats['changed'] += len(changed_meta)
+        self._stats['deleted'] += len(deleted)
+        self._stats['last_error'] = None
+        self._stats['last_sync_seconds'] = round(time.monotonic() - started, 2)
+        if changed:
+            self.log_debug(f"Wiki.js-Spiegel abgeglichen: {len(changed_meta)} geändert, {len(deleted)} gelöscht, "
+                           f"{len(stale)} Inhalte geladen", "api")
+        if changed or first_sync:
+            for listener in self._listeners:
+                try:
+                    listener(self)
+                except Exception as e:
+                    self.log_debug(f"Verarbeitung nach dem Abgleich des Wiki.js-Spiegels fehlgeschlagen: {e}", "error")
+        return True
+
+    # Reading
+
+    def store_content(self, page_id, updated_at, content, title=None):
+        """Stores the content of a page (also read-through from live fetches) and updates the search index"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT path, title FROM pages WHERE id = ?", (page_id,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return
+            title = title or row['title']
+            # The title stays as listed, so the page index does not have to be rebuilt
+            conn.execute("UPDATE pages SET content = ?, content_updated_at = ? WHERE id = ?",
+                         (content, updated_at, page_id))
+            conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (page_id,))
+            conn.execute("INSERT INTO pages_fts (rowid, title, path, content) VALUES (?, ?, ?, ?)",
+                         (page_id, title, row['path'], content))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def pages_by_path(self):
+        """
+        Returns all pages keyed by path in the format of wikijs.get_page_index
+
+        The dict is rebuilt only when the mirror changed; it must not be modified.
+        """
+        generation = self._meta('generation')
+        with self._index_lock:
+            if self._index is None or generation != self._index_generation:
+                rows = self._conn().execute(
+                    "SELECT id, path, title, content_type, updated_at FROM pages ORDER BY path")
+                self._index = {
+                    row['path']: {
+                        'id': row['id'],
+                        'path': row['path'],
+                        'title': row['title'],
+                        'contentType': row['content_type'],
+                        'updatedAt': row['updated_at'],
+                    }
+                    for row in rows
+                }
+                self._index_generation = generation
+            return self._index
+
+    def get_content(self, page_id, updated_at):
+        """
+        Returns (content, title) of a page if the mirror has it in the given version
+
+        Returns:
+            tuple or None
+        """
+        row = self._conn().execute(
+            "SELECT content, title, content_updated_at FROM pages WHERE id = ?", (page_id,)).fetchone()
+        if row is None or row['content'] is None or row['content_updated_at'] != updated_at:
+            return None
+        return row['content'], row['title']
+
+    def search(self, query, limit=50):
+        """
+        Full-text search over title, path and content
+
+        Every word of the query must occur (as prefix); title matches rank
+        highest. Snippets are HTML-escaped with <mark> around the hits.
+
+        Returns:
+            list: Dicts with id, path, title and snippet
+        """
+        words = [word.replace('"', '""') for word in query.split()]
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        rows = self._conn().execute(
+            "SELECT p.id, p.path, p.title, "
+            "snippet(pages_fts, 2, ?, ?, '…', 12) AS snippet "
+            "FROM pages_fts JOIN pages p ON p.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts, 10.0, 5.0, 1.0) LIMIT ?",
+            (_MARK_START, _MARK_END, match, limit)
+        ).fetchall()
+        return [{
+            'id': row['id'],
+            'path': row['path'],
+            'title': row['title'],
+            'snippet': html.escape(row['snippet'] or '').replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'),
+        } for row in rows]
+
+    def stats(self):
+        """Returns page counts and sync state for monitoring"""
+        conn = self._conn()
+        counts = conn.execute(
+            "SELECT COUNT(*) AS pages, COUNT(content) AS with_content, "
+            "SUM(content_updated_at IS NOT updated_at) AS stale FROM pages").fetchone()
+        last_sync = self._meta('last_sync')
+        return dict(
+            self._stats,
+            pages=counts['pages'],
+            with_content=counts['with_content'],
+            stale=counts['stale'] or 0,
+            last_sync_age=round(time.time() - float(last_sync), 1) if last_sync else None,
+            interval=self.interval,
+        )
@@ -10,39 +10,308 @@ Wiki.js API interaction functionality for DocFlow application
 
 import os
 import requests
+import threading
+import time
 import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from urllib.parse import quote
 
-def log_debug(message, log_type='info'):
-    """Placeholder for log_debug function - will be replaced with app's function"""
+from page_cache import ByteLRUCache
+
+# Process-wide cache of page contents, keyed by (page ID, updatedAt)
+page_content_cache = ByteLRUCache()
+
+def default_log_debug(message, log_type='info'):
+    """Fallback logger used when no debug_logger is passed"""
     print(f"[{log_type.upper()}] {message}")
 
+# Shared health check state: result cache and circuit breaker
+HEALTH_CACHE_TTL = 30
+HEALTH_FAILURE_THRESHOLD = 3
+HEALTH_OPEN_SECONDS = 60
+HEALTH_REQUEST_TIMEOUT = 5
+
+_health_lock = threading.Lock()
+_health_state = {
+    'result': None,
+    'checked_at': 0.0,
+    'failures': 0,
+    'open_until': 0.0
+}
+
+def configure_health_check(cache_ttl=None, failure_threshold=None, open_seconds=None, request_timeout=None):
+    """Changes the timings of the Wiki.js health check"""
+    global HEALTH_CACHE_TTL, HEALTH_FAILURE_THRESHOLD, HEALTH_OPEN_SECONDS, HEALTH_REQUEST_TIMEOUT
+    if cache_ttl is not None:
+        HEALTH_CACHE_TTL = cache_ttl
+    if failure_threshold is not None:
+        HEALTH_FAILURE_THRESHOLD = max(1, failure_threshold)
+    if open_seconds is not None:
+        HEALTH_OPEN_SECONDS = open_seconds
+    if request_timeout is not None:
+        HEALTH_REQUEST_TIMEOUT = request_timeout
+
+# Timeout for all GraphQL requests except the health check; a timeout counts as overload
+REQUEST_TIMEOUT = 120
+
+class AdaptiveLimiter:
+    """
+    Limits the number of concurrent GraphQL requests to Wiki.js (AIMD)
+
+    While the smoothed latency stays within tolerance times the lowest
+    latency seen in the current window, the limit grows by about one
+    request per round trip. Rising latency makes it ease off, and 429/5xx
+    responses, timeouts and connection errors halve it, at most once per
+    round trip so that a burst of failures counts as one signal.
+
+    Latency and baseline are kept per operation (page list, page fetch,
+    page creation, ...), so a slow kind of request is only compared with
+    itself; requests covering several pages are divided by their number.
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=32, tolerance=2.0, backoff=0.5,
+                 baseline_window=300, samples=500):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.baseline_window = baseline_window
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._latencies = deque(maxlen=samples)
+        self._smoothed = None
+        self._operations = {}
+        self._last_decrease = 0.0
+        self._counts = {'ok': 0, 'overload': 0, 'error': 0}
+        self._decreases = 0
+
+    def configure(self, initial=None, min_limit=None, max_limit=None, tolerance=None, backoff=None):
+        """Changes the limits; waiting requests are re-evaluated immediately"""
+        with self._condition:
+            if min_limit is not None:
+                self.min_limit = max(1, min_limit)
+            if max_limit is not None:
+                self.max_limit = max(self.min_limit, max_limit)
+            if initial is not None:
+                self.limit = float(initial)
+            if tolerance is not None:
+                self.tolerance = tolerance
+            if backoff is not None:
+                self.backoff = backoff
+            self.limit = float(min(self.max_limit, max(self.min_limit, self.limit)))
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, operation='default', units=1):
+        """
+        Waits for a free slot and holds it for one request
+
+        Yields a dict; set its 'result' to 'overload' if the server signalled
+        overload. An exception leaving the block counts as 'error'.
+
+        Args:
+            operation: Kind of request whose latencies are compared with each other
+            units: Number of pages the request covers
+        """
+        with self._condition:
+            self._waiting += 1
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._waiting -= 1
+            self._in_flight += 1
+            # Only a fully used limit says anything about whether a higher one would work
+            saturated = self._in_flight >= int(self.limit)
+
+        outcome = {'result': 'ok'}
+        started = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            if outcome['result'] == 'ok':
+                outcome['result'] = 'error'
+            raise
+        finally:
+            self._record(outcome['result'], time.monotonic() - started, saturated, operation, units)
+
+    def _record(self, result, seconds, saturated, operation='default', units=1):
+        with self._condition:
+            self._in_flight -= 1
+            self._counts[result] += 1
+            now = time.monotonic()
+            round_trip = self._smoothed or seconds
+
+            if result == 'overload':
+                if now - self._last_decrease > round_trip:
+                    self._decrease(self.backoff, now)
+            elif result == 'ok':
+                self._latencies.append(seconds)
+                self._smoothed = seconds if self._smoothed is None else 0.8 * self._smoothed + 0.2 * seconds
+
+                state = self._operations.get(operation)
+                if state is None:
+                    state = self._operations[operation] = {
+                        'smoothed': None, 'baseline': None, 'window_min': None, 'window_start': now
+                    }
+                latency = seconds / max(1, units)
+                state['smoothed'] = latency if state['smoothed'] is None else 0.8 * state['smoothed'] + 0.2 * latency
+
+                # Baseline: lowest latency of the last window, so it follows a Wiki.js that got slower
+                if state['window_min'] is None or latency < state['window_min']:
+                    state['window_min'] = latency
+                if state['baseline'] is None or latency < state['baseline']:
+                    state['baseline'] = latency
+                if now - state['window_start'] > self.baseline_window:
+                    state['baseline'] = state['window_min']
+                    state['window_min'] = None
+                    state['window_start'] = now
+
+                if state['smoothed'] <= state['baseline'] * self.tolerance:
+                    if saturated:
+                        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                elif now - self._last_decrease > round_trip:
+                    # Latency is rising: Wiki.js is queueing, ease off before it starts failing
+                    self._decrease(0.9, now)
+
+            self._condition.notify_all()
+
+    def _decrease(self, factor, now):
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self._last_decrease = now
+        self._decreases += 1
+
+    def stats(self):
+        """Returns the current limit, latencies and counters for monitoring"""
+        with self._condition:
+            latencies = sorted(self._latencies)
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+            return {
+                'limit': int(self.limit),
+                'limit_exact': round(self.limit, 2),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'latency_ms': round(self._smoothed * 1000, 1) if self._smoothed is not None else None,
+                'operations': {
+                    operation: {
+                        'latency_ms': round(state['smoothed'] * 1000, 1),
+                        'baseline_ms': round(state['baseline'] * 1000, 1),
+                    }
+                    for operation, state in self._operations.items()
+                },
+                'p50_ms': percentile(0.5),
+                'p95_ms': percentile(0.95),
+                'requests': dict(self._counts),
+                'decreases': self._decreases,
+            }
+
+# Process-wide limiter shared by uploads, exports and directory listings
+request_limiter = AdaptiveLimiter()
+
+def configure_limiter(initial=None, min_limit=None, max_limit=None, tolerance=None, request_timeout=None):
+    """Changes the adaptive concurrency limit and the request timeout for Wiki.js"""
+    global REQUEST_TIMEOUT
+    request_limiter.configure(initial=initial, min_limit=min_limit, max_limit=max_limit, tolerance=tolerance)
+    if request_timeout is not None:
+        REQUEST_TIMEOUT = request_timeout
+
+def graphql_request(wikijs_url, headers, payload, operation='default', units=1):
+    """
+    Sends a GraphQL request through the adaptive limiter
+
+    429 and 5xx responses are returned to the caller as before, but reduce
+    the limit, as do timeouts and connection errors. operation and units
+    select the latency baseline (see AdaptiveLimiter).
+    """
+    with request_limiter.slot(operation, units) as outcome:
+        try:
+            response = requests.post(f'{wikijs_url}/graphql', headers=headers, json=payload,
+                                     timeout=REQUEST_TIMEOUT)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            outcome['result'] = 'overload'
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            outcome['result'] = 'overload'
+        return response
+
 def test_connection(wikijs_url, wikijs_token, debug_logger=None):
-    """Test connection to Wiki.js API"""
-    global log_debug
-    if debug_logger:
-        log_debug = debug_logger
+    """
+    Test connection to Wiki.js API
+
+    The result is cached for HEALTH_CACHE_TTL seconds and shared by all
+    requests. After HEALTH_FAILURE_THRESHOLD failed checks in a row Wiki.js
+    is not contacted again for HEALTH_OPEN_SECONDS (circuit breaker).
+    """
+    log_debug = debug_logger or default_log_debug
 
     if not wikijs_url or not wikijs_token:
         log_debug("Wiki.js URL oder Token nicht konfiguriert", "error")
         return {'success': False, 'message': 'Wiki.js URL oder Token nicht konfiguriert'}
 
+    # Concurrent checks wait for the running one instead of sending their own request
+    with _health_lock:
+        now = time.monotonic()
+
+        if _health_state['result'] and now - _health_state['checked_at'] < HEALTH_CACHE_TTL:
+            log_debug("Verwende zwischengespeichertes Ergebnis des Verbindungstests", "api")
+            return dict(_health_state['result'])
+
+        if now < _health_state['open_until']:
+            retry_in = int(_health_state['open_until'] - now) + 1
+            log_debug(f"Wiki.js als nicht erreichbar markiert, nächster Versuch in {retry_in} s", "error")
+            return {
+                'success': False,
+                'message': f'Wiki.js ist derzeit nicht erreichbar. Nächster Verbindungsversuch in {retry_in} Sekunden.'
+            }
+
+        result, reachable = _probe_connection(wikijs_url, wikijs_token, log_debug)
+
+        _health_state['result'] = result
+        _health_state['checked_at'] = time.monotonic()
+        if reachable:
+            _health_state['failures'] = 0
+        else:
+            _health_state['failures'] += 1
+            if _health_state['failures'] >= HEALTH_FAILURE_THRESHOLD:
+                _health_state['open_until'] = time.monotonic() + HEALTH_OPEN_SECONDS
+                log_debug(f"{_health_state['failures']} fehlgeschlagene Verbindungstests, "
+                          f"pausiere Anfragen an Wiki.js für {HEALTH_OPEN_SECONDS} s", "error")
+
+        return dict(result)
+
+def _probe_connection(wikijs_url, wikijs_token, log_debug):
+    """
+    Sends a minimal GraphQL query to Wiki.js
+
+    Returns:
+        tuple: (result dict, whether the server was reachable)
+    """
     try:
-        # Use a simple query to list pages
-        test_query = "{pages{list{id,title,path,contentType}}}"
+        # Minimal query: a single page ID instead of the whole page list
+        test_query = "{pages{list(limit:1){id}}}"
         log_debug(f"Teste Wiki.js Verbindung zu: {wikijs_url}", "api")
 
-        encoded_query = quote(test_query)
-
         headers = {
-            'Authorization': f'Bearer {wikijs_token}'
+            'Authorization': f'Bearer {wikijs_token}',
+            'Content-Type': 'application/json'
         }
-        log_debug(f"Sende GET-Anfrage an: {wikijs_url}/graphql/pages/list", "api")
+        log_debug(f"Sende POST-Anfrage an: {wikijs_url}/graphql", "api")
 
-        response = requests.get(
-            f'{wikijs_url}/graphql/pages/list?query={encoded_query}',
-            headers=headers
+        response = requests.post(
+            f'{wikijs_url}/graphql',
+            headers=headers,
+            json={'query': test_query},
+            timeout=HEALTH_REQUEST_TIMEOUT
         )
 
         log_debug(f"Status Code: {response.status_code}", "api")
@@ -56,57 +325,77 @@ def test_connection(wikijs_url, wikijs_token, debug_logger=None):
             return {
                 'success': False,
                 'message': f"API-Fehler: {error_msg}\nBitte überprüfen Sie den API-Token."
-            }
+            }, True
 
         if 'data' in data and 'pages' in data['data'] and 'list' in data['data']['pages']:
-            page_count = len(data['data']['pages']['list'])
-            log_debug(f"Verbindung erfolgreich! {page_count} Seiten gefunden.", "success")
-            return {'success': True, 'message': f'Verbindung zu Wiki.js erfolgreich hergestellt! {page_count} Seiten gefunden.'}
+            log_debug("Verbindung erfolgreich!", "success")
+            return {'success': True, 'message': 'Verbindung zu Wiki.js erfolgreich hergestellt!'}, True
         else:
             log_debug("Unerwartetes Antwortformat von Wiki.js", "error")
             return {
                 'success': False,
                 'message': 'Unerwartetes Antwortformat von Wiki.js. Bitte überprüfen Sie die API-Konfiguration.'
-            }
+            }, True
 
-    except requests.exceptions.ConnectionError:
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
         log_debug(f"Verbindungsfehler: Server nicht erreichbar unter {wikijs_url}", "error")
         return {
             'success': False,
             'message': f'Verbindungsfehler: Server nicht erreichbar unter {wikijs_url}'
-        }
+        }, False
     except requests.exceptions.HTTPError as e:
         log_debug(f"HTTP-Fehler {e.response.status_code}: {e.response.text}", "error")
+        # Server errors count towards the circuit breaker, client errors do not
+        reachable = e.response.status_code < 500
         if e.response.status_code == 401:
             return {
                 'success': False,
                 'message': 'Authentifizierungsfehler: Ungültiger API-Token'
-            }
+            }, reachable
         elif e.response.status_code == 400:
             return {
                 'success': False,
                 'message': 'API-Fehler: Ungültige Anfrage. Bitte überprüfen Sie die Wiki.js-URL und den API-Token'
-            }
+            }, reachable
         return {
             'success': False,
             'message': f'HTTP-Fehler {e.response.status_code}: {e.response.text}'
-        }
+        }, reachable
     except Exception as e:
         log_debug(f"Unerwarteter Fehler: {str(e)}", "error")
         return {
             'success': False,
             'message': f'Unerwarteter Fehler: {str(e)}\nBitte überprüfen Sie die Konsole für weitere Details.'
-        }
+        }, False
+
+def directories_from_paths(all_paths):
+    """Returns the sorted folders of a list of page paths, starting with the root ''"""
+    # Extract unique directories from paths
+    directories = set()
+    for path in all_paths:
+        # Split the path and reconstruct directories
+        parts = path.split('/')
+        for i in range(1, len(parts)):
+            directories.add('/'.join(parts[:i]))
+
+    # Convert set to list and sort
+    directory_list = sorted(list(directories))
+
+    # Add root directory if it doesn't exist
+    if '' not in directory_list:
+        directory_list.insert(0, '')
+
+    return directory_list
 
 def get_directories(wikijs_url, wikijs_token, debug_logger=None):
     """Retrieves a list of all directories from Wiki.js"""
-    global log_debug
-    if debug_logger:
-        log_debug = debug_logger
-
     if not wikijs_url or not wikijs_token:
         return {'success': False, 'message': 'Wiki.js URL oder Token nicht konfiguriert', 'directories': []}
 
+    mirror = active_mirror(wikijs_url)
+    if mirror is not None:
+        return {'success': True, 'directories': directories_from_paths(mirror.pages_by_path())}
+
     try:
         # GraphQL query to get all pages which will be used to extract unique directories
         query = """
@@ -124,11 +413,7 @@ def get_directories(wikijs_url, wikijs_token, debug_logger=None):
             'Content-Type': 'application/json'
         }
 
-        response = requests.post(
-            f'{wikijs_url}/graphql',
-            headers=headers,
-            json={'query': query}
-        )
+        response = graphql_request(wikijs_url, headers, {'query': query}, 'pages.list')
 
         response.raise_for_status()
         data = response.json()
@@ -141,22 +426,7 @@ def get_directories(wikijs_url, wikijs_token, debug_logger=None):
         pages = data.get('data', {}).get('pages', {}).get('list', [])
         all_paths = [page['path'] for page in pages if 'path' in page]
 
-        # Extract unique directories from paths
-        directories = set()
-        for path in all_paths:
-            # Split the path and reconstruct directories
-            parts = path.split('/')
-            for i in range(1, len(parts)):
-                directories.add('/'.join(parts[:i]))
-
-        # Convert set to list and sort
-        directory_list = sorted(list(directories))
-
-        # Add root directory if it doesn't exist
-        if '' not in directory_list:
-            directory_list.insert(0, '')
-
-        return {'success': True, 'directories': directory_list}
+        return {'success': True, 'directories': directories_from_paths(all_paths)}
 
     except Exception as e:
         error_trace = traceback.format_exc()
@@ -172,13 +442,17 @@ def fetch_pages(wikijs_url, wikijs_token, limit=100, debug_logger=None):
     Retrieves a list of pages from Wiki.js
     Returns a tuple of (pages, error)
     """
-    global log_debug
-    if debug_logger:
-        log_debug = debug_logger
+    log_debug = debug_logger or default_log_debug
 
     if not wikijs_url or not wikijs_token:
         return [], "Wiki.js URL oder Token nicht konfiguriert"
 
+    mirror = active_mirror(wikijs_url)
+    if mirror is not None:
+        pages = list(mirror.pages_by_path().values())[:limit]
+        log_debug(f"Using {len(pages)} pages from the local Wiki.js mirror", "api")
+        return [page for page in pages if page.get('contentType') == 'markdown'], None
+
     try:
         # GraphQL query to get all pages with id, title, path, and contentType
         query = f"""
@@ -201,11 +475,7 @@ def fetch_pages(wikijs_url, wikijs_token, limit=100, debug_logger=None):
 
         log_debug(f"Fetching Wiki.js pages from: {wikijs_url}", "api")
 
-        response = requests.post(
-            f'{wikijs_url}/graphql',
-            headers=headers,
-            json={'query': query}
-        )
+        response = graphql_request(wikijs_url, headers, {'query': query}, 'pages.list')
 
         response.raise_for_status()
         data = response.json()
@@ -224,7 +494,7 @@ def fetch_pages(wikijs_url, wikijs_token, limit=100, debug_logger=None):
 
         return markdown_pages, None
 
-    except requests.exceptions.ConnectionError as e:
+    except requests.exceptions.ConnectionError:
         error_msg = f"Connection error: Could not connect to Wiki.js at {wikijs_url}"
         log_debug(error_msg, "error")
         return [], error_msg
@@ -238,11 +508,229 @@ def fetch_pages(wikijs_url, wikijs_token, limit=100, debug_logger=None):
         log_debug(f"Traceback: {traceback.format_exc()}", "error")
         return [], error_msg
 
+# Shared index of all pages, so resolving a path does not need a list query per page.
+# Its updatedAt values also decide whether cached contents are still current, so an
+# edit in Wiki.js can take up to PAGE_INDEX_TTL seconds to show up in exports.
+PAGE_INDEX_TTL = 60
+# Minimum age of the index (or mirror) before a caller asking for fresh data reloads it;
+# keeps lookups of many unknown paths from sending one full page list query each
+PAGE_INDEX_REFRESH_SECONDS = 5
+
+_page_index_lock = threading.Lock()
+_page_index = {
+    'url': None,
+    'pages': {},
+    'fetched_at': 0.0
+}
+
+# Optional local mirror (wiki_mirror.WikiMirror) serving page lists and contents
+_mirror = None
+
+def configure_mirror(mirror):
+    """Serves page lists, directories and contents from a wiki_mirror.WikiMirror; None disables it"""
+    global _mirror
+    _mirror = mirror
+    if mirror is not None:
+        mirror.start()
+
+def active_mirror(wikijs_url):
+    """Returns the mirror if it belongs to wikijs_url and has finished its first sync"""
+    mirror = _mirror
+    if mirror is None or mirror.wikijs_url != wikijs_url or not mirror.ready():
+        return None
+    return mirror
+
+_similarity = None
+
+def configure_similarity(index):
+    """Adds every created page to a similarity.SimilarityIndex; None disables it"""
+    global _similarity
+    _similarity = index
+
+def configure_page_index(ttl=None):
+    """Changes how long the page index is reused before it is loaded again"""
+    global PAGE_INDEX_TTL
+    if ttl is not None:
+        PAGE_INDEX_TTL = ttl
+
+def get_page_index(wikijs_url, wikijs_token, debug_logger=None, refresh=False):
+    """
+    Returns all pages of Wiki.js keyed by path
+
+    The list is loaded with one query and shared by all requests for
+    PAGE_INDEX_TTL seconds. refresh=True reloads it unless it is younger
+    than PAGE_INDEX_REFRESH_SECONDS. The returned dict must not be modified.
+
+    Returns:
+        tuple: (dict path -> page with id, path, title, contentType, updatedAt; error or None)
+    """
+    log_debug = debug_logger or default_log_debug
+
+    if not wikijs_url or not wikijs_token:
+        return {}, "Wiki.js URL oder Token nicht konfiguriert"
+
+    mirror = active_mirror(wikijs_url)
+    if mirror is not None:
+        if refresh:
+            # Delta sync instead of a full reload; skipped if another caller just synced
+            try:
+                mirror.sync(min_age=PAGE_INDEX_REFRESH_SECONDS)
+            except Exception as e:
+                log_debug(f"Abgleich des Wiki.js-Spiegels fehlgeschlagen: {e}", "warning")
+        return mirror.pages_by_path(), None
+
+    # Concurrent callers wait for the running load instead of sending their own list query
+    with _page_index_lock:
+        age = time.monotonic() - _page_index['fetched_at']
+        max_age = PAGE_INDEX_REFRESH_SECONDS if refresh else PAGE_INDEX_TTL
+        if _page_index['url'] == wikijs_url and age < max_age:
+            return _page_index['pages'], None
+
+        pages, error = list_pages(wikijs_url, wikijs_token, debug_logger=log_debug)
+        if error:
+            return {}, error
+
+        _page_index['pages'] = {page['path']: page for page in pages if page.get('path')}
+        _page_index['url'] = wikijs_url
+        _page_index['fetched_at'] = time.monotonic()
+        log_debug(f"Seitenindex mit {len(_page_index['pages'])} Seiten geladen", "api")
+        return _page_index['pages'], None
+
+def list_pages(wikijs_url, wikijs_token, debug_logger=None):
+    """
+    Loads the metadata of all pages with one query, without contents
+
+    Returns:
+        tuple: (list of pages with id, path, title, contentType, updatedAt; error or None)
+    """
+    log_debug = debug_logger or default_log_debug
+
+    headers = {
+        'Authorization': f'Bearer {wikijs_token}',
+        'Content-Type': 'application/json'
+    }
+    query = "{pages{list{id path title contentType updatedAt}}}"
+
+    try:
+        response = graphql_request(wikijs_url, headers, {'query': query}, 'pages.list')
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log_debug(f"Seitenliste konnte nicht geladen werden: {e}", "error")
+        return [], f"Seitenliste konnte nicht geladen werden: {e}"
+
+    if 'errors' in data:
+        error_msg = ', '.join(error.get('message', 'Unknown error') for error in data['errors'])
+        log_debug(f"GraphQL errors listing pages: {error_msg}", "error")
+        return [], f"GraphQL Error: {error_msg}"
+
+    return data.get('data', {}).get('pages', {}).get('list') or [], None
+
+def fetch_contents_by_id(pages, wikijs_url, wikijs_token, debug_logger=None):
+    """
+    Fetches the contents of several pages with a single GraphQL request
+
+    Every page becomes an aliased pages.single field of one query.
+
+    Args:
+        pages: List of page dicts with at least id (title is used as fallback)
+
+    Returns:
+        dict: page ID -> (content, title); content is None if the page could not be
+        fetched and an empty string for an empty page
+    """
+    log_debug = debug_logger or default_log_debug
+
+    if not pages:
+        return {}
+
+    fields = "\n".join(
+        f"  p{i}: pages {{ single(id: {int(page['id'])}) {{ content title }} }}"
+        for i, page in enumerate(pages)
+    )
+    query = f"query GetPageContents {{\n{fields}\n}}"
+    headers = {
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {wikijs_token}'
+    }
+
+    try:
+        response = graphql_request(wikijs_url, headers, {'query': query}, 'pages.single', units=len(pages))
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        log_debug(f"Error fetching {len(pages)} pages: {e}", "error")
+        data = {}
+
+    # Wiki.js reports a failing page as error of its alias; the other aliases still carry data
+    if data.get('errors'):
+        error_messages = ', '.join(error.get('message', 'Unknown error') for error in data['errors'])
+        log_debug(f"GraphQL errors fetching contents: {error_messages}", "error")
+
+    payload = data.get('data') or {}
+    results = {}
+    for i, page in enumerate(pages):
+        single = (payload.get(f"p{i}") or {}).get('single') or {}
+        results[page['id']] = (single.get('content'), single.get('title') or page.get('title'))
+    return results
+
+def fetch_page_contents(page_paths, wikijs_url, wikijs_token, debug_logger=None):
+    """
+    Fetches several pages with a single GraphQL request
+
+    Every page becomes an aliased pages.single field of one query; pages
+    whose content is cached or mirrored for their updatedAt are not
+    requested at all.
+
+    Returns:
+        dict: path -> (content, title); content is None if the page could not be fetched
+    """
+    log_debug = debug_logger or default_log_debug
+
+    pages_by_path, error = get_page_index(wikijs_url, wikijs_token, debug_logger=log_debug)
+    if error:
+        return {path: (None, None) for path in page_paths}
+
+    mirror = active_mirror(wikijs_url)
+    results = {}
+    missing = []
+    for path in page_paths:
+        page = pages_by_path.get(path)
+        if not page or not page.get('id'):
+            log_debug(f"No page found with path: {path}", "error")
+            results[path] = (None, None)
+            continue
+        cached = page_content_cache.get((page['id'], page['updatedAt'])) if page.get('updatedAt') else None
+        if not cached and mirror is not None:
+            cached = mirror.get_content(page['id'], page.get('updatedAt'))
+        if cached and cached[0]:
+            results[path] = cached
+        else:
+            missing.append(page)
+
+    if not missing:
+        log_debug(f"Using cached content for {len(results)} pages", "success")
+        return results
+
+    log_debug(f"Fetching content for {len(missing)} pages in one request "
+              f"({len(page_paths) - len(missing)} from cache)", "api")
+    contents = fetch_contents_by_id(missing, wikijs_url, wikijs_token, debug_logger=log_debug)
+
+    for page in missing:
+        content, title = contents[page['id']]
+        content = content or None
+        if content and page.get('updatedAt'):
+            page_content_cache.discard_page(page['id'])
+            page_content_cache.put((page['id'], page['updatedAt']), (content, title))
+            if mirror is not None:
+                mirror.store_content(page['id'], page['updatedAt'], content, title)
+        results[page['path']] = (content, title)
+
+    return results
+
 def fetch_page_content(page_path, wikijs_url, wikijs_token, debug_logger=None):
     """Fetch page content from Wiki.js API"""
-    global log_debug
-    if debug_logger:
-        log_debug = debug_logger
+    log_debug = debug_logger or default_log_debug
 
     log_debug(f"Fetching Wiki.js page content for path: {page_path}", "api")
 
@@ -255,48 +743,17 @@ def fetch_page_content(page_path, wikijs_url, wikijs_token, debug_logger=None):
         'Authorization': f'Bearer {wikijs_token}'
     }
 
-    # Step 1: First query to list all pages and find the matching one
-    find_page_query = """
-    query ListPages {
-      pages {
-        list {
-          id
-          path
-          title
-        }
-      }
-    }
-    """
-
     try:
-        log_debug(f"Step 1: Listing pages to find ID for path: {page_path}", "api")
-        response = requests.post(
-            f"{wikijs_url}/graphql",
-            json={'query': find_page_query},
-            headers=headers
-        )
-
-        response_data = response.json()
-
-        if 'errors' in response_data:
-            error_messages = ', '.join([error.get('message', 'Unknown error') for error in response_data['errors']])
-            log_debug(f"GraphQL errors listing pages: {error_messages}", "error")
-            return None, None
-
-        # Extract pages from the response
-        pages = response_data.get('data', {}).get('pages', {}).get('list', [])
-        if not pages:
-            log_debug(f"No pages found", "error")
+        # Step 1: Look up the page ID in the shared page index
+        pages_by_path, error = get_page_index(wikijs_url, wikijs_token, debug_logger=log_debug)
+        if error:
             return None, None
 
-        log_debug(f"Retrieved {len(pages)} pages, looking for path: {page_path}", "api")
-
-        # Find the page with matching path
-        matching_page = None
-        for p in pages:
-            if p.get('path') == page_path:
-                matching_page = p
-                break
+        matching_page = pages_by_path.get(page_path)
+        if not matching_page:
+            # The page may have been created after the index was loaded
+            pages_by_path, error = get_page_index(wikijs_url, wikijs_token, debug_logger=log_debug, refresh=True)
+            matching_page = pages_by_path.get(page_path)
 
         # If no exact match found
         if not matching_page:
@@ -312,6 +769,25 @@ def fetch_page_content(page_path, wikijs_url, wikijs_token, debug_logger=None):
 
         log_debug(f"Found page ID: {page_id} for path: {page_path}", "success")
 
+        # The page list already contains updatedAt, so an unchanged page can be
+        # served from the cache without fetching its content again (at most
+        # PAGE_INDEX_TTL seconds behind the wiki, see get_page_index)
+        updated_at = matching_page.get('updatedAt')
+        cache_key = (page_id, updated_at)
+        if updated_at:
+            cached = page_content_cache.get(cache_key)
+            if cached:
+                content, cached_title = cached
+                log_debug(f"Using cached content for page: {cached_title} ({len(content)} chars)", "success")
+                return content, cached_title
+
+        mirror = active_mirror(wikijs_url)
+        if mirror is not None:
+            mirrored = mirror.get_content(page_id, updated_at)
+            if mirrored and mirrored[0]:
+                log_debug(f"Using mirrored content for page: {mirrored[1]} ({len(mirrored[0])} chars)", "success")
+                return mirrored
+
         # Step 2: Now get the content using the page ID
         content_query = """
         query GetPageContent($id: Int!) {
@@ -332,11 +808,9 @@ def fetch_page_content(page_path, wikijs_url, wikijs_token, debug_logger=None):
         }
 
         log_debug(f"Step 2: Fetching content for page ID: {page_id}", "api")
-        content_response = requests.post(
-            f"{wikijs_url}/graphql",
-            json={'query': content_query, 'variables': content_variables},
-            headers=headers
-        )
+        content_response = graphql_request(wikijs_url, headers,
+                                           {'query': content_query, 'variables': content_variables},
+                                           'pages.single')
 
         content_data = content_response.json()
 
@@ -361,11 +835,19 @@ def fetch_page_content(page_path, wikijs_url, wikijs_token, debug_logger=None):
             return None, title
 
         log_debug(f"Successfully fetched content for page: {title} ({len(content)} chars)", "success")
+
+        if updated_at:
+            # Older versions of this page can never be hit again
+            page_content_cache.discard_page(page_id)
+            page_content_cache.put(cache_key, (content, title))
+            if mirror is not None:
+                # Read-through: the next request is served locally even before the next sync
+                mirror.store_content(page_id, updated_at, content, title)
+
         return content, title
 
     except ValueError as json_err:
         log_debug(f"Failed to parse Wiki.js API response as JSON: {str(json_err)}", "error")
-        log_debug(f"Raw response: {response.text[:200] if 'response' in locals() else 'No response available'}...", "error")
         return None, None
 
     except requests.exceptions.ConnectionError:
@@ -386,9 +868,7 @@ def upload_content(content, title, session_id, wikijs_url, wikijs_token, custom_
                    external_url=None, sanitize_wikijs_path_fn=None, sanitize_wikijs_title_fn=None,
                    clean_markdown_content_fn=None):
     """Uploads a Markdown file to Wiki.js"""
-    global log_debug
-    if debug_logger:
-        log_debug = debug_logger
+    log_debug = debug_logger or default_log_debug
 
     if not sanitize_wikijs_path_fn or not sanitize_wikijs_title_fn or not clean_markdown_content_fn:
         log_debug("Required sanitization functions not provided", "error")
@@ -398,7 +878,25 @@ def upload_content(content, title, session_id, wikijs_url, wikijs_token, custom_
         log_debug("Wiki.js URL oder Token nicht konfiguriert", "error")
         return False, None
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path, page_title = resolve_page_path(
+        title, custom_path=custom_path, custom_title=custom_title, username=username,
+        default_folder=default_folder, debug_logger=log_debug,
+        sanitize_wikijs_path_fn=sanitize_wikijs_path_fn, sanitize_wikijs_title_fn=sanitize_wikijs_title_fn
+    )
+
+    return create_page(content, page_title, path, wikijs_url, wikijs_token, debug_logger=log_debug,
+                       external_url=external_url, clean_markdown_content_fn=clean_markdown_content_fn)
+
+def resolve_page_path(title, custom_path=None, custom_title=None, username=None, default_folder=None,
+                      debug_logger=None, sanitize_wikijs_path_fn=None, sanitize_wikijs_title_fn=None):
+    """
+    Determines the Wiki.js path and title of an uploaded file
+
+    Returns:
+        tuple: (path, title)
+    """
+    log_debug = debug_logger or default_log_debug
+
     date_with_time = datetime.now().strftime("%Y-%m-%d-%H%M")
 
     # Remove .md extension from title if present
@@ -452,9 +950,22 @@ def upload_content(content, title, session_id, wikijs_url, wikijs_token, custom_
 
     # Final check and sanitization of the path
     path = sanitize_wikijs_path_fn(path)
+    return path, title_without_extension
+
+def create_page(content, title, path, wikijs_url, wikijs_token, debug_logger=None, external_url=None,
+                clean_markdown_content_fn=None):
+    """
+    Creates a Wiki.js page at an already resolved path
+
+    Returns:
+        tuple: (success, wiki_url)
+    """
+    log_debug = debug_logger or default_log_debug
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    title_without_extension = title
 
     # Clean the Markdown content of typical conversion artifacts
-    cleaned_content = clean_markdown_content_fn(content)
+    cleaned_content = clean_markdown_content_fn(content) if clean_markdown_content_fn else content
     log_debug(f"Markdown-Inhalt bereinigt. {len(content) - len(cleaned_content)} Zeichen entfernt.", "info")
 
     log_debug(f"Starte Upload zu Wiki.js: {title_without_extension}", "api")
@@ -518,11 +1029,7 @@ def upload_content(content, title, session_id, wikijs_url, wikijs_token, custom_
         log_debug(f"Sende Wiki.js Request an: {wikijs_url}/graphql", "api")
 
         # POST with json payload for the mutation
-        response = requests.post(
-            f'{wikijs_url}/graphql',
-            headers=headers,
-            json=request_payload
-        )
+        response = graphql_request(wikijs_url, headers, request_payload, 'pages.create')
 
         log_debug(f"Status Code: {response.status_code}", "api")
 
@@ -555,6 +1062,12 @@ def upload_content(content, title, session_id, wikijs_url, wikijs_token, custom_
             # Construct full Wiki.js URL to the page using external URL instead of API URL
             wiki_url = f"{external_url}/{actual_path}" if external_url else f"{wikijs_url}/{actual_path}"
             log_debug(f"Wiki.js Seite erfolgreich erstellt: {wiki_url} (ID: {page_id})", "success")
+
+            if _similarity is not None and actual_path:
+                try:
+                    _similarity.add(actual_path, cleaned_content, title_without_extension)
+                except Exception as e:
+                    log_debug(f"Ähnlichkeitsindex konnte nicht aktualisiert werden: {e}", "warning")
             return True, wiki_url
         else:
             error_message = result.get('message', 'Unbekannter Fehler')
@@ -567,3 +1080,39 @@ def upload_content(content, title, session_id, wikijs_url, wikijs_token, custom_
         log_debug(f"Exception Details: {type(e).__name__}", "error")
         log_debug(f"Traceback: {traceback.format_exc()}", "error")
         return False, None
+
+def upload_pages(pages, wikijs_url, wikijs_token, debug_logger=None, external_url=None,
+                 clean_markdown_content_fn=None, max_workers=4):
+    """
+    Creates several pages in parallel, e.g. the parts of a split document
+
+    Args:
+        pages: List of dicts with path, title and content; the first one is the index page
+
+    Returns:
+        tuple: (all succeeded, URL of the first page, list of (page, success, wiki_url))
+    """
+    log_debug = debug_logger or default_log_debug
+
+    if not wikijs_url or not wikijs_token:
+        log_debug("Wiki.js URL oder Token nicht konfiguriert", "error")
+        return False, None, []
+
+    def create(page):
+        return create_page(page['content'], page['title'], page['path'], wikijs_url, wikijs_token,
+                           debug_logger=log_debug, external_url=external_url,
+                           clean_markdown_content_fn=clean_markdown_content_fn)
+
+    # The adaptive limiter decides how many of these threads actually send at the same time
+    log_debug(f"Lade {len(pages)} Seiten mit bis zu {max_workers} parallelen Anfragen hoch "
+              f"(aktuelles Wiki.js-Limit: {request_limiter.stats()['limit']})", "api")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        outcomes = list(executor.map(create, pages))
+
+    results = [(page, success, wiki_url) for page, (success, wiki_url) in zip(pages, outcomes)]
+    failed = [page['path'] for page, success, _ in results if not success]
+    if failed:
+        log_debug(f"{len(failed)} von {len(pages)} Seiten konnten nicht erstellt werden: {', '.join(failed)}", "error")
+
+    first_url = results[0][2] if results else None
+    return not failed, first_url, results
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DocFlow - Markdown Converter for Wiki.js
+Created by: Joachim Mild
+Copyright (c) 2025 TresorHaus GmbH
+
+Conversion worker for the distributed mode
+
+Claims conversion and export jobs from the shared queue configured with
+QUEUE_URL and runs them with the same code as the web application. Any
+number of workers can run on any number of hosts; they only need the
+queue backend, Pandoc and the Wiki.js connection.
+
+Start:  python worker.py [--threads 2]
+Stop:   SIGTERM or Ctrl+C; running jobs are finished first
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+import app
+import job_queue
+
+HANDLERS = {
+    'convert': app.run_convert_job,
+    'export': app.run_export_job,
+}
+
+# Interval of the maintenance loop (heartbeats, stale jobs, expired sessions)
+MAINTENANCE_INTERVAL = 15
+CLEANUP_INTERVAL = 3600
+
+def work(backend, worker_id, running, stop_event):
+    """Claims and runs jobs until stop_event is set"""
+    while not stop_event.is_set():
+        job = backend.claim(worker_id, timeout=5)
+        if job is None:
+            continue
+
+        handler = HANDLERS.get(job['kind'])
+        app.log_debug(f"{worker_id}: Job {job['id']} ({job['kind']}, Versuch {job['attempts']}) gestartet")
+        running.add(job['id'])
+        started = time.monotonic()
+        try:
+            if handler is None:
+                raise ValueError(f"Unbekannter Jobtyp: {job['kind']}")
+            result = handler(job['payload'])
+            backend.finish(job['id'], result=result)
+            app.log_debug(f"{worker_id}: Job {job['id']} nach {time.monotonic() - started:.1f}s abgeschlossen",
+                          "success")
+        except Exception as e:
+            backend.finish(job['id'], error=str(e))
+            app.log_debug(f"{worker_id}: Job {job['id']} fehlgeschlagen: {e}", "error")
+        finally:
+            running.discard(job['id'])
+
+def maintain(backend, running, stop_event, lease_seconds):
+    """Sends heartbeats for running jobs and requeues jobs of workers that stopped"""
+    last_cleanup = 0
+    while not stop_event.wait(MAINTENANCE_INTERVAL):
+        try:
+            for job_id in list(running):
+                backend.heartbeat(job_id)
+            requeued = backend.requeue_stale(lease_seconds)
+            if requeued:
+                app.log_debug(f"{requeued} Job(s) eines nicht mehr erreichbaren Workers erneut eingestellt", "warning")
+            if time.monotonic() - last_cleanup > CLEANUP_INTERVAL:
+                backend.cleanup()
+                last_cleanup = time.monotonic()
+        except Exception as e:
+            app.log_debug(f"Wartung der Warteschlange fehlgeschlagen: {e}", "error")
+
+def main():
+    parser = argparse.ArgumentParser(description="DocFlow conversion worker")
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WORKER_THREADS', 2)),
+                        help="Jobs processed in parallel by this process")
+    parser.add_argument('--lease', type=int, default=int(os.getenv('JOB_LEASE_SECONDS', job_queue.DEFAULT_LEASE_SECONDS)),
+                        help="Seconds without heartbeat after which a job is given to another worker")
+    args = parser.parse_args()
+
+    if app.job_backend is None:
+        print("QUEUE_URL ist nicht gesetzt, der Worker hat keine Warteschlange", file=sys.stderr)
+        return 1
+
+    # A worker only claims as many jobs as it has threads, so its local scheduler never sheds load
+    app.conversion_scheduler.max_queued = 0
+
+    stop_event = threading.Event()
+    running = set()
+
+    def stop(signum, frame):
+        app.log_debug("Worker wird beendet, laufende Jobs werden abgeschlossen", "warning")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    worker_name = f"{socket.gethostname()}-{os.getpid()}"
+    threads = [
+        threading.Thread(target=work, args=(app.job_backend, f"{worker_name}-{i}", running, stop_event),
+                         name=f"worker-{i}")
+        for i in range(max(1, args.threads))
+    ]
+    threads.append(threading.Thread(target=maintain, args=(app.job_backend, running, stop_event, args.lease),
+                                    name='worker-maintenance'))
+    for thread in threads:
+        thread.start()
+
+    app.log_debug(f"Worker {worker_name} gestartet ({args.threads} Threads, {type(app.job_backend).__name__})", "info")
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+    app.log_debug(f"Worker {worker_name} beendet", "info")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())